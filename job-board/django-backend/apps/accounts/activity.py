@@ -0,0 +1,167 @@
+"""
+Buffered last-login / last-seen tracking.
+
+Logins and authenticated requests only write to two Redis hashes
+(user id -> epoch seconds). flush_activity, run periodically by
+apps.accounts.tasks.flush_user_activity, copies them to accounts_customuser
+with one UPDATE ... FROM (VALUES ...) per chunk, so a busy user costs one row
+write per flush instead of one per login. Readers merge the buffer with
+merge_buffered_activity to see values that have not been flushed yet.
+
+Recording and reading never fail the request: if Redis is unavailable new
+timestamps are logged and lost, and readers see the stored ones.
+"""
+import datetime
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+LAST_LOGIN_KEY = 'activity:last_login'
+LAST_SEEN_KEY = 'activity:last_seen'
+FIELDS = {'last_login': LAST_LOGIN_KEY, 'last_seen': LAST_SEEN_KEY}
+
+# user id -> when this process last buffered a last-seen for it
+_recently_seen = {}
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _from_epoch(value):
+    return datetime.datetime.fromtimestamp(float(value), tz=datetime.timezone.utc) if value else None
+
+
+def record_login(user_id, when=None):
+    """Buffers a login, which also counts as being seen."""
+    when = when or time.time()
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        pipe.hset(LAST_LOGIN_KEY, str(user_id), when)
+        pipe.hset(LAST_SEEN_KEY, str(user_id), when)
+        pipe.execute()
+    except Exception:
+        # A login is not refused for want of its timestamp
+        logger.warning('Could not buffer the login of user %s', user_id)
+        return
+    _recently_seen[str(user_id)] = when
+
+
+def record_seen(user_id, when=None):
+    """
+    Buffers a last-seen timestamp. Each process writes at most one per user
+    every ACTIVITY_SEEN_RESOLUTION seconds, so most requests cost nothing.
+    """
+    user_id = str(user_id)
+    when = when or time.time()
+    if when - _recently_seen.get(user_id, 0) < settings.ACTIVITY_SEEN_RESOLUTION:
+        return
+    if len(_recently_seen) >= settings.ACTIVITY_SEEN_MEMORY:
+        _recently_seen.clear()
+    _recently_seen[user_id] = when
+    try:
+        _redis().hset(LAST_SEEN_KEY, user_id, when)
+    except Exception:
+        # Not retried before the resolution has passed again, so a Redis outage costs one attempt per user
+        logger.warning('Could not buffer the last-seen time of user %s', user_id)
+
+
+def buffered_activity(user_ids):
+    """Unflushed timestamps as {user id: {'last_login': datetime, 'last_seen': datetime}}, in one round trip."""
+    user_ids = [str(user_id) for user_id in user_ids]
+    if not user_ids:
+        return {}
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for key in FIELDS.values():
+            pipe.hmget(key, user_ids)
+        logins, seen = pipe.execute()
+    except Exception:
+        logger.warning('Activity buffer unavailable, showing stored timestamps only')
+        return {}
+    return {
+        user_id: {'last_login': _from_epoch(login), 'last_seen': _from_epoch(last_seen)}
+        for user_id, login, last_seen in zip(user_ids, logins, seen)
+        if login or last_seen
+    }
+
+
+def merge_buffered_activity(users):
+    """Overlays the buffered timestamps on `users` where they are newer than the stored ones."""
+    buffered = buffered_activity([user.pk for user in users])
+    for user in users:
+        for field, value in buffered.get(str(user.pk), {}).items():
+            if value and (getattr(user, field) is None or value > getattr(user, field)):
+                setattr(user, field, value)
+    return users
+
+
+def _take_buffer():
+    """Atomically empties both hashes and returns {user id: [last_login, last_seen]} as epoch strings."""
+    pipe = _redis().pipeline(transaction=True)
+    for key in FIELDS.values():
+        pipe.hgetall(key)
+    pipe.delete(*FIELDS.values())
+    logins, seen, _ = pipe.execute()
+    rows = {}
+    for index, values in enumerate((logins, seen)):
+        for user_id, value in values.items():
+            rows.setdefault(user_id.decode(), [None, None])[index] = value.decode()
+    return rows
+
+
+def _restore_buffer(rows):
+    # HSETNX: anything recorded since the buffer was taken is newer
+    pipe = _redis().pipeline(transaction=False)
+    for user_id, values in rows.items():
+        for key, value in zip(FIELDS.values(), values):
+            if value is not None:
+                pipe.hsetnx(key, user_id, value)
+    pipe.execute()
+
+
+def _update_chunk(rows):
+    table = connection.ops.quote_name(CustomUser._meta.db_table)
+    values = ', '.join(['(%s::uuid, to_timestamp(%s::float8), to_timestamp(%s::float8))'] * len(rows))
+    params = [value for user_id, (login, seen) in rows for value in (user_id, login, seen)]
+    with connection.cursor() as cursor:
+        # GREATEST ignores NULLs, and never moves a timestamp backwards
+        cursor.execute(
+            f"UPDATE {table} AS u "
+            f"SET last_login = GREATEST(u.last_login, v.last_login), "
+            f"last_seen = GREATEST(u.last_seen, v.last_seen) "
+            f"FROM (VALUES {values}) AS v (id, last_login, last_seen) "
+            f"WHERE u.id = v.id",
+            params,
+        )
+        return cursor.rowcount
+
+
+def flush_activity():
+    """
+    Writes the buffered timestamps to the user table and returns the number
+    of users updated. If the write fails the buffer is put back.
+    """
+    rows = _take_buffer()
+    if not rows:
+        return 0
+    # Sorted so concurrent flushes lock rows in the same order
+    items = sorted(rows.items())
+    chunk_size = settings.ACTIVITY_FLUSH_CHUNK_SIZE
+    updated = 0
+    try:
+        with transaction.atomic():
+            for start in range(0, len(items), chunk_size):
+                updated += _update_chunk(items[start:start + chunk_size])
+    except Exception:
+        _restore_buffer(rows)
+        logger.exception('Activity flush failed, %d users requeued', len(rows))
+        raise
+    return updated
@@ -1,3 +1,107 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.auth.models import Permission
 
-# Register your models here.
+from apps.core.pagination import EstimatedCountPaginator
+
+from .bulk import start_user_changes
+from .models import CustomUser, Profile
+
+
+def _run_bulk_action(modeladmin, request, queryset, description, **changes):
+    """
+    Applies `changes` with set-based updates instead of saving each user.
+    Selections above BULK_USER_SYNC_LIMIT continue in the background, which
+    is handed the selection's query rather than every id it matches.
+    """
+    updated, progress = start_user_changes(queryset, requested_by=request.user.pk, **changes)
+    if progress is None:
+        modeladmin.message_user(request, f"{description}: {updated} user(s) updated.", messages.SUCCESS)
+    else:
+        modeladmin.message_user(
+            request,
+            f"{description}: {progress.get()['total']} users queued as job {progress.job_id}. "
+            f"Progress: /api/accounts/users/bulk-update/{progress.job_id}/",
+            messages.INFO,
+        )
+
+
+@admin.action(description="Deactivate selected users", permissions=['change'])
+def deactivate_users(modeladmin, request, queryset):
+    _run_bulk_action(modeladmin, request, queryset, "Deactivate", is_active=False)
+
+
+@admin.action(description="Reactivate selected users", permissions=['change'])
+def reactivate_users(modeladmin, request, queryset):
+    _run_bulk_action(modeladmin, request, queryset, "Reactivate", is_active=True)
+
+
+@admin.action(description="Mark selected users as recruiters", permissions=['change'])
+def make_recruiters(modeladmin, request, queryset):
+    _run_bulk_action(modeladmin, request, queryset, "Mark as recruiter", user_type='recruiter')
+
+
+@admin.action(description="Mark selected users as job seekers", permissions=['change'])
+def make_job_seekers(modeladmin, request, queryset):
+    _run_bulk_action(modeladmin, request, queryset, "Mark as job seeker", user_type='job_seeker')
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables with millions of rows: estimated counts
+    instead of COUNT(*), and no second count for the unfiltered total.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class ProfileInline(admin.StackedInline):
+    model = Profile
+    can_delete = False
+    fields = ('first_name', 'last_name', 'user_type', 'phone_number', 'company_name', 'position')
+
+
+@admin.register(CustomUser)
+class CustomUserAdmin(LargeTableAdmin):
+    list_display = ('email', 'full_name', 'user_type', 'is_active', 'is_staff', 'date_joined', 'last_login', 'last_seen')
+    list_select_related = ('profile',)
+    list_filter = ('is_active', 'is_staff')
+    # Prefix search only: backed by accounts_user_email_prefix_idx
+    search_fields = ('^email',)
+    search_help_text = "Search by the start of the email address."
+    readonly_fields = ('date_joined', 'last_login', 'last_seen')
+    fieldsets = (
+        (None, {'fields': ('email',)}),
+        ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
+        ('Important dates', {'fields': ('date_joined', 'last_login', 'last_seen')}),
+    )
+    autocomplete_fields = ('groups', 'user_permissions')
+    inlines = [ProfileInline]
+    actions = [deactivate_users, reactivate_users, make_recruiters, make_job_seekers]
+
+    @admin.display(description='Name', ordering='profile__last_name')
+    def full_name(self, obj):
+        return obj.profile.full_name if hasattr(obj, 'profile') else ''
+
+    @admin.display(description='Type', ordering='profile__user_type')
+    def user_type(self, obj):
+        return obj.profile.get_user_type_display() if hasattr(obj, 'profile') else ''
+
+
+@admin.register(Profile)
+class ProfileAdmin(LargeTableAdmin):
+    list_display = ('user', 'full_name', 'user_type', 'company_name', 'updated_at')
+    list_select_related = ('user',)
+    list_filter = ('user_type',)
+    search_fields = ('^user__email',)
+    search_help_text = "Search by the start of the user's email address."
+    autocomplete_fields = ('user',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(Permission)
+class PermissionAdmin(admin.ModelAdmin):
+    """Registered so permissions can be picked with an autocomplete widget."""
+    list_display = ('name', 'codename', 'content_type')
+    list_select_related = ('content_type',)
+    search_fields = ('name', 'codename')
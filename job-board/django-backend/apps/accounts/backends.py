@@ -0,0 +1,98 @@
+"""
+Authentication backend with each user's effective permissions cached in Redis.
+
+DjangoModelPermissions checks request.user.has_perms(), which ModelBackend
+answers by joining the user and group permission tables, once per request.
+CachedPermissionBackend keeps the resulting set in the cache, tagged with
+the version tokens it was computed under: one for the user (their groups and
+permissions) and one shared by everyone (what groups grant, and the
+permissions themselves). The set and both tokens are read in one MGET, and a
+set whose tags no longer match is computed again.
+
+Changes replace the tokens once their transaction commits (forget_users(),
+forget_all(), called from apps/accounts/signals.py), so a set computed from
+the old rows, even one written after the change, is never used again.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'auth:perms:'
+USER_VERSION_PREFIX = 'auth:perms:version:'
+SHARED_VERSION_KEY = 'auth:perms:version'
+
+
+def _perms_key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def _version_key(user_id):
+    return f'{USER_VERSION_PREFIX}{user_id}'
+
+
+def _version_timeout():
+    # Outlives every set tagged with the previous token, which would match again once it expired
+    return settings.PERMISSION_CACHE_SECONDS * 2
+
+
+def forget_users(user_ids):
+    """Invalidates the cached permissions of these users when the transaction commits."""
+    keys = [_version_key(pk) for pk in user_ids]
+    if keys:
+        transaction.on_commit(lambda: _replace({key: uuid.uuid4().hex for key in keys}, _version_timeout()))
+
+
+def forget_all():
+    """Invalidates every cached permission set when the transaction commits."""
+    transaction.on_commit(lambda: _replace({SHARED_VERSION_KEY: uuid.uuid4().hex}, None))
+
+
+def _replace(tokens, timeout):
+    try:
+        cache.set_many(tokens, timeout)
+    except Exception:
+        logger.exception('Could not invalidate cached permissions')
+
+
+def cached_permissions(user_obj, compute):
+    """
+    The user's permission set from the cache, or from `compute()`, cached
+    for PERMISSION_CACHE_SECONDS. One cache round trip when cached.
+    """
+    perms_key, version_key = _perms_key(user_obj.pk), _version_key(user_obj.pk)
+    try:
+        found = cache.get_many([perms_key, version_key, SHARED_VERSION_KEY])
+    except Exception:
+        logger.warning('Permission cache unavailable, reading permissions from the database')
+        return compute()
+    # Superusers hold every permission, so the flag is part of the tag
+    tag = (found.get(version_key), found.get(SHARED_VERSION_KEY), user_obj.is_superuser)
+    cached = found.get(perms_key)
+    if cached is not None and cached[0] == tag:
+        return set(cached[1])
+    perms = compute()
+    try:
+        cache.set(perms_key, (tag, frozenset(perms)), settings.PERMISSION_CACHE_SECONDS)
+    except Exception:
+        logger.warning('Could not cache the permissions of user %s', user_obj.pk)
+    return perms
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ModelBackend reading each user's effective permissions through the cache."""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        # Still kept on the user object too, so later checks in the request skip the cache
+        if not hasattr(user_obj, '_perm_cache'):
+            user_obj._perm_cache = cached_permissions(
+                user_obj, lambda: super(CachedPermissionBackend, self).get_all_permissions(user_obj),
+            )
+        return user_obj._perm_cache
@@ -0,0 +1,150 @@
+"""
+Refresh token blacklist in Redis.
+
+A blacklisted token is one key per jti that expires with the token, so the
+blacklist never holds more than one refresh lifetime of rotations and needs
+no cleanup. With TOKEN_BLACKLIST_BLOOM, lookups first go through a Bloom
+filter; the exact key is only read when the filter says the jti may be there.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+
+KEY_PREFIX = 'auth:blacklist:'
+BLOOM_PREFIX = 'auth:blacklist:bloom:'
+BLOOM_SINCE_KEY = 'auth:blacklist:bloom-since'
+LEGACY_TABLES = ('token_blacklist_blacklistedtoken', 'token_blacklist_outstandingtoken')
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def _ttl(exp):
+    return max(1, int(exp - time.time()) + 1)
+
+
+class BloomFilter:
+    """
+    Bloom filter over Redis bitmaps, one per refresh-lifetime window of
+    expiry times. A token is filed under the window its `exp` falls in, so
+    whole windows expire together and nothing has to be removed.
+
+    The filter only answers for tokens issued after it started being filled
+    (BLOOM_SINCE_KEY): older tokens may have been blacklisted without it.
+    """
+    def __init__(self, capacity, error_rate, window):
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.window = window
+        self._since = None
+        self._marked = False
+
+    def _key(self, exp):
+        return f'{BLOOM_PREFIX}{int(exp) // self.window}'
+
+    def _offsets(self, jti):
+        # Double hashing (Kirsch-Mitzenmacher) from one digest
+        digest = hashlib.blake2b(jti.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def covers(self, exp):
+        """Whether every blacklisting of a token expiring at `exp` went through the filter."""
+        if self._since is None:
+            since = _redis().get(BLOOM_SINCE_KEY)
+            if since is None:
+                return False
+            self._since = float(since)
+        return self._since <= exp - self.window
+
+    def add(self, pipe, jti, exp):
+        if not self._marked:
+            pipe.set(BLOOM_SINCE_KEY, time.time(), nx=True)
+            self._marked = True
+        key = self._key(exp)
+        for offset in self._offsets(jti):
+            pipe.setbit(key, offset, 1)
+        pipe.expireat(key, (int(exp) // self.window + 1) * self.window + 60)
+
+    def might_contain(self, jti, exp):
+        pipe = _redis().pipeline(transaction=False)
+        key = self._key(exp)
+        for offset in self._offsets(jti):
+            pipe.getbit(key, offset)
+        return all(pipe.execute())
+
+
+_bloom = None
+
+
+def get_bloom():
+    global _bloom
+    if not settings.TOKEN_BLACKLIST_BLOOM:
+        return None
+    if _bloom is None:
+        _bloom = BloomFilter(
+            settings.TOKEN_BLACKLIST_BLOOM_CAPACITY,
+            settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE,
+            int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds()),
+        )
+    return _bloom
+
+
+def add(jti, exp):
+    """
+    Blacklists a token until it expires. Returns False if it already was,
+    which lets two concurrent refreshes of one token detect each other.
+    """
+    pipe = _redis().pipeline(transaction=False)
+    bloom = get_bloom()
+    if bloom is not None:
+        bloom.add(pipe, jti, exp)
+    pipe.set(KEY_PREFIX + jti, 1, ex=_ttl(exp), nx=True)
+    return bool(pipe.execute()[-1])
+
+
+def add_many(tokens):
+    """Blacklists (jti, exp) pairs in one round trip."""
+    pipe = _redis().pipeline(transaction=False)
+    bloom = get_bloom()
+    for jti, exp in tokens:
+        pipe.set(KEY_PREFIX + jti, 1, ex=_ttl(exp), nx=True)
+        if bloom is not None:
+            bloom.add(pipe, jti, exp)
+    pipe.execute()
+
+
+def contains(jti, exp):
+    bloom = get_bloom()
+    if bloom is not None and bloom.covers(exp) and not bloom.might_contain(jti, exp):
+        return False
+    return bool(_redis().exists(KEY_PREFIX + jti))
+
+
+def purge_legacy_tables(batch_size=10000):
+    """
+    Deletes expired rows left in the database tables of simplejwt's
+    token_blacklist app, in batches, and returns the number of outstanding
+    tokens removed. Does nothing if those tables do not exist.
+    """
+    if not set(LEGACY_TABLES) <= set(connection.introspection.table_names()):
+        return 0
+    blacklisted, outstanding = LEGACY_TABLES
+    purged = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM {outstanding} WHERE expires_at < now() ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED",
+                [batch_size],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return purged
+            cursor.execute(f"DELETE FROM {blacklisted} WHERE token_id = ANY(%s)", [ids])
+            cursor.execute(f"DELETE FROM {outstanding} WHERE id = ANY(%s)", [ids])
+            purged += len(ids)
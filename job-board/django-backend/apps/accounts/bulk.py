@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, QuerySet
+from django.db.models.sql import Query
+from django.utils import timezone
+
+from apps.core.progress import JobProgress
+
+from .models import CustomUser, Profile
+from .signals import users_bulk_updated
+
+
+# A UUID takes 39 bytes in a JSON list ('"...", '), so no more ids than this fit in a request body
+UUID_JSON_BYTES = 39
+
+
+def max_selection():
+    """The most ids one bulk update request can carry within DATA_UPLOAD_MAX_MEMORY_SIZE."""
+    return settings.DATA_UPLOAD_MAX_MEMORY_SIZE // UUID_JSON_BYTES
+
+
+def _chunks(users, size):
+    """Chunks of user ids (as strings) from a list of ids, or from a queryset read in primary key order."""
+    if not isinstance(users, QuerySet):
+        for start in range(0, len(users), size):
+            yield users[start:start + size]
+        return
+    # Keyset pagination, so users the changes move out of the selection do not shift later chunks
+    ids = users.order_by('pk').values_list('pk', flat=True)
+    chunk = [str(pk) for pk in ids[:size]]
+    while chunk:
+        yield chunk
+        chunk = [str(pk) for pk in ids.filter(pk__gt=chunk[-1])[:size]]
+
+
+def apply_user_changes(users, is_active=None, user_type=None, progress=None):
+    """
+    Applies account changes with one set-based UPDATE per chunk instead of a
+    save() per user, then sends `users_bulk_updated` once per chunk so caches,
+    tokens and the search index are invalidated in batches. `users` is a list
+    of user ids or a CustomUser queryset.
+
+    Per-user post_save signals (e.g. save_user_profile) are deliberately not fired.
+    Returns the number of users updated.
+    """
+    changes = {}
+    if is_active is not None:
+        changes['is_active'] = is_active
+    if user_type is not None:
+        changes['user_type'] = user_type
+    if not changes:
+        return 0
+
+    if not isinstance(users, QuerySet):
+        users = [str(user_id) for user_id in users]
+    updated = processed = 0
+    for chunk in _chunks(users, settings.BULK_USER_CHUNK_SIZE):
+        previous_user_types = {}
+        with transaction.atomic():
+            if is_active is not None:
+                updated += CustomUser.objects.filter(id__in=chunk).exclude(is_active=is_active).update(is_active=is_active)
+            if user_type is not None:
+                profiles = Profile.objects.filter(user_id__in=chunk).exclude(user_type=user_type)
+                previous_user_types = dict(profiles.order_by().values_list('user_type').annotate(Count('pk')))
+                count = profiles.update(user_type=user_type, updated_at=timezone.now())
+                if is_active is None:
+                    updated += count
+            users_bulk_updated.send(sender=CustomUser, user_ids=chunk, changes=changes,
+                                    previous_user_types=previous_user_types)
+        processed += len(chunk)
+        if progress is not None:
+            progress.update(processed)
+    return updated
+
+
+def start_user_changes(users, requested_by=None, **changes):
+    """
+    Runs small selections inline and hands large ones to a Celery task.
+    `users` is a list of user ids or a CustomUser queryset; a queryset is
+    handed over as its query, not as the ids it selects.
+
+    Returns (updated count, None) when done inline, or (None, JobProgress)
+    for a background job whose progress can be polled.
+    """
+    if isinstance(users, QuerySet):
+        total, payload = users.count(), users.query
+    else:
+        users = payload = [str(user_id) for user_id in users]
+        total = len(users)
+    if total <= settings.BULK_USER_SYNC_LIMIT:
+        return apply_user_changes(users, **changes), None
+
+    from .tasks import bulk_update_users
+    progress = JobProgress.create(
+        'bulk_user_update', total=total, payload=payload,
+        changes=changes, requested_by=str(requested_by) if requested_by else None,
+    )
+    bulk_update_users.delay(progress.job_id, changes)
+    return None, progress
+
+
+def load_selection(payload):
+    """The users of a start_user_changes() payload: its list of ids, or a queryset for its query."""
+    if isinstance(payload, Query):
+        users = CustomUser.objects.all()
+        users.query = payload
+        return users
+    return payload
@@ -0,0 +1,53 @@
+from apps.core.exports import Export
+
+from .models import CustomUser, Profile
+
+
+class UserExport(Export):
+    """Every account, for compliance requests and audits."""
+    name = 'users'
+    columns = (
+        ('id', 'id'),
+        ('email', 'email'),
+        ('first_name', 'profile__first_name'),
+        ('last_name', 'profile__last_name'),
+        ('user_type', 'profile__user_type'),
+        ('is_active', 'is_active'),
+        ('is_staff', 'is_staff'),
+        ('date_joined', 'date_joined'),
+        ('last_login', 'last_login'),
+        ('last_seen', 'last_seen'),
+    )
+
+    def get_queryset(self):
+        return CustomUser.objects.all()
+
+
+class ProfileExport(Export):
+    """Every profile with its user's email; `user_type` selects job seekers or recruiters."""
+    name = 'profiles'
+    columns = (
+        ('user_id', 'user_id'),
+        ('email', 'user__email'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+        ('phone_number', 'phone_number'),
+        ('user_type', 'user_type'),
+        ('location', 'location'),
+        ('skills', 'skills'),
+        ('experience', 'experience'),
+        ('education', 'education'),
+        ('resume', 'resume'),
+        ('company_name', 'company_name'),
+        ('company_website', 'company_website'),
+        ('position', 'position'),
+        ('linkedin_profile', 'linkedin_profile'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
+
+    def get_queryset(self):
+        profiles = Profile.objects.all()
+        if self.params.get('user_type'):
+            profiles = profiles.filter(user_type=self.params['user_type'])
+        return profiles
@@ -0,0 +1,101 @@
+"""
+Resume file parsing, kept free of models so it can run on its own.
+
+apps/accounts/resumes.py parses a single file in process; batches run
+`python -m apps.accounts.extraction` once per file instead. It reads the
+file on stdin, the RESUME_* limits as JSON in its argument, and writes
+{"text", "error"} as JSON on stdout.
+"""
+import io
+import json
+import re
+import sys
+import zipfile
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+# Characters Postgres cannot store in text, and runs of blank space
+_CONTROL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_BLANKS = re.compile(r'[ \t\xa0]+')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+LIMITS = ('RESUME_MAX_BYTES', 'RESUME_MAX_PAGES', 'RESUME_MAX_CHARS')
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class ExtractionTimeout(ExtractionError):
+    pass
+
+
+def extract_text(data):
+    """The text of a PDF or DOCX file's bytes; raises ExtractionError."""
+    if not data:
+        raise ExtractionError('Empty or unreadable file')
+    if len(data) > settings.RESUME_MAX_BYTES:
+        raise ExtractionError(f'File larger than {settings.RESUME_MAX_BYTES} bytes')
+    if data.startswith(b'%PDF'):
+        text = _pdf_text(data)
+    elif data.startswith(b'PK'):
+        text = _docx_text(data)
+    else:
+        raise ExtractionError('Not a PDF or DOCX file')
+    text = _CONTROL.sub('', text)
+    text = _BLANK_LINES.sub('\n\n', _BLANKS.sub(' ', text))
+    return text.strip()[:settings.RESUME_MAX_CHARS]
+
+
+def _docx_text(data):
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            # A small archive can inflate to a huge document
+            if archive.getinfo('word/document.xml').file_size > settings.RESUME_MAX_BYTES * 10:
+                raise ExtractionError('Document too large once decompressed')
+            paragraphs, runs = [], []
+            with archive.open('word/document.xml') as document:
+                for _, element in ElementTree.iterparse(document):
+                    tag = element.tag.rpartition('}')[2]
+                    if tag == 't':
+                        runs.append(element.text or '')
+                    elif tag == 'tab':
+                        runs.append('\t')
+                    elif tag in ('br', 'cr'):
+                        runs.append('\n')
+                    elif tag == 'p':
+                        paragraphs.append(''.join(runs))
+                        runs = []
+                        element.clear()
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as exc:
+        raise ExtractionError(f'Not a readable DOCX file: {exc}') from None
+    return '\n'.join(paragraphs)
+
+
+def _pdf_text(data):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ExtractionError('PDF extraction needs pypdf') from None
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        pages = [page.extract_text() or '' for page in reader.pages[:settings.RESUME_MAX_PAGES]]
+    except ExtractionError:
+        raise
+    except Exception as exc:
+        # pypdf raises a variety of errors on malformed files
+        raise ExtractionError(f'Not a readable PDF file: {exc.__class__.__name__}: {exc}') from None
+    return '\n\n'.join(pages)
+
+
+def main():
+    settings.configure(**json.loads(sys.argv[1]))
+    try:
+        result = {'text': extract_text(sys.stdin.buffer.read()), 'error': ''}
+    except ExtractionError as exc:
+        result = {'text': '', 'error': str(exc)}
+    json.dump(result, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts import blacklist
+from apps.accounts.tokens import RevocationAwareTokenRefreshSerializer
+from apps.core.benchmarking import summarize, write_results
+
+FILL_BATCH = 1000
+# Synthetic entries are recognisable so they can be removed afterwards
+JTI_PREFIX = 'bench'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark refresh-token rotation and blacklist lookups while the Redis blacklist "
+        "grows, with and without the Bloom filter. Run it against a disposable Redis: "
+        "synthetic entries are removed afterwards, but their Bloom filter bits are not"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='0,100000,1000000,10000000',
+                            help='Comma-separated blacklist sizes to measure at')
+        parser.add_argument('--refreshes', type=int, default=2000, help='Refreshes to time at each size')
+        parser.add_argument('--bloom', choices=['off', 'on', 'both'], default='both')
+        parser.add_argument('--keep', action='store_true', help='Leave the synthetic entries in Redis')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        if options['refreshes'] < 1:
+            raise CommandError('--refreshes must be positive')
+        modes = {'off': [False], 'on': [True], 'both': [False, True]}[options['bloom']]
+
+        scenarios = {}
+        for bloom in modes:
+            with override_settings(TOKEN_BLACKLIST_BLOOM=bloom):
+                blacklist._bloom = None
+                self._clear()
+                filled = 0
+                for size in sizes:
+                    self._fill(size - filled)
+                    filled = size
+                    label = f"{'bloom' if bloom else 'exact'}@{size}"
+                    for name, summary in self._measure(options['refreshes']).items():
+                        scenarios[f'{name}:{label}'] = summary
+                        self.stdout.write(
+                            f"{name:9} {label:16} p50 {summary['latency_ms']['p50']:7.3f}ms  "
+                            f"p99 {summary['latency_ms']['p99']:7.3f}ms  {summary['throughput']:9.0f}/s"
+                        )
+                    self.stdout.write(f"{'':9} {label:16} redis memory {self._memory_mb():.0f} MiB")
+            if not options['keep']:
+                self._clear()
+        blacklist._bloom = None
+
+        if options['output']:
+            write_results(options['output'], scenarios, sizes=sizes, refreshes=options['refreshes'])
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _fill(self, count):
+        """Blacklists `count` synthetic tokens with expiries spread over one refresh lifetime."""
+        lifetime = settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds()
+        now = time.time()
+        started = time.perf_counter()
+        for offset in range(0, count, FILL_BATCH):
+            batch = min(FILL_BATCH, count - offset)
+            blacklist.add_many(
+                (JTI_PREFIX + uuid.uuid4().hex, now + 60 + (offset + i) % lifetime) for i in range(batch)
+            )
+        if count:
+            self.stdout.write(f"Blacklisted {count} tokens in {time.perf_counter() - started:.1f}s")
+
+    def _measure(self, count):
+        """Times blacklist lookups of live tokens and full rotations through the refresh serializer."""
+        tokens = [RefreshToken() for _ in range(count)]
+        for token in tokens:
+            token[api_settings.JTI_CLAIM] = JTI_PREFIX + uuid.uuid4().hex
+            token[api_settings.USER_ID_CLAIM] = str(uuid.UUID(int=0))
+
+        lookups = []
+        started = time.perf_counter()
+        for token in tokens:
+            t0 = time.perf_counter()
+            blacklist.contains(token['jti'], token['exp'])
+            lookups.append((time.perf_counter() - t0) * 1000)
+        lookup_seconds = time.perf_counter() - started
+
+        refreshes, errors = [], 0
+        started = time.perf_counter()
+        for token in tokens:
+            t0 = time.perf_counter()
+            serializer = RevocationAwareTokenRefreshSerializer(data={'refresh': str(token)})
+            try:
+                serializer.is_valid(raise_exception=True)
+            except Exception:
+                errors += 1
+            refreshes.append((time.perf_counter() - t0) * 1000)
+        refresh_seconds = time.perf_counter() - started
+        return {
+            'lookup': summarize(lookups, lookup_seconds),
+            'refresh': summarize(refreshes, refresh_seconds, errors=errors),
+        }
+
+    def _clear(self):
+        redis = blacklist._redis()
+        keys = []
+        for key in redis.scan_iter(match=f'{blacklist.KEY_PREFIX}{JTI_PREFIX}*', count=FILL_BATCH):
+            keys.append(key)
+            if len(keys) >= FILL_BATCH:
+                redis.unlink(*keys)
+                keys = []
+        if keys:
+            redis.unlink(*keys)
+
+    def _memory_mb(self):
+        try:
+            return blacklist._redis().info('memory')['used_memory'] / 2 ** 20
+        except Exception:
+            return 0.0
@@ -0,0 +1,46 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts import resumes
+from apps.accounts.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract the text of resumes that have none yet (apps/accounts/resumes.py), e.g. after "
+        "a bulk load or when setting up candidate search. Files already seen are linked "
+        "without being parsed again"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Every profile with a resume, not only those without text')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Parse again the files that failed before, e.g. once pypdf is installed')
+        parser.add_argument('--workers', type=int, default=settings.RESUME_EXTRACTION_WORKERS,
+                            help='Processes parsing files')
+        parser.add_argument('--batch', type=int, default=settings.RESUME_EXTRACTION_BATCH,
+                            help='Profiles read per batch')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch'] < 1:
+            raise CommandError('--workers and --batch must be positive')
+        if options['all'] or options['retry_failed']:
+            profiles = Profile.objects.exclude(resume='').exclude(resume__isnull=True)
+        else:
+            profiles = resumes.pending_profiles()
+        profile_ids = list(profiles.order_by('pk').values_list('pk', flat=True))
+
+        started, report = time.perf_counter(), Counter()
+        for start in range(0, len(profile_ids), options['batch']):
+            batch = profile_ids[start:start + options['batch']]
+            report.update(resumes.extract_resumes(batch, options['workers'], retry_failed=options['retry_failed']))
+            self.stdout.write(f"{min(start + options['batch'], len(profile_ids))}/{len(profile_ids)} profiles")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['extracted']} files extracted, {report['failed']} failed, {report['reused']} resumes "
+            f"already known, {report['missing']} missing in {elapsed:.1f}s"
+        ))
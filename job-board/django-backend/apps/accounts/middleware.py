@@ -1,7 +1,9 @@
-from ratelimit.decorators import ratelimit
+from django_ratelimit.decorators import ratelimit
 from django.http import JsonResponse
 from functools import wraps
 
+from .activity import record_seen
+
 def rate_limit(key='user_or_ip', rate='5/m', method='ALL'):
     def decorator(view_func):
         @wraps(view_func)
@@ -22,3 +24,19 @@ def rate_limit(key='user_or_ip', rate='5/m', method='ALL'):
             return response
         return _wrapped_view
     return decorator
+
+
+class ActivityMiddleware:
+    """
+    Buffers a last-seen timestamp for authenticated requests. Runs after the
+    view, so users authenticated by DRF (JWT) are seen too.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            record_seen(user.pk)
+        return response
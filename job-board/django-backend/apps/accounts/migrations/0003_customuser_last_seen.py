@@ -0,0 +1,18 @@
+# Generated by Django 4.2.12 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, help_text='Last time the user made an authenticated request.', null=True),
+        ),
+    ]
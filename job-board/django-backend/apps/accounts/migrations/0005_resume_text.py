@@ -0,0 +1,35 @@
+# Generated by Django 4.2.12 on 2026-10-19 14:01
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_geo_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('content_hash', models.CharField(help_text='SHA-256 of the file', max_length=64, primary_key=True, serialize=False)),
+                ('text', models.BinaryField(help_text='zlib-compressed UTF-8 text')),
+                ('characters', models.PositiveIntegerField(default=0)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('error', models.CharField(blank=True, help_text='Why no text could be extracted', max_length=255)),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='accounts_resume_search_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='resume_text',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='accounts.resumetext'),
+        ),
+    ]
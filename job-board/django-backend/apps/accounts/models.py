@@ -1,8 +1,11 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 import uuid
-from django.core.validators import RegexValidator
+from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
 from django.conf import settings
 
 # Custom User Manager to handle user creation
@@ -58,6 +61,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     )
     date_joined = models.DateTimeField(default=timezone.now, help_text="Date when the user account was created.")
     last_login = models.DateTimeField(null=True, blank=True, help_text="Last time the user logged in.")
+    # Both timestamps are buffered in Redis and written in bulk (apps/accounts/activity.py)
+    last_seen = models.DateTimeField(null=True, blank=True, help_text="Last time the user made an authenticated request.")
     groups = models.ManyToManyField(
         'auth.Group',
         verbose_name='groups',
@@ -84,6 +89,14 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-date_joined'] 
+        indexes = [
+            models.Index(fields=['-date_joined'], name='accounts_user_joined_idx'),
+            # Backs case-insensitive prefix search (email__istartswith), e.g. in the admin
+            models.Index(
+                OpClass(Upper('email'), name='text_pattern_ops'),
+                name='accounts_user_email_prefix_idx',
+            ),
+        ]
 
     def __str__(self):
         """String representation of the CustomUser."""
@@ -122,6 +135,13 @@ class Profile(models.Model):
     last_name = models.CharField(max_length=150, blank=True)
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     bio = models.TextField(blank=True)
+    location = models.CharField(max_length=255, blank=True, help_text="City the user is based in, e.g. 'Nairobi'")
+    # Geocoded from location unless set explicitly (apps/core/geo.py)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
     profile_picture = models.ImageField(
         upload_to='profile_pics/', 
         blank=True, 
@@ -137,6 +157,11 @@ class Profile(models.Model):
 
     # Fields specific to Job Seekers
     resume = models.FileField(upload_to='resumes/', blank=True, null=True)
+    # Set once the resume's text is extracted (apps/accounts/resumes.py)
+    resume_text = models.ForeignKey(
+        'ResumeText', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='profiles', db_constraint=False,
+    )
     skills = models.TextField(blank=True)
     experience = models.TextField(blank=True)
     education = models.TextField(blank=True)
@@ -155,10 +180,34 @@ class Profile(models.Model):
         verbose_name = 'Profile'
         verbose_name_plural = 'Profiles'
         ordering = ['user__email']
+        indexes = [
+            models.Index(fields=['geohash'], opclasses=['varchar_pattern_ops'], name='accounts_profile_geohash_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email}'s Profile"
 
     @property
     def full_name(self):
-        return f"{self.first_name} {self.last_name}".strip()
\ No newline at end of file
+        return f"{self.first_name} {self.last_name}".strip()
+
+
+class ResumeText(models.Model):
+    """
+    Text extracted from a resume file, stored once per file content and
+    shared by every profile that uploaded it (apps/accounts/resumes.py).
+    """
+    content_hash = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of the file")
+    text = models.BinaryField(help_text="zlib-compressed UTF-8 text")
+    characters = models.PositiveIntegerField(default=0)
+    search_vector = SearchVectorField(null=True)
+    error = models.CharField(max_length=255, blank=True, help_text="Why no text could be extracted")
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='accounts_resume_search_idx'),
+        ]
+
+    def __str__(self):
+        return self.content_hash
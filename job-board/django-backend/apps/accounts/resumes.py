@@ -0,0 +1,226 @@
+"""
+Resume text extraction and full-text candidate search.
+
+When a profile's resume changes, the extract_resume task reads the file
+and hashes it. Text is stored once per file content in ResumeText, keyed
+by the SHA-256 of the file, so a re-upload of a known file (or the same
+file on several profiles) is linked without being parsed again.
+
+Batches of new files are parsed in subprocesses, at most
+RESUME_EXTRACTION_WORKERS at a time, each killed after
+RESUME_EXTRACTION_TIMEOUT seconds: a parser stuck on a malformed file
+fails that file, not the batch, and a crash only takes its process down.
+They are plain subprocesses (apps/accounts/extraction.py) because Celery's
+prefork workers are daemonic, and daemonic processes cannot start a
+multiprocessing pool. A single file is parsed in process, under an alarm.
+DOCX is read with the standard library, PDF with pypdf.
+
+The text is stored zlib-compressed next to its tsvector, which has a GIN
+index. search() ranks profiles on it; the text itself is only unpacked
+for the page of results shown, to cut the snippets.
+"""
+import datetime
+import hashlib
+import html
+import json
+import logging
+import signal
+import subprocess
+import sys
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Value
+from django.utils import timezone
+
+from .extraction import LIMITS, ExtractionError, ExtractionTimeout, extract_text
+from .models import Profile, ResumeText
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout('Timed out')
+
+
+def extract_within(data, timeout):
+    """
+    (text, error) of one file, parsed in this process, giving up after
+    `timeout` seconds. The timeout needs the main thread.
+    """
+    alarm = threading.current_thread() is threading.main_thread()
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_text(data), ''
+    except ExtractionTimeout:
+        return '', f'Timed out after {timeout}s'
+    except ExtractionError as exc:
+        return '', str(exc)
+    except Exception as exc:
+        logger.exception('Resume extraction failed')
+        return '', f'Extraction failed: {exc.__class__.__name__}'
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def extract_in_subprocess(data, timeout):
+    """(text, error) of one file, parsed by a subprocess that is killed after `timeout` seconds."""
+    limits = json.dumps({name: getattr(settings, name) for name in LIMITS})
+    try:
+        result = subprocess.run(
+            [sys.executable, '-m', 'apps.accounts.extraction', limits], input=data, capture_output=True,
+            timeout=timeout, cwd=settings.BASE_DIR,
+        )
+    except subprocess.TimeoutExpired:
+        return '', f'Timed out after {timeout}s'
+    if result.returncode:
+        logger.error('Resume extraction exited with status %s: %s', result.returncode,
+                     result.stderr.decode(errors='replace')[-2000:])
+        return '', f'Extraction failed with exit status {result.returncode}'
+    output = json.loads(result.stdout)
+    return output['text'], output['error']
+
+
+def extract_many(files, workers=None, timeout=None):
+    """
+    Yields (key, text, error) for each (key, data) of `files`, in order.
+    With more than one worker, each file is parsed in its own subprocess.
+    """
+    workers = min(workers or settings.RESUME_EXTRACTION_WORKERS, len(files))
+    timeout = timeout or settings.RESUME_EXTRACTION_TIMEOUT
+    if workers <= 1:
+        for key, data in files:
+            yield key, *extract_within(data, timeout)
+        return
+    # Threads only wait on the subprocesses, so there are at most `workers` of those
+    with ThreadPoolExecutor(workers) as executor:
+        results = executor.map(lambda file: extract_in_subprocess(file[1], timeout), files)
+        for (key, _), (text, error) in zip(files, results):
+            yield key, text, error
+
+
+def store(digest, text, error=''):
+    """Saves the text of the file with this hash, compressed, with its tsvector."""
+    vector = SearchVector(Value(text), config=settings.RESUME_SEARCH_CONFIG) if text else None
+    ResumeText.objects.bulk_create(
+        [ResumeText(content_hash=digest, text=zlib.compress(text.encode()), characters=len(text),
+                    search_vector=vector, error=error[:255])],
+        update_conflicts=True, unique_fields=['content_hash'],
+        update_fields=['text', 'characters', 'search_vector', 'error', 'extracted_at'],
+    )
+
+
+def unpack(data):
+    return zlib.decompress(bytes(data)).decode()
+
+
+def extract_resumes(profile_ids, workers=None, retry_failed=False):
+    """
+    Links the profiles to the text of their resume, extracting the files
+    not seen before (and, with `retry_failed`, those that failed before);
+    returns counts of what was done.
+    """
+    report = Counter()
+    files, links = {}, []
+    profiles = Profile.objects.filter(pk__in=profile_ids).exclude(resume='').exclude(resume__isnull=True)
+    storage = Profile._meta.get_field('resume').storage
+    for pk, name in profiles.values_list('pk', 'resume'):
+        try:
+            with storage.open(name, 'rb') as resume:
+                data = resume.read(settings.RESUME_MAX_BYTES + 1)
+        except OSError:
+            # Linked to the text of an empty file, so the sweep does not try it again and again
+            logger.warning('Resume %s of profile %s could not be read', name, pk)
+            report['missing'] += 1
+            data = b''
+        digest = content_hash(data)
+        files.setdefault(digest, data)
+        links.append((pk, name, digest))
+
+    known = ResumeText.objects.filter(pk__in=files)
+    if retry_failed:
+        known = known.filter(error='')
+    known = set(known.values_list('pk', flat=True))
+    report['reused'] = sum(1 for _, _, digest in links if digest in known)
+    new = [(digest, data) for digest, data in files.items() if digest not in known]
+    for digest, text, error in extract_many(new, workers=workers):
+        store(digest, text, error)
+        report['failed' if error else 'extracted'] += 1
+    for pk, name, digest in links:
+        # Unless the resume was replaced in the meantime
+        Profile.objects.filter(pk=pk, resume=name).update(resume_text=digest)
+    return report
+
+
+def pending_profiles():
+    """Profiles with a resume whose text was never extracted."""
+    return Profile.objects.exclude(resume='').exclude(resume__isnull=True).filter(resume_text__isnull=True)
+
+
+def purge_unused_texts():
+    """Deletes the texts of files no profile uses any more; returns how many."""
+    cutoff = timezone.now() - datetime.timedelta(hours=1)  # not ones being linked right now
+    deleted, _ = ResumeText.objects.filter(profiles__isnull=True, extracted_at__lt=cutoff).delete()
+    return deleted
+
+
+def remember_resume(instance):
+    """post_init and post_save hook: the resume the profile was loaded or saved with."""
+    instance._loaded_resume = str(instance.__dict__.get('resume') or '')
+
+
+def resume_changed(instance):
+    """pre_save hook: forgets the text of a replaced resume; whether it was replaced."""
+    current = str(instance.resume or '')
+    if instance.pk is not None and getattr(instance, '_loaded_resume', None) == current:
+        return False
+    instance.resume_text = None
+    return bool(current)
+
+
+def search(query, queryset=None):
+    """
+    Active job seekers whose resume matches `query` (web search syntax:
+    quoted phrases, `or`, `-word`), best first, annotated with `rank`.
+    """
+    query = SearchQuery(query, search_type='websearch', config=settings.RESUME_SEARCH_CONFIG)
+    if queryset is None:
+        queryset = Profile.objects.filter(user_type='job_seeker', user__is_active=True)
+    # Cover density (ts_rank_cd) rewards matching words close together and, unlike ts_rank,
+    # still ranks queries with an excluded word. Normalization 1 divides by the log of the
+    # length, so long resumes do not win on size alone.
+    rank = SearchRank(F('resume_text__search_vector'), query, cover_density=True, normalization=Value(1))
+    return queryset.filter(resume_text__search_vector=query).annotate(rank=rank).order_by('-rank', 'pk')
+
+
+def snippets(profiles, query):
+    """{profile pk: resume excerpts with the matching words in <mark>} in one query."""
+    digests = {profile.pk: profile.resume_text_id for profile in profiles if profile.resume_text_id}
+    texts = dict(ResumeText.objects.filter(pk__in=set(digests.values())).values_list('pk', 'text'))
+    keys = [pk for pk, digest in digests.items() if digest in texts]
+    if not keys:
+        return {}
+    options = (f'StartSel=<mark>, StopSel=</mark>, MaxWords={settings.RESUME_SNIPPET_WORDS}, '
+               f'MinWords={settings.RESUME_SNIPPET_WORDS // 3}, MaxFragments=3, FragmentDelimiter=" … "')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT ts_headline(%s::regconfig, t, websearch_to_tsquery(%s::regconfig, %s), %s) "
+            "FROM unnest(%s::text[]) WITH ORDINALITY AS v(t, n) ORDER BY n",
+            [settings.RESUME_SEARCH_CONFIG, settings.RESUME_SEARCH_CONFIG, query, options,
+             # Escaped, so only the <mark> tags are markup
+             [html.escape(unpack(texts[digests[pk]])) for pk in keys]],
+        )
+        return {pk: headline for pk, (headline,) in zip(keys, cursor.fetchall())}
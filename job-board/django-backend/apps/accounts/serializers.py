@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from .activity import merge_buffered_activity
+from .bulk import max_selection
 from .models import CustomUser, Profile
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -11,17 +13,50 @@ class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = [
-            'first_name', 'last_name', 'phone_number', 'bio', 
-            'profile_picture', 'user_type', 'resume', 'skills', 
+            'first_name', 'last_name', 'phone_number', 'bio', 'location',
+            'latitude', 'longitude', 'profile_picture', 'user_type', 'resume', 'skills', 
             'experience', 'education', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'user_type'] # user_type is often set once or by admin
 
+    def validate(self, attrs):
+        # Coordinates are geocoded from location unless both are given
+        if ('latitude' in attrs) != ('longitude' in attrs):
+            raise serializers.ValidationError('Set latitude and longitude together.')
+        return attrs
+
+class CandidateSerializer(serializers.ModelSerializer):
+    """
+    A job seeker found by resume search, with the rank of the match and
+    excerpts of the resume (matching words in <mark>) passed in the
+    `snippets` context as {profile pk: snippet}.
+    """
+    user_id = serializers.UUIDField(source='user.id', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Profile
+        fields = ['user_id', 'first_name', 'last_name', 'location', 'skills', 'resume', 'rank', 'snippet']
+        read_only_fields = fields
+
+    def get_snippet(self, profile):
+        return self.context.get('snippets', {}).get(profile.pk, '')
+
+
+class ActivityMergingListSerializer(serializers.ListSerializer):
+    """Merges the buffered activity of a whole page in one Redis round trip."""
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, 'all') else data)
+        merge_buffered_activity(users)
+        return super().to_representation(users)
+
 class CustomUserSerializer(serializers.ModelSerializer):
     """
     Serializer for the CustomUser model.
     Used for user registration, listing, and detail views.
     Includes nested Profile data.
+    last_login / last_seen include buffered values not yet written to the database.
     """
     profile = ProfileSerializer(read_only=True) # Nested serializer for the related profile
     # Using write_only password for security, won't be returned in responses
@@ -31,19 +66,23 @@ class CustomUserSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = [
             'id', 'email', 'password', 'is_active', 'is_staff', 
-            'date_joined', 'last_login', 'profile'
+            'date_joined', 'last_login', 'last_seen', 'profile'
         ]
-        read_only_fields = ['id', 'is_active', 'is_staff', 'date_joined', 'last_login']
+        read_only_fields = ['id', 'is_active', 'is_staff', 'date_joined', 'last_login', 'last_seen']
+        list_serializer_class = ActivityMergingListSerializer
+
+    def to_representation(self, instance):
+        if not isinstance(self.parent, ActivityMergingListSerializer):
+            merge_buffered_activity([instance])
+        return super().to_representation(instance)
 
     def create(self, validated_data):
         """
         Custom create method to handle password hashing and profile creation.
         """
         password = validated_data.pop('password', None)
-        user = CustomUser.objects.create_user(email=validated_data['email'], password=password)
-        # Create an associated profile for the new user
-        Profile.objects.create(user=user)
-        return user
+        # The profile is created by the post_save signal in signals.py
+        return CustomUser.objects.create_user(email=validated_data['email'], password=password)
 
     def update(self, instance, validated_data):
         """
@@ -101,10 +140,30 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             email=validated_data['email'],
             password=validated_data['password']
         )
-        Profile.objects.create(
-            user=user, 
-            user_type=user_type,
-            first_name=first_name,
-            last_name=last_name
-        )
-        return user
\ No newline at end of file
+        # The post_save signal has already created an empty profile; fill it in
+        profile = user.profile
+        profile.user_type = user_type
+        profile.first_name = first_name
+        profile.last_name = last_name
+        profile.save(update_fields=['user_type', 'first_name', 'last_name', 'updated_at'])
+        return user
+
+class BulkUserUpdateSerializer(serializers.Serializer):
+    """
+    Validates a bulk account change: a list of user ids plus the fields to set.
+    """
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+    is_active = serializers.BooleanField(required=False)
+    user_type = serializers.ChoiceField(choices=Profile.USER_TYPE_CHOICES, required=False)
+
+    def validate_ids(self, ids):
+        if len(ids) > max_selection():
+            raise serializers.ValidationError(
+                f"Select at most {max_selection()} users per request; use the admin for larger selections."
+            )
+        return ids
+
+    def validate(self, data):
+        if 'is_active' not in data and 'user_type' not in data:
+            raise serializers.ValidationError("Provide is_active and/or user_type.")
+        return data
@@ -1,6 +1,21 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, update_last_login
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_migrate, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django_rest_passwordreset.signals import reset_password_token_created
+from apps.core import geo
+from apps.core.mail import send_templated_mail
+from . import backends, resumes
+from .activity import record_login
 from .models import CustomUser, Profile
+from .tokens import revoke_user_tokens
+
+# Sent once per chunk by set-based account updates (apps/accounts/bulk.py),
+# which bypass post_save. Arguments: user_ids, changes, previous_user_types
+# ({user_type: count} of the profiles whose type the chunk changed).
+users_bulk_updated = Signal()
 
 @receiver(post_save, sender=CustomUser)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,4 +26,86 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
   # optional to ensure profile is saved if user is updated
   if hasattr(instance, 'profile'):
-    instance.profile.save()
\ No newline at end of file
+    instance.profile.save()
+
+@receiver(post_init, sender=Profile, dispatch_uid='accounts.profile_loaded')
+def remember_profile_location(sender, instance, **kwargs):
+  geo.remember_location(instance)
+  resumes.remember_resume(instance)
+
+@receiver(pre_save, sender=Profile, dispatch_uid='accounts.profile_located')
+def locate_profile(sender, instance, **kwargs):
+  geo.locate(instance)
+
+@receiver(pre_save, sender=Profile, dispatch_uid='accounts.profile_resume_changed')
+def forget_replaced_resume_text(sender, instance, **kwargs):
+  instance._resume_uploaded = resumes.resume_changed(instance)
+
+@receiver(post_save, sender=Profile, dispatch_uid='accounts.profile_resume_uploaded')
+def queue_resume_extraction(sender, instance, **kwargs):
+  # Only now is the file in storage under its final name
+  resumes.remember_resume(instance)
+  # The row must be committed before the task reads it
+  if instance.__dict__.pop('_resume_uploaded', False):
+    from .tasks import extract_resume
+    profile_id = instance.pk
+    transaction.on_commit(lambda: extract_resume.delay(profile_id))
+
+# Session logins (admin) are buffered like JWT logins instead of saving the user
+user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+
+@receiver(user_logged_in)
+def buffer_last_login(sender, user, **kwargs):
+  record_login(user.pk)
+
+@receiver(reset_password_token_created)
+def send_password_reset_email(sender, instance, reset_password_token, **kwargs):
+  # Queued for the email workers so the request never waits on SMTP
+  user = reset_password_token.user
+  profile = getattr(user, 'profile', None)
+  send_templated_mail(
+    settings.PASSWORD_RESET_EMAIL_SUBJECT,
+    settings.PASSWORD_RESET_EMAIL_TEMPLATE,
+    [user.email],
+    context={
+      'user': {
+        'first_name': profile.first_name if profile else '',
+        'last_name': profile.last_name if profile else '',
+      },
+      'reset_password_url': f"{settings.PASSWORD_RESET_URL}{reset_password_token.key}",
+    },
+  )
+
+@receiver(users_bulk_updated)
+def revoke_tokens_of_deactivated_users(sender, user_ids, changes, **kwargs):
+  # Access tokens already fail on is_active; this stops refreshes too
+  if changes.get('is_active') is False:
+    transaction.on_commit(lambda: revoke_user_tokens(user_ids))
+
+# Cached permission sets (apps/accounts/backends.py). Deleting a group or a
+# permission removes its m2m rows without m2m_changed, and migrations add
+# permissions in bulk, hence the model signals too.
+@receiver(m2m_changed, sender=CustomUser.groups.through, dispatch_uid='accounts.user_groups_changed')
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through, dispatch_uid='accounts.user_permissions_changed')
+def forget_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+  if action not in ('post_add', 'post_remove', 'post_clear'):
+    return
+  if not reverse:
+    backends.forget_users([instance.pk])
+  elif pk_set is not None:
+    # Users added to or removed from a group or permission
+    backends.forget_users(pk_set)
+  else:
+    backends.forget_all()
+
+@receiver(m2m_changed, sender=Group.permissions.through, dispatch_uid='accounts.group_permissions_changed')
+def forget_group_permissions(sender, action, **kwargs):
+  if action in ('post_add', 'post_remove', 'post_clear'):
+    backends.forget_all()
+
+@receiver(post_delete, sender=Group, dispatch_uid='accounts.group_deleted')
+@receiver(post_save, sender=Permission, dispatch_uid='accounts.permission_saved')
+@receiver(post_delete, sender=Permission, dispatch_uid='accounts.permission_deleted')
+@receiver(post_migrate, dispatch_uid='accounts.migrated')
+def forget_all_permissions(sender, **kwargs):
+  backends.forget_all()
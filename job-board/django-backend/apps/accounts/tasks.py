@@ -0,0 +1,62 @@
+from django.conf import settings
+
+from apps.core.progress import JobProgress
+from apps.core.queues import BULK_QUEUE, queued_task
+
+from .activity import flush_activity
+from .blacklist import purge_legacy_tables
+from .bulk import apply_user_changes, load_selection
+from .resumes import extract_resumes, pending_profiles, purge_unused_texts
+
+
+@queued_task(BULK_QUEUE)
+def bulk_update_users(job_id, changes):
+    """
+    Background half of apps.accounts.bulk.start_user_changes for large selections.
+    """
+    progress = JobProgress(job_id)
+    payload = progress.get_payload()
+    if payload is None:
+        progress.fail('Selection expired before the job started')
+        return 0
+    try:
+        updated = apply_user_changes(load_selection(payload), progress=progress, **changes)
+    except Exception as exc:
+        progress.fail(exc)
+        raise
+    progress.finish(updated=updated)
+    return updated
+
+
+@queued_task(BULK_QUEUE)
+def flush_user_activity():
+    """Periodic: writes the buffered last_login / last_seen timestamps in bulk."""
+    return flush_activity()
+
+
+@queued_task(BULK_QUEUE)
+def purge_token_blacklist():
+    """
+    Periodic: removes expired rows left by the database-backed token_blacklist
+    app. Redis blacklist entries expire on their own.
+    """
+    return purge_legacy_tables()
+
+
+@queued_task(BULK_QUEUE, soft_time_limit=10 * 60)
+def extract_resume(profile_id):
+    """Extracts the text of a profile's resume; queued when one is uploaded."""
+    return dict(extract_resumes([profile_id]))
+
+
+@queued_task(BULK_QUEUE, soft_time_limit=30 * 60)
+def extract_pending_resumes():
+    """
+    Periodic: extracts the resumes still without text (lost tasks, bulk
+    loads), RESUME_EXTRACTION_BATCH at a time, and deletes texts no
+    profile uses any more.
+    """
+    pending = pending_profiles().order_by('pk').values_list('pk', flat=True)
+    profile_ids = list(pending[:settings.RESUME_EXTRACTION_BATCH])
+    report = extract_resumes(profile_ids) if profile_ids else {}
+    return {**report, 'purged': purge_unused_texts()}
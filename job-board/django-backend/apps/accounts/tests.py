@@ -1,28 +1,53 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
 import pytest
+from unittest import mock, skipUnless
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework import status
+from rest_framework import permissions, status
 from rest_framework.test import APITestCase
-from .models import CustomUser, Profile
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
+from apps.core.pagination import EstimatedCountPaginator
+from apps.core.progress import JobProgress
+from apps.jobs.models import Job
+from . import activity, backends, blacklist, resumes
+from .models import CustomUser, Profile, ResumeText
+from .tasks import extract_resume
+from .views import LoginView
 from .serializers import CustomUserSerializer, ProfileSerializer
 
 class AccountTests(APITestCase):
     def setUp(self):
+        # Throttle counts outlive the test database
+        cache.delete_pattern('throttle_*')
         # Create a test user
         self.user = CustomUser.objects.create_user(
             email='test@example.com',
             password='testpassword123'
         )
-        # Create a test profile
-        self.profile = Profile.objects.create(
-            user=self.user,
-            user_type='job_seeker',
-            first_name='Test',
-            last_name='User'
-        )
+        # Fill in the profile the post_save signal created
+        self.profile = self.user.profile
+        self.profile.user_type = 'job_seeker'
+        self.profile.first_name = 'Test'
+        self.profile.last_name = 'User'
+        self.profile.save()
 
     def test_user_registration(self):
         """Test user registration with valid data."""
-        url = reverse('user-list')
+        url = reverse('user-register')
         data = {
             'email': 'newuser@example.com',
             'password': 'newpassword123',
@@ -38,7 +63,7 @@ class AccountTests(APITestCase):
 
     def test_user_registration_invalid_email(self):
         """Test user registration with invalid email."""
-        url = reverse('user-list')
+        url = reverse('user-register')
         data = {
             'email': 'invalid-email',
             'password': 'newpassword123',
@@ -153,3 +178,455 @@ class AccountTests(APITestCase):
         self.client.force_authenticate(user=admin_user)
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RegistrationTests(APITestCase):
+    def test_registration_fills_signal_created_profile(self):
+        """Test that registering creates one user with a single, populated profile."""
+        response = self.client.post(reverse('user-register'), {
+            'email': 'new@example.com', 'password': 'newpassword123', 'password_confirm': 'newpassword123',
+            'user_type': 'recruiter', 'first_name': 'New', 'last_name': 'Recruiter',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        profile = Profile.objects.get(user__email='new@example.com')
+        self.assertEqual((profile.user_type, profile.full_name), ('recruiter', 'New Recruiter'))
+
+
+class BulkUserUpdateTests(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            email='admin@example.com',
+            password='adminpassword123'
+        )
+        self.users = [
+            CustomUser.objects.create_user(email=f'spam{i}@example.com', password='spampassword123')
+            for i in range(5)
+        ]
+        self.url = reverse('user-bulk-update')
+        self.client.force_authenticate(user=self.admin)
+
+    def _bulk_update(self, users, **changes):
+        return self.client.post(self.url, {'ids': [str(u.id) for u in users], **changes}, format='json')
+
+    def test_bulk_deactivate(self):
+        """Test deactivating many users in one request."""
+        response = self._bulk_update(self.users, is_active=False)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 5)
+        self.assertEqual(CustomUser.objects.filter(is_active=False).count(), 5)
+
+    def test_bulk_update_query_count_is_independent_of_selection_size(self):
+        """Test that bulk updates are set-based, not one query per user."""
+        with CaptureQueriesContext(connection) as small:
+            self._bulk_update(self.users[:1], user_type='recruiter')
+        with CaptureQueriesContext(connection) as large:
+            self._bulk_update(self.users[1:], user_type='recruiter')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Profile.objects.filter(user_type='recruiter').count(), 5)
+
+    def test_bulk_deactivate_revokes_refresh_tokens(self):
+        """Test that refresh tokens issued before deactivation stop working."""
+        refresh = RefreshToken.for_user(self.users[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self._bulk_update(self.users[:1], is_active=False)
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(BULK_USER_SYNC_LIMIT=2)
+    def test_large_selection_runs_as_job(self):
+        """Test that large selections return a job whose progress can be polled."""
+        from .tasks import bulk_update_users
+        with mock.patch.object(bulk_update_users, 'delay', side_effect=bulk_update_users):
+            response = self._bulk_update(self.users, is_active=False)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        response = self.client.get(reverse('user-bulk-update-status', args=[response.data['job_id']]))
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(response.data['processed'], 5)
+        self.assertEqual(CustomUser.objects.filter(is_active=False).count(), 5)
+
+    @override_settings(BULK_USER_SYNC_LIMIT=2, BULK_USER_CHUNK_SIZE=2)
+    def test_admin_action_hands_over_its_query(self):
+        """Test that a large admin selection is stored as a query, not a list of ids, and applied in chunks."""
+        from .admin import deactivate_users
+        from .tasks import bulk_update_users
+        request = mock.Mock(user=self.admin)
+        modeladmin = mock.Mock()
+        selection = CustomUser.objects.filter(email__startswith='spam', is_active=True)
+        with mock.patch.object(bulk_update_users, 'delay') as delay:
+            deactivate_users(modeladmin, request, selection)
+        job_id = delay.call_args.args[0]
+        self.assertNotIsInstance(JobProgress(job_id).get_payload(), list)
+
+        # Each chunk deactivated leaves the selection without skipping the next
+        bulk_update_users(*delay.call_args.args)
+        self.assertEqual(JobProgress(job_id).get()['processed'], 5)
+        self.assertEqual(CustomUser.objects.filter(is_active=False).count(), 5)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=4 * 39)
+    def test_selection_is_limited_to_what_a_request_can_carry(self):
+        """Test that requests cannot select more ids than fit in the request body limit."""
+        response = self._bulk_update(self.users, is_active=False)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', response.data)
+
+    def test_bulk_update_requires_admin(self):
+        """Test that regular users cannot run bulk updates."""
+        self.client.force_authenticate(user=self.users[0])
+        response = self._bulk_update(self.users, is_active=False)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@mock.patch.object(LoginView, 'throttle_classes', [])
+class ActivityTests(APITestCase):
+    def setUp(self):
+        activity._redis().delete(activity.LAST_LOGIN_KEY, activity.LAST_SEEN_KEY)
+        activity._recently_seen.clear()
+        self.user = CustomUser.objects.create_user(email='active@example.com', password='activepassword123')
+
+    def test_login_is_buffered_and_merged_on_read(self):
+        """Test that logging in does not write the user row until the flush."""
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'active@example.com', 'password': 'activepassword123',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        data = self.client.get(reverse('user-me')).data
+        self.assertIsNotNone(data['last_login'])
+        self.assertIsNotNone(data['last_seen'])
+
+        self.assertEqual(activity.flush_activity(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(activity.buffered_activity([self.user.pk]), {})
+
+    def test_flush_is_one_statement_and_never_moves_backwards(self):
+        """Test that many users are flushed together and newer stored values win."""
+        users = [self.user] + [
+            CustomUser.objects.create_user(email=f'seen{i}@example.com', password='x') for i in range(3)
+        ]
+        later = float(int(time.time()) + 3600)
+        CustomUser.objects.filter(pk=self.user.pk).update(last_seen=activity._from_epoch(later))
+        for user in users:
+            activity.record_seen(user.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(activity.flush_activity(), 4)
+        self.assertEqual(len([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')]), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_seen.timestamp(), later)
+        self.assertEqual(CustomUser.objects.filter(last_seen__isnull=False).count(), 4)
+
+    def test_last_seen_written_once_per_resolution(self):
+        activity.record_seen(self.user.pk, when=1000.0)
+        activity.record_seen(self.user.pk, when=1010.0)
+        self.assertEqual(activity.buffered_activity([self.user.pk])[str(self.user.pk)]['last_seen'].timestamp(), 1000.0)
+
+    def test_requests_succeed_while_redis_is_down(self):
+        """Test that logins and authenticated requests only log when the activity buffer is unavailable."""
+        with mock.patch.object(activity, '_redis', side_effect=ConnectionError), \
+                self.assertLogs(activity.logger, 'WARNING'):
+            response = self.client.post(reverse('token_obtain_pair'), {
+                'email': 'active@example.com', 'password': 'activepassword123',
+            })
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+            self.assertEqual(self.client.get(reverse('user-me')).status_code, status.HTTP_200_OK)
+
+    def test_failed_flush_keeps_buffer(self):
+        activity.record_login(self.user.pk)
+        with mock.patch.object(activity, '_update_chunk', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                activity.flush_activity()
+        self.assertIn(str(self.user.pk), activity.buffered_activity([self.user.pk]))
+
+
+@mock.patch.object(TokenRefreshView, 'throttle_classes', [])
+class TokenBlacklistTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='rotate@example.com', password='rotatepassword123')
+        blacklist._redis().delete(blacklist.BLOOM_SINCE_KEY)
+        blacklist._bloom = None
+        self.addCleanup(setattr, blacklist, '_bloom', None)
+
+    def _refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)})
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        """Test that a refresh token is blacklisted in Redis when it is rotated."""
+        refresh = RefreshToken.for_user(self.user)
+        first = self._refresh(refresh)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._refresh(refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self._refresh(first.data['refresh']).status_code, status.HTTP_200_OK)
+        ttl = blacklist._redis().ttl(blacklist.KEY_PREFIX + refresh['jti'])
+        self.assertAlmostEqual(ttl, refresh['exp'] - time.time(), delta=5)
+
+    @override_settings(TOKEN_BLACKLIST_BLOOM=True, TOKEN_BLACKLIST_BLOOM_CAPACITY=1000)
+    def test_bloom_filter(self):
+        """Test that the Bloom filter answers misses and never hides a blacklisted token."""
+        earlier = RefreshToken.for_user(self.user)
+        with override_settings(TOKEN_BLACKLIST_BLOOM=False):
+            blacklist.add(earlier['jti'], earlier['exp'])
+        self.assertTrue(blacklist.contains(earlier['jti'], earlier['exp']))
+
+        blacklist.get_bloom()._since = time.time() - 24 * 3600 * 2  # the filter has been filled for long enough
+        refresh = RefreshToken.for_user(self.user)
+        self.assertTrue(blacklist.add(refresh['jti'], refresh['exp']))
+        self.assertFalse(blacklist.add(refresh['jti'], refresh['exp']))
+        self.assertTrue(blacklist.contains(refresh['jti'], refresh['exp']))
+
+        misses = [RefreshToken.for_user(self.user) for _ in range(20)]
+        with mock.patch.object(blacklist, '_redis', wraps=blacklist._redis) as redis:
+            self.assertFalse(any(blacklist.contains(token['jti'], token['exp']) for token in misses))
+        self.assertEqual(redis.call_count, 20)  # one pipelined filter lookup each, no key lookup
+
+    def test_purge_legacy_tables(self):
+        """Test that expired rows of the old database blacklist are removed."""
+        self.assertEqual(blacklist.purge_legacy_tables(), 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE token_blacklist_outstandingtoken (id bigserial PRIMARY KEY, expires_at timestamptz)"
+            )
+            cursor.execute(
+                "CREATE TABLE token_blacklist_blacklistedtoken (id bigserial PRIMARY KEY, "
+                "token_id bigint REFERENCES token_blacklist_outstandingtoken (id))"
+            )
+            cursor.execute(
+                "INSERT INTO token_blacklist_outstandingtoken (expires_at) "
+                "SELECT now() + (n || ' hours')::interval FROM generate_series(-5, 4) AS n"
+            )
+            cursor.execute("INSERT INTO token_blacklist_blacklistedtoken (token_id) SELECT id FROM token_blacklist_outstandingtoken")
+        self.assertEqual(blacklist.purge_legacy_tables(batch_size=2), 5)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM token_blacklist_outstandingtoken")
+            self.assertEqual(cursor.fetchone()[0], 5)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(email='admin@example.com', password='adminpassword123')
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:accounts_customuser_changelist')
+
+    def _seed(self, count, prefix='user'):
+        password = make_password('seedpassword123')
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f'{prefix}{i}@example.com', password=password) for i in range(count)
+        )
+        Profile.objects.bulk_create(Profile(user=user, first_name=f'First{i}') for i, user in enumerate(users))
+
+    def _changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return queries.captured_queries
+
+    def test_changelist_query_count_is_independent_of_rows(self):
+        """Test that profile columns are joined rather than loaded per row."""
+        self._seed(3, prefix='few')
+        few = self._changelist_queries()
+        self._seed(40, prefix='many')
+        many = self._changelist_queries()
+        self.assertEqual(len(few), len(many))
+
+    def test_changelist_skips_count_on_large_tables(self):
+        """Test that no COUNT(*) runs when the planner estimate is large."""
+        self._seed(3)
+        with mock.patch.object(EstimatedCountPaginator, '_table_estimate', return_value=2_000_000), \
+                mock.patch.object(EstimatedCountPaginator, '_plan_estimate', return_value=2_000_000):
+            for params in ({}, {'q': 'user1'}, {'is_active__exact': '1'}):
+                queries = self._changelist_queries(**params)
+                self.assertFalse([q for q in queries if 'COUNT(' in q['sql'].upper()], params)
+
+    def test_search_uses_email_prefix(self):
+        """Test that admin search matches the start of the email only."""
+        self._seed(3)
+        response = self.client.get(self.url, {'q': 'USER1'})
+        self.assertContains(response, 'user1@example.com')
+        self.assertNotContains(response, 'user2@example.com')
+        queries = self._changelist_queries(q='user1')
+        self.assertTrue(any('UPPER' in q['sql'] and 'LIKE' in q['sql'] for q in queries))
+
+    @skipUnless(os.getenv('ADMIN_PERF_USERS'), 'Set ADMIN_PERF_USERS to seed a large table')
+    def test_changelist_time_on_large_table(self):
+        """
+        Opt-in check against a large seeded table, e.g. ADMIN_PERF_USERS=1000000.
+        The changelist, a search and a filter must each stay within ADMIN_PERF_BUDGET_MS.
+        """
+        total = int(os.getenv('ADMIN_PERF_USERS'))
+        budget = float(os.getenv('ADMIN_PERF_BUDGET_MS', '500')) / 1000
+        for start in range(0, total, 50000):
+            self._seed(min(50000, total - start), prefix=f'perf{start}-')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE accounts_customuser')
+            cursor.execute('ANALYZE accounts_profile')
+
+        for params in ({}, {'q': 'perf0-1'}, {'is_active__exact': '1'}):
+            started = time.perf_counter()
+            queries = self._changelist_queries(**params)
+            elapsed = time.perf_counter() - started
+            self.assertLess(elapsed, budget, params)
+            self.assertLessEqual(len(queries), 10, params)
+
+
+def _docx(*paragraphs):
+    """A minimal DOCX file with these paragraphs."""
+    namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    body = ''.join(f'<w:p><w:r><w:t>{escape(text)}</w:t></w:r></w:p>' for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{namespace}"><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def _extract_in_daemon(files, results):
+    results.put(list(resumes.extract_many(files, workers=2)))
+
+
+class ResumeTests(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = self.settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.recruiter = CustomUser.objects.create_user(email='hiring@example.com', password='pass12345')
+        self.recruiter.profile.user_type = 'recruiter'
+        self.recruiter.profile.save()
+
+    def _seeker(self, email, data, name='resume.docx'):
+        user = CustomUser.objects.create_user(email=email, password='pass12345')
+        profile = user.profile
+        profile.first_name = email.split('@')[0]
+        with mock.patch('apps.accounts.tasks.extract_resume.delay', side_effect=extract_resume), \
+                self.captureOnCommitCallbacks(execute=True):
+            profile.resume = SimpleUploadedFile(name, data)
+            profile.save()
+        profile.refresh_from_db()
+        return profile
+
+    def test_uploaded_resumes_are_extracted_once_per_file(self):
+        """The same file uploaded twice is parsed once; a replaced resume is extracted again."""
+        data = _docx('Senior platform engineer', 'Kubernetes, Terraform & Go')
+        with mock.patch.object(resumes, 'extract_text', wraps=resumes.extract_text) as extract_text:
+            first = self._seeker('ann@example.com', data)
+            second = self._seeker('bob@example.com', data, name='cv.docx')
+        self.assertEqual(extract_text.call_count, 1)
+        self.assertEqual(first.resume_text_id, second.resume_text_id)
+        stored = ResumeText.objects.get()
+        self.assertEqual(resumes.unpack(stored.text), 'Senior platform engineer\nKubernetes, Terraform & Go')
+        self.assertEqual(stored.error, '')
+
+        with mock.patch('apps.accounts.tasks.extract_resume.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            second.resume = SimpleUploadedFile('new.docx', _docx('Data analyst'))
+            second.save()
+            second.save()  # unchanged, nothing queued
+        delay.assert_called_once_with(second.pk)
+        self.assertIsNone(second.resume_text_id)
+
+    def test_recruiters_search_resumes_with_snippets(self):
+        """Matches are ranked and highlighted for recruiters only."""
+        best = self._seeker('ann@example.com', _docx('Kubernetes operator', 'Ran Kubernetes clusters for years'))
+        other = self._seeker('bob@example.com', _docx('Frontend developer', 'Some Kubernetes exposure'))
+        self._seeker('cat@example.com', _docx('Accountant <script>'))
+        url = reverse('profile-search')
+
+        self.client.force_authenticate(user=best.user)
+        self.assertEqual(self.client.get(url, {'q': 'kubernetes'}).status_code, 403)
+        self.client.force_authenticate(user=self.recruiter)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+        results = self.client.get(url, {'q': 'kubernetes clusters'}).data['results']
+        self.assertEqual([row['first_name'] for row in results], ['ann'])
+        results = self.client.get(url, {'q': 'kubernetes -accountant'}).data['results']
+        self.assertEqual([row['user_id'] for row in results], [str(best.user.pk), str(other.user.pk)])
+        self.assertIn('<mark>Kubernetes</mark> clusters', results[0]['snippet'])
+        [row] = self.client.get(url, {'q': 'accountant'}).data['results']
+        self.assertIn('&lt;script', row['snippet'])
+        self.assertNotIn('<script', row['snippet'])
+
+    def test_unreadable_files_and_timeouts_fail_without_stopping_the_batch(self):
+        """Failures are stored with their reason; a slow parser is cut off at the timeout."""
+        files = [('good', _docx('Python developer')), ('bad', b'not a resume'), ('empty', b'')]
+        results = {key: (text, error) for key, text, error in resumes.extract_many(files, workers=2)}
+        self.assertEqual(results['good'], ('Python developer', ''))
+        self.assertEqual(results['bad'], ('', 'Not a PDF or DOCX file'))
+        self.assertEqual(results['empty'], ('', 'Empty or unreadable file'))
+
+        with mock.patch.object(resumes, 'extract_text', side_effect=lambda data: time.sleep(5)):
+            started = time.perf_counter()
+            self.assertEqual(resumes.extract_within(b'x', timeout=0.2), ('', 'Timed out after 0.2s'))
+        self.assertLess(time.perf_counter() - started, 2)
+
+        files = [('good', _docx('Python developer'))]
+        self.assertEqual(list(resumes.extract_many(files * 2, workers=2, timeout=0.001)),
+                         [('good', '', 'Timed out after 0.001s')] * 2)
+
+        profile = self._seeker('ann@example.com', b'%PDF-1.4 truncated', name='resume.pdf')
+        self.assertTrue(profile.resume_text.error)
+        self.assertFalse(resumes.pending_profiles().exists())
+
+    def test_batches_are_extracted_from_daemonic_workers(self):
+        """Celery's prefork workers are daemonic, which rules out a multiprocessing pool."""
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        worker = context.Process(target=_extract_in_daemon, daemon=True,
+                                 args=([('good', _docx('Python developer')), ('bad', b'not a resume')], results))
+        worker.start()
+        try:
+            self.assertEqual(results.get(timeout=60), [('good', 'Python developer', ''),
+                                                       ('bad', '', 'Not a PDF or DOCX file')])
+        finally:
+            worker.join(5)
+
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='perms@example.com', password='permspassword123')
+        cache.delete_many([backends._perms_key(self.user.pk), backends._version_key(self.user.pk)])
+        self.group = Group.objects.create(name='Job editors')
+        self.add_job = Permission.objects.get(codename='add_job')
+        self.delete_job = Permission.objects.get(codename='delete_job')
+
+    def _can(self, perm):
+        # A new user object per request, as authentication loads it
+        return CustomUser.objects.get(pk=self.user.pk).has_perm(perm)
+
+    def test_model_permission_check_is_one_cache_read(self):
+        """Test that a cached check makes no queries and one cache round trip."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.add_job)
+            self.user.groups.add(self.group)
+        self.assertTrue(self._can('jobs.add_job'))
+        user = CustomUser.objects.get(pk=self.user.pk)
+        request = mock.Mock(user=user, method='POST')
+        view = mock.Mock(spec=['queryset'], queryset=Job.objects.all())
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, self.assertNumQueries(0):
+            self.assertTrue(permissions.DjangoModelPermissions().has_permission(request, view))
+            request.method = 'DELETE'
+            self.assertFalse(permissions.DjangoModelPermissions().has_permission(request, view))
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_changes_invalidate_cached_permissions(self):
+        """Test that group, membership and direct permission changes are seen on the next check."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.group)
+        self.assertFalse(self._can('jobs.add_job'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.add_job)
+        self.assertTrue(self._can('jobs.add_job'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.delete_job)
+        self.assertTrue(self._can('jobs.delete_job'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.customuser_set.remove(self.user)
+        self.assertFalse(self._can('jobs.add_job'))
+        self.assertTrue(self._can('jobs.delete_job'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.clear()
+        self.assertFalse(self._can('jobs.delete_job'))
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import blacklist
+
+
+def _revoked_key(user_id):
+    return f'auth:revoked:{user_id}'
+
+
+def revoke_user_tokens(user_ids):
+    """
+    Invalidates every refresh token issued to these users before now,
+    with a single cache round trip for the whole batch.
+    """
+    now = int(timezone.now().timestamp())
+    timeout = int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+    cache.set_many({_revoked_key(user_id): now for user_id in user_ids}, timeout=timeout)
+
+
+def is_token_revoked(token):
+    revoked_at = cache.get(_revoked_key(token[api_settings.USER_ID_CLAIM]))
+    return revoked_at is not None and token['iat'] <= revoked_at
+
+
+class BlacklistableRefreshToken(RefreshToken):
+    """
+    Refresh token checked against the Redis blacklist (apps/accounts/blacklist.py)
+    instead of the token_blacklist app's database tables.
+    """
+    def verify(self, *args, **kwargs):
+        if blacklist.contains(self[api_settings.JTI_CLAIM], self['exp']):
+            raise TokenError('Token is blacklisted')
+        super().verify(*args, **kwargs)
+
+    def blacklist(self):
+        """Returns False if the token was already blacklisted."""
+        return blacklist.add(self[api_settings.JTI_CLAIM], self['exp'])
+
+
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses refresh tokens that were rotated already or whose user's tokens
+    were revoked, e.g. by a bulk deactivation.
+
+    With BLACKLIST_AFTER_ROTATION the old token is blacklisted atomically, so
+    of two concurrent refreshes with the same token only one succeeds.
+    """
+    token_class = BlacklistableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_token_revoked(refresh):
+            raise InvalidToken('Token has been revoked')
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and not refresh.blacklist():
+                raise InvalidToken('Token is blacklisted')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class ActivityTrackingTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Buffers the login in Redis (apps/accounts/activity.py) instead of saving
+    the user row, which UPDATE_LAST_LOGIN would do on every login.
+    """
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        from .activity import record_login
+        record_login(self.user.pk)
+        return data
@@ -1,15 +1,30 @@
 from rest_framework import viewsets, mixins, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
-from apps.core.throttling import CustomRateThrottle
+from apps.core.exports import export_response
+from apps.core.progress import JobProgress
+from rest_framework_simplejwt.views import TokenObtainPairView
+from apps.core.throttling import CustomRateThrottle, ExportThrottle, LoginThrottle
 
 from .models import CustomUser, Profile
-from .serializers import CustomUserSerializer, ProfileSerializer, UserRegistrationSerializer
-from .permissions import IsOwnerOfProfileOrReadOnly
+from .bulk import start_user_changes
+from .exports import ProfileExport, UserExport
+from .resumes import search as search_resumes, snippets as resume_snippets
+from .serializers import (
+    BulkUserUpdateSerializer, CandidateSerializer, CustomUserSerializer, ProfileSerializer, UserRegistrationSerializer
+)
+from .permissions import IsOwnerOfProfileOrReadOnly, IsRecruiter
 
 from apps.core.pagination import CustomPageNumberPagination 
 
+
+class LoginView(TokenObtainPairView):
+    """Obtains a JWT pair; a few attempts a minute per address (LoginThrottle)."""
+    throttle_classes = [LoginThrottle]
+
+
 class CustomUserViewSet(
     mixins.RetrieveModelMixin, # Allow GET (retrieve) for a single user
     mixins.ListModelMixin,     # Allow GET (list) for multiple users
@@ -31,7 +46,7 @@ class CustomUserViewSet(
         """
         Instantiates and returns the list of permissions that this view requires.
         """
-        if self.action == 'create': # Registration is handled by a separate action below
+        if self.action in ['create', 'register']: # Registration is handled by a separate action below
             self.permission_classes = [AllowAny]
         elif self.action == 'me':
             self.permission_classes = [IsAuthenticated]
@@ -71,6 +86,44 @@ class CustomUserViewSet(
             serializer.save()
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='bulk-update', permission_classes=[IsAdminUser])
+    def bulk_update(self, request):
+        """
+        Deactivates, reactivates or changes the type of many users at once.
+        Large selections return 202 with a job id to poll for progress.
+        """
+        serializer = BulkUserUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = {key: value for key, value in serializer.validated_data.items() if key != 'ids'}
+
+        updated, progress = start_user_changes(
+            serializer.validated_data['ids'], requested_by=request.user.pk, **changes
+        )
+        if progress is None:
+            return Response({'status': 'done', 'updated': updated})
+        return Response(progress.get(), status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=False, methods=['get'], url_path=r'bulk-update/(?P<job_id>[0-9a-f-]+)',
+        permission_classes=[IsAdminUser]
+    )
+    def bulk_update_status(self, request, job_id=None):
+        """
+        Progress of a background bulk update.
+        """
+        state = JobProgress(job_id).get()
+        if state is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(state)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser], throttle_classes=[ExportThrottle])
+    def export(self, request):
+        """
+        Streams every user as CSV or JSON lines (apps/core/exports.py).
+        Large exports return 202 with a job to poll for the download link.
+        """
+        return export_response(request, UserExport())
+
 class ProfileViewSet(
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -107,4 +160,34 @@ class ProfileViewSet(
             serializer = self.get_serializer(profile, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser], throttle_classes=[ExportThrottle])
+    def export(self, request):
+        """
+        Streams every profile, or those of one `?user_type=`, as CSV or JSON lines.
+        """
+        user_type = request.query_params.get('user_type') or None
+        if user_type not in (None, *dict(Profile.USER_TYPE_CHOICES)):
+            raise ValidationError({'user_type': f'Choose from {", ".join(dict(Profile.USER_TYPE_CHOICES))}.'})
+        return export_response(request, ProfileExport(user_type=user_type))
+
+    @action(
+        detail=False, methods=['get'], url_path='search',
+        permission_classes=[IsAuthenticated, IsRecruiter | IsAdminUser], pagination_class=CustomPageNumberPagination,
+    )
+    def search(self, request):
+        """
+        Recruiters: job seekers whose resume matches `?q=` (web search
+        syntax: "exact phrase", or, -excluded), best match first, with
+        highlighted excerpts.
+        """
+        query = (request.query_params.get('q') or '').strip()
+        if not query:
+            raise ValidationError({'q': 'Enter something to search for.'})
+        profiles = search_resumes(query).select_related('user').only(
+            'pk', 'first_name', 'last_name', 'location', 'skills', 'resume', 'resume_text', 'user__id',
+        )
+        page = self.paginate_queryset(profiles)
+        serializer = CandidateSerializer(page, many=True, context={'snippets': resume_snippets(page, query)})
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,142 @@
+import json
+import logging
+
+from django_redis import get_redis_connection
+
+from .queues import BULK_QUEUE
+
+logger = logging.getLogger(__name__)
+
+# name -> Batch, filled in when the modules declaring batches are imported.
+# Declare batches in an app's tasks.py so Celery workers import them on startup.
+_registry = {}
+
+
+class Batch:
+    """
+    Coalesces many small units of work into one bulk execution.
+
+    Items are collected in a Redis list, in order and each one handled, and a
+    single flush task is scheduled `delay` seconds after the first item
+    arrives. The flush hands the handler up to `max_size` items at a time.
+    With `unique=True` they go to a Redis set instead, so repeated items (e.g.
+    the same user id) collapse into one.
+
+    Items of a chunk that still fails on the flush task's last retry are moved
+    to `failed_key` and logged rather than dropped.
+    """
+    def __init__(self, name, handler, max_size=500, delay=2, queue=BULK_QUEUE, unique=False):
+        self.name = name
+        self.handler = handler
+        self.max_size = max_size
+        self.delay = delay
+        self.queue = queue
+        self.unique = unique
+        # Separate keys, as the two are different Redis types
+        self.items_key = f'batch:{name}:items' if unique else f'batch:{name}:queue'
+        self.scheduled_key = f'batch:{name}:scheduled'
+        self.failed_key = f'batch:{name}:failed'
+
+    def __call__(self, items):
+        """Runs the handler directly, bypassing the queue."""
+        return self.handler(items)
+
+    def __repr__(self):
+        return f'<Batch {self.name}>'
+
+    @property
+    def redis(self):
+        return get_redis_connection('default')
+
+    def add(self, *items):
+        """
+        Queues items for the next flush. Items must be JSON serializable.
+        """
+        if not items:
+            return
+        values = [json.dumps(item, sort_keys=True) for item in items]
+        if self.unique:
+            self.redis.sadd(self.items_key, *values)
+        else:
+            self.redis.rpush(self.items_key, *values)
+        self._schedule()
+
+    def pending(self):
+        """Number of items waiting for a flush."""
+        return self.redis.scard(self.items_key) if self.unique else self.redis.llen(self.items_key)
+
+    def flush(self, final=False):
+        """
+        Drains the pending items through the handler in chunks of `max_size`.
+        Returns the number of items processed.
+
+        Items of a failed chunk are put back before the error is re-raised, so
+        a retry of the flush task picks them up again. On the `final` attempt
+        they are moved to `failed_key` instead, and the flush goes on.
+        """
+        # Clear the flag first: items added while we drain schedule a new flush.
+        self.redis.delete(self.scheduled_key)
+        processed = 0
+        while True:
+            raw = self._take()
+            if not raw:
+                break
+            items = [json.loads(value) for value in raw]
+            try:
+                self.handler(items)
+            except Exception:
+                if final:
+                    self.redis.rpush(self.failed_key, *raw)
+                    logger.exception('Batch %s failed for good, %d items moved to %s',
+                                     self.name, len(items), self.failed_key)
+                    continue
+                self._put_back(raw)
+                logger.exception('Batch %s failed, %d items requeued', self.name, len(items))
+                raise
+            processed += len(items)
+        return processed
+
+    def _take(self):
+        if self.unique:
+            return self.redis.spop(self.items_key, self.max_size)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.lrange(self.items_key, 0, self.max_size - 1)
+        pipe.ltrim(self.items_key, self.max_size, -1)
+        return pipe.execute()[0]
+
+    def _put_back(self, raw):
+        if self.unique:
+            self.redis.sadd(self.items_key, *raw)
+        else:
+            # At the head, in their original order
+            self.redis.lpush(self.items_key, *reversed(raw))
+
+    def _schedule(self):
+        # Only the first add after a flush schedules the task.
+        if self.redis.set(self.scheduled_key, 1, nx=True, ex=max(int(self.delay) * 10, 60)):
+            from .tasks import flush_batch
+            flush_batch.apply_async(args=[self.name], countdown=self.delay, queue=self.queue)
+
+
+def batched(name, **options):
+    """
+    Decorator turning a function that takes a list of items into a Batch.
+
+        @batched('search.profiles', max_size=1000, unique=True)
+        def reindex_profiles(user_ids):
+            ...
+
+        reindex_profiles.add(str(user.id))
+    """
+    def decorator(handler):
+        batch = Batch(name, handler, **options)
+        _registry[name] = batch
+        return batch
+    return decorator
+
+
+def get_batch(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f'No batch registered under {name!r}') from None
@@ -0,0 +1,147 @@
+"""
+Helpers shared by the benchmark commands and the pytest-benchmark suite:
+latency summaries, reproducible result files and regression comparison.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+
+import django
+from django.conf import settings
+from django.utils import timezone
+
+RESULTS_VERSION = 1
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(latencies_ms, elapsed, errors=0, queries=None):
+    """
+    Summary of one scenario: throughput, latency percentiles (ms) and, when
+    known, the number of SQL queries per request.
+    """
+    latencies = sorted(latencies_ms)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+    if queries:
+        summary['queries'] = {'mean': round(statistics.fmean(queries), 2), 'max': max(queries)}
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """What produced a result file, so runs can be reproduced and compared fairly."""
+    return {
+        'commit': git_revision(),
+        'created_at': timezone.now().isoformat(),
+        'python': sys.version.split()[0],
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'settings': settings.SETTINGS_MODULE,
+    }
+
+
+def write_results(path, scenarios, **config):
+    """Writes scenario summaries plus the run configuration and environment."""
+    data = {
+        'version': RESULTS_VERSION,
+        'environment': environment(),
+        'config': config,
+        'scenarios': scenarios,
+    }
+    with open(path, 'w') as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+    return data
+
+
+def load_results(path):
+    """
+    Reads a result file written by write_results() or by
+    `pytest --benchmark-json` and returns {scenario: summary}.
+    """
+    with open(path) as fh:
+        data = json.load(fh)
+    if 'scenarios' in data:
+        return data['scenarios']
+
+    scenarios = {}
+    for bench in data.get('benchmarks', []):
+        stats = bench['stats']
+        data_ms = sorted(value * 1000 for value in stats.get('data', []))
+        summary = {
+            'requests': stats['rounds'],
+            'errors': 0,
+            'throughput': round(stats['ops'], 2),
+            'latency_ms': {
+                'mean': round(stats['mean'] * 1000, 3),
+                'p50': round(stats['median'] * 1000, 3),
+                'p95': round(percentile(data_ms, 95), 3) if data_ms else None,
+                'p99': round(percentile(data_ms, 99), 3) if data_ms else None,
+                'max': round(stats['max'] * 1000, 3),
+            },
+        }
+        if 'queries' in bench.get('extra_info', {}):
+            queries = bench['extra_info']['queries']
+            summary['queries'] = {'mean': queries, 'max': queries}
+        scenarios[bench['name']] = summary
+    return scenarios
+
+
+def compare(base, head, throughput_drop=10.0, latency_increase=10.0, query_increase=0):
+    """
+    Compares two {scenario: summary} mappings.
+
+    Returns (rows, regressions): one row per scenario and metric, and the
+    subset that got worse by more than the thresholds (percentages for
+    throughput and latency, absolute queries per request).
+    """
+    rows, regressions = [], []
+
+    def check(scenario, metric, old, new, worse, limit, unit):
+        if old is None or new is None:
+            return
+        if unit == '%':
+            change = ((new - old) / old * 100) if old else 0.0
+        else:
+            change = new - old
+        regressed = (change > limit) if worse == 'up' else (-change > limit)
+        row = {'scenario': scenario, 'metric': metric, 'base': old, 'head': new, 'change': round(change, 2),
+               'unit': unit, 'regressed': regressed}
+        rows.append(row)
+        if regressed:
+            regressions.append(row)
+
+    for scenario in sorted(set(base) & set(head)):
+        old, new = base[scenario], head[scenario]
+        check(scenario, 'throughput', old.get('throughput'), new.get('throughput'), 'down', throughput_drop, '%')
+        for key in ('p95', 'p99'):
+            check(scenario, key, old['latency_ms'].get(key), new['latency_ms'].get(key), 'up', latency_increase, '%')
+        if 'queries' in old and 'queries' in new:
+            check(scenario, 'queries', old['queries']['max'], new['queries']['max'], 'up', query_increase, 'n')
+    return rows, regressions
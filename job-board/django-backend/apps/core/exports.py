@@ -0,0 +1,256 @@
+"""
+Streaming CSV / JSON lines exports of large querysets.
+
+Rows are read with iterator(chunk_size=EXPORT_CHUNK_SIZE), a server-side
+cursor on PostgreSQL, as tuples (values_list) rather than model instances,
+and encoded into pieces of about EXPORT_BUFFER_SIZE bytes, gzipped on the
+fly if asked: memory stays the same whatever the number of rows.
+
+export_response() streams an export straight to the client. Exports of more
+than EXPORT_SYNC_LIMIT rows (or asked for with `?background=1`) run in the
+run_export task instead, which writes the file to default storage under
+EXPORT_DIRECTORY; the caller gets a job id to poll, and once the job is done
+its status carries a download link. Files are removed after
+EXPORT_RETENTION_HOURS by the core-exports-purge task.
+"""
+import csv
+import datetime
+import os
+import tempfile
+import zlib
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .progress import PROGRESS_TTL, JobProgress
+
+# Name -> Export subclass, as used by the export command and the run_export task
+DATASETS = {
+    'users': 'apps.accounts.exports.UserExport',
+    'profiles': 'apps.accounts.exports.ProfileExport',
+    'applications': 'apps.jobs.exports.ApplicationExport',
+}
+# Format -> (content type, file extension)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+EXPORT_DIRECTORY = 'exports'
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Export:
+    """
+    A dataset to export. Subclasses set `name`, list their `columns` as
+    (header, lookup) pairs and select the rows in get_queryset(), which
+    may use the keyword arguments the export was created with (kept in
+    `params`, JSON-serializable, so a background job can recreate it).
+    """
+    name = None
+    columns = ()
+    ordering = ('pk',)
+
+    def __init__(self, **params):
+        self.params = params
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def rows(self):
+        """The rows as tuples, from a server-side cursor."""
+        queryset = self.get_queryset().order_by(*self.ordering).values_list(*(lookup for _, lookup in self.columns))
+        return queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+    def exceeds(self, limit):
+        """Whether there are more than `limit` rows, counting no further than limit + 1."""
+        return self.get_queryset().order_by()[:limit + 1].count() > limit
+
+    def filename(self, file_format, compress=False):
+        suffix = '.gz' if compress else ''
+        return f"{self.name}-{timezone.now():%Y%m%d-%H%M%S}.{FORMATS[file_format][1]}{suffix}"
+
+
+def get_export(dataset, **params):
+    try:
+        return import_string(DATASETS[dataset])(**params)
+    except KeyError:
+        raise ValueError(f'Unknown dataset {dataset!r}; choose from {", ".join(DATASETS)}') from None
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands back what csv.writer wrote."""
+    def write(self, value):
+        return value
+
+
+def lines(headers, rows, file_format):
+    """Yields the export as text: a header line for CSV, then one line per row."""
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([_csv_cell(value) for value in row])
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        for row in rows:
+            yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+def stream(export, file_format, compress=False, progress=None):
+    """
+    Yields the export as bytes in pieces of about EXPORT_BUFFER_SIZE
+    (before compression). `progress`, a JobProgress, is updated as rows
+    are read.
+    """
+    rows = export.rows()
+    if progress is not None:
+        rows = _counted(rows, progress)
+    # wbits=31: a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pieces, size = [], 0
+    for line in lines(export.headers, rows, file_format):
+        pieces.append(line)
+        size += len(line)
+        if size >= settings.EXPORT_BUFFER_SIZE:
+            data = ''.join(pieces).encode()
+            pieces, size = [], 0
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    data = ''.join(pieces).encode()
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def _counted(rows, progress):
+    count = 0
+    for count, row in enumerate(rows, 1):
+        if count % settings.EXPORT_CHUNK_SIZE == 0:
+            progress.update(count)
+        yield row
+    progress.update(count)
+
+
+def streaming_response(export, file_format, compress=False):
+    content_type = 'application/gzip' if compress else FORMATS[file_format][0]
+    response = StreamingHttpResponse(stream(export, file_format, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export.filename(file_format, compress)}"'
+    response['Cache-Control'] = 'no-store'  # Exports hold personal data
+    return response
+
+
+def _flag(value):
+    return (value or '').lower() in ('1', 'true', 'yes')
+
+
+def export_response(request, export):
+    """
+    Answers an export request: `?output=csv|jsonl` (CSV by default),
+    `?gzip=1` to compress, `?background=1` to run it as a background job
+    whatever its size.
+    """
+    params = request.query_params
+    file_format = params.get('output') or 'csv'
+    if file_format not in FORMATS:
+        raise ValidationError({'output': f'Choose from {", ".join(FORMATS)}.'})
+    compress = _flag(params.get('gzip'))
+    if not _flag(params.get('background')) and not export.exceeds(settings.EXPORT_SYNC_LIMIT):
+        return streaming_response(export, file_format, compress)
+    progress = start_export(export, file_format, compress, requested_by=request.user.pk)
+    return Response(status_of(progress.get(), request), status=status.HTTP_202_ACCEPTED)
+
+
+def start_export(export, file_format, compress=False, requested_by=None):
+    """Hands an export to the run_export task; returns its JobProgress."""
+    from .tasks import run_export
+    # The status holds the file name, so it is kept for a day longer than the file
+    progress = JobProgress.create(
+        'export', total=None, ttl=settings.EXPORT_RETENTION_HOURS * 60 * 60 + PROGRESS_TTL,
+        dataset=export.name, format=file_format, gzip=compress,
+        params=export.params, requested_by=str(requested_by) if requested_by else None, file=None,
+    )
+    run_export.delay(progress.job_id)
+    return progress
+
+
+def write_export(progress):
+    """
+    Runs the export described by a pending JobProgress into default
+    storage, through a temporary file; returns the stored file name.
+    """
+    state = progress.get()
+    export = get_export(state['dataset'], **state['params'])
+    filename = export.filename(state['format'], state['gzip'])
+    progress.update(0)
+    with tempfile.TemporaryFile() as temporary:
+        for data in stream(export, state['format'], state['gzip'], progress=progress):
+            temporary.write(data)
+        temporary.seek(0)
+        name = default_storage.save(f"{EXPORT_DIRECTORY}/{progress.job_id}/{filename}", File(temporary))
+    progress.finish(file=name)
+    return name
+
+
+def status_of(state, request):
+    """A job's progress as shown to its owner, with the download link once done."""
+    state = {key: value for key, value in state.items() if key not in ('file', 'requested_by', 'ttl')}
+    state['status_url'] = request.build_absolute_uri(reverse('export-status', args=[state['job_id']]))
+    if state['status'] == 'done':
+        state['download_url'] = request.build_absolute_uri(reverse('export-download', args=[state['job_id']]))
+    return state
+
+
+def purge_exports(now=None):
+    """Deletes export files older than EXPORT_RETENTION_HOURS; returns how many."""
+    cutoff = (now or timezone.now()) - datetime.timedelta(hours=settings.EXPORT_RETENTION_HOURS)
+    try:
+        directories, _ = default_storage.listdir(EXPORT_DIRECTORY)
+    except FileNotFoundError:
+        return 0
+    deleted = 0
+    for directory in directories:
+        path = f'{EXPORT_DIRECTORY}/{directory}'
+        _, files = default_storage.listdir(path)
+        expired = [name for name in files if default_storage.get_modified_time(f'{path}/{name}') < cutoff]
+        for name in expired:
+            default_storage.delete(f'{path}/{name}')
+        deleted += len(expired)
+        if len(expired) == len(files):
+            _remove_directory(path)
+    return deleted
+
+
+def _remove_directory(path):
+    # Only local storage leaves empty directories behind
+    if hasattr(default_storage, 'path'):
+        try:
+            os.rmdir(default_storage.path(path))
+        except OSError:
+            pass
@@ -0,0 +1,230 @@
+"""
+Geo search without PostGIS: geohash prefix columns plus exact distance.
+
+Rows that have a location store its latitude, longitude and geohash (a
+base32 string whose prefixes are ever larger cells containing the point).
+A radius or bounding-box search:
+  1. covers the area's bounding box with at most GEO_COVER_MAX_CELLS
+     geohash cells, and selects the rows whose geohash starts with one of
+     them: a few prefix scans of a B-tree (varchar_pattern_ops) index;
+  2. drops the candidates outside the exact box (latitude/longitude ranges);
+  3. for a radius, computes the haversine distance of what is left, filters
+     on it and orders by it.
+Only rows near the area are ever read, and only those pay for the distance.
+
+Locations are geocoded by the GEOCODER backend; the default resolves the
+city names in CITIES without any network access.
+"""
+import math
+import operator
+from functools import lru_cache, reduce
+
+from django.conf import settings
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from django.utils.module_loading import import_string
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # Cells of about 5 x 5 m
+EARTH_RADIUS_KM = 6371.0088
+
+# Name (lower case) -> (latitude, longitude) understood by GazetteerGeocoder
+CITIES = {
+    'nairobi': (-1.2921, 36.8219),
+    'mombasa': (-4.0435, 39.6682),
+    'kisumu': (-0.0917, 34.7680),
+    'nakuru': (-0.3031, 36.0800),
+    'eldoret': (0.5143, 35.2698),
+    'kampala': (0.3476, 32.5825),
+    'kigali': (-1.9441, 30.0619),
+    'dar es salaam': (-6.7924, 39.2083),
+    'addis ababa': (9.0054, 38.7636),
+    'lagos': (6.5244, 3.3792),
+    'abuja': (9.0765, 7.3986),
+    'accra': (5.6037, -0.1870),
+    'cairo': (30.0444, 31.2357),
+    'johannesburg': (-26.2041, 28.0473),
+    'cape town': (-33.9249, 18.4241),
+    'london': (51.5074, -0.1278),
+    'berlin': (52.5200, 13.4050),
+    'paris': (48.8566, 2.3522),
+    'amsterdam': (52.3676, 4.9041),
+    'new york': (40.7128, -74.0060),
+    'san francisco': (37.7749, -122.4194),
+    'toronto': (43.6532, -79.3832),
+    'dubai': (25.2048, 55.2708),
+    'bangalore': (12.9716, 77.5946),
+    'singapore': (1.3521, 103.8198),
+}
+
+
+def _spread(value):
+    """Moves bit i of a 32-bit integer to bit 2i."""
+    value = (value | value << 16) & 0x0000FFFF0000FFFF
+    value = (value | value << 8) & 0x00FF00FF00FF00FF
+    value = (value | value << 4) & 0x0F0F0F0F0F0F0F0F
+    value = (value | value << 2) & 0x3333333333333333
+    return (value | value << 1) & 0x5555555555555555
+
+
+def _bits(precision):
+    """(longitude bits, latitude bits) of a geohash of `precision` characters."""
+    return (5 * precision + 1) // 2, 5 * precision // 2
+
+
+def _cell(value, low, span, bits):
+    """Index of the cell containing `value` when [low, low + span] is cut into 2**bits cells."""
+    return min(max(int((value - low) / span * (1 << bits)), 0), (1 << bits) - 1)
+
+
+def _geohash(column, row, precision):
+    """Geohash of the cell at (longitude index, latitude index)."""
+    lon_bits, lat_bits = _bits(precision)
+    if lon_bits == lat_bits:
+        code = _spread(column) << 1 | _spread(row)
+    else:
+        # Longitude has one more bit: interleave as if latitude had it too, then drop it
+        code = (_spread(column) << 1 | _spread(row << 1)) >> 1
+    return ''.join(BASE32[code >> shift & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lon_bits, lat_bits = _bits(precision)
+    return _geohash(_cell(longitude, -180.0, 360.0, lon_bits), _cell(latitude, -90.0, 180.0, lat_bits), precision)
+
+
+def cover(south, west, north, east, max_cells=None):
+    """
+    Geohash prefixes of the smallest cells of which at most `max_cells`
+    contain the box; [] if even the largest cells need more, meaning the
+    box is too large to prune by geohash. A box with west > east crosses
+    the antimeridian.
+    """
+    max_cells = max_cells or settings.GEO_COVER_MAX_CELLS
+    if west > east:
+        half = max(1, max_cells // 2)
+        western, eastern = cover(south, west, north, 180.0, half), cover(south, -180.0, north, east, half)
+        return western + eastern if western and eastern else []
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lon_bits, lat_bits = _bits(precision)
+        columns = range(_cell(west, -180.0, 360.0, lon_bits), _cell(east, -180.0, 360.0, lon_bits) + 1)
+        rows = range(_cell(south, -90.0, 180.0, lat_bits), _cell(north, -90.0, 180.0, lat_bits) + 1)
+        if len(columns) * len(rows) <= max_cells:
+            return [_geohash(column, row, precision) for row in rows for column in columns]
+    return []
+
+
+def radius_box(latitude, longitude, radius_km):
+    """(south, west, north, east) of the box containing the circle; west > east across the antimeridian."""
+    angle = radius_km / EARTH_RADIUS_KM
+    south, north = latitude - math.degrees(angle), latitude + math.degrees(angle)
+    if south <= -90.0 or north >= 90.0 or angle >= math.pi / 2:
+        # The circle contains a pole: every longitude is in range
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+    delta = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(latitude)))))
+    west, east = longitude - delta, longitude + delta
+    if east - west >= 360.0:
+        return south, -180.0, north, 180.0
+    return south, (west + 540.0) % 360.0 - 180.0, north, (east + 540.0) % 360.0 - 180.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def distance_km(latitude, longitude):
+    """Query expression: haversine distance (km) of a row's coordinates from the point."""
+    half_dlat = Radians(F('latitude') - Value(latitude)) / Value(2.0)
+    half_dlon = Radians(F('longitude') - Value(longitude)) / Value(2.0)
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(math.radians(latitude))) * Cos(Radians(F('latitude'))) * Power(
+        Sin(half_dlon), 2
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
+
+
+def within_box(queryset, south, west, north, east, max_cells=None):
+    """Rows located inside the box, pruned by geohash prefix first."""
+    condition = Q(latitude__gte=south, latitude__lte=north)
+    if west <= east:
+        condition &= Q(longitude__gte=west, longitude__lte=east)
+    else:
+        condition &= Q(longitude__gte=west) | Q(longitude__lte=east)
+    cells = cover(south, west, north, east, max_cells)
+    if cells:
+        condition &= reduce(operator.or_, (Q(geohash__startswith=cell) for cell in cells))
+    return queryset.filter(condition)
+
+
+def within_radius(queryset, latitude, longitude, radius_km, max_cells=None):
+    """Rows within `radius_km` of the point, annotated with their `distance_km`."""
+    queryset = within_box(queryset, *radius_box(latitude, longitude, radius_km), max_cells=max_cells)
+    return queryset.annotate(distance_km=distance_km(latitude, longitude)).filter(distance_km__lte=radius_km)
+
+
+def parse_point(value):
+    """'lat,lng' -> (latitude, longitude); raises ValueError."""
+    try:
+        latitude, longitude = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('Expected "latitude,longitude".') from None
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        raise ValueError('Coordinates out of range.')
+    return latitude, longitude
+
+
+def parse_bbox(value):
+    """
+    'west,south,east,north' (GeoJSON order) -> (south, west, north, east);
+    raises ValueError. west > east selects a box across the antimeridian.
+    """
+    try:
+        west, south, east, north = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('Expected "west,south,east,north".') from None
+    if not (-90.0 <= south <= north <= 90.0 and -180.0 <= west <= 180.0 and -180.0 <= east <= 180.0):
+        raise ValueError('Bounding box out of range.')
+    return south, west, north, east
+
+
+class GazetteerGeocoder:
+    """Resolves the known city names in CITIES, ignoring anything after a comma."""
+    def geocode(self, location):
+        name = location.split(',')[0].strip().lower()
+        return CITIES.get(name)
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    return import_string(settings.GEOCODER)()
+
+
+def geocode(location):
+    """(latitude, longitude) of a free-text location, or None."""
+    location = (location or '').strip()
+    return get_geocoder().geocode(location) if location else None
+
+
+def remember_location(instance):
+    """post_init hook: what locate() compares with to tell whether the location moved."""
+    # Read from __dict__ so a deferred field is not fetched
+    fields = instance.__dict__
+    instance._geo_loaded = (fields.get('location'), fields.get('latitude'), fields.get('longitude'))
+
+
+def locate(instance):
+    """
+    pre_save hook for models with location, latitude, longitude and geohash
+    fields. Geocodes the location when there are no coordinates, or when the
+    location changed but the coordinates did not (so they are stale), then
+    derives the geohash. Explicitly set coordinates are kept.
+    """
+    loaded_location, *loaded_point = getattr(instance, '_geo_loaded', (None, None, None))
+    point = [instance.latitude, instance.longitude]
+    moved = loaded_location is not None and instance.location != loaded_location and point == loaded_point
+    if None in point or moved:
+        point = list(geocode(instance.location) or (None, None))
+        instance.latitude, instance.longitude = point
+    instance.geohash = encode(*point) if None not in point else None
+    instance._geo_loaded = (instance.location, *point)
@@ -0,0 +1,165 @@
+import logging
+import smtplib
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+from .batching import batched
+from .queues import REALTIME_QUEUE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+# One delivery connection per worker process, reused across batches.
+_connection = None
+
+
+def serialize_message(message):
+    """
+    Turns an EmailMessage into a JSON-serializable payload for the queue.
+    Attachments are not supported; send those synchronously.
+    """
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'alternatives': [list(alt) for alt in getattr(message, 'alternatives', [])],
+    }
+
+
+def build_message(payload, templates, connection=None):
+    """
+    Rebuilds an EmailMultiAlternatives from a payload. Templated payloads are
+    rendered here, in the worker, with each template compiled once per batch.
+    """
+    payload = dict(payload)
+    template_name = payload.pop('template', None)
+    context = payload.pop('context', None) or {}
+    alternatives = payload.pop('alternatives', [])
+
+    if template_name:
+        if template_name not in templates:
+            templates[template_name] = get_template(template_name)
+        html = templates[template_name].render(context)
+        payload['body'] = strip_tags(html).strip()
+        alternatives = alternatives + [[html, 'text/html']]
+
+    message = EmailMultiAlternatives(connection=connection, **payload)
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+def get_delivery_connection():
+    """
+    Returns the process-wide delivery connection, reopening it if the SMTP
+    server dropped it since the last batch.
+    """
+    global _connection
+    if _connection is not None:
+        smtp = getattr(_connection, 'connection', None)
+        if smtp is not None:
+            try:
+                if smtp.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected()
+            except (smtplib.SMTPException, OSError):
+                _connection.close()
+        return _connection
+
+    backend = getattr(settings, 'EMAIL_DELIVERY_BACKEND', DEFAULT_DELIVERY_BACKEND)
+    _connection = get_connection(backend, fail_silently=False)
+    return _connection
+
+
+def deliver(payloads):
+    """
+    Sends payloads over the shared delivery connection.
+    Returns the payloads that could not be sent. Payloads that cannot be
+    built (a missing template, a render error) are logged and dropped:
+    retrying would fail the same way.
+    """
+    connection = get_delivery_connection()
+    templates = {}
+    failed = []
+    connection.open()
+    for index, payload in enumerate(payloads):
+        try:
+            message = build_message(payload, templates, connection=connection)
+        except Exception:
+            logger.exception('Dropped email to %s that could not be built: %r', payload.get('to'), payload)
+            continue
+        try:
+            connection.send_messages([message])
+        except (smtplib.SMTPException, OSError):
+            logger.warning('Could not deliver email to %s', payload.get('to'), exc_info=True)
+            failed.append(payload)
+            # Reopen for the rest of the batch; if the server is gone, give the
+            # remaining messages back for a later retry.
+            connection.close()
+            try:
+                connection.open()
+            except (smtplib.SMTPException, OSError):
+                failed.extend(payloads[index + 1:])
+                break
+    return failed
+
+
+@batched('email.outbox', max_size=getattr(settings, 'EMAIL_BATCH_SIZE', 100), delay=1, queue=REALTIME_QUEUE)
+def email_outbox(payloads):
+    """
+    Delivers queued emails. Failures are retried with backoff by send_email_batch
+    rather than requeued here, so messages that went out are never sent twice.
+    """
+    failed = deliver(payloads)
+    if failed:
+        from .tasks import send_email_batch
+        send_email_batch.apply_async(args=[failed], countdown=send_email_batch.default_retry_delay)
+
+
+class CeleryEmailBackend(BaseEmailBackend):
+    """
+    Email backend that hands messages to Celery instead of talking SMTP in the
+    request. The actual delivery backend is EMAIL_DELIVERY_BACKEND.
+    """
+    def send_messages(self, email_messages):
+        payloads = [serialize_message(message) for message in email_messages if message.recipients()]
+        email_outbox.add(*payloads)
+        return len(payloads)
+
+
+def send_templated_mail(subject, template_name, recipients, context=None, from_email=None):
+    """
+    Queues one email per recipient rendered from `template_name`.
+
+    `recipients` is a list of addresses or of (address, context) pairs; per
+    recipient context is merged over the shared `context`. With the Celery
+    backend rendering happens in the worker, once per template per batch.
+    """
+    payloads = []
+    for recipient in recipients:
+        address, extra = (recipient, None) if isinstance(recipient, str) else recipient
+        payloads.append({
+            'subject': subject,
+            'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+            'to': [address],
+            'template': template_name,
+            'context': {**(context or {}), **(extra or {})},
+        })
+
+    connection = get_connection()
+    if isinstance(connection, CeleryEmailBackend):
+        email_outbox.add(*payloads)
+    else:
+        # Synchronous backends (console in development, locmem in tests)
+        templates = {}
+        connection.send_messages([build_message(payload, templates) for payload in payloads])
+    return len(payloads)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarking import compare, load_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare two benchmark result files (from `loadtest --output` or `pytest --benchmark-json`) "
+        "and fail when throughput, p95/p99 latency or query counts regressed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', help='Result file of the baseline commit')
+        parser.add_argument('head', help='Result file of the commit under test')
+        parser.add_argument('--throughput-drop', type=float, default=10.0,
+                            help='Allowed throughput drop in percent')
+        parser.add_argument('--latency-increase', type=float, default=10.0,
+                            help='Allowed p95/p99 latency increase in percent')
+        parser.add_argument('--query-increase', type=int, default=0,
+                            help='Allowed extra SQL queries per request')
+
+    def handle(self, *args, **options):
+        try:
+            base, head = load_results(options['base']), load_results(options['head'])
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Could not read results: {exc}')
+
+        rows, regressions = compare(
+            base, head,
+            throughput_drop=options['throughput_drop'],
+            latency_increase=options['latency_increase'],
+            query_increase=options['query_increase'],
+        )
+        for missing in sorted(set(base) ^ set(head)):
+            self.stdout.write(self.style.WARNING(f"{missing}: only present in one of the files"))
+
+        for row in rows:
+            suffix = '%' if row['unit'] == '%' else ''
+            line = (f"{row['scenario']:<40} {row['metric']:<10} {row['base']:>12} -> {row['head']:>12} "
+                    f"({row['change']:+}{suffix})")
+            self.stdout.write(self.style.ERROR(line) if row['regressed'] else line)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) beyond the allowed thresholds")
+        self.stdout.write(self.style.SUCCESS("No regressions"))
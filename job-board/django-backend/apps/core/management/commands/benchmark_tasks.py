@@ -0,0 +1,78 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django_redis import get_redis_connection
+
+from apps.core.benchmarking import percentile
+from apps.core.tasks import BENCHMARK_COUNTER_KEY, benchmark_noop
+
+
+class Command(BaseCommand):
+    help = "Benchmark Celery enqueue latency and tasks/sec against the configured broker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5000, help='Number of tasks to enqueue')
+        parser.add_argument('--queue', default='default', help='Queue to send the tasks to')
+        parser.add_argument('--payload-size', type=int, default=0, help='Bytes of payload per task')
+        parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for workers to drain')
+        parser.add_argument('--no-wait', action='store_true', help='Only measure enqueue latency')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        if count < 1:
+            raise CommandError('--count must be positive')
+
+        redis = get_redis_connection('default')
+        redis.delete(BENCHMARK_COUNTER_KEY)
+        payload = 'x' * options['payload_size'] or None
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(count):
+            t0 = time.perf_counter()
+            benchmark_noop.apply_async(args=[payload], queue=options['queue'])
+            latencies.append((time.perf_counter() - t0) * 1000)
+        enqueue_seconds = time.perf_counter() - started
+        latencies.sort()
+
+        results = {
+            'count': count,
+            'queue': options['queue'],
+            'payload_size': options['payload_size'],
+            'enqueue_per_sec': round(count / enqueue_seconds, 1),
+            'enqueue_ms': {
+                'mean': round(statistics.fmean(latencies), 3),
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'p99': round(percentile(latencies, 99), 3),
+                'max': round(latencies[-1], 3),
+            },
+        }
+
+        if not options['no_wait']:
+            deadline = time.monotonic() + options['timeout']
+            done = 0
+            while time.monotonic() < deadline:
+                done = int(redis.get(BENCHMARK_COUNTER_KEY) or 0)
+                if done >= count:
+                    break
+                time.sleep(0.05)
+            total_seconds = time.perf_counter() - started
+            results['completed'] = done
+            results['tasks_per_sec'] = round(done / total_seconds, 1)
+            if done < count:
+                self.stderr.write(self.style.WARNING(
+                    f"Only {done}/{count} tasks finished within {options['timeout']}s; "
+                    f"is a worker consuming '{options['queue']}'?"
+                ))
+
+        for key, value in results.items():
+            self.stdout.write(f"{key}: {value}")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Export users, profiles or applications as CSV or JSON lines, streamed from a "
+        "server-side cursor so memory stays flat however many rows there are"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--output', default='-', help='File to write, or - for stdout')
+        parser.add_argument('--format', dest='file_format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output')
+        parser.add_argument('--job', type=int, help='applications: only those to this job')
+        parser.add_argument('--employer', help='applications: only those to jobs of this user id')
+        parser.add_argument('--user-type', help='profiles: only job_seeker or recruiter profiles')
+
+    def handle(self, *args, **options):
+        params = {
+            'applications': {'job': options['job'], 'employer': options['employer']},
+            'profiles': {'user_type': options['user_type']},
+        }.get(options['dataset'], {})
+        export = exports.get_export(options['dataset'], **{key: value for key, value in params.items() if value})
+        stream = exports.stream(export, options['file_format'], options['gzip'])
+
+        started, written = time.perf_counter(), 0
+        if options['output'] == '-':
+            try:
+                for data in stream:
+                    sys.stdout.buffer.write(data)
+                    written += len(data)
+                sys.stdout.buffer.flush()
+            except BrokenPipeError:
+                return  # e.g. piped into head
+        else:
+            try:
+                with open(options['output'], 'wb') as output:
+                    for data in stream:
+                        output.write(data)
+                        written += len(data)
+            except OSError as exc:
+                raise CommandError(f"Could not write {options['output']}: {exc}")
+        # stderr, so it does not end up in an export written to stdout
+        self.stderr.write(
+            f"Exported {options['dataset']}: {written / 2 ** 20:.1f} MiB in {time.perf_counter() - started:.1f}s"
+        )
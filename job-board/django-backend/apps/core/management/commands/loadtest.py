@@ -0,0 +1,200 @@
+import itertools
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import seeding
+from apps.core.benchmarking import summarize, write_results
+
+SEARCH_TERMS = seeding.SKILLS + ['engineer', 'analyst', 'designer', 'remote', 'nairobi']
+
+
+class Scenario:
+    """One endpoint under load. `build` returns (method, path, request kwargs)."""
+    def __init__(self, name, build, auth=None):
+        self.name = name
+        self.build = build
+        self.auth = auth  # None, 'user' or 'admin'
+
+
+def _register(rng, ctx):
+    email = f"load-{ctx['run_id']}-{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}@{seeding.SEED_EMAIL_DOMAIN}"
+    password = ctx['password']
+    return 'post', '/api/accounts/users/register/', {'json': {
+        'email': email, 'password': password, 'password_confirm': password, 'first_name': 'Load',
+    }}
+
+
+def _login(rng, ctx):
+    email = seeding.seed_email(rng.randrange(ctx['users']))
+    return 'post', '/api/accounts/auth/login/', {'json': {'email': email, 'password': ctx['password']}}
+
+
+def _me(rng, ctx):
+    return 'get', '/api/accounts/users/me/', {}
+
+
+def _profile_patch(rng, ctx):
+    return 'patch', '/api/accounts/profiles/me/', {'json': {'bio': f'Bio revision {rng.randrange(10 ** 6)}'}}
+
+
+def _user_list(rng, ctx):
+    return 'get', '/api/accounts/users/', {'params': {'page': rng.randrange(1, ctx['list_pages'] + 1)}}
+
+
+def _job_search(rng, ctx):
+    return 'get', '/api/jobs/', {'params': {'q': rng.choice(SEARCH_TERMS)}}
+
+
+def _autocomplete(rng, ctx):
+    term = rng.choice(SEARCH_TERMS)
+    return 'get', '/api/search/autocomplete/', {'params': {'q': term[:rng.randint(1, len(term))]}}
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        Scenario('register', _register),
+        Scenario('login', _login),
+        Scenario('users_me', _me, auth='user'),
+        Scenario('profile_patch', _profile_patch, auth='user'),
+        Scenario('user_list', _user_list, auth='admin'),
+        Scenario('job_search', _job_search),
+        Scenario('autocomplete', _autocomplete),
+    ]
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate HTTP load against a running server (start it with config.settings.benchmark) and "
+        "report throughput, latency percentiles and SQL queries per scenario"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Server to load')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+        parser.add_argument('--requests', type=int, default=500, help='Requests per scenario')
+        parser.add_argument('--duration', type=float, help='Seconds per scenario instead of a request count')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests before each scenario')
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Number of seeded users to log in as (see seed_data)')
+        parser.add_argument('--accounts', type=int, default=20, help='Distinct users holding tokens')
+        parser.add_argument('--password', default=seeding.SEED_PASSWORD, help='Password of the seeded users')
+        parser.add_argument('--list-pages', type=int, default=50, help='Pages the user_list scenario spreads over')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the request mix')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be positive')
+
+        self.base_url = options['base_url'].rstrip('/')
+        self.timeout = options['timeout']
+        ctx = {
+            'run_id': uuid.uuid4().hex[:8],
+            'users': options['users'],
+            'password': options['password'],
+            'list_pages': options['list_pages'],
+        }
+        tokens = self._login_accounts(names, options)
+
+        results = {}
+        for name in names:
+            scenario = SCENARIOS[name]
+            if options['warmup']:
+                self._run(scenario, ctx, tokens, options, count=options['warmup'], seed=options['seed'] - 1)
+            summary = self._run(scenario, ctx, tokens, options, count=options['requests'], seed=options['seed'],
+                                duration=options['duration'])
+            results[name] = summary
+            latency = summary['latency_ms']
+            queries = summary.get('queries', {}).get('mean', '-')
+            self.stdout.write(
+                f"{name:<14} {summary['requests']:>6} req  {summary['errors']:>4} err  "
+                f"{summary['throughput']:>8} req/s  p50 {latency['p50']}ms  p95 {latency['p95']}ms  "
+                f"p99 {latency['p99']}ms  queries {queries}"
+            )
+
+        if options['output']:
+            config = {key: options[key] for key in (
+                'base_url', 'requests', 'duration', 'concurrency', 'warmup', 'users', 'accounts', 'seed',
+            )}
+            write_results(options['output'], results, **config)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _login_accounts(self, names, options):
+        """Access tokens for the scenarios that need an authenticated user."""
+        needs = {SCENARIOS[name].auth for name in names}
+        tokens = {'user': [], 'admin': []}
+        session = requests.Session()
+
+        def login(email):
+            response = session.post(
+                f'{self.base_url}/api/accounts/auth/login/',
+                json={'email': email, 'password': options['password']}, timeout=self.timeout,
+            )
+            if response.status_code != 200:
+                raise CommandError(
+                    f"Login as {email} failed ({response.status_code}); seed the data first with `seed_data`"
+                )
+            return response.json()['access']
+
+        if 'user' in needs:
+            count = min(options['accounts'], options['users'])
+            tokens['user'] = [login(seeding.seed_email(index)) for index in range(1, count + 1)]
+        if 'admin' in needs:
+            tokens['admin'] = [login(seeding.SEED_ADMIN_EMAIL)]
+        return tokens
+
+    def _run(self, scenario, ctx, tokens, options, count, seed, duration=None):
+        counter = itertools.count()
+        deadline = time.perf_counter() + duration if duration else None
+        lock = threading.Lock()
+        latencies, queries = [], []
+        errors = [0]
+
+        def worker(index):
+            rng = random.Random(f'{seed}:{scenario.name}:{index}')
+            session = requests.Session()
+            if scenario.auth:
+                token = tokens[scenario.auth][index % len(tokens[scenario.auth])]
+                session.headers['Authorization'] = f'Bearer {token}'
+            local_latencies, local_queries, local_errors = [], [], 0
+            while True:
+                if deadline is not None:
+                    if time.perf_counter() >= deadline:
+                        break
+                elif next(counter) >= count:
+                    break
+                method, path, kwargs = scenario.build(rng, ctx)
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, f'{self.base_url}{path}', timeout=self.timeout, **kwargs)
+                    ok = response.status_code < 400
+                except requests.RequestException:
+                    response, ok = None, False
+                local_latencies.append((time.perf_counter() - started) * 1000)
+                if not ok:
+                    local_errors += 1
+                elif 'X-Query-Count' in response.headers:
+                    local_queries.append(int(response.headers['X-Query-Count']))
+            with lock:
+                latencies.extend(local_latencies)
+                queries.extend(local_queries)
+                errors[0] += local_errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(worker, range(options['concurrency'])))
+        return summarize(latencies, time.perf_counter() - started, errors=errors[0], queries=queries)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 import os
 
@@ -17,7 +18,6 @@ class Command(BaseCommand):
 
         # Feature toggles (optional)
         swagger_enabled = os.getenv("SWAGGER_ENABLED", "false").lower() == "true"
-        graphql_enabled = os.getenv("GRAPHQL_ENABLED", "false").lower() == "true"
 
         # External service ports (with sensible defaults for dev/docker)
         mailhog_port = os.getenv("MAILHOG_PORT", "8025")
@@ -37,9 +37,8 @@ class Command(BaseCommand):
             swagger_path = os.getenv("SWAGGER_PATH", "/api/docs/")
             urls.append(("API Docs (Swagger)", f"{base_url}{swagger_path}"))
 
-        if graphql_enabled:
-            graphql_path = os.getenv("GRAPHQL_PATH", "/graphql/")
-            urls.append(("GraphQL Playground", f"{base_url}{graphql_path}"))
+        if settings.GRAPHQL_ENABLED:
+            urls.append(("GraphQL Playground", f"{base_url}{settings.GRAPHQL_PATH}"))
 
         # Common dev services (available when using docker-compose)
         urls.extend([
@@ -0,0 +1,51 @@
+import json
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.startup import by_package, eager_lazy_modules, measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot Django in fresh interpreters like a gunicorn worker does and report the boot time "
+        "and where the import time goes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Boots to take the median of')
+        parser.add_argument('--top', type=int, default=20, help='Modules and packages to list')
+        parser.add_argument('--budget-ms', type=float, help='Fail if the median boot time exceeds this')
+        parser.add_argument('--output', help='Write the full import profile as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive')
+
+        boots = [measure_startup()['boot_ms'] for _ in range(options['runs'])]
+        profile = measure_startup(importtime=True)
+        median = statistics.median(boots)
+        imports = profile['imports']
+
+        self.stdout.write(f"Boot time: median {median:.0f}ms over {len(boots)} runs "
+                          f"(min {min(boots):.0f}ms, max {max(boots):.0f}ms), {len(imports)} modules imported")
+
+        self.stdout.write("\nSlowest imports (cumulative, ms):")
+        for entry in sorted(imports, key=lambda e: -e['cumulative_us'])[:options['top']]:
+            self.stdout.write(f"  {entry['cumulative_us'] / 1000:8.1f}  {entry['module']}")
+
+        self.stdout.write("\nImport time by package (self, ms):")
+        for package, self_us in by_package(imports)[:options['top']]:
+            self.stdout.write(f"  {self_us / 1000:8.1f}  {package}")
+
+        eager = eager_lazy_modules(profile['modules'])
+        if eager:
+            self.stdout.write(self.style.WARNING(f"\nImported at boot but meant to load lazily: {', '.join(eager)}"))
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({'boot_ms': boots, 'imports': imports}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Profile written to {options['output']}"))
+
+        if options['budget_ms'] is not None and median > options['budget_ms']:
+            raise CommandError(f"Median boot time {median:.0f}ms exceeds the {options['budget_ms']:.0f}ms budget")
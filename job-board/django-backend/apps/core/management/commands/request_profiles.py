@@ -0,0 +1,80 @@
+import json
+import os
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "List the request profiles recorded by ProfilingMiddleware, download one, "
+        "or merge them into flame graphs per view action"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Only profiles of this view action, e.g. CustomUserViewSet.me')
+        parser.add_argument('--download', type=int, metavar='ID', help='Write one profile to --output')
+        parser.add_argument('--flamegraph', action='store_true',
+                            help='Merge the profiles of each view action into a flame graph in --output')
+        parser.add_argument('--output', help='File (--download) or directory (--flamegraph) to write; '
+                                             '.svg and .folded files are rendered, anything else is JSON')
+        parser.add_argument('--clear', action='store_true', help='Delete all stored profiles')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            profiling.clear_profiles()
+            self.stdout.write(self.style.SUCCESS('Deleted all stored profiles'))
+        elif options['download'] is not None:
+            self._download(options['download'], options['output'])
+        elif options['flamegraph']:
+            self._flamegraphs(options['view'], options['output'])
+        else:
+            self._list(options['view'])
+
+    def _list(self, view):
+        profiles = profiling.list_profiles(view=view)
+        by_view = defaultdict(list)
+        for profile in profiles:
+            by_view[profile['view']].append(profile['duration_ms'])
+        self.stdout.write(f"{len(profiles)} profiles")
+        for name, durations in sorted(by_view.items(), key=lambda item: -max(item[1])):
+            self.stdout.write(f"  {name:50} {len(durations):5} profiles, max {max(durations):8.1f}ms")
+        for profile in profiles[:20]:
+            self.stdout.write(
+                f"  #{profile['id']:<6} {profile['started_at'][:19]} {profile['method']:6} {profile['path']:40} "
+                f"{profile['status']} {profile['duration_ms']:8.1f}ms  sql {profile['sql']['count']}/"
+                f"{profile['sql']['ms']:.1f}ms  cache {profile['cache']['count']}/{profile['cache']['ms']:.1f}ms  "
+                f"({profile['reason']})"
+            )
+
+    def _download(self, profile_id, output):
+        if not output:
+            raise CommandError('--download needs --output')
+        profile = profiling.get_profile(profile_id)
+        if profile is None:
+            raise CommandError(f'No stored profile {profile_id}')
+        self._write(output, profile['stacks'], f"{profile['view']} {profile['path']}", profile)
+
+    def _flamegraphs(self, view, output):
+        if not output:
+            raise CommandError('--flamegraph needs --output')
+        os.makedirs(output, exist_ok=True)
+        views = profiling.aggregate(profiling.list_profiles(view=view, with_stacks=True))
+        if not views:
+            raise CommandError('No stored profiles')
+        for name, stacks in views.items():
+            for extension in ('svg', 'folded'):
+                self._write(os.path.join(output, f'{name}.{extension}'), stacks, name)
+
+    def _write(self, path, stacks, title, data=None):
+        if path.endswith('.svg'):
+            content = profiling.render_flamegraph(stacks, title=title)
+        elif path.endswith('.folded'):
+            content = profiling.folded_text(stacks)
+        else:
+            content = json.dumps(data if data is not None else stacks, indent=2)
+        with open(path, 'w') as fh:
+            fh.write(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,92 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import CustomUser
+from apps.core import seeding
+from apps.jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed deterministic users, profiles and jobs for benchmarks and load tests, "
+        "streamed with COPY on PostgreSQL"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='Number of users to create')
+        parser.add_argument('--jobs', type=int, default=20000, help='Number of job postings to create')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--password', default=seeding.SEED_PASSWORD, help='Password shared by all seeded users')
+        parser.add_argument('--batch-size', type=int, default=50000, help='Rows per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Parallel processes, each with its own connection')
+        parser.add_argument('--defer-indexes', action='store_true',
+                            help='Drop secondary indexes during the load and rebuild them afterwards')
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded data first')
+        parser.add_argument('--index', action='store_true', help='Rebuild the search and autocomplete indexes afterwards')
+        parser.add_argument('--dump', metavar='FILE', help='Write the seeded rows to a gzipped dump afterwards')
+        parser.add_argument('--restore', metavar='FILE', help='Load a dump instead of generating data')
+
+    def handle(self, *args, **options):
+        if options['users'] < 0 or options['jobs'] < 0:
+            raise CommandError('--users and --jobs must not be negative')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be positive')
+
+        if options['clear'] or options['restore']:
+            deleted = seeding.clear_seed_data()
+            self.stdout.write(f"Deleted {deleted} previously seeded rows")
+
+        if options['restore']:
+            started = time.perf_counter()
+            restored = seeding.restore_seed_data(options['restore'])
+            elapsed = time.perf_counter() - started
+            for table, rows in restored.items():
+                self.stdout.write(f"{table}: {rows} rows")
+            self.stdout.write(self.style.SUCCESS(f"Restored {options['restore']} in {elapsed:.1f}s"))
+        elif options['defer_indexes']:
+            with seeding.deferred_indexes(CustomUser, Job):
+                self._generate(options)
+                started = time.perf_counter()
+            self.stdout.write(f"Rebuilt secondary indexes in {time.perf_counter() - started:.1f}s")
+        else:
+            self._generate(options)
+
+        if options['index']:
+            from apps.search.documents import get_documents
+            from apps.search.indexing import rebuild_index
+            for document in get_documents():
+                index, count = rebuild_index(document)
+                self.stdout.write(f"Indexed {count} {document.name} into {index}")
+            from apps.search import autocomplete
+            counts = autocomplete.rebuild_weights()
+            version = autocomplete.publish(force=True)
+            self.stdout.write(f"Published autocomplete snapshot {version} ({sum(counts.values())} terms)")
+
+        if options['dump']:
+            size = seeding.dump_seed_data(options['dump'])
+            self.stdout.write(self.style.SUCCESS(f"Dump written to {options['dump']} ({size / 2 ** 20:.1f} MiB)"))
+
+    def _generate(self, options):
+        seeding.ensure_seed_admin(options['password'])
+        existing = seeding.seeded_user_count()
+        common = {'seed': options['seed'], 'batch_size': options['batch_size'], 'workers': options['workers']}
+
+        started = time.perf_counter()
+        users = seeding.seed_users(options['users'], password=options['password'], start=existing, **common)
+        elapsed = time.perf_counter() - started
+        if users:
+            self.stdout.write(f"Seeded {users} users in {elapsed:.1f}s ({users / elapsed:,.0f} users/s)")
+
+        if options['jobs']:
+            if not existing + users:
+                raise CommandError('Jobs need seeded recruiters: pass --users as well')
+            started = time.perf_counter()
+            jobs = seeding.seed_jobs(
+                options['jobs'], users=existing + users, start=seeding.seeded_job_count(), **common
+            )
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Seeded {jobs} jobs in {elapsed:.1f}s ({jobs / elapsed:,.0f} jobs/s)")
+        self.stdout.write(self.style.SUCCESS(f"Done (admin: {seeding.SEED_ADMIN_EMAIL})"))
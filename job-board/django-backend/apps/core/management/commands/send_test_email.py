@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.mail import email_outbox, send_templated_mail
+
+
+class Command(BaseCommand):
+    help = "Send test emails through the configured backend (e.g. to MailHog on localhost:1025)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', default='test@example.com', help='Recipient address')
+        parser.add_argument('--count', type=int, default=1, help='Number of emails to send')
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Deliver queued emails in this process instead of waiting for a worker'
+        )
+
+    def handle(self, *args, **options):
+        recipients = [
+            (options['to'], {'user': {'first_name': 'Test', 'last_name': f'#{i + 1}'}})
+            for i in range(options['count'])
+        ]
+        sent = send_templated_mail(
+            settings.PASSWORD_RESET_EMAIL_SUBJECT,
+            settings.PASSWORD_RESET_EMAIL_TEMPLATE,
+            recipients,
+            context={'reset_password_url': f"{settings.PASSWORD_RESET_URL}test-token"},
+        )
+        self.stdout.write(f"Handed {sent} email(s) to {settings.EMAIL_BACKEND}")
+
+        if options['flush']:
+            delivered = email_outbox.flush()
+            self.stdout.write(self.style.SUCCESS(
+                f"Flushed {delivered} email(s) through {settings.EMAIL_DELIVERY_BACKEND}"
+            ))
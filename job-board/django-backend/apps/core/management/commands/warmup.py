@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core.warmup import PHASES, measure_first_requests, run_warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the worker warm-up hooks and report their timings, or with --compare measure the "
+        "first-request latency of fresh processes with and without warm-up"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--phase', choices=PHASES, help='Only run this phase')
+        parser.add_argument('--compare', action='store_true',
+                            help='Boot a cold and a warmed-up process and compare their first requests')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            results = {'cold': measure_first_requests(warm=False), 'warm': measure_first_requests(warm=True)}
+            self._write_comparison(results)
+        else:
+            results = [run_warmup(phase) for phase in ([options['phase']] if options['phase'] else PHASES)]
+            for report in results:
+                self._write_report(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _write_report(self, report):
+        self.stdout.write(f"{report['phase']}: {report['total_ms']:.1f}ms")
+        for entry in report['hooks']:
+            line = f"  {entry['ms']:8.1f}ms  {entry['name']}"
+            self.stdout.write(self.style.ERROR(f"{line}  {entry['error']}") if entry['error'] else line)
+
+    def _write_comparison(self, results):
+        for report in results['warm']['warmup']:
+            self._write_report(report)
+        self.stdout.write("\nFirst / second request (ms):")
+        self.stdout.write(f"  {'endpoint':40} {'cold':>17} {'warm':>17}")
+        for cold, warm in zip(results['cold']['endpoints'], results['warm']['endpoints']):
+            self.stdout.write(
+                f"  {cold['path']:40} {cold['first_ms']:8.1f} /{cold['second_ms']:7.1f} "
+                f"{warm['first_ms']:8.1f} /{warm['second_ms']:7.1f}"
+            )
@@ -0,0 +1,90 @@
+import random
+import sys
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from . import profiling
+
+
+class QueryCountMiddleware:
+    """
+    Adds X-Query-Count and X-Query-Time-Ms headers with the SQL issued while
+    handling the request, so load tests can track query counts per endpoint
+    without DEBUG. Only enabled by the benchmark settings.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = {'count': 0, 'seconds': 0.0}
+
+        def record(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['count'] += 1
+                stats['seconds'] += time.perf_counter() - started
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record))
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(stats['count'])
+        response['X-Query-Time-Ms'] = f"{stats['seconds'] * 1000:.3f}"
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in production profiler (PROFILING_ENABLED). Profiles a random
+    PROFILING_SAMPLE_RATE of requests and every request slower than
+    PROFILING_SLOW_MS, and stores their stacks, SQL and cache timings
+    (see apps/core/profiling.py). Requests that are neither sampled nor
+    slow are discarded when they finish.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        if not sampled and not settings.PROFILING_SLOW_MS:
+            return self.get_response(request)
+
+        sampler = profiling.get_sampler()
+        token = sampler.start(sys._getframe())
+        started_at = timezone.now()
+        started = time.perf_counter()
+        try:
+            with profiling.Recorder() as recorder, ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            samples = sampler.stop(token)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        slow = bool(settings.PROFILING_SLOW_MS) and duration_ms >= settings.PROFILING_SLOW_MS
+        if sampled or slow:
+            profiling.store_profile({
+                'view': profiling.view_action(request),
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'started_at': started_at.isoformat(),
+                'duration_ms': duration_ms,
+                'reason': 'slow' if slow else 'sampled',
+                'interval_ms': settings.PROFILING_INTERVAL_MS,
+                'samples': sum(samples.values()),
+                'stacks': profiling.fold(samples),
+                **recorder.summary(),
+            })
+        return response
@@ -1,3 +1,8 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
@@ -21,4 +26,48 @@ class CustomPageNumberPagination(PageNumberPagination):
             'current_page': self.page.number,
             'total_pages': self.page.paginator.num_pages,
             'results': data
-        })
\ No newline at end of file
+        })
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids COUNT(*) on large tables.
+
+    Unfiltered querysets use the planner statistics in pg_class, filtered ones
+    the row estimate from EXPLAIN. Only when the estimate is below
+    `exact_count_threshold` is an exact COUNT(*) run, so small results stay exact.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+
+        if not queryset.query.where:
+            estimate = self._table_estimate(connection, queryset.model._meta.db_table)
+        else:
+            estimate = self._plan_estimate(connection, queryset)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+    def _table_estimate(self, connection, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            row = cursor.fetchone()
+        # reltuples is -1 until the table has been analyzed
+        return row[0] if row and row[0] >= 0 else None
+
+    def _plan_estimate(self, connection, queryset):
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,300 @@
+"""
+Request profiling for production: a statistical sampler that records the
+Python stacks of in-flight requests, plus their SQL and cache timings, for a
+sampled fraction of requests and for any request slower than
+PROFILING_SLOW_MS. Used by ProfilingMiddleware, the /api/profiling/
+endpoints and the request_profiles command.
+
+Stacks are kept in the folded format ("outer;inner;leaf" -> samples) that
+flamegraph.pl and speedscope read; render_flamegraph draws them as SVG.
+"""
+import contextvars
+import html
+import os
+import sys
+import time
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis.cache import RedisCache
+
+MAX_STACK_DEPTH = 200
+SLOWEST_QUERIES = 5
+SEQUENCE_KEY = 'profiling:seq'
+
+# The Recorder of the request being profiled in this thread or greenlet
+_recorder = contextvars.ContextVar('profiling_recorder', default=None)
+
+
+def _original(module, name):
+    """
+    `module.name` as it was before gevent monkey-patching: the sampler must
+    be a real OS thread to see greenlets, and must not use gevent locks or sleeps.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(__import__(module), name)
+    return monkey.get_original(module, name)
+
+
+class Sampler:
+    """
+    Samples the stacks of the registered requests every `interval` seconds
+    from a background OS thread.
+
+    Each request registers its own frame as the root. A sample is kept only
+    if that frame is on the stack the thread is running, which also drops
+    samples taken while another greenlet of the same thread was running.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = _original('_thread', 'allocate_lock')()
+        self._get_ident = _original('_thread', 'get_ident')
+        self._sleep = _original('time', 'sleep')
+        self._pid = None
+
+    def start(self, root_frame):
+        if self._pid != os.getpid():
+            # Threads do not survive a fork: each worker starts its own
+            self._pid = os.getpid()
+            _original('_thread', 'start_new_thread')(self._run, ())
+        token = object()
+        with self._lock:
+            self._active[token] = (self._get_ident(), root_frame, Counter())
+        return token
+
+    def stop(self, token):
+        """Unregisters a request and returns its samples as {code object tuple: count}."""
+        with self._lock:
+            return self._active.pop(token)[2]
+
+    def _run(self):
+        while True:
+            self._sleep(self.interval)
+            if self._active:
+                self.sample()
+
+    def sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, root_frame, counts in self._active.values():
+                stack = _stack(frames.get(thread_id), root_frame)
+                if stack:
+                    counts[stack] += 1
+
+
+def _stack(frame, root_frame):
+    """The code objects below `root_frame` down to `frame`, or None if root_frame is not on the stack."""
+    codes = []
+    while frame is not None and len(codes) < MAX_STACK_DEPTH:
+        if frame is root_frame:
+            return tuple(reversed(codes))
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    return None
+
+
+_sampler = None
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        _sampler = Sampler(settings.PROFILING_INTERVAL_MS / 1000)
+    return _sampler
+
+
+class Recorder:
+    """SQL and cache timings of one request."""
+    def __init__(self):
+        self.queries = []
+        self.cache_calls = Counter()
+        self.cache_seconds = Counter()
+
+    def __enter__(self):
+        self._token = _recorder.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorder.reset(self._token)
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, sql))
+
+    def record_cache(self, operation, seconds):
+        self.cache_calls[operation] += 1
+        self.cache_seconds[operation] += seconds
+
+    def summary(self):
+        slowest = sorted(self.queries, key=lambda query: -query[0])[:SLOWEST_QUERIES]
+        return {
+            'sql': {
+                'count': len(self.queries),
+                'ms': sum(seconds for seconds, _ in self.queries) * 1000,
+                'slowest': [{'ms': seconds * 1000, 'sql': sql} for seconds, sql in slowest],
+            },
+            'cache': {
+                'count': sum(self.cache_calls.values()),
+                'ms': sum(self.cache_seconds.values()) * 1000,
+                'operations': {
+                    operation: {'count': count, 'ms': self.cache_seconds[operation] * 1000}
+                    for operation, count in self.cache_calls.items()
+                },
+            },
+        }
+
+
+def _timed(operation):
+    def method(self, *args, **kwargs):
+        recorder = _recorder.get()
+        if recorder is None:
+            return getattr(super(TimedRedisCache, self), operation)(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return getattr(super(TimedRedisCache, self), operation)(*args, **kwargs)
+        finally:
+            recorder.record_cache(operation, time.perf_counter() - started)
+    method.__name__ = operation
+    return method
+
+
+class TimedRedisCache(RedisCache):
+    """django_redis cache backend that reports its calls to the request being profiled, if any."""
+
+
+for _operation in ('get', 'get_many', 'set', 'set_many', 'add', 'delete', 'delete_many',
+                   'incr', 'decr', 'has_key', 'touch', 'get_or_set', 'delete_pattern'):
+    setattr(TimedRedisCache, _operation, _timed(_operation))
+
+
+def frame_label(code):
+    """'function (path:line)', with paths relative to the project or site-packages."""
+    filename = code.co_filename
+    base = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(base):
+        filename = filename[len(base):]
+    elif 'site-packages' + os.sep in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return f'{code.co_qualname} ({filename}:{code.co_firstlineno})'
+
+
+def fold(samples):
+    """Turns Sampler samples into folded stacks: {'outer;inner;leaf': count}."""
+    folded = Counter()
+    for stack, count in samples.items():
+        folded[';'.join(frame_label(code) for code in stack)] += count
+    return dict(folded)
+
+
+def view_action(request):
+    """'ViewSet.action' for DRF viewsets, otherwise the URL name or path."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return request.path
+    view_class = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None) or {}
+    if view_class is not None:
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f'{view_class.__name__}.{action}'
+    return match.view_name or request.path
+
+
+def _slot_key(profile_id):
+    return f'profiling:slot:{profile_id % settings.PROFILING_MAX_STORED}'
+
+
+def store_profile(profile):
+    """
+    Stores a profile and returns its id. Profiles live in a ring of
+    PROFILING_MAX_STORED cache slots, so the newest ones overwrite the oldest.
+    """
+    cache.add(SEQUENCE_KEY, 0, timeout=None)
+    profile_id = cache.incr(SEQUENCE_KEY)
+    cache.set(_slot_key(profile_id), {**profile, 'id': profile_id}, timeout=settings.PROFILING_TTL)
+    return profile_id
+
+
+def get_profile(profile_id):
+    profile = cache.get(_slot_key(profile_id))
+    return profile if profile and profile['id'] == profile_id else None
+
+
+def list_profiles(view=None, with_stacks=False):
+    """Stored profiles, newest first; without their stacks unless `with_stacks`."""
+    keys = [f'profiling:slot:{slot}' for slot in range(settings.PROFILING_MAX_STORED)]
+    profiles = [profile for profile in cache.get_many(keys).values() if view is None or profile['view'] == view]
+    profiles.sort(key=lambda profile: -profile['id'])
+    if not with_stacks:
+        profiles = [{key: value for key, value in profile.items() if key != 'stacks'} for profile in profiles]
+    return profiles
+
+
+def clear_profiles():
+    cache.delete_many([SEQUENCE_KEY] + [f'profiling:slot:{slot}' for slot in range(settings.PROFILING_MAX_STORED)])
+
+
+def aggregate(profiles):
+    """Sums the folded stacks of `profiles` per view action: {view: {stack: samples}}."""
+    views = {}
+    for profile in profiles:
+        views.setdefault(profile['view'], Counter()).update(profile['stacks'])
+    return {view: dict(stacks) for view, stacks in views.items()}
+
+
+def folded_text(stacks):
+    """Folded stacks as the text flamegraph.pl and speedscope import."""
+    return ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
+
+
+def render_flamegraph(stacks, title='', width=1200, row_height=16):
+    """Draws folded stacks as a self-contained SVG flame graph (root at the bottom)."""
+    tree = {'children': {}, 'count': 0}
+    for stack, count in stacks.items():
+        node = tree
+        node['count'] += count
+        for frame in stack.split(';'):
+            node = node['children'].setdefault(frame, {'children': {}, 'count': 0})
+            node['count'] += count
+
+    total = tree['count'] or 1
+    boxes = []
+
+    def layout(node, x, depth):
+        for name, child in sorted(node['children'].items()):
+            box_width = child['count'] / total * width
+            if box_width >= 0.5:
+                boxes.append((name, child['count'], x, depth, box_width))
+                layout(child, x, depth + 1)
+            x += box_width
+
+    layout(tree, 0.0, 0)
+    depth = max((box[3] for box in boxes), default=0) + 1
+    height = (depth + 2) * row_height
+    rows = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="4" y="{row_height - 4}">{html.escape(title)} ({tree["count"]} samples)</text>',
+    ]
+    for name, count, x, level, box_width in boxes:
+        y = height - (level + 1) * row_height
+        hue = 10 + zlib.crc32(name.encode()) % 50
+        label = html.escape(name)
+        chars = int(box_width / 7)
+        text = label if len(name) <= chars else (html.escape(name[:chars - 2]) + '..' if chars > 3 else '')
+        rows.append(
+            f'<g><title>{label} ({count} samples, {count / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{box_width:.1f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},90%,60%)"/>'
+            f'<text x="{x + 2:.1f}" y="{y + row_height - 4}">{text}</text></g>'
+        )
+    rows.append('</svg>')
+    return '\n'.join(rows)
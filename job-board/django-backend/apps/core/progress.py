@@ -0,0 +1,65 @@
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+
+PROGRESS_TTL = 60 * 60 * 24  # Keep job status around for a day, unless created with a longer ttl
+
+
+class JobProgress:
+    """
+    Progress record for long-running background work (bulk updates, exports),
+    stored in the cache so any process can report it.
+    """
+    def __init__(self, job_id):
+        self.job_id = str(job_id)
+        self.key = f'progress:{self.job_id}'
+        self.payload_key = f'progress:{self.job_id}:payload'
+
+    @classmethod
+    def create(cls, kind, total, payload=None, ttl=PROGRESS_TTL, **meta):
+        """
+        Registers a pending job. `payload` (e.g. the selected ids) is stored
+        next to the status so it does not have to travel through the broker.
+        The status is kept for `ttl` seconds after its last update.
+        """
+        progress = cls(uuid.uuid4())
+        state = {
+            'job_id': progress.job_id,
+            'kind': kind,
+            'status': 'pending',
+            'total': total,
+            'processed': 0,
+            'created_at': timezone.now().isoformat(),
+            'finished_at': None,
+            'error': None,
+            'ttl': ttl,
+            **meta,
+        }
+        values = {progress.key: state}
+        if payload is not None:
+            values[progress.payload_key] = payload
+        cache.set_many(values, timeout=ttl)
+        return progress
+
+    def get(self):
+        return cache.get(self.key)
+
+    def get_payload(self):
+        return cache.get(self.payload_key)
+
+    def _update(self, **changes):
+        state = self.get() or {'job_id': self.job_id}
+        state.update(changes)
+        cache.set(self.key, state, timeout=state.get('ttl', PROGRESS_TTL))
+        return state
+
+    def update(self, processed):
+        return self._update(status='running', processed=processed)
+
+    def finish(self, **result):
+        cache.delete(self.payload_key)
+        return self._update(status='done', finished_at=timezone.now().isoformat(), **result)
+
+    def fail(self, error):
+        return self._update(status='failed', finished_at=timezone.now().isoformat(), error=str(error))
@@ -0,0 +1,60 @@
+from django.conf import settings
+
+# Queue names. Latency-sensitive work (emails the user is waiting for, cache
+# invalidation) goes to REALTIME, everything else that is not urgent to BULK.
+REALTIME_QUEUE = 'realtime'
+DEFAULT_QUEUE = 'default'
+BULK_QUEUE = 'bulk'
+
+DEFAULT_QUEUE_PROFILES = {
+    REALTIME_QUEUE: {'prefetch_multiplier': 1, 'acks_late': True},
+    DEFAULT_QUEUE: {'prefetch_multiplier': 4, 'acks_late': True},
+    BULK_QUEUE: {'prefetch_multiplier': 16, 'acks_late': False},
+}
+
+
+def get_queue_profile(queue):
+    """
+    Returns the worker/task tuning for a queue, falling back to the default queue.
+    """
+    profiles = getattr(settings, 'TASK_QUEUE_PROFILES', DEFAULT_QUEUE_PROFILES)
+    return profiles.get(queue) or profiles.get(DEFAULT_QUEUE) or DEFAULT_QUEUE_PROFILES[DEFAULT_QUEUE]
+
+
+def worker_overrides(queues=None):
+    """
+    Returns Celery config overrides for a worker consuming the given queues.
+
+    Prefetch is a per-worker setting, so a worker that mixes queues takes the
+    smallest multiplier: a bulk backlog must never sit in front of realtime tasks.
+    """
+    if not queues:
+        queues = [DEFAULT_QUEUE]
+    elif isinstance(queues, str):
+        queues = [q.strip() for q in queues.split(',') if q.strip()]
+
+    profiles = [get_queue_profile(queue) for queue in queues]
+    return {
+        'worker_prefetch_multiplier': min(p['prefetch_multiplier'] for p in profiles),
+    }
+
+
+def queued_task(queue=DEFAULT_QUEUE, **options):
+    """
+    Declares a shared task bound to a queue, with the queue's ack-late setting.
+
+    Results are not stored unless the task passes ignore_result=False.
+
+        @queued_task(BULK_QUEUE, bind=True, max_retries=3)
+        def rebuild_something(self, ids):
+            ...
+    """
+    # Celery is imported here, when the first task module loads, instead of at
+    # Django startup. Loading the project app makes it current for shared tasks.
+    from celery import shared_task
+    from config.celery import app  # noqa: F401
+
+    profile = get_queue_profile(queue)
+    options.setdefault('acks_late', profile['acks_late'])
+    options.setdefault('ignore_result', True)
+    return shared_task(queue=queue, **options)
@@ -0,0 +1,402 @@
+"""
+Deterministic fake data for benchmarks and local load tests.
+
+The same seed always produces the same users, profiles and jobs, so result
+files from different commits are measured against identical data. Rows are
+generated per fixed-size chunk with their own random stream, which keeps the
+output independent of how many workers produced it.
+
+On PostgreSQL rows are streamed with COPY (bypassing create_user hashing,
+model signals and per-row INSERTs); other databases fall back to bulk_create.
+"""
+import gzip
+import hashlib
+import io
+import itertools
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from apps.accounts.models import CustomUser, Profile
+from apps.core import geo
+from apps.jobs.models import Job
+from apps.jobs.partitions import ensure_partitions
+
+SEED_EMAIL_DOMAIN = 'seed.jobboard.test'
+SEED_PASSWORD = 'seed-password-123'
+SEED_ADMIN_EMAIL = f'admin@{SEED_EMAIL_DOMAIN}'
+RECRUITER_EVERY = 10  # One in ten seeded users is a recruiter
+CHUNK_SIZE = 10000  # Rows per random stream; changing it changes the generated data
+JOB_HISTORY = timedelta(days=90)  # Seeded jobs are posted over this period
+JOB_SPREAD_DEGREES = 0.2  # Standard deviation of seeded job coordinates around their city
+
+FIRST_NAMES = ['Amina', 'Brian', 'Chen', 'Diego', 'Esther', 'Fatuma', 'Grace', 'Hiro', 'Ivan', 'Joy',
+               'Kofi', 'Lena', 'Mwangi', 'Nadia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Wanjiru']
+LAST_NAMES = ['Achieng', 'Baker', 'Chege', 'Dubois', 'Eze', 'Fischer', 'Garcia', 'Hassan', 'Ito', 'Juma',
+              'Kamau', 'Lopez', 'Mensah', 'Novak', 'Otieno', 'Patel', 'Rossi', 'Smith', 'Tanaka', 'Wafula']
+SKILLS = ['python', 'django', 'postgres', 'react', 'typescript', 'aws', 'docker', 'kubernetes', 'go',
+          'java', 'sql', 'figma', 'excel', 'sales', 'marketing', 'accounting', 'rust', 'terraform']
+COMPANIES = ['Acme', 'Savanna Labs', 'Northwind', 'Kilimanjaro Tech', 'Globex', 'Umoja Systems',
+             'Initech', 'Baobab Digital', 'Hooli', 'Nairobi Data Co']
+TITLES = ['Backend Engineer', 'Frontend Engineer', 'Data Analyst', 'Product Designer', 'DevOps Engineer',
+          'Sales Associate', 'Marketing Manager', 'Accountant', 'QA Engineer', 'Data Engineer',
+          'Mobile Developer', 'Support Specialist']
+CATEGORIES = ['Engineering', 'Data', 'Design', 'Sales', 'Marketing', 'Finance', 'Support']
+LOCATIONS = ['Nairobi', 'Mombasa', 'Kisumu', 'Lagos', 'Accra', 'Kigali', 'Remote', 'Berlin', 'London']
+JOB_TYPES = ['full_time', 'part_time', 'contract', 'internship']
+# Precomputed so a row costs one choice() instead of a sample() and a join
+PROFILE_SKILLS = [' '.join(combo) for combo in itertools.combinations(SKILLS, 4)]
+JOB_SKILLS = [', '.join(combo) for combo in itertools.combinations(SKILLS, 3)]
+
+# Column order of the generated tuples. Serial ids are left to the sequences.
+USER_COLUMNS = ('id', 'email', 'password', 'is_superuser', 'is_staff', 'is_active', 'date_joined', 'last_login')
+PROFILE_COLUMNS = (
+    'user_id', 'first_name', 'last_name', 'phone_number', 'bio', 'profile_picture', 'user_type', 'resume',
+    'skills', 'experience', 'education', 'location', 'company_name', 'company_website', 'company_description',
+    'position', 'linkedin_profile', 'created_at', 'updated_at',
+)
+JOB_COLUMNS = (
+    'employer_id', 'title', 'company_name', 'description', 'category', 'location', 'latitude', 'longitude',
+    'geohash', 'job_type', 'is_active', 'created_at', 'updated_at',
+)
+SEED_TABLES = (
+    (CustomUser._meta.db_table, USER_COLUMNS),
+    (Profile._meta.db_table, PROFILE_COLUMNS),
+    (Job._meta.db_table, JOB_COLUMNS),
+)
+
+
+def seed_email(index):
+    return f'user{index}@{SEED_EMAIL_DOMAIN}'
+
+
+def seed_user_id(seed, index):
+    """
+    Primary key (a UUID4 string) of the seeded user `index`, computable
+    without a query. Formatted by hand: uuid.UUID() costs twice as much.
+    """
+    digest = hashlib.md5(f'{seed}:{index}'.encode()).hexdigest()
+    variant = '89ab'[int(digest[16], 16) & 3]
+    return f'{digest[:8]}-{digest[8:12]}-4{digest[13:16]}-{variant}{digest[17:20]}-{digest[20:]}'
+
+
+@lru_cache(maxsize=None)
+def _timestamp(now, minutes_ago):
+    # Timestamps repeat at minute granularity; formatting each only once matters at 100k rows/s
+    return (now - timedelta(minutes=minutes_ago)).isoformat()
+
+
+def _rng(seed, kind, chunk):
+    return random.Random(f'{seed}:{kind}:{chunk}')
+
+
+def _chunked(start, stop, kind, seed):
+    """
+    Yields (index, rng, emit) for every row of the chunks covering
+    [start, stop). Rows before `start` must still be generated (emit=False)
+    so each row consumes the same random numbers as in a full run.
+    """
+    if stop <= start:
+        return
+    for chunk in range(start // CHUNK_SIZE, (stop - 1) // CHUNK_SIZE + 1):
+        rng = _rng(seed, kind, chunk)
+        for index in range(chunk * CHUNK_SIZE, min((chunk + 1) * CHUNK_SIZE, stop)):
+            yield index, rng, index >= start
+
+
+def generate_users(start, stop, seed, password_hash, now):
+    """
+    Yields (user, profile) value tuples in USER_COLUMNS / PROFILE_COLUMNS order.
+    Ids and timestamps are strings, ready for COPY.
+    """
+    for index, rng, emit in _chunked(start, stop, 'users', seed):
+        user_id = seed_user_id(seed, index)
+        joined = _timestamp(now, rng.randrange(60 * 24 * 365))
+        recruiter = index % RECRUITER_EVERY == 0
+        user = (user_id, seed_email(index), password_hash, False, False, True, joined, None)
+        profile = (
+            user_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), None, '', None,
+            'recruiter' if recruiter else 'job_seeker', None,
+            '' if recruiter else rng.choice(PROFILE_SKILLS), '', '', '',
+            rng.choice(COMPANIES) if recruiter else '', '', '',
+            'Talent Partner' if recruiter else '', '', joined, joined,
+        )
+        if emit:
+            yield user, profile
+
+
+def _job_point(rng, location):
+    """(latitude, longitude, geohash) strings of a job in `location`, scattered around the city."""
+    # Drawn even for remote jobs so every row consumes the same random numbers
+    dlat, dlon = rng.gauss(0, JOB_SPREAD_DEGREES), rng.gauss(0, JOB_SPREAD_DEGREES)
+    city = geo.CITIES.get(location.lower())
+    if city is None:
+        return None, None, None
+    latitude, longitude = round(city[0] + dlat, 6), round(city[1] + dlon, 6)
+    return str(latitude), str(longitude), geo.encode(latitude, longitude)
+
+
+def generate_jobs(start, stop, seed, users, now):
+    """Yields job value tuples in JOB_COLUMNS order, posted by the seeded recruiters."""
+    recruiters = (users + RECRUITER_EVERY - 1) // RECRUITER_EVERY
+    if not recruiters:
+        raise ValueError('Seed users before jobs: no seeded recruiters')
+    geo_chunk = None
+    for index, rng, emit in _chunked(start, stop, 'jobs', seed):
+        if index // CHUNK_SIZE != geo_chunk:
+            # Coordinates have their own stream, so adding them left the other columns unchanged
+            geo_chunk = index // CHUNK_SIZE
+            geo_rng = _rng(seed, 'jobs-geo', geo_chunk)
+        title = rng.choice(TITLES)
+        skills = rng.choice(JOB_SKILLS)
+        created = _timestamp(now, rng.randrange(int(JOB_HISTORY.total_seconds() // 60)))
+        employer_id, company, category = (
+            seed_user_id(seed, rng.randrange(recruiters) * RECRUITER_EVERY), rng.choice(COMPANIES),
+            rng.choice(CATEGORIES),
+        )
+        location = rng.choice(LOCATIONS)
+        point = _job_point(geo_rng, location)
+        row = (
+            employer_id, title, company, f"We are hiring a {title} with experience in {skills}.",
+            category, location, *point, rng.choice(JOB_TYPES),
+            rng.random() > 0.1, created, created,
+        )
+        if emit:
+            yield row
+
+
+# Generated values are strings, booleans or None and never contain tabs,
+# newlines or backslashes, so COPY text format needs no escaping
+_COPY_LITERALS = {None: '\\N', True: 't', False: 'f'}
+
+
+def _copy_line(row):
+    return '\t'.join([value if value.__class__ is str else _COPY_LITERALS[value] for value in row]) + '\n'
+
+
+def _copy_rows(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    buffer.writelines(map(_copy_line, rows))
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer, 1 << 20)
+
+
+def _insert_users(start, stop, seed, password_hash, now):
+    """Writes users [start, stop) in one transaction, one COPY per chunk and table."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Safe for throwaway data: a crash loses at most the last commits
+            cursor.execute('SET LOCAL synchronous_commit = off')
+        for chunk_start in range(start, stop, CHUNK_SIZE):
+            rows = list(generate_users(chunk_start, min(chunk_start + CHUNK_SIZE, stop), seed, password_hash, now))
+            if connection.vendor == 'postgresql':
+                _copy_rows(cursor, CustomUser._meta.db_table, USER_COLUMNS, [user for user, _ in rows])
+                _copy_rows(cursor, Profile._meta.db_table, PROFILE_COLUMNS, [profile for _, profile in rows])
+            else:
+                CustomUser.objects.bulk_create(CustomUser(**dict(zip(USER_COLUMNS, user))) for user, _ in rows)
+                Profile.objects.bulk_create(
+                    Profile(**dict(zip(PROFILE_COLUMNS, profile))) for _, profile in rows
+                )
+    return stop - start
+
+
+def _insert_jobs(start, stop, seed, users, now):
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL synchronous_commit = off')
+        for chunk_start in range(start, stop, CHUNK_SIZE):
+            rows = generate_jobs(chunk_start, min(chunk_start + CHUNK_SIZE, stop), seed, users, now)
+            if connection.vendor == 'postgresql':
+                _copy_rows(cursor, Job._meta.db_table, JOB_COLUMNS, rows)
+            else:
+                Job.objects.bulk_create(Job(**dict(zip(JOB_COLUMNS, row))) for row in rows)
+    return stop - start
+
+
+def _run_parallel(func, count, start, batch_size, workers, *args):
+    """
+    Runs func(range_start, range_stop, *args) over [start, start + count) in
+    batches, in `workers` forked processes when workers > 1.
+    """
+    ranges = [(lo, min(lo + batch_size, start + count)) for lo in range(start, start + count, batch_size)]
+    if workers <= 1 or len(ranges) <= 1:
+        return sum(func(lo, hi, *args) for lo, hi in ranges)
+
+    # Children must open their own connections rather than share the parent's socket
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(func, lo, hi, *args) for lo, hi in ranges]
+        return sum(future.result() for future in futures)
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """
+    Drops the secondary indexes declared in the models' Meta.indexes for the
+    duration of a bulk load and rebuilds them afterwards, which is much
+    cheaper than maintaining them row by row. Unique constraints stay.
+    """
+    indexes = [(model, index) for model in models for index in model._meta.indexes]
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+
+
+def seed_users(count, seed=42, password=SEED_PASSWORD, batch_size=50000, start=0, workers=1):
+    """
+    Creates `count` users with profiles. The password is hashed once and
+    shared, since hashing per user would dominate the run time.
+    Returns the number of users created.
+    """
+    password_hash = make_password(password)
+    return _run_parallel(_insert_users, count, start, batch_size, workers, seed, password_hash, timezone.now())
+
+
+def seed_jobs(count, users, seed=42, batch_size=50000, start=0, workers=1):
+    """
+    Creates `count` job postings spread over the recruiters among the first
+    `users` seeded users (which must exist with the same seed).
+    Returns the number of jobs created.
+    """
+    now = timezone.now()
+    if connection.vendor == 'postgresql':
+        # COPY routes rows into the monthly partitions, so they must exist first
+        ensure_partitions(Job._meta.db_table, since=now - JOB_HISTORY)
+    return _run_parallel(_insert_jobs, count, start, batch_size, workers, seed, users, now)
+
+
+def seeded_user_count():
+    return CustomUser.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').exclude(email=SEED_ADMIN_EMAIL).count()
+
+
+def seeded_job_count():
+    return Job.objects.filter(employer__email__endswith=f'@{SEED_EMAIL_DOMAIN}').count()
+
+
+def ensure_seed_admin(password=SEED_PASSWORD):
+    user = CustomUser.objects.filter(email=SEED_ADMIN_EMAIL).first()
+    if user is None:
+        user = CustomUser.objects.create_superuser(email=SEED_ADMIN_EMAIL, password=password)
+    return user
+
+
+def _delete_cascading(queryset):
+    """
+    Set-based delete following CASCADE and SET_NULL relations. Model.delete()
+    would load every row because of the search signals, which takes minutes
+    at this size.
+    """
+    model = queryset.model
+    for relation in model._meta.related_objects:
+        related = relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': queryset})
+        if relation.many_to_many:
+            relation.through._base_manager.filter(
+                **{f'{relation.field.m2m_reverse_field_name()}__in': queryset}
+            )._raw_delete(queryset.db)
+            continue
+        if relation.on_delete.__name__ == 'SET_NULL':
+            related.update(**{relation.field.name: None})
+            continue
+        if relation.on_delete.__name__ != 'CASCADE':
+            raise ValueError(f'Cannot bulk delete {model.__name__}: {relation} is not CASCADE or SET_NULL')
+        _delete_cascading(related)
+    for field in model._meta.many_to_many:
+        field.remote_field.through._base_manager.filter(**{f'{field.m2m_field_name()}__in': queryset})._raw_delete(
+            queryset.db
+        )
+    return queryset._raw_delete(queryset.db)
+
+
+def clear_seed_data():
+    """Deletes everything created by the seeder (jobs cascade with their employers)."""
+    seeded = CustomUser._base_manager.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+    with transaction.atomic():
+        return _delete_cascading(seeded)
+
+
+def _seed_queries():
+    users, profiles, jobs = (table for table, _ in SEED_TABLES)
+    seeded = f"u.email LIKE '%@{SEED_EMAIL_DOMAIN}'"
+
+    def select(alias, columns):
+        return ', '.join(f'{alias}.{column}' for column in columns)
+
+    return [
+        (users, USER_COLUMNS, f"SELECT {select('u', USER_COLUMNS)} FROM {users} u WHERE {seeded}"),
+        (profiles, PROFILE_COLUMNS,
+         f"SELECT {select('p', PROFILE_COLUMNS)} FROM {profiles} p JOIN {users} u ON u.id = p.user_id "
+         f"WHERE {seeded}"),
+        (jobs, JOB_COLUMNS,
+         f"SELECT {select('j', JOB_COLUMNS)} FROM {jobs} j JOIN {users} u ON u.id = j.employer_id "
+         f"WHERE {seeded}"),
+    ]
+
+
+def dump_seed_data(path, compresslevel=1):
+    """
+    Writes the seeded rows to a gzipped file of COPY sections. It restores
+    with restore_seed_data() or, as plain SQL, with `gunzip -c FILE | psql`.
+    Returns the file size in bytes.
+    """
+    with gzip.open(path, 'wt', compresslevel=compresslevel) as fh, connection.cursor() as cursor:
+        fh.write('-- Seed data dump (apps.core.seeding)\n')
+        for table, columns, query in _seed_queries():
+            fh.write(f"COPY {table} ({', '.join(columns)}) FROM stdin;\n")
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT", fh, 1 << 20)
+            fh.write('\\.\n')
+    with open(path, 'rb') as fh:
+        return fh.seek(0, io.SEEK_END)
+
+
+class _CopySection:
+    """File-like view of one COPY section of a dump, ending at the `\\.` line."""
+    def __init__(self, fh):
+        self.fh = fh
+        self.done = False
+
+    def readline(self, size=-1):
+        if self.done:
+            return ''
+        line = self.fh.readline()
+        if not line or line.rstrip('\n') == '\\.':
+            self.done = True
+            return ''
+        return line
+
+    def read(self, size=-1):
+        lines, length = [], 0
+        while size < 0 or length < size:
+            line = self.readline()
+            if not line:
+                break
+            lines.append(line)
+            length += len(line)
+        return ''.join(lines)
+
+
+def restore_seed_data(path):
+    """Streams a dump written by dump_seed_data() back in. Returns the rows per table."""
+    restored = {}
+    with gzip.open(path, 'rt') as fh, transaction.atomic(), connection.cursor() as cursor:
+        for line in iter(fh.readline, ''):
+            if not line.startswith('COPY '):
+                continue
+            cursor.copy_expert(line.replace('FROM stdin;', 'FROM STDIN').strip(), _CopySection(fh), 1 << 20)
+            restored[line.split()[1]] = cursor.rowcount
+        # Moves rows of months without a partition out of the default one
+        ensure_partitions(Job._meta.db_table)
+    return restored
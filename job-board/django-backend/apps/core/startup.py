@@ -0,0 +1,78 @@
+"""
+Measures how long a fresh process takes to become ready to serve requests,
+and which imports that time goes to. Used by the profile_startup command and
+the startup regression test.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+# What a gunicorn worker does before its first request
+BOOT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({'boot_ms': (time.perf_counter() - started) * 1000, 'modules': sorted(sys.modules)}))
+"""
+
+# Integrations that must only be imported when they are first used
+LAZY_MODULES = ('celery', 'kombu', 'elasticsearch', 'boto3', 'botocore', 'storages', 'PIL')
+
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """
+    Parses `python -X importtime` output into a list of
+    {'module', 'self_us', 'cumulative_us', 'depth'} dicts, in import order.
+    """
+    imports = []
+    for line in output.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append({
+                'module': module,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': len(indent) // 2,
+            })
+    return imports
+
+
+def by_package(imports):
+    """Self import time per top-level package, most expensive first."""
+    totals = defaultdict(int)
+    for entry in imports:
+        totals[entry['module'].split('.')[0]] += entry['self_us']
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def measure_startup(settings_module=None, importtime=False):
+    """
+    Boots Django in a fresh interpreter and returns {'boot_ms', 'modules'},
+    plus 'imports' (see parse_importtime) when `importtime` is set.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module or settings.SETTINGS_MODULE}
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', BOOT_SCRIPT]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=settings.BASE_DIR, env=env)
+    if result.returncode:
+        raise RuntimeError(f'Boot failed: {result.stderr.strip().splitlines()[-1:]}')
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    if importtime:
+        data['imports'] = parse_importtime(result.stderr)
+    return data
+
+
+def eager_lazy_modules(modules):
+    """The LAZY_MODULES (or their submodules) a boot imported."""
+    loaded = {module.split('.')[0] for module in modules}
+    return sorted(loaded.intersection(LAZY_MODULES))
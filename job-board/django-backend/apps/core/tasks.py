@@ -0,0 +1,72 @@
+import logging
+import random
+
+from django_redis import get_redis_connection
+
+from .batching import get_batch
+from .exports import purge_exports, write_export
+from .mail import deliver
+from .progress import JobProgress
+from .queues import BULK_QUEUE, DEFAULT_QUEUE, REALTIME_QUEUE, queued_task
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_COUNTER_KEY = 'benchmark:tasks:done'
+
+
+@queued_task(BULK_QUEUE, bind=True, max_retries=5, default_retry_delay=10)
+def flush_batch(self, name):
+    """
+    Flushes a registered Batch. Failed chunks are requeued by the batch itself,
+    so retrying simply drains them again; the last retry sets aside the chunks
+    that still fail (Batch.failed_key).
+    """
+    try:
+        return get_batch(name).flush(final=self.request.retries >= self.max_retries)
+    except LookupError:
+        raise
+    except Exception as exc:
+        raise self.retry(exc=exc)
+
+
+@queued_task(DEFAULT_QUEUE)
+def benchmark_noop(payload=None):
+    """
+    No-op task used by the benchmark_tasks command to measure throughput.
+    """
+    get_redis_connection('default').incr(BENCHMARK_COUNTER_KEY)
+
+
+@queued_task(REALTIME_QUEUE, bind=True, max_retries=6, default_retry_delay=30)
+def send_email_batch(self, payloads):
+    """
+    Retries emails that failed to deliver, backing off exponentially
+    (30s, 60s, 120s, ...). Only the messages that fail again are retried.
+    """
+    failed = deliver(payloads)
+    if failed:
+        if self.request.retries >= self.max_retries:
+            logger.error('Giving up on %d emails after %d retries', len(failed), self.request.retries)
+            return len(payloads) - len(failed)
+        countdown = self.default_retry_delay * 2 ** self.request.retries
+        raise self.retry(args=[failed], countdown=countdown + random.randint(0, 10))
+    return len(payloads)
+
+
+@queued_task(BULK_QUEUE, soft_time_limit=60 * 60)
+def run_export(job_id):
+    """Background half of apps.core.exports.export_response for large exports."""
+    progress = JobProgress(job_id)
+    if progress.get() is None:
+        return None
+    try:
+        return write_export(progress)
+    except Exception as exc:
+        progress.fail(exc)
+        raise
+
+
+@queued_task(BULK_QUEUE)
+def purge_export_files():
+    """Periodic: deletes background export files past their retention."""
+    return purge_exports()
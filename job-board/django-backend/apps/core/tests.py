@@ -0,0 +1,512 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import smtplib
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import CustomUser
+from apps.jobs.models import Application, Job
+
+from . import exports
+from . import geo
+from . import mail as core_mail
+from . import profiling
+from . import seeding
+from .batching import Batch
+from .benchmarking import compare, load_results, summarize
+from .mail import CeleryEmailBackend, deliver, email_outbox, send_templated_mail
+from .queues import worker_overrides
+from .startup import LAZY_MODULES, eager_lazy_modules, measure_startup, parse_importtime
+from .tasks import benchmark_noop, flush_batch, run_export
+from .throttling import ExportThrottle
+from . import warmup
+
+
+class QueueTests(TestCase):
+    def test_worker_overrides_use_smallest_prefetch(self):
+        """A worker mixing queues takes the most latency-sensitive prefetch."""
+        self.assertEqual(worker_overrides(['bulk'])['worker_prefetch_multiplier'], 16)
+        self.assertEqual(worker_overrides('realtime,bulk')['worker_prefetch_multiplier'], 1)
+        self.assertEqual(worker_overrides(None)['worker_prefetch_multiplier'], 4)
+
+    def test_queued_task_options(self):
+        """Tasks are bound to their queue and do not store results."""
+        self.assertEqual(flush_batch.queue, 'bulk')
+        self.assertFalse(flush_batch.acks_late)
+        self.assertTrue(flush_batch.ignore_result)
+        self.assertEqual(benchmark_noop.queue, 'default')
+        self.assertTrue(benchmark_noop.acks_late)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.handled = []
+        self.batch = Batch('tests.batch', self.handled.append, max_size=2)
+        unique = Batch('tests.batch', self.handled.append, unique=True)
+        keys = [self.batch.items_key, unique.items_key, self.batch.scheduled_key, self.batch.failed_key]
+        self.batch.redis.delete(*keys)
+        self.addCleanup(self.batch.redis.delete, *keys)
+
+    @mock.patch('apps.core.tasks.flush_batch.apply_async')
+    def test_add_keeps_every_item_and_schedules_once(self, apply_async):
+        """Items are kept in order, duplicates included, and only one flush is scheduled."""
+        self.batch.add(1, 2)
+        self.batch.add(2, 3)
+        self.assertEqual(self.batch.pending(), 4)
+        apply_async.assert_called_once_with(args=['tests.batch'], countdown=2, queue='bulk')
+        self.batch.flush()
+        self.assertEqual(self.handled, [[1, 2], [2, 3]])
+
+    @mock.patch('apps.core.tasks.flush_batch.apply_async')
+    def test_unique_batches_coalesce_items(self, apply_async):
+        """Duplicate items of a unique batch collapse."""
+        batch = Batch('tests.batch', self.handled.append, unique=True)
+        batch.add(1, 2)
+        batch.add(2, 3)
+        self.assertEqual(batch.pending(), 3)
+
+    @mock.patch('apps.core.tasks.flush_batch.apply_async')
+    def test_flush_drains_in_chunks(self, apply_async):
+        """Flush hands the handler at most max_size items per call."""
+        self.batch.add(1, 2, 3)
+        self.assertEqual(self.batch.flush(), 3)
+        self.assertEqual(len(self.handled), 2)
+        self.assertEqual(sorted(sum(self.handled, [])), [1, 2, 3])
+        self.assertEqual(self.batch.pending(), 0)
+
+        # The next add after a flush schedules again
+        self.batch.add(4)
+        self.assertEqual(apply_async.call_count, 2)
+
+    @mock.patch('apps.core.tasks.flush_batch.apply_async')
+    def test_failed_flush_requeues_items(self, apply_async):
+        """Items of a failing chunk are put back for the retry."""
+        def fail(items):
+            raise RuntimeError('boom')
+
+        batch = Batch('tests.batch', fail)
+        batch.add(1, 2)
+        with self.assertRaises(RuntimeError):
+            batch.flush()
+        self.assertEqual(batch.pending(), 2)
+
+        # The last retry sets them aside and logs them instead
+        with self.assertLogs('apps.core.batching', 'ERROR'):
+            self.assertEqual(batch.flush(final=True), 0)
+        self.assertEqual(batch.pending(), 0)
+        self.assertEqual(batch.redis.lrange(batch.failed_key, 0, -1), [b'1', b'2'])
+
+    @mock.patch('apps.core.tasks.flush_batch.apply_async')
+    def test_last_retry_of_the_flush_task_is_final(self, apply_async):
+        """The flush task only sets items aside once it has no retries left."""
+        self.batch.add(1)
+        with mock.patch.object(Batch, 'flush', return_value=1) as flush, \
+                mock.patch.dict('apps.core.batching._registry', {'tests.batch': self.batch}):
+            flush_batch.apply(args=['tests.batch'])
+            flush.assert_called_with(final=False)
+            flush_batch.apply(args=['tests.batch'], retries=flush_batch.max_retries)
+            flush.assert_called_with(final=True)
+
+
+class FlakyBackend(LocmemBackend):
+    """Delivery backend that refuses mail for one address."""
+    def send_messages(self, messages):
+        if any('bounce@example.com' in m.to for m in messages):
+            raise smtplib.SMTPRecipientsRefused({'bounce@example.com': (550, b'no')})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class CeleryEmailTests(TestCase):
+    def setUp(self):
+        core_mail._connection = None
+        self.addCleanup(setattr, core_mail, '_connection', None)
+        email_outbox.redis.delete(email_outbox.items_key, email_outbox.scheduled_key)
+        self.addCleanup(email_outbox.redis.delete, email_outbox.items_key, email_outbox.scheduled_key)
+
+    @mock.patch('apps.core.tasks.flush_batch.apply_async')
+    def test_backend_enqueues_instead_of_sending(self, apply_async):
+        """Sending through the Celery backend only queues the message, however often it is sent."""
+        message = EmailMessage('Hi', 'Body', 'from@example.com', ['to@example.com'])
+        self.assertEqual(CeleryEmailBackend().send_messages([message]), 1)
+        self.assertEqual(CeleryEmailBackend().send_messages([message]), 1)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(email_outbox.pending(), 2)
+        apply_async.assert_called_once_with(args=['email.outbox'], countdown=1, queue='realtime')
+
+        email_outbox.flush()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['to@example.com'])
+
+    @override_settings(EMAIL_BACKEND='apps.core.mail.CeleryEmailBackend')
+    @mock.patch('apps.core.tasks.flush_batch.apply_async')
+    def test_templates_render_once_per_batch(self, apply_async):
+        """A batch of templated mail compiles the template a single time."""
+        recipients = [(f'user{i}@example.com', {'user': {'first_name': f'User{i}'}}) for i in range(5)]
+        send_templated_mail('Reset', 'password_reset_email.html', recipients,
+                            context={'reset_password_url': 'http://x/reset'})
+
+        with mock.patch('apps.core.mail.get_template', wraps=core_mail.get_template) as get_template:
+            email_outbox.flush()
+        self.assertEqual(get_template.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn('http://x/reset', mail.outbox[0].alternatives[0][0])
+
+    @override_settings(EMAIL_DELIVERY_BACKEND='apps.core.tests.FlakyBackend')
+    def test_deliver_returns_only_failed_messages(self):
+        """Failures are handed back for retry without resending delivered mail."""
+        payloads = [
+            {'subject': 'a', 'body': 'a', 'to': ['ok@example.com']},
+            {'subject': 'b', 'body': 'b', 'to': ['bounce@example.com']},
+            {'subject': 'c', 'body': 'c', 'to': ['ok2@example.com']},
+        ]
+        failed = deliver(payloads)
+        self.assertEqual([p['to'] for p in failed], [['bounce@example.com']])
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_payloads_that_cannot_be_built_are_dropped(self):
+        """A missing template is logged and skipped instead of failing the batch."""
+        payloads = [
+            {'subject': 'a', 'body': '', 'to': ['ok@example.com'], 'template': 'missing.html'},
+            {'subject': 'b', 'body': 'b', 'to': ['ok2@example.com']},
+        ]
+        with self.assertLogs('apps.core.mail', 'ERROR'):
+            self.assertEqual(deliver(payloads), [])
+        self.assertEqual([m.to for m in mail.outbox], [['ok2@example.com']])
+
+
+class GeoTests(TestCase):
+    def test_encode(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744), 'u4pruydqq')
+        self.assertEqual(geo.encode(-90, -180, precision=4), '0000')
+        self.assertEqual(geo.encode(90, 180, precision=4), 'zzzz')
+
+    def test_cover_contains_every_point_of_the_box(self):
+        """Points inside a box, including one across the antimeridian, match one of its cells."""
+        for south, west, north, east in ((-1.5, 36.6, -1.1, 37.1), (10, 179.5, 11, -179.8), (-40, -100, 40, 100)):
+            cells = geo.cover(south, west, north, east, max_cells=16)
+            self.assertTrue(0 < len(cells) <= 16)
+            for step in range(11):
+                lat = south + (north - south) * step / 10
+                lon = west + ((east - west) % 360) * (10 - step) / 10
+                lon = (lon + 180) % 360 - 180
+                self.assertTrue(any(geo.encode(lat, lon).startswith(cell) for cell in cells), (lat, lon))
+        self.assertEqual(geo.cover(-90, -180, 90, 180, max_cells=16), [])
+
+    def test_radius_box(self):
+        south, west, north, east = geo.radius_box(-1.29, 36.82, 25)
+        for bearing_point in ((south, 36.82), (north, 36.82), (-1.29, west), (-1.29, east)):
+            self.assertAlmostEqual(geo.haversine_km(-1.29, 36.82, *bearing_point), 25, delta=0.1)
+        self.assertGreater(geo.radius_box(0, 179.9, 50)[1], geo.radius_box(0, 179.9, 50)[3])
+        self.assertEqual(geo.radius_box(89.9, 0, 50)[1::2], (-180.0, 180.0))
+
+    def test_profiles_are_geocoded_when_their_location_changes(self):
+        profile = CustomUser.objects.create_user(email='geo@example.com', password='pass12345').profile
+        profile.location = 'Kigali'
+        profile.save()
+        self.assertEqual((profile.latitude, profile.longitude), geo.CITIES['kigali'])
+        profile.refresh_from_db()
+        self.assertEqual(profile.geohash, geo.encode(*geo.CITIES['kigali']))
+
+        profile.latitude, profile.longitude = -1.95, 30.1
+        profile.save()
+        self.assertEqual(profile.latitude, -1.95)
+        profile.location = 'Atlantis'
+        profile.save()
+        self.assertEqual((profile.latitude, profile.geohash), (None, None))
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ExportThrottle, 'allow_request', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.admin = CustomUser.objects.create_superuser('exports@example.com', 'pass12345')
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.seeker = CustomUser.objects.create_user(email='seeker@example.com', password='pass12345')
+        self.job = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='APIs')
+        Application.objects.create(job=self.job, applicant=self.seeker, cover_letter='=HYPERLINK("x")')
+
+    def _content(self, response):
+        return b''.join(response.streaming_content)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2, EXPORT_BUFFER_SIZE=64)
+    def test_users_stream_as_csv_or_gzipped_json_lines(self):
+        """Only admins export users; rows are streamed, compressed on request."""
+        url = reverse('user-export')
+        self.client.force_authenticate(user=self.recruiter)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(self._content(response).decode())))
+        self.assertEqual(sorted(row['email'] for row in rows), sorted(CustomUser.objects.values_list('email', flat=True)))
+
+        response = self.client.get(url, {'output': 'jsonl', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertRegex(response['Content-Disposition'], r'filename="users-\d{8}-\d{6}\.jsonl\.gz"')
+        rows = [json.loads(line) for line in gzip.decompress(self._content(response)).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertIn('exports@example.com', {row['email'] for row in rows})
+        self.assertEqual(self.client.get(url, {'output': 'xlsx'}).status_code, 400)
+
+    def test_applications_are_exported_to_the_employer(self):
+        """Only the employer exports a job's applications; formulas are neutralised in CSV."""
+        url = reverse('job-export-applications', args=[self.job.pk])
+        self.client.force_authenticate(user=self.seeker)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(user=self.recruiter)
+        Job.objects.filter(pk=self.job.pk).update(is_active=False)
+        [row] = csv.DictReader(io.StringIO(self._content(self.client.get(url)).decode()))
+        self.assertEqual((row['email'], row['job_title']), ('seeker@example.com', 'Backend Engineer'))
+        self.assertEqual(row['cover_letter'], '\'=HYPERLINK("x")')
+
+    @override_settings(EXPORT_SYNC_LIMIT=2)
+    @mock.patch('apps.core.tasks.run_export.delay')
+    def test_large_exports_run_in_the_background(self, delay):
+        """Exports over the sync limit are written to storage and downloaded by their requester."""
+        delay.side_effect = run_export
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('profile-export'), {'output': 'jsonl'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.data['job_id']
+
+        state = self.client.get(response.data['status_url']).data
+        self.assertEqual((state['status'], state['processed']), ('done', 3))
+        download = self.client.get(state['download_url'])
+        self.assertEqual(len(b''.join(download.streaming_content).splitlines()), 3)
+
+        self.client.force_authenticate(user=self.recruiter)
+        self.assertEqual(self.client.get(state['download_url']).status_code, 404)
+        self.assertEqual(exports.purge_exports(), 0)
+        self.assertEqual(exports.purge_exports(now=timezone.now() + datetime.timedelta(days=2)), 1)
+        self.assertFalse(os.path.exists(os.path.join(settings.MEDIA_ROOT, 'exports', job_id)))
+
+    @override_settings(EXPORT_RETENTION_HOURS=72)
+    @mock.patch('apps.core.tasks.run_export.delay')
+    def test_export_status_outlives_its_file(self, delay):
+        """The status of a background export is kept for longer than EXPORT_RETENTION_HOURS."""
+        export = exports.get_export('users')
+        progress = exports.start_export(export, 'csv', requested_by=self.admin.pk)
+        self.assertGreater(cache.ttl(progress.key), 72 * 60 * 60)
+        progress.update(1)
+        self.assertGreater(cache.ttl(progress.key), 72 * 60 * 60)
+        self.assertNotIn('ttl', exports.status_of(progress.get(), RequestFactory().get('/')))
+
+
+class BenchmarkingTests(TestCase):
+    def _summary(self, throughput, p95, queries):
+        return summarize([p95] * 100, elapsed=100 / throughput, queries=[queries])
+
+    def test_compare_flags_regressions(self):
+        """Slower, lower-throughput or chattier scenarios are reported."""
+        base = {'users_me': self._summary(200, 10, 2), 'login': self._summary(5, 300, 1)}
+        head = {'users_me': self._summary(150, 14, 3), 'login': self._summary(5.1, 305, 1)}
+        _, regressions = compare(base, head)
+        self.assertEqual(
+            {(row['scenario'], row['metric']) for row in regressions},
+            {('users_me', 'throughput'), ('users_me', 'p95'), ('users_me', 'p99'), ('users_me', 'queries')},
+        )
+
+    def test_load_pytest_benchmark_results(self):
+        """pytest-benchmark JSON files are normalised to the same summary format."""
+        data = {'benchmarks': [{
+            'name': 'test_users_me',
+            'stats': {'rounds': 3, 'ops': 250.0, 'mean': 0.004, 'median': 0.004, 'max': 0.006,
+                      'data': [0.003, 0.004, 0.006]},
+            'extra_info': {'queries': 2},
+        }]}
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fh:
+            json.dump(data, fh)
+            fh.flush()
+            results = load_results(fh.name)
+        self.assertEqual(results['test_users_me']['throughput'], 250.0)
+        self.assertEqual(results['test_users_me']['latency_ms']['p99'], 6.0)
+        self.assertEqual(results['test_users_me']['queries']['max'], 2)
+
+    def _seeded_rows(self):
+        return list(CustomUser.objects.filter(email__endswith=seeding.SEED_EMAIL_DOMAIN).order_by('email')
+                    .values_list('id', 'email', 'profile__first_name', 'profile__skills', 'profile__user_type'))
+
+    def test_seeding_is_deterministic(self):
+        """The same seed gives the same rows however the range is split up."""
+        with mock.patch.object(seeding, 'CHUNK_SIZE', 8):
+            seeding.seed_users(30, seed=7)
+            whole = self._seeded_rows()
+            seeding.clear_seed_data()
+            seeding.seed_users(12, seed=7)
+            seeding.seed_users(18, seed=7, start=12, batch_size=5)
+            self.assertEqual(self._seeded_rows(), whole)
+
+    def test_seed_dump_round_trip(self):
+        """A dump restores the same users, profiles and jobs."""
+        seeding.seed_users(20, seed=3)
+        seeding.seed_jobs(15, users=20, seed=3)
+        users = self._seeded_rows()
+        with tempfile.NamedTemporaryFile(suffix='.sql.gz') as fh:
+            seeding.dump_seed_data(fh.name)
+            seeding.clear_seed_data()
+            self.assertFalse(Job.objects.exists())
+            restored = seeding.restore_seed_data(fh.name)
+        self.assertEqual(restored, {'accounts_customuser': 20, 'accounts_profile': 20, 'jobs_job': 15})
+        self.assertEqual(self._seeded_rows(), users)
+
+    @override_settings(MIDDLEWARE=['apps.core.middleware.QueryCountMiddleware'])
+    def test_query_count_header(self):
+        """Responses report the SQL issued while handling them."""
+        response = self.client.get(reverse('health-check'))
+        self.assertEqual(response['X-Query-Count'], '0')
+        self.assertEqual(float(response['X-Query-Time-Ms']), 0)
+
+
+class StartupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.boot = measure_startup()
+
+    def test_boot_skips_lazy_integrations(self):
+        """Celery, Elasticsearch, boto3 and Pillow are not imported by a worker boot."""
+        self.assertEqual(eager_lazy_modules(self.boot['modules']), [])
+        self.assertIn('apps.accounts.views', self.boot['modules'])
+
+    def test_boot_time_within_budget(self):
+        boot_ms = min([self.boot['boot_ms']] + [measure_startup()['boot_ms'] for _ in range(2)])
+        self.assertLess(boot_ms, settings.STARTUP_TIME_BUDGET_MS)
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   celery.local\n"
+            "import time:      2000 |       2120 | celery\n"
+        )
+        imports = parse_importtime(output)
+        self.assertEqual([(i['module'], i['depth']) for i in imports], [('celery.local', 1), ('celery', 0)])
+        self.assertIn('celery', LAZY_MODULES)
+
+
+class WarmupTests(TestCase):
+    def test_hooks_are_timed_and_failures_isolated(self):
+        """A failing hook is reported but does not stop the ones after it."""
+        calls = []
+
+        def broken():
+            raise RuntimeError('no route')
+
+        hooks = [('broken', broken), ('ok', lambda: calls.append('ok'))]
+        with mock.patch.dict(warmup._hooks, {warmup.POST_FORK: hooks}):
+            report = warmup.run_warmup(warmup.POST_FORK)
+        self.assertEqual(calls, ['ok'])
+        self.assertEqual([entry['name'] for entry in report['hooks']], ['broken', 'ok'])
+        self.assertEqual(report['hooks'][0]['error'], 'RuntimeError: no route')
+        self.assertIsNone(report['hooks'][1]['error'])
+
+    def test_pre_fork_closes_connections(self):
+        """Nothing the master opened is inherited by the workers."""
+        with mock.patch('django.db.connections.close_all') as close_all:
+            report = warmup.run_warmup(warmup.PRE_FORK)
+        close_all.assert_called_once_with()
+        self.assertEqual([entry['error'] for entry in report['hooks']], [None] * len(report['hooks']))
+
+    @override_settings(WARMUP_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(warmup.run_warmup(warmup.POST_FORK)['hooks'], [])
+
+    def test_synthetic_requests(self):
+        """Authenticated endpoints are rejected after the token has been checked."""
+        # Like the test client, keep request_finished from closing the test transaction
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        self.assertEqual(warmup.request_endpoint({'path': '/health/'}), 200)
+        self.assertEqual(warmup.request_endpoint({'path': '/api/accounts/users/me/', 'authenticated': True}), 401)
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_MAX_STORED=10)
+class ProfilingTests(APITestCase):
+    def setUp(self):
+        profiling.clear_profiles()
+        self.admin = CustomUser.objects.create_superuser('profiler@example.com', 'pass12345')
+
+    def test_sampled_request_is_stored(self):
+        """Profiles record the view action with its SQL and cache timings."""
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get('/api/accounts/users/').status_code, 200)
+        [profile] = profiling.list_profiles(with_stacks=True)
+        self.assertEqual(profile['view'], 'CustomUserViewSet.list')
+        self.assertEqual(profile['reason'], 'sampled')
+        self.assertGreaterEqual(profile['sql']['count'], 1)
+        self.assertGreaterEqual(profile['cache']['count'], 1)
+        self.assertEqual(profiling.get_profile(profile['id'])['path'], '/api/accounts/users/')
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0, PROFILING_SLOW_MS=60000)
+    def test_fast_unsampled_requests_are_discarded(self):
+        self.client.get('/health/')
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_ring_keeps_newest(self):
+        for _ in range(12):
+            self.client.get('/health/')
+        ids = [profile['id'] for profile in profiling.list_profiles()]
+        self.assertEqual(ids, list(range(12, 2, -1)))
+
+    def test_sampler_only_counts_stacks_below_root(self):
+        """Samples are attributed to a request only while its frame is on the stack."""
+        sampler = profiling.Sampler(interval=60)
+        sampler._pid = os.getpid()  # no background thread; sample by hand
+
+        def view():
+            sampler.sample()
+
+        def request():
+            token = sampler.start(sys._getframe())
+            other = sampler.start(object())
+            view()
+            return sampler.stop(token), sampler.stop(other)
+
+        samples, other_samples = request()
+        self.assertEqual([code.co_name for code in next(iter(samples))], ['view', 'sample'])
+        self.assertEqual(other_samples, {})
+
+    def test_staff_endpoint_and_flamegraph(self):
+        """Only staff can read profiles; flame graphs are merged per view action."""
+        self.client.get('/health/')
+        self.client.get('/health/')
+        self.assertEqual(self.client.get('/api/profiling/profiles/').status_code, 401)
+
+        self.client.force_authenticate(user=self.admin)
+        listed = self.client.get('/api/profiling/profiles/', {'view': 'health-check'}).json()
+        self.assertEqual(len(listed), 2)
+        self.assertNotIn('stacks', listed[0])
+        response = self.client.get('/api/profiling/profiles/flamegraph/', {'view': 'health-check'})
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertTrue(response.content.startswith(b'<svg'))
+
+    def test_render_flamegraph(self):
+        svg = profiling.render_flamegraph({'a;b': 3, 'a;c': 1}, title='demo')
+        self.assertIn('<title>a (4 samples, 100.0%)</title>', svg)
+        self.assertIn('<title>b (3 samples, 75.0%)</title>', svg)
+        self.assertEqual(profiling.folded_text({'a;b': 3}), 'a;b 3\n')
@@ -1,10 +1,19 @@
-from rest_framework.throttling import UserRateThrottle
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from django.core.cache import cache
 
 class JobSearchThrottle(UserRateThrottle):
     scope = 'job_search'
     rate = '100/hour'  # Prevent scraping
 
+class AutocompleteThrottle(UserRateThrottle):
+    scope = 'autocomplete'  # A request per keystroke; rate in DEFAULT_THROTTLE_RATES
+
+class ExportThrottle(UserRateThrottle):
+    scope = 'exports'  # Each export reads a whole table; rate in DEFAULT_THROTTLE_RATES
+
+class LoginThrottle(AnonRateThrottle):
+    scope = 'login'  # Password guessing, per address; rate in DEFAULT_THROTTLE_RATES
+
 class ApplicationThrottle(UserRateThrottle):
     scope = 'applications'
     rate = '10/day'  # Prevent spam applications
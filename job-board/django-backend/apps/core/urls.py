@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .views.profiling import RequestProfileViewSet
+
+router = SimpleRouter()
+router.register(r'profiles', RequestProfileViewSet, basename='request-profile')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
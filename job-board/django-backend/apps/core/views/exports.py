@@ -0,0 +1,43 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core import exports
+from apps.core.progress import JobProgress
+
+
+def _own_export(request, job_id):
+    """The state of a background export started by the caller (or any, for staff)."""
+    state = JobProgress(job_id).get()
+    if state is None or state.get('kind') != 'export':
+        raise Http404
+    if not request.user.is_staff and state.get('requested_by') != str(request.user.pk):
+        raise Http404
+    return state
+
+
+class ExportStatusView(APIView):
+    """Progress of a background export, with its download link once done."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        return Response(exports.status_of(_own_export(request, job_id), request))
+
+
+class ExportDownloadView(APIView):
+    """Streams the file of a finished background export."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        state = _own_export(request, job_id)
+        if state['status'] != 'done' or not default_storage.exists(state['file']):
+            raise Http404
+        response = FileResponse(
+            default_storage.open(state['file']), as_attachment=True, filename=os.path.basename(state['file']),
+        )
+        response['Cache-Control'] = 'no-store'
+        return response
@@ -0,0 +1,50 @@
+from django.http import Http404, HttpResponse
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from apps.core import profiling
+
+
+def _download(content, filename, content_type):
+    response = HttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class RequestProfileViewSet(viewsets.ViewSet):
+    """
+    Staff-only access to the request profiles recorded by ProfilingMiddleware.
+
+    `?view=CustomUserViewSet.me` filters by view action. `?output=folded`
+    downloads folded stacks, `?output=svg` a flame graph.
+    """
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    def list(self, request):
+        return Response(profiling.list_profiles(view=request.query_params.get('view') or None))
+
+    def retrieve(self, request, pk=None):
+        profile = profiling.get_profile(int(pk)) if pk.isdigit() else None
+        if profile is None:
+            raise Http404
+        output = request.query_params.get('output')
+        if output == 'folded':
+            return _download(profiling.folded_text(profile['stacks']), f'profile-{pk}.folded', 'text/plain')
+        if output == 'svg':
+            svg = profiling.render_flamegraph(profile['stacks'], title=f"{profile['view']} {profile['path']}")
+            return _download(svg, f'profile-{pk}.svg', 'image/svg+xml')
+        return Response(profile)
+
+    @action(detail=False)
+    def flamegraph(self, request):
+        """Samples of all stored profiles of one view action, merged."""
+        view = request.query_params.get('view')
+        if not view:
+            return Response(sorted(profiling.aggregate(profiling.list_profiles(with_stacks=True))))
+        stacks = profiling.aggregate(profiling.list_profiles(view=view, with_stacks=True)).get(view, {})
+        if request.query_params.get('output') == 'folded':
+            return _download(profiling.folded_text(stacks), f'{view}.folded', 'text/plain')
+        return _download(profiling.render_flamegraph(stacks, title=view), f'{view}.svg', 'image/svg+xml')
@@ -0,0 +1,268 @@
+"""
+Warm-up hooks that prime a process before it serves traffic, so the first
+request after a worker (re)start does not pay for lazy initialisation.
+
+Hooks run in one of two phases:
+
+* PRE_FORK runs once in the gunicorn master (with --preload) before workers
+  are forked. Work done here is shared copy-on-write by every worker, so it
+  must not open sockets: no database, cache or broker connections.
+* POST_FORK runs in each worker before it accepts connections, and after
+  every --max-requests recycle. This is where connections are opened and
+  synthetic requests are sent through the full middleware stack.
+
+Other apps can add hooks with the `hook` decorator. See config/gunicorn.conf.py.
+"""
+import hmac
+import json
+import logging
+import os
+import secrets
+import subprocess
+import sys
+import time
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PRE_FORK = 'pre_fork'
+POST_FORK = 'post_fork'
+PHASES = (PRE_FORK, POST_FORK)
+
+_hooks = {PRE_FORK: [], POST_FORK: []}
+
+# Sent as the X-Warmup header of synthetic requests. Clients can send the
+# header too, so only this value, known to no one outside the process, marks
+# a request as warm-up.
+_SECRET = secrets.token_hex(16)
+
+
+def hook(phase, name=None):
+    """Registers the decorated function to run in `phase`, in registration order."""
+    if phase not in PHASES:
+        raise ValueError(f'Unknown warm-up phase {phase!r}')
+
+    def decorator(func):
+        _hooks[phase].append((name or func.__name__, func))
+        return func
+    return decorator
+
+
+def get_hooks(phase):
+    return list(_hooks[phase])
+
+
+def run_warmup(phase):
+    """
+    Runs the hooks of `phase` and returns a report:
+    {'phase', 'total_ms', 'hooks': [{'name', 'ms', 'error'}]}.
+
+    A failing hook is logged and skipped; warm-up never stops a worker from booting.
+    """
+    report = {'phase': phase, 'total_ms': 0.0, 'hooks': []}
+    if not settings.WARMUP_ENABLED:
+        return report
+
+    started = time.perf_counter()
+    for name, func in get_hooks(phase):
+        hook_started = time.perf_counter()
+        error = None
+        try:
+            func()
+        except Exception as exc:
+            error = f'{type(exc).__name__}: {exc}'
+            logger.warning('Warm-up hook %s failed', name, exc_info=True)
+        report['hooks'].append({'name': name, 'ms': (time.perf_counter() - hook_started) * 1000, 'error': error})
+    report['total_ms'] = (time.perf_counter() - started) * 1000
+
+    if phase == PRE_FORK:
+        # Nothing opened before the fork may be shared with the workers
+        from django.db import connections
+        connections.close_all()
+
+    logger.info(
+        'Warm-up %s finished in %.1fms (%s)', phase, report['total_ms'],
+        ', '.join(f"{entry['name']} {entry['ms']:.1f}ms" for entry in report['hooks']),
+    )
+    return report
+
+
+def _view_classes():
+    """The DRF view classes reachable from the root URLconf."""
+    from django.urls import URLResolver, get_resolver
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns)
+            else:
+                view_class = getattr(pattern.callback, 'cls', None)
+                if view_class is not None:
+                    yield view_class
+
+    return set(walk(get_resolver().url_patterns))
+
+
+@hook(PRE_FORK)
+def urls():
+    """Imports every URLconf and view, compiles the route regexes and builds the reverse lookup tables."""
+    from django.urls import Resolver404, get_resolver, resolve
+
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for endpoint in settings.WARMUP_ENDPOINTS:
+        try:
+            resolve(endpoint['path'])
+        except Resolver404:
+            logger.warning('Warm-up endpoint %s does not resolve', endpoint['path'])
+
+
+@hook(PRE_FORK)
+def serializers():
+    """Builds the fields of the hot serializers, which imports their validators and field mappings."""
+    for path in settings.WARMUP_SERIALIZERS:
+        import_string(path)().fields
+
+
+@hook(PRE_FORK)
+def permissions():
+    """Instantiates the authentication, permission and throttle classes of every API view."""
+    for view_class in _view_classes():
+        view = view_class()
+        for policy in ('authentication_classes', 'permission_classes', 'throttle_classes'):
+            for policy_class in getattr(view, policy, ()):
+                policy_class()
+
+
+@hook(POST_FORK)
+def database():
+    """Opens the first connection to each database, which also runs the per-process type lookups."""
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+@hook(POST_FORK)
+def cache():
+    """Opens the first connection of the cache's pool."""
+    from django.core.cache import cache as default_cache
+
+    default_cache.get('warmup:ping')
+
+
+@hook(POST_FORK)
+def endpoints():
+    """Sends the synthetic requests of WARMUP_ENDPOINTS through the full WSGI stack."""
+    for endpoint in settings.WARMUP_ENDPOINTS:
+        status = request_endpoint(endpoint)
+        if status >= 500:
+            logger.warning('Warm-up request to %s returned %s', endpoint['path'], status)
+
+
+def _warmup_token():
+    """A valid access token for a user that does not exist, so authentication runs all the way to the user lookup."""
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    token = AccessToken()
+    token[api_settings.USER_ID_CLAIM] = str(uuid.UUID(int=0))
+    return str(token)
+
+
+def is_warmup(request):
+    """Whether `request` is one of this process's synthetic warm-up requests."""
+    return hmac.compare_digest(request.META.get('HTTP_X_WARMUP', '').encode(), _SECRET.encode())
+
+
+def _warmup_host():
+    if settings.WARMUP_HOST:
+        return settings.WARMUP_HOST
+    hosts = [host.strip() for host in settings.ALLOWED_HOSTS if host.strip() and '*' not in host]
+    return hosts[0].lstrip('.') if hosts else 'localhost'
+
+
+def request_endpoint(endpoint, application=None):
+    """
+    Sends one synthetic request, described by a WARMUP_ENDPOINTS entry, through
+    the WSGI application and returns the response status code.
+
+    The request is marked with an X-Warmup header (see is_warmup()). Endpoints flagged
+    `authenticated` get a bearer token for a non-existent user.
+    """
+    if application is None:
+        from django.core.wsgi import get_wsgi_application
+        application = get_wsgi_application()
+
+    path, _, query = endpoint['path'].partition('?')
+    environ = {
+        'REQUEST_METHOD': endpoint.get('method', 'GET').upper(),
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': _warmup_host(),
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': _warmup_host(),
+        'HTTP_ACCEPT': 'application/json',
+        'HTTP_X_WARMUP': _SECRET,
+        'CONTENT_LENGTH': '0',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if endpoint.get('authenticated'):
+        environ['HTTP_AUTHORIZATION'] = f'Bearer {_warmup_token()}'
+
+    status = []
+    response = application(environ, lambda status_line, headers, exc_info=None: status.append(status_line))
+    try:
+        for _ in response:
+            pass
+    finally:
+        # Fires request_finished, like a real request
+        response.close()
+    return int(status[0].split()[0])
+
+
+# Boots a fresh process like a gunicorn worker, optionally warms it up, then
+# times the first and second request to each endpoint
+FIRST_REQUEST_SCRIPT = """
+import json, sys, time
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.conf import settings
+from apps.core import warmup
+reports = [warmup.run_warmup(phase) for phase in warmup.PHASES] if sys.argv[1] == 'warm' else []
+results = []
+for endpoint in settings.WARMUP_ENDPOINTS:
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        status = warmup.request_endpoint(endpoint, application)
+        timings.append((time.perf_counter() - started) * 1000)
+    results.append({'path': endpoint['path'], 'status': status, 'first_ms': timings[0], 'second_ms': timings[1]})
+print(json.dumps({'warmup': reports, 'endpoints': results}))
+"""
+
+
+def measure_first_requests(warm, settings_module=None):
+    """
+    Runs FIRST_REQUEST_SCRIPT in a fresh interpreter and returns
+    {'warmup': [reports], 'endpoints': [{'path', 'status', 'first_ms', 'second_ms'}]}.
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module or settings.SETTINGS_MODULE}
+    command = [sys.executable, '-c', FIRST_REQUEST_SCRIPT, 'warm' if warm else 'cold']
+    result = subprocess.run(command, capture_output=True, text=True, cwd=settings.BASE_DIR, env=env)
+    if result.returncode:
+        raise RuntimeError(f'Measurement failed: {result.stderr.strip().splitlines()[-1:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,86 @@
+"""
+Query depth and cost limits, checked during validation so expensive
+documents are rejected before any resolver runs.
+
+Every object field costs 1 plus the cost of its selection, multiplied by
+the number of items it can return when it is a list: the literal `limit`
+argument if given, GRAPHQL_MAX_PAGE_SIZE for a `limit` passed as a
+variable, and GRAPHQL_DEFAULT_LIST_SIZE for unpaginated lists, which the
+loaders cap at that size. Scalars and introspection fields are free.
+Fragments are expanded where spread.
+"""
+from django.conf import settings
+from graphql import GraphQLError, get_named_type, is_list_type
+from graphql.language import FieldNode, FragmentSpreadNode, IntValueNode
+from graphql.type import get_nullable_type
+from graphql.validation import ValidationRule
+
+
+class QueryCostRule(ValidationRule):
+    def __init__(self, context):
+        super().__init__(context)
+        self._fragments = {}  # name -> (depth, cost), each fragment measured once
+
+    def enter_operation_definition(self, node, *args):
+        schema = self.context.schema
+        root = {'query': schema.query_type, 'mutation': schema.mutation_type,
+                'subscription': schema.subscription_type}[node.operation.value]
+        if root is None:
+            return
+        depth, cost = self._measure(node.selection_set, root, frozenset())
+        if depth > settings.GRAPHQL_MAX_DEPTH:
+            self.report_error(GraphQLError(
+                f'Query depth {depth} exceeds the limit of {settings.GRAPHQL_MAX_DEPTH}.', node,
+            ))
+        if cost > settings.GRAPHQL_MAX_COST:
+            self.report_error(GraphQLError(
+                f'Query cost {cost} exceeds the limit of {settings.GRAPHQL_MAX_COST}.', node,
+            ))
+
+    def _measure(self, selection_set, parent_type, visiting):
+        """(depth, cost) of a selection set on `parent_type`; `visiting` guards fragment cycles."""
+        depth, cost = 1, 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                field = getattr(parent_type, 'fields', {}).get(name)
+                if name.startswith('__') or field is None or selection.selection_set is None:
+                    continue  # unknown fields are reported by the standard rules
+                child_depth, child_cost = self._measure(
+                    selection.selection_set, get_named_type(field.type), visiting,
+                )
+                depth = max(depth, 1 + child_depth)
+                cost += self._multiplier(selection, field) * (1 + child_cost)
+            elif isinstance(selection, FragmentSpreadNode):
+                child_depth, child_cost = self._spread(selection.name.value, visiting)
+                depth, cost = max(depth, child_depth), cost + child_cost
+            else:
+                condition = selection.type_condition
+                fragment_type = self.context.schema.get_type(condition.name.value) if condition else None
+                child_depth, child_cost = self._measure(selection.selection_set, fragment_type or parent_type,
+                                                        visiting)
+                depth, cost = max(depth, child_depth), cost + child_cost
+        return depth, cost
+
+    def _spread(self, name, visiting):
+        fragment = self.context.get_fragment(name)
+        if fragment is None or name in visiting:
+            return 0, 0  # reported by the standard rules (KnownFragmentNames, NoFragmentCycles)
+        if name not in self._fragments:
+            fragment_type = self.context.schema.get_type(fragment.type_condition.name.value)
+            self._fragments[name] = self._measure(fragment.selection_set, fragment_type, visiting | {name})
+        return self._fragments[name]
+
+    @staticmethod
+    def _multiplier(node, field):
+        if not is_list_type(get_nullable_type(field.type)):
+            return 1
+        if 'limit' not in field.args:
+            return settings.GRAPHQL_DEFAULT_LIST_SIZE
+        for argument in node.arguments or ():
+            if argument.name.value == 'limit':
+                if isinstance(argument.value, IntValueNode):
+                    return max(0, min(int(argument.value.value), settings.GRAPHQL_MAX_PAGE_SIZE))
+                return settings.GRAPHQL_MAX_PAGE_SIZE
+        default = field.args['limit'].default_value
+        return default if isinstance(default, int) else settings.GRAPHQL_MAX_PAGE_SIZE
@@ -0,0 +1,119 @@
+"""
+Per-request DataLoaders for the GraphQL resolvers.
+
+graphql-core executes synchronously here, so a loader cannot wait for the
+end of an event-loop tick to collect keys. Instead, whenever objects enter
+a result (a root resolver or a batch load) Loaders.seen() queues the keys
+their related fields may ask for; the first load() that misses the cache
+fetches every queued key with one query. A nested query therefore runs one
+query per loader per level, however many rows each level returns, and keys
+nobody asks for are never fetched.
+
+Lists of related rows hold at most GRAPHQL_DEFAULT_LIST_SIZE per key, the
+size the cost rule (complexity.py) charges for them.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from apps.accounts.models import CustomUser, Profile
+from apps.jobs.models import Application, Job
+
+
+class DataLoader:
+    """Caches `batch_load(keys) -> {key: value}` results by key, batching queued keys."""
+    def __init__(self, batch_load, default=None):
+        self.batch_load = batch_load
+        self.default = default  # called for keys batch_load returns nothing for
+        self._cache = {}
+        self._queue = set()
+
+    def queue(self, keys):
+        self._queue.update(key for key in keys if key not in self._cache)
+
+    def load(self, key):
+        if key not in self._cache:
+            keys, self._queue = self._queue | {key}, set()
+            values = self.batch_load(list(keys))
+            for each in keys:
+                self._cache[each] = values[each] if each in values else (self.default and self.default())
+        return self._cache[key]
+
+
+def _group(objects, attribute):
+    groups = defaultdict(list)
+    for obj in objects:
+        groups[getattr(obj, attribute)].append(obj)
+    return groups
+
+
+def _latest(queryset, key, order):
+    """`queryset` limited to the first GRAPHQL_DEFAULT_LIST_SIZE rows by `order` per value of `key`."""
+    rank = Window(RowNumber(), partition_by=F(key), order_by=order)
+    return queryset.annotate(rank=rank).filter(rank__lte=settings.GRAPHQL_DEFAULT_LIST_SIZE).order_by(order)
+
+
+class Loaders:
+    """The loaders of one request, reachable from resolvers as info.context.loaders."""
+    def __init__(self):
+        self.user = DataLoader(self._users)
+        self.profile = DataLoader(self._profiles)  # by user id
+        self.job = DataLoader(self._jobs)
+        self.jobs_by_employer = DataLoader(self._jobs_by_employer, list)
+        self.applications_by_job = DataLoader(self._applications_by_job, list)
+        self.applications_by_applicant = DataLoader(self._applications_by_applicant, list)
+        self.application_count = DataLoader(self._application_counts, int)  # by job id
+
+    def seen(self, objects):
+        """Queues the keys the related fields of `objects` load; returns `objects`."""
+        users, jobs, applications = [], [], []
+        for obj in objects:
+            if isinstance(obj, CustomUser):
+                users.append(obj.pk)
+            elif isinstance(obj, Job):
+                jobs.append(obj)
+            elif isinstance(obj, Application):
+                applications.append(obj)
+        if users:
+            self.profile.queue(users)
+            self.jobs_by_employer.queue(users)
+            self.applications_by_applicant.queue(users)
+        if jobs:
+            self.user.queue(job.employer_id for job in jobs)
+            self.applications_by_job.queue(job.pk for job in jobs)
+            self.application_count.queue(job.pk for job in jobs)
+        if applications:
+            self.job.queue(application.job_id for application in applications)
+            self.user.queue(application.applicant_id for application in applications)
+        return objects
+
+    def _users(self, ids):
+        users = self.seen(list(CustomUser.objects.filter(pk__in=ids).order_by()))
+        return {user.pk: user for user in users}
+
+    def _profiles(self, user_ids):
+        return {profile.user_id: profile for profile in Profile.objects.filter(user_id__in=user_ids).order_by()}
+
+    def _jobs(self, ids):
+        jobs = self.seen(list(Job.objects.filter(pk__in=ids).order_by()))
+        return {job.pk: job for job in jobs}
+
+    def _jobs_by_employer(self, user_ids):
+        jobs = _latest(Job.objects.filter(employer_id__in=user_ids, is_active=True), 'employer_id', '-created_at')
+        return _group(self.seen(list(jobs)), 'employer_id')
+
+    def _applications_by_job(self, job_ids):
+        applications = _latest(Application.objects.filter(job_id__in=job_ids), 'job_id', '-submitted_at')
+        return _group(self.seen(list(applications)), 'job_id')
+
+    def _applications_by_applicant(self, user_ids):
+        applications = _latest(Application.objects.filter(applicant_id__in=user_ids), 'applicant_id',
+                               '-submitted_at')
+        return _group(self.seen(list(applications)), 'applicant_id')
+
+    def _application_counts(self, job_ids):
+        counts = (Application.objects.filter(job_id__in=job_ids).order_by()
+                  .values('job_id').annotate(count=Count('pk')))
+        return {row['job_id']: row['count'] for row in counts}
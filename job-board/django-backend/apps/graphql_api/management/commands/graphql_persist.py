@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.graphql_api import persisted
+from apps.graphql_api.schema import schema
+from apps.graphql_api.views import GraphQLView
+
+
+class Command(BaseCommand):
+    help = (
+        "Validate GraphQL documents and register them as persisted queries, printing the hash "
+        "clients send as extensions.persistedQuery.sha256Hash. With GRAPHQL_PERSISTED_QUERIES_ONLY "
+        "the registered documents are the only ones the endpoint runs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='.graphql files, one document each')
+
+    def handle(self, *args, **options):
+        documents = []
+        for name in options['files']:
+            try:
+                query = Path(name).read_text()
+            except OSError as exc:
+                raise CommandError(f'{name}: {exc}')
+            _, errors = persisted.get_document(schema.graphql_schema, query, GraphQLView.validation_rules)
+            if errors:
+                raise CommandError(f'{name}: ' + '; '.join(error.message for error in errors))
+            documents.append((name, query))
+
+        # Nothing is registered unless every document is valid
+        for name, query in documents:
+            self.stdout.write(f'{persisted.register(query)}  {name}')
@@ -0,0 +1,118 @@
+"""
+Persisted queries and the parsed-document cache.
+
+Clients send `extensions.persistedQuery.sha256Hash` instead of the document
+(the Apollo "automatic persisted queries" protocol). An unknown hash is
+answered with PersistedQueryNotFound and the client retries with the text
+and hash. The text is stored in Redis under the hash once it has parsed
+and passed validation, depth and cost included, and for
+GRAPHQL_PERSISTED_QUERY_TTL only: anyone can send one. Documents
+registered by the graphql_persist command are kept for good, apart, and
+with GRAPHQL_PERSISTED_QUERIES_ONLY they are the only ones that run.
+
+Each process also keeps the last GRAPHQL_DOCUMENT_CACHE_SIZE documents it
+parsed and validated, keyed by hash, so a repeated document skips both.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, parse, validate
+
+KEY_PREFIX = 'graphql:persisted:'
+AUTOMATIC_PREFIX = 'graphql:persisted:auto:'
+NOT_FOUND = 'PersistedQueryNotFound'
+NOT_ALLOWED = 'PersistedQueryNotAllowed'
+
+_documents = OrderedDict()  # hash -> (query, document, validation errors)
+_lock = threading.Lock()
+
+
+class PersistedQueryError(Exception):
+    pass
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def register(query):
+    """Adds a document to the allow-list for good and returns its hash."""
+    digest = query_hash(query)
+    cache.set(KEY_PREFIX + digest, query, timeout=None)
+    return digest
+
+
+def remember(query):
+    """Stores a document a client sent with its hash, once it validated, for GRAPHQL_PERSISTED_QUERY_TTL."""
+    cache.set(AUTOMATIC_PREFIX + query_hash(query), query, timeout=settings.GRAPHQL_PERSISTED_QUERY_TTL)
+
+
+def lookup(digest):
+    """The registered document with this hash, or None."""
+    if settings.GRAPHQL_PERSISTED_QUERIES_ONLY:
+        return cache.get(KEY_PREFIX + digest)
+    with _lock:
+        entry = _documents.get(digest)
+    if entry is not None and not entry[2]:
+        return entry[0]
+    found = cache.get_many([KEY_PREFIX + digest, AUTOMATIC_PREFIX + digest])
+    return found.get(KEY_PREFIX + digest) or found.get(AUTOMATIC_PREFIX + digest)
+
+
+def resolve(query, extensions):
+    """
+    (document, whether to remember it) for a request's `query` and
+    `extensions` parameters. A document sent with a hash not stored yet is
+    to be remembered once it has passed validation.
+    """
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise PersistedQueryError('Extensions are invalid JSON.')
+    persisted = extensions.get('persistedQuery') if isinstance(extensions, dict) else None
+    if not persisted:
+        if query and settings.GRAPHQL_PERSISTED_QUERIES_ONLY and lookup(query_hash(query)) is None:
+            raise PersistedQueryError(NOT_ALLOWED)
+        return query, False
+
+    digest = persisted.get('sha256Hash') if isinstance(persisted, dict) else None
+    if not isinstance(digest, str):
+        raise PersistedQueryError('persistedQuery.sha256Hash is required.')
+    if not query:
+        query = lookup(digest)
+        if query is None:
+            raise PersistedQueryError(NOT_FOUND)
+        return query, False
+    if query_hash(query) != digest:
+        raise PersistedQueryError('The query does not match persistedQuery.sha256Hash.')
+    if lookup(digest) is None:
+        if settings.GRAPHQL_PERSISTED_QUERIES_ONLY:
+            raise PersistedQueryError(NOT_ALLOWED)
+        return query, True
+    return query, False
+
+
+def get_document(schema, query, rules):
+    """(document, validation errors) for `query`, parsed and validated once per process."""
+    digest = query_hash(query)
+    with _lock:
+        entry = _documents.get(digest)
+        if entry is not None:
+            _documents.move_to_end(digest)
+            return entry[1], entry[2]
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error]
+    errors = validate(schema, document, rules, graphene_settings.MAX_VALIDATION_ERRORS)
+    with _lock:
+        _documents[digest] = (query, document, errors)
+        while len(_documents) > settings.GRAPHQL_DOCUMENT_CACHE_SIZE:
+            _documents.popitem(last=False)
+    return document, errors
@@ -0,0 +1,151 @@
+"""
+GraphQL schema over users, profiles, jobs and applications (read only).
+
+Relations are resolved through the request's DataLoaders (loaders.py), never
+through the ORM's related managers, so nesting does not multiply queries.
+Visibility follows the REST API: job postings and public profiles are open,
+e-mail addresses and applications only to their owner, the job's employer
+or staff.
+"""
+import graphene
+from django.conf import settings
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from apps.accounts.models import CustomUser, Profile
+from apps.jobs.models import Application, Job
+
+
+def _is_self_or_staff(info, user_id):
+    viewer = info.context.user
+    return viewer.is_authenticated and (viewer.is_staff or viewer.pk == user_id)
+
+
+def _page(queryset, limit, offset):
+    limit = max(0, min(limit, settings.GRAPHQL_MAX_PAGE_SIZE))
+    return list(queryset[max(offset, 0):max(offset, 0) + limit])
+
+
+class ProfileType(DjangoObjectType):
+    class Meta:
+        model = Profile
+        name = 'Profile'
+        fields = (
+            'first_name', 'last_name', 'bio', 'user_type', 'skills', 'experience', 'education',
+            'company_name', 'company_website', 'company_description', 'position', 'linkedin_profile',
+        )
+
+
+class UserType(DjangoObjectType):
+    email = graphene.String(description='Only visible to the user and staff.')
+    profile = graphene.Field(ProfileType)
+    jobs = graphene.List(graphene.NonNull(lambda: JobType),
+                         description=f'The latest {settings.GRAPHQL_DEFAULT_LIST_SIZE} active postings by this user.')
+    applications = graphene.List(graphene.NonNull(lambda: ApplicationType),
+                                 description=f'The latest {settings.GRAPHQL_DEFAULT_LIST_SIZE}; '
+                                             'only visible to the user and staff.')
+
+    class Meta:
+        model = CustomUser
+        name = 'User'
+        fields = ('id', 'date_joined')
+
+    def resolve_email(user, info):
+        return user.email if _is_self_or_staff(info, user.pk) else None
+
+    def resolve_profile(user, info):
+        return info.context.loaders.profile.load(user.pk)
+
+    def resolve_jobs(user, info):
+        return info.context.loaders.jobs_by_employer.load(user.pk)
+
+    def resolve_applications(user, info):
+        if not _is_self_or_staff(info, user.pk):
+            return None
+        return info.context.loaders.applications_by_applicant.load(user.pk)
+
+
+class JobType(DjangoObjectType):
+    employer = graphene.Field(UserType)
+    application_count = graphene.Int()
+    applications = graphene.List(graphene.NonNull(lambda: ApplicationType),
+                                 description=f'The latest {settings.GRAPHQL_DEFAULT_LIST_SIZE}; '
+                                             "only visible to the job's employer and staff.")
+
+    class Meta:
+        model = Job
+        name = 'Job'
+        fields = ('id', 'title', 'company_name', 'description', 'category', 'location', 'job_type',
+                  'is_active', 'created_at', 'updated_at')
+
+    def resolve_employer(job, info):
+        return info.context.loaders.user.load(job.employer_id)
+
+    def resolve_application_count(job, info):
+        return info.context.loaders.application_count.load(job.pk)
+
+    def resolve_applications(job, info):
+        if not _is_self_or_staff(info, job.employer_id):
+            return None
+        return info.context.loaders.applications_by_job.load(job.pk)
+
+
+class ApplicationType(DjangoObjectType):
+    job = graphene.Field(JobType)
+    applicant = graphene.Field(UserType)
+
+    class Meta:
+        model = Application
+        name = 'Application'
+        fields = ('id', 'status', 'cover_letter', 'submitted_at', 'updated_at')
+
+    def resolve_job(application, info):
+        return info.context.loaders.job.load(application.job_id)
+
+    def resolve_applicant(application, info):
+        return info.context.loaders.user.load(application.applicant_id)
+
+
+class Query(graphene.ObjectType):
+    me = graphene.Field(UserType)
+    user = graphene.Field(UserType, id=graphene.UUID(required=True))
+    job = graphene.Field(JobType, id=graphene.Int(required=True))
+    jobs = graphene.List(
+        graphene.NonNull(JobType),
+        limit=graphene.Int(default_value=20), offset=graphene.Int(default_value=0),
+        category=graphene.String(), location=graphene.String(), job_type=graphene.String(),
+        description='Active postings, newest first.',
+    )
+    users = graphene.List(graphene.NonNull(UserType), limit=graphene.Int(default_value=20),
+                          offset=graphene.Int(default_value=0), description='Staff only.')
+
+    def resolve_me(root, info):
+        viewer = info.context.user
+        return info.context.loaders.seen([viewer])[0] if viewer.is_authenticated else None
+
+    def resolve_user(root, info, id):
+        if not info.context.user.is_authenticated:
+            raise GraphQLError('Authentication credentials were not provided.')
+        return info.context.loaders.user.load(id)
+
+    def resolve_job(root, info, id):
+        job = info.context.loaders.job.load(id)
+        return job if job and (job.is_active or _is_self_or_staff(info, job.employer_id)) else None
+
+    def resolve_jobs(root, info, limit, offset, category=None, location=None, job_type=None):
+        jobs = Job.objects.filter(is_active=True, duplicate_of__isnull=True).order_by('-created_at')
+        if category:
+            jobs = jobs.filter(category__iexact=category)
+        if location:
+            jobs = jobs.filter(location__icontains=location)
+        if job_type:
+            jobs = jobs.filter(job_type=job_type)
+        return info.context.loaders.seen(_page(jobs, limit, offset))
+
+    def resolve_users(root, info, limit, offset):
+        if not info.context.user.is_staff:
+            raise GraphQLError('You do not have permission to perform this action.')
+        return info.context.loaders.seen(_page(CustomUser.objects.order_by('-date_joined'), limit, offset))
+
+
+schema = graphene.Schema(query=Query)
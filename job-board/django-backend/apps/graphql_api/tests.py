@@ -0,0 +1,152 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import CustomUser
+from apps.jobs.models import Application, Job
+
+from . import persisted
+
+NESTED_QUERY = """
+{
+  jobs(limit: 50) {
+    title
+    applicationCount
+    employer { email profile { companyName } }
+    applications { status applicant { email profile { firstName } } }
+  }
+}
+"""
+
+
+class GraphQLTests(APITestCase):
+    def setUp(self):
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.recruiter.profile.user_type = 'recruiter'
+        self.recruiter.profile.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.recruiter)}')
+        self.seekers = [
+            CustomUser.objects.create_user(email=f'seeker{i}@example.com', password='pass12345') for i in range(3)
+        ]
+        self._post_jobs(2)
+
+    def _post_jobs(self, count):
+        posted = Job.objects.count()
+        for i in range(posted, posted + count):
+            # Distinct titles: identical reposts would be hidden as duplicates
+            job = Job.objects.create(employer=self.recruiter, title=f'Job {i}', description='Django')
+            for seeker in self.seekers:
+                Application.objects.create(job=job, applicant=seeker)
+
+    def _query(self, query, **params):
+        return self.client.post(reverse('graphql'), {'query': query, **params}, format='json')
+
+    def test_nested_queries_run_a_fixed_number_of_statements(self):
+        """Batched loaders keep the query count independent of the number of jobs and applications."""
+        # Token user, jobs, counts, applications, then users and profiles once
+        # for the employers and once for the applicants
+        with self.assertNumQueries(8):
+            response = self._query(NESTED_QUERY)
+        self.assertEqual(len(response.json()['data']['jobs']), 2)
+
+        self._post_jobs(10)
+        with self.assertNumQueries(8):
+            response = self._query(NESTED_QUERY)
+        jobs = response.json()['data']['jobs']
+        self.assertEqual(len(jobs), 12)
+        self.assertEqual(jobs[0]['applicationCount'], 3)
+        self.assertEqual(len(jobs[0]['applications']), 3)
+        self.assertEqual(jobs[0]['employer']['email'], 'recruiter@example.com')
+
+    @override_settings(GRAPHQL_DEFAULT_LIST_SIZE=2)
+    def test_unpaginated_lists_are_capped_at_their_costed_size(self):
+        """Related lists hold no more rows per parent than the cost rule charges for."""
+        self._post_jobs(2)
+        query = '{ jobs(limit: 10) { applications { id } employer { jobs { id } } } }'
+        with self.assertNumQueries(5):
+            jobs = self._query(query).json()['data']['jobs']
+        self.assertEqual(len(jobs), 4)
+        for job in jobs:
+            self.assertEqual(len(job['applications']), 2)
+            self.assertEqual(len(job['employer']['jobs']), 2)
+
+    def test_private_fields_are_hidden_from_other_users(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.seekers[0])}')
+        jobs = self._query(NESTED_QUERY).json()['data']['jobs']
+        self.assertIsNone(jobs[0]['employer']['email'])
+        self.assertIsNone(jobs[0]['applications'])
+
+        response = self._query('{ users { id } }')
+        self.assertEqual(response.json()['errors'][0]['message'], 'You do not have permission to perform this action.')
+
+    def test_session_cookies_do_not_authenticate(self):
+        """Without a bearer token a logged-in browser session is served as anonymous."""
+        self.client.credentials()
+        self.client.force_login(self.recruiter)
+        response = self._query('{ me { email } jobs { applications { status } } }')
+        self.assertIsNone(response.json()['data']['me'])
+        self.assertIsNone(response.json()['data']['jobs'][0]['applications'])
+
+    @override_settings(GRAPHQL_MAX_DEPTH=4, GRAPHQL_MAX_COST=100)
+    def test_expensive_queries_are_rejected_before_execution(self):
+        """Depth and cost are checked during validation, so no resolver (and no SQL) runs."""
+        self.client.credentials()
+        deep = '{ jobs(limit: 1) { employer { jobs { employer { id } } } } }'
+        costly = 'query { ...Listing } fragment Listing on Query { jobs(limit: 100) { employer { id } } }'
+        for query, message in ((deep, 'Query depth 5 exceeds'), (costly, 'Query cost 200 exceeds')):
+            with self.assertNumQueries(0):
+                response = self._query(query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(message, response.json()['errors'][0]['message'])
+        self.assertEqual(self._query('{ jobs(limit: 10) { employer { id } } }').status_code, 200)
+
+    def test_persisted_queries(self):
+        """Unknown hashes ask for the document, which is stored and then run from its hash alone."""
+        query = '{ jobs(limit: 1) { title } }'
+        digest = persisted.query_hash(query)
+        cache.delete_many([persisted.KEY_PREFIX + digest, persisted.AUTOMATIC_PREFIX + digest])
+        persisted._documents.pop(digest, None)
+        extensions = {'persistedQuery': {'version': 1, 'sha256Hash': digest}}
+
+        response = self.client.post(reverse('graphql'), {'extensions': extensions}, format='json')
+        self.assertEqual(response.json()['errors'][0]['message'], persisted.NOT_FOUND)
+        self.assertEqual(self._query(query, extensions=extensions).status_code, 200)
+        response = self.client.get(reverse('graphql'), {'extensions': json.dumps(extensions)},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.json()['data']['jobs'], [{'title': 'Job 1'}])
+
+        mismatched = {'persistedQuery': {'version': 1, 'sha256Hash': '0' * 64}}
+        self.assertEqual(self._query(query, extensions=mismatched).status_code, 400)
+        self.assertGreater(cache.ttl(persisted.AUTOMATIC_PREFIX + digest), 0)
+
+    @override_settings(GRAPHQL_MAX_COST=100)
+    def test_rejected_documents_are_not_persisted(self):
+        """Documents failing validation or the cost limit are never stored."""
+        for query in ('{ jobs(limit: 1) { nonexistent } }', '{ jobs(limit: 100) { employer { id } } }'):
+            digest = persisted.query_hash(query)
+            cache.delete_many([persisted.KEY_PREFIX + digest, persisted.AUTOMATIC_PREFIX + digest])
+            extensions = {'persistedQuery': {'version': 1, 'sha256Hash': digest}}
+            self.assertEqual(self._query(query, extensions=extensions).status_code, 400)
+            self.assertIsNone(cache.get(persisted.AUTOMATIC_PREFIX + digest))
+            self.assertIsNone(persisted.lookup(digest))
+
+    @override_settings(GRAPHQL_PERSISTED_QUERIES_ONLY=True)
+    def test_only_registered_queries_run_when_required(self):
+        query = '{ jobs(limit: 2) { id } }'
+        cache.delete(persisted.KEY_PREFIX + persisted.query_hash(query))
+        self.assertEqual(self._query(query).json()['errors'][0]['message'], persisted.NOT_ALLOWED)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.graphql') as document:
+            document.write(query)
+            document.flush()
+            out = StringIO()
+            call_command('graphql_persist', document.name, stdout=out)
+        self.assertTrue(out.getvalue().startswith(persisted.query_hash(query)))
+        self.assertEqual(len(self._query(query).json()['data']['jobs']), 2)
@@ -0,0 +1,10 @@
+from django.conf import settings
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+from .views import GraphQLView
+
+# Authenticated by bearer token only (GraphQLView.dispatch ignores the session), so CSRF does not apply
+urlpatterns = [
+    path('', csrf_exempt(GraphQLView.as_view(graphiql=settings.DEBUG)), name='graphql'),
+]
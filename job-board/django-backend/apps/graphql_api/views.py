@@ -0,0 +1,66 @@
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, JsonResponse
+from graphene_django.views import GraphQLView as BaseGraphQLView
+from graphene_django.views import HttpError
+from graphql import ExecutionResult, execute, specified_rules
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import persisted
+from .complexity import QueryCostRule
+from .loaders import Loaders
+
+
+class GraphQLView(BaseGraphQLView):
+    """
+    The GraphQL endpoint: JWT authentication as in the REST API, the depth
+    and cost limits as validation rules, persisted queries, and documents
+    parsed and validated once per process.
+    """
+    validation_rules = (*specified_rules, QueryCostRule)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed as exc:
+            detail = exc.detail.get('detail', exc.detail) if isinstance(exc.detail, dict) else exc.detail
+            return JsonResponse({'errors': [{'message': str(detail)}]}, status=401)
+        # Only the bearer token counts: the endpoint is CSRF exempt, so a session cookie must not authenticate
+        request.user = authenticated[0] if authenticated else AnonymousUser()
+        request.loaders = Loaders()
+        return super().dispatch(request, *args, **kwargs)
+
+    @staticmethod
+    def get_graphql_params(request, data):
+        query, variables, operation_name, id = BaseGraphQLView.get_graphql_params(request, data)
+        try:
+            query, request.remember_query = persisted.resolve(
+                query, request.GET.get('extensions') or data.get('extensions'),
+            )
+        except persisted.PersistedQueryError as exc:
+            # Clients retry with the full document on a 200 PersistedQueryNotFound
+            status = 200 if str(exc) == persisted.NOT_FOUND else 400
+            raise HttpError(HttpResponse(status=status), str(exc))
+        return query, variables, operation_name, id
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if not query:
+            return super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+        schema = self.schema.graphql_schema
+        # The schema has no mutations, so GET cannot change anything and needs no special case
+        document, errors = persisted.get_document(schema, query, self.validation_rules)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+        if getattr(request, 'remember_query', False):
+            persisted.remember(query)
+        try:
+            return execute(
+                schema, document,
+                root_value=self.get_root_value(request),
+                context_value=self.get_context(request),
+                variable_values=variables,
+                operation_name=operation_name,
+                middleware=self.get_middleware(request),
+            )
+        except Exception as exc:
+            return ExecutionResult(errors=[exc])
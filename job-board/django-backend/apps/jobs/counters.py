@@ -0,0 +1,175 @@
+"""
+Job impression and view counters.
+
+Requests only write to Redis: impressions and views are HINCRBY'd into two
+hashes, and each view adds the viewer to a per-job HyperLogLog so distinct
+viewers are counted in ~12KB per job at ~0.8% error. flush_counters, run
+periodically by apps.jobs.tasks.flush_job_counters, adds the buffered counts
+to jobs_jobcounter with one INSERT ... ON CONFLICT per chunk. Nothing here
+writes to or locks the job table; counts lag by up to one flush interval.
+
+A job's HyperLogLog is deleted with the job (forget_jobs(), from a
+post_delete hook and when partitions are archived), and by the flush when
+it finds the job gone.
+
+Recording never fails the request: if Redis is unavailable the counts are
+logged and lost.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django_redis import get_redis_connection
+
+from apps.stats.rollups import record_many
+
+from .models import Job, JobCounter
+
+logger = logging.getLogger(__name__)
+
+IMPRESSIONS_KEY = 'jobs:counters:impressions'
+VIEWS_KEY = 'jobs:counters:views'
+# Jobs whose HyperLogLog changed since the last flush
+DIRTY_KEY = 'jobs:counters:dirty'
+VIEWERS_PREFIX = 'jobs:viewers:'
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def viewer_id(request):
+    """The user id, or a hash of address and user agent for anonymous visitors."""
+    if request.user.is_authenticated:
+        return str(request.user.pk)
+    client = f"{request.META.get('REMOTE_ADDR', '')}|{request.META.get('HTTP_USER_AGENT', '')}"
+    return 'anon:' + hashlib.blake2b(client.encode(), digest_size=8).hexdigest()
+
+
+def record_impressions(job_ids):
+    """Counts one impression for each of `job_ids`, in one round trip."""
+    if not job_ids:
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hincrby(IMPRESSIONS_KEY, str(job_id), 1)
+        pipe.execute()
+    except Exception:
+        logger.warning('Could not count impressions of %d jobs', len(job_ids))
+
+
+def record_view(job_id, viewer):
+    job_id = str(job_id)
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        pipe.hincrby(VIEWS_KEY, job_id, 1)
+        pipe.pfadd(VIEWERS_PREFIX + job_id, viewer)
+        pipe.sadd(DIRTY_KEY, job_id)
+        pipe.execute()
+    except Exception:
+        logger.warning('Could not count a view of job %s', job_id)
+
+
+def forget_jobs(job_ids):
+    """Drops the viewer HyperLogLogs of deleted jobs."""
+    if not job_ids:
+        return
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        pipe.delete(*(f'{VIEWERS_PREFIX}{job_id}' for job_id in job_ids))
+        pipe.srem(DIRTY_KEY, *(str(job_id) for job_id in job_ids))
+        pipe.execute()
+    except Exception:
+        # Runs once the deletion has committed, so there is nothing left to fail
+        logger.exception('Could not drop the viewer counts of %d deleted jobs', len(job_ids))
+
+
+def _take_buffer():
+    """
+    Atomically empties the buffer and returns {job id: [impressions, views,
+    unique viewers]}, unique viewers being None for jobs without new views.
+    """
+    pipe = _redis().pipeline(transaction=True)
+    pipe.hgetall(IMPRESSIONS_KEY)
+    pipe.hgetall(VIEWS_KEY)
+    pipe.smembers(DIRTY_KEY)
+    pipe.delete(IMPRESSIONS_KEY, VIEWS_KEY, DIRTY_KEY)
+    impressions, views, dirty, _ = pipe.execute()
+
+    rows = {}
+    for index, counts in enumerate((impressions, views)):
+        for job_id, count in counts.items():
+            rows.setdefault(int(job_id), [0, 0, None])[index] = int(count)
+    dirty = sorted(int(job_id) for job_id in dirty)
+    if dirty:
+        # PFCOUNT of the whole HyperLogLog: unique viewers are a total, not a delta
+        pipe = _redis().pipeline(transaction=False)
+        for job_id in dirty:
+            pipe.pfcount(f'{VIEWERS_PREFIX}{job_id}')
+        for job_id, unique in zip(dirty, pipe.execute()):
+            rows.setdefault(job_id, [0, 0, None])[2] = unique
+    return rows
+
+
+def _restore_buffer(rows):
+    pipe = _redis().pipeline(transaction=False)
+    for job_id, (impressions, views, unique) in rows.items():
+        if impressions:
+            pipe.hincrby(IMPRESSIONS_KEY, str(job_id), impressions)
+        if views:
+            pipe.hincrby(VIEWS_KEY, str(job_id), views)
+        if unique is not None:
+            pipe.sadd(DIRTY_KEY, str(job_id))
+    pipe.execute()
+
+
+def _upsert_chunk(rows):
+    """Adds a chunk of counts to the counter table; returns the ids of the jobs still there."""
+    table = connection.ops.quote_name(JobCounter._meta.db_table)
+    jobs = connection.ops.quote_name(Job._meta.db_table)
+    values = ', '.join(['(%s::bigint, %s::bigint, %s::bigint, %s::bigint)'] * len(rows))
+    params = [value for job_id, counts in rows for value in (job_id, *counts)]
+    with connection.cursor() as cursor:
+        # The join drops deleted jobs without locking the job rows it reads
+        cursor.execute(
+            f"INSERT INTO {table} AS c (job_id, impressions, views, unique_viewers, updated_at) "
+            f"SELECT v.job_id, v.impressions, v.views, COALESCE(v.unique_viewers, 0), now() "
+            f"FROM (VALUES {values}) AS v (job_id, impressions, views, unique_viewers) "
+            f"JOIN {jobs} AS j ON j.id = v.job_id "
+            f"ON CONFLICT (job_id) DO UPDATE SET "
+            f"impressions = c.impressions + EXCLUDED.impressions, "
+            f"views = c.views + EXCLUDED.views, "
+            f"unique_viewers = GREATEST(c.unique_viewers, EXCLUDED.unique_viewers), "
+            f"updated_at = EXCLUDED.updated_at "
+            f"RETURNING c.job_id",
+            params,
+        )
+        return {job_id for job_id, in cursor.fetchall()}
+
+
+def flush_counters():
+    """
+    Adds the buffered counts to the counter table and returns the number of
+    jobs updated. If the write fails the buffer is put back.
+    """
+    rows = _take_buffer()
+    if not rows:
+        return 0
+    # Sorted so concurrent flushes lock counter rows in the same order
+    items = sorted(rows.items())
+    chunk_size = settings.JOB_COUNTERS_FLUSH_CHUNK_SIZE
+    updated = set()
+    try:
+        with transaction.atomic():
+            for start in range(0, len(items), chunk_size):
+                updated |= _upsert_chunk(items[start:start + chunk_size])
+            # Views also feed the dashboard rollups, bucketed at flush time
+            record_many('job_views', {job_id: views for job_id, (_, views, _) in items if views})
+    except Exception:
+        _restore_buffer(rows)
+        logger.exception('Job counter flush failed, %d jobs requeued', len(rows))
+        raise
+    forget_jobs([job_id for job_id, (_, _, unique) in items if unique is not None and job_id not in updated])
+    return len(updated)
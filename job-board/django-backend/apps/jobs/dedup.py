@@ -0,0 +1,330 @@
+"""
+Near-duplicate detection of job postings with MinHash and LSH.
+
+A posting's title and description, lower-cased, are cut into overlapping
+word JOBS_DEDUP_SHINGLE_SIZE-grams, and the set of those shingles is
+summarized by a MinHash signature of JOBS_DEDUP_PERMUTATIONS values: the
+share of positions where two signatures agree estimates the Jaccard
+similarity of the two sets. Signatures use one-permutation hashing: each
+shingle is hashed once into one of the bins, which keeps its smallest
+hash, and empty bins borrow from the next non-empty one. That costs one
+hash per shingle instead of one per shingle and permutation.
+
+For LSH the signature is cut into JOBS_DEDUP_BANDS bands of r values, each
+hashed into a bucket with the posting's scope: its employer, city and job
+type, so the same role offered in two cities or on two contracts is not a
+duplicate. Postings of similarity s share
+a bucket with probability 1 - (1 - s^r)^bands; with 16 bands of 8 values
+that is 95% at 0.8 and 6% at 0.5. The postings sharing a bucket are
+verified on their whole signatures against JOBS_DEDUP_THRESHOLD.
+
+Postings are checked as they are saved: a GIN overlap query on the
+buckets in jobs_jobfingerprint, then a lookup of the matches, however
+many postings there are. A match marks the posting as a duplicate_of the
+earliest matching active posting. cluster() does the same in batch over
+every active posting, for historical data and for rows written by bulk
+paths that bypass model signals (e.g. feed ingestion, apps/jobs/feeds.py).
+"""
+import hashlib
+import logging
+import math
+import re
+from array import array
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Job, JobFingerprint
+
+logger = logging.getLogger(__name__)
+
+MASK32 = 0xFFFFFFFF
+# Added per bin of distance when an empty bin borrows a value (densification)
+BORROW_OFFSET = 0x9E3779B1
+_WORD = re.compile(r'\w+')
+# The fields a fingerprint is computed from, in fingerprint()'s order
+FINGERPRINT_FIELDS = ('title', 'description', 'location', 'job_type')
+
+
+def shingles(title, description):
+    """The set of word n-grams of a posting's text."""
+    words = _WORD.findall(f'{title} {description}'.lower())
+    size = settings.JOBS_DEDUP_SHINGLE_SIZE
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[start:start + size]) for start in range(len(words) - size + 1)}
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def signature(title, description):
+    """The MinHash signature of a posting's text, a list of 32-bit ints; None if it has no words."""
+    bins = settings.JOBS_DEDUP_PERMUTATIONS
+    minimums = [None] * bins
+    for shingle in shingles(title, description):
+        value = _hash64(shingle.encode())
+        index, value = value % bins, value // bins  # low bits pick the bin, the rest is the hash
+        if minimums[index] is None or value < minimums[index]:
+            minimums[index] = value
+    filled = [index for index, value in enumerate(minimums) if value is not None]
+    if not filled:
+        return None
+    result = [0] * bins
+    nearest = filled[0] + bins  # the first filled bin, seen from past the end
+    for index in range(bins - 1, -1, -1):
+        if minimums[index] is not None:
+            nearest = index
+        result[index] = (minimums[nearest % bins] + (nearest - index) * BORROW_OFFSET) & MASK32
+    return result
+
+
+def _city(location):
+    return (location or '').split(',')[0].strip().lower()
+
+
+def buckets(signature, employer_id, location='', job_type=''):
+    """One signed 64-bit bucket per band, scoped to the employer, city and job type."""
+    bands = settings.JOBS_DEDUP_BANDS
+    rows = len(signature) // bands
+    scope = f'{employer_id}|{_city(location)}|{(job_type or "").strip().lower()}|'.encode()
+    return [
+        _hash64(scope + bytes([band]) + array('I', signature[band * rows:(band + 1) * rows]).tobytes()) - (1 << 63)
+        for band in range(bands)
+    ]
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def is_similar(first, second, threshold=None):
+    """
+    Whether two signatures' similarity reaches the threshold (by default
+    JOBS_DEDUP_THRESHOLD). Stops as soon as too many values differ, which
+    is after a few dozen for most candidates.
+    """
+    threshold = settings.JOBS_DEDUP_THRESHOLD if threshold is None else threshold
+    allowed = len(first) - math.ceil(threshold * len(first) - 1e-9)
+    for a, b in zip(first, second):
+        if a != b:
+            allowed -= 1
+            if allowed < 0:
+                return False
+    return True
+
+
+def pack(signature):
+    return array('I', signature).tobytes()
+
+
+def unpack(data):
+    signature = array('I')
+    signature.frombytes(bytes(data))
+    return signature
+
+
+def fingerprint(employer_id, title, description, location='', job_type=''):
+    """(signature, buckets) of a posting, or None if it has no words."""
+    values = signature(title, description)
+    return None if values is None else (values, buckets(values, employer_id, location, job_type))
+
+
+def find_original(fingerprint, exclude=None):
+    """
+    Id of the earliest active posting the fingerprint nearly repeats, older
+    than `exclude` (the posting itself) if given; or None.
+    """
+    values, keys = fingerprint[0], set(fingerprint[1])
+    # The overlap alone, with no LIMIT or other condition: Postgres has no statistics to
+    # estimate && on these arrays and would otherwise prefer scanning the table
+    overlapping = JobFingerprint.objects.filter(buckets__overlap=list(keys)).values_list('job_id', 'buckets')
+    shared = {
+        job_id: len(keys.intersection(other)) for job_id, other in overlapping if exclude is None or job_id < exclude
+    }
+    if not shared:
+        return None
+    # Postings sharing the most bands are the likeliest matches
+    candidates = sorted(shared, key=lambda job_id: (-shared[job_id], job_id))[:settings.JOBS_DEDUP_MAX_CANDIDATES]
+    rows = JobFingerprint.objects.filter(job_id__in=candidates, job__is_active=True).values_list(
+        'job_id', 'signature', 'job__duplicate_of_id',
+    )
+    # An active match is either an original or a duplicate of one
+    return min(
+        (original or job_id for job_id, other, original in rows if is_similar(values, unpack(other))), default=None,
+    )
+
+
+def remember_text(instance):
+    """post_init hook: what check() compares with to tell whether the posting changed."""
+    # Read from __dict__ so a deferred field is not fetched
+    fields = instance.__dict__
+    instance._dedup_loaded = tuple(fields.get(name) for name in (*FINGERPRINT_FIELDS, 'is_active'))
+
+
+def check(instance):
+    """
+    pre_save hook: for a new posting, or one whose text, scope or active
+    flag changed, computes its fingerprint (stored by store() once the row is
+    saved) and sets duplicate_of.
+    """
+    current = tuple(getattr(instance, name) for name in (*FINGERPRINT_FIELDS, 'is_active'))
+    if instance.pk is not None and getattr(instance, '_dedup_loaded', None) == current:
+        return
+    instance._dedup_fingerprint = fingerprint(instance.employer_id, *current[:-1])
+    original = None
+    if instance.is_active and instance._dedup_fingerprint is not None:
+        original = find_original(instance._dedup_fingerprint, exclude=instance.pk)
+    instance.duplicate_of_id = original
+    instance._dedup_loaded = current
+
+
+def store(instance, created=False):
+    """
+    post_save hook: saves the fingerprint check() computed. A posting that is
+    no longer an active original releases its duplicates, which show again
+    until cluster() regroups them.
+    """
+    if not hasattr(instance, '_dedup_fingerprint'):
+        return
+    computed = instance.__dict__.pop('_dedup_fingerprint')
+    if computed is None:
+        JobFingerprint.objects.filter(job_id=instance.pk).delete()
+    else:
+        JobFingerprint.objects.bulk_create(
+            [JobFingerprint(job_id=instance.pk, signature=pack(computed[0]), buckets=computed[1])],
+            update_conflicts=True, unique_fields=['job'], update_fields=['signature', 'buckets', 'updated_at'],
+        )
+    if not created and (not instance.is_active or instance.duplicate_of_id is not None):
+        release_duplicates([instance.pk])
+
+
+def release_duplicates(job_ids):
+    """Clears duplicate_of on the duplicates of these postings, e.g. once they are closed or deleted."""
+    released = list(Job.objects.filter(duplicate_of__in=job_ids).values_list('pk', flat=True))
+    if released:
+        _set_originals({pk: None for pk in released})
+
+
+def _set_originals(originals):
+    """Writes {job id: original id or None} in one UPDATE per chunk and queues the jobs for reindexing."""
+    from apps.search.documents import get_document
+    from apps.search.indexing import enqueue
+
+    items = list(originals.items())
+    for start in range(0, len(items), settings.JOBS_DEDUP_CHUNK_SIZE):
+        chunk = items[start:start + settings.JOBS_DEDUP_CHUNK_SIZE]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE jobs_job j SET duplicate_of_id = v.original "
+                "FROM unnest(%s::bigint[], %s::bigint[]) AS v(id, original) WHERE j.id = v.id",
+                [[pk for pk, _ in chunk], [original for _, original in chunk]],
+            )
+            enqueue(get_document('jobs'), [pk for pk, _ in chunk])
+
+
+def fingerprint_jobs(queryset, chunk_size=None):
+    """
+    Computes and stores the fingerprints of the jobs in `queryset` without
+    model signals, e.g. after bulk inserts; returns how many were stored.
+    """
+    chunk_size = chunk_size or settings.JOBS_DEDUP_CHUNK_SIZE
+    rows = queryset.order_by().values_list('pk', 'employer_id', *FINGERPRINT_FIELDS).iterator(chunk_size)
+    stored, chunk = 0, []
+    for pk, employer_id, *fields in rows:
+        computed = fingerprint(employer_id, *fields)
+        if computed is not None:
+            chunk.append(JobFingerprint(job_id=pk, signature=pack(computed[0]), buckets=computed[1]))
+        if len(chunk) >= chunk_size:
+            stored += _store_fingerprints(chunk)
+            chunk = []
+    return stored + _store_fingerprints(chunk)
+
+
+def _store_fingerprints(fingerprints):
+    if fingerprints:
+        JobFingerprint.objects.bulk_create(
+            fingerprints, update_conflicts=True, unique_fields=['job'],
+            update_fields=['signature', 'buckets', 'updated_at'],
+        )
+    return len(fingerprints)
+
+
+class _Clusters:
+    """Union-find of job ids; each cluster's root is its smallest id, the earliest posting."""
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = item
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+    def originals(self):
+        """{duplicate id: original id} for every clustered id but the roots."""
+        return {item: root for item in self.parent if (root := self.find(item)) != item}
+
+
+def cluster(fingerprint_missing=True, dry_run=False):
+    """
+    Groups every active posting with the near-duplicates it shares an LSH
+    bucket with and updates duplicate_of to match. Buckets holding more
+    than JOBS_DEDUP_MAX_BUCKET_SIZE postings (boilerplate) are skipped.
+    Returns counts of what was done.
+    """
+    report = {'fingerprinted': 0, 'buckets': 0, 'compared': 0, 'duplicates': 0, 'changed': 0}
+    if fingerprint_missing:
+        report['fingerprinted'] = fingerprint_jobs(Job.objects.filter(fingerprint__isnull=True))
+
+    clusters = _Clusters()
+    threshold = settings.JOBS_DEDUP_THRESHOLD
+    # A server-side cursor, so the buckets are streamed rather than fetched at once
+    with transaction.atomic(), connection.chunked_cursor() as cursor:
+        cursor.execute(
+            "SELECT array_agg(f.job_id ORDER BY f.job_id) FROM jobs_jobfingerprint f "
+            "JOIN jobs_job j ON j.id = f.job_id AND j.is_active CROSS JOIN unnest(f.buckets) AS bucket "
+            "GROUP BY bucket HAVING count(*) BETWEEN 2 AND %s",
+            [settings.JOBS_DEDUP_MAX_BUCKET_SIZE],
+        )
+        while groups := [ids for ids, in cursor.fetchmany(settings.JOBS_DEDUP_CHUNK_SIZE)]:
+            report['buckets'] += len(groups)
+            needed = {job_id for ids in groups for job_id in ids}
+            signatures = {
+                job_id: unpack(data)
+                for job_id, data in JobFingerprint.objects.filter(job_id__in=needed).values_list('job_id', 'signature')
+            }
+            for ids in groups:
+                # Each posting is compared with the first posting of each cluster met in the
+                # bucket rather than with every other one: linear when a bucket holds copies
+                leaders = []
+                for job_id in ids:
+                    for leader in leaders:
+                        if clusters.find(job_id) == clusters.find(leader):
+                            break
+                        report['compared'] += 1
+                        if is_similar(signatures[job_id], signatures[leader], threshold):
+                            clusters.union(job_id, leader)
+                            break
+                    else:
+                        leaders.append(job_id)
+
+    originals = clusters.originals()
+    report['duplicates'] = len(originals)
+    current = dict(Job.objects.filter(duplicate_of__isnull=False).values_list('pk', 'duplicate_of_id'))
+    changes = {pk: original for pk, original in originals.items() if current.get(pk) != original}
+    changes.update({pk: None for pk in current.keys() - originals.keys()})
+    report['changed'] = len(changes)
+    if changes and not dry_run:
+        _set_originals(changes)
+    logger.info('Duplicate clustering: %s', report)
+    return report
@@ -0,0 +1,32 @@
+from apps.core.exports import Export
+
+from .models import Application
+
+
+class ApplicationExport(Export):
+    """Applications with their applicant's contact details, to one `job` or to an `employer`'s jobs."""
+    name = 'applications'
+    columns = (
+        ('id', 'id'),
+        ('job_id', 'job_id'),
+        ('job_title', 'job__title'),
+        ('applicant_id', 'applicant_id'),
+        ('email', 'applicant__email'),
+        ('first_name', 'applicant__profile__first_name'),
+        ('last_name', 'applicant__profile__last_name'),
+        ('phone_number', 'applicant__profile__phone_number'),
+        ('location', 'applicant__profile__location'),
+        ('resume', 'applicant__profile__resume'),
+        ('status', 'status'),
+        ('cover_letter', 'cover_letter'),
+        ('submitted_at', 'submitted_at'),
+        ('updated_at', 'updated_at'),
+    )
+
+    def get_queryset(self):
+        applications = Application.objects.all()
+        if self.params.get('job') is not None:
+            applications = applications.filter(job_id=self.params['job'])
+        if self.params.get('employer') is not None:
+            applications = applications.filter(job__employer_id=self.params['employer'])
+        return applications
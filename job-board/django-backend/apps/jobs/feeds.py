@@ -0,0 +1,438 @@
+"""
+Bulk ingestion of job feeds exported by partner ATSs.
+
+An employer's JobFeed takes uploads of XML (<job> elements, one child
+element per field) or JSON (an array of objects, or one object per line).
+Each upload is ingested by a JobFeedRun. The file is parsed as a stream,
+with iterparse or an incremental JSON decoder reading FEED_READ_SIZE bytes
+at a time, so memory holds one chunk of FEED_CHUNK_SIZE postings however
+large the feed is.
+
+Postings are matched on (employer, external_id) through JobSource, which
+also keeps a hash of each posting's content. For each chunk, one query
+finds the known postings and unchanged ones are skipped. New ones are
+inserted with one INSERT and changed ones updated with one UPDATE ... FROM
+unnest. Model signals are bypassed. Instead, jobs_bulk_saved is sent per
+chunk so the search index, autocomplete and stats follow, and fingerprints
+for near-duplicate detection are stored. Duplicates are grouped by the
+daily clustering, and no new-job notifications go out for feed postings.
+
+Once a full feed has been read to the end, the feed's active postings it
+did not list are closed. A feed that cannot be parsed fails its run and
+closes nothing. Invalid postings are counted and skipped; the first
+FEED_ERROR_SAMPLES are kept on the run. Runs of one feed never overlap:
+each holds an advisory lock on the feed.
+"""
+import codecs
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from contextlib import contextmanager
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core import geo
+
+from . import dedup
+from .models import Job, JobFeedRun, JobSource
+from .signals import jobs_bulk_saved
+
+logger = logging.getLogger(__name__)
+
+# First key of the advisory locks held while a feed is ingested; the second is the feed id
+FEED_LOCK_NAMESPACE = 4801
+# Run fields saved as the run progresses
+COUNTS = ['received', 'created', 'updated', 'unchanged', 'closed', 'errors', 'error_samples']
+# Job fields a posting sets: {field: keys accepted in the feed}
+TEXT_FIELDS = {
+    'title': ('title',),
+    'company_name': ('company_name', 'company'),
+    'description': ('description',),
+    'category': ('category',),
+    'location': ('location',),
+}
+JOB_TYPES = {value for value, _ in Job.JOB_TYPE_CHOICES}
+TRUE, FALSE = {'true', '1', 'yes'}, {'false', '0', 'no'}
+# Written by one UPDATE per chunk: (column, array type)
+UPDATE_COLUMNS = (
+    ('title', 'text'), ('company_name', 'text'), ('description', 'text'), ('category', 'text'),
+    ('location', 'text'), ('latitude', 'float8'), ('longitude', 'float8'), ('geohash', 'text'),
+    ('job_type', 'text'), ('is_active', 'boolean'),
+)
+# Blank space and the punctuation between the objects of a JSON array
+_SEPARATORS = re.compile(r'[\s,\[\]]*')
+
+
+class FeedError(Exception):
+    """The feed cannot be read; its run fails and closes nothing."""
+
+
+class FeedBusy(Exception):
+    """Another run of the feed is in progress."""
+
+
+class InvalidPosting(ValueError):
+    pass
+
+
+# Parsing
+
+def _local_name(tag):
+    return tag.rpartition('}')[2]
+
+
+def parse_xml(stream):
+    """Yields each <job> element of an XML feed as {child tag: text}, one element in memory at a time."""
+    parents = []
+    try:
+        for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                parents.append(element)
+                continue
+            parents.pop()
+            if _local_name(element.tag) == 'job':
+                yield {_local_name(child.tag): child.text or '' for child in element}
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+    except ElementTree.ParseError as exc:
+        raise FeedError(f'Invalid XML: {exc}') from None
+
+
+def parse_json(stream):
+    """Yields each value of a JSON feed, a top-level array or one value per line."""
+    decoder, text = json.JSONDecoder(), codecs.getincrementaldecoder('utf-8-sig')()
+    buffer, position, done = '', 0, False
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as exc:
+                if done:
+                    raise FeedError(f'Invalid JSON: {exc.msg}') from None
+            else:
+                yield item
+                continue
+        elif done:
+            return
+        # The next value is incomplete: read on
+        if len(buffer) - position > settings.FEED_MAX_POSTING_CHARS:
+            raise FeedError(f'A posting is longer than {settings.FEED_MAX_POSTING_CHARS} characters')
+        data = stream.read(settings.FEED_READ_SIZE)
+        done = not data
+        try:
+            buffer = buffer[position:] + text.decode(data, final=done)
+        except UnicodeDecodeError:
+            raise FeedError('Not UTF-8 text') from None
+        position = 0
+
+
+PARSERS = {'xml': parse_xml, 'json': parse_json}
+
+
+# Postings
+
+def _text(item, *keys):
+    for key in keys:
+        value = item.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, (str, int, float)):
+            raise InvalidPosting(f'{key} is not text')
+        return str(value).strip()
+    return ''
+
+
+def _point(item):
+    values = [_text(item, 'latitude'), _text(item, 'longitude')]
+    if not any(values):
+        return None, None
+    try:
+        latitude, longitude = (float(value) for value in values)
+    except ValueError:
+        raise InvalidPosting('latitude and longitude must both be numbers') from None
+    if not (math.isfinite(latitude) and math.isfinite(longitude)
+            and -90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise InvalidPosting('latitude or longitude out of range')
+    return latitude, longitude
+
+
+def _flag(item, *keys):
+    for key in keys:
+        value = item.get(key)
+        if value is None or value == '':
+            continue
+        if isinstance(value, bool):
+            return value
+        value = str(value).strip().lower()
+        if value in TRUE | FALSE:
+            return value in TRUE
+        raise InvalidPosting(f'{key} is not true or false')
+    return True
+
+
+def clean(item):
+    """(external_id, {job field: value}) of a parsed posting; raises InvalidPosting."""
+    if not isinstance(item, dict):
+        raise InvalidPosting('Not an object')
+    external_id = _text(item, 'external_id', 'id')
+    if not external_id:
+        raise InvalidPosting('Missing external_id')
+    if len(external_id) > JobSource._meta.get_field('external_id').max_length:
+        raise InvalidPosting('external_id too long')
+    fields = {name: _text(item, *keys) for name, keys in TEXT_FIELDS.items()}
+    for name in ('title', 'description'):
+        if not fields[name]:
+            raise InvalidPosting(f'Missing {name}')
+    for name, value in fields.items():
+        limit = Job._meta.get_field(name).max_length
+        if limit and len(value) > limit:
+            raise InvalidPosting(f'{name} longer than {limit} characters')
+    job_type = re.sub(r'[\s-]+', '_', _text(item, 'job_type', 'type').lower()) or 'full_time'
+    if job_type not in JOB_TYPES:
+        raise InvalidPosting(f'Unknown job_type {job_type!r}')
+    fields['job_type'] = job_type
+    fields['latitude'], fields['longitude'] = _point(item)
+    fields['is_active'] = _flag(item, 'active', 'is_active')
+    return external_id, fields
+
+
+def content_hash(fields):
+    """Hash of a cleaned posting, to tell whether it changed since the last run."""
+    data = json.dumps(fields, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _record_error(run, position, item, exc):
+    run.errors += 1
+    if len(run.error_samples) < settings.FEED_ERROR_SAMPLES:
+        sample = {'posting': position, 'error': str(exc)}
+        if isinstance(item, dict) and (item.get('external_id') or item.get('id')):
+            sample['external_id'] = str(item.get('external_id') or item.get('id'))[:255]
+        run.error_samples.append(sample)
+
+
+def _postings(stream, file_format, run, seen):
+    """Yields (external_id, fields) of the valid postings, counting the others on the run."""
+    for item in PARSERS[file_format](stream):
+        run.received += 1
+        try:
+            external_id, fields = clean(item)
+            if external_id in seen:
+                raise InvalidPosting(f'external_id {external_id!r} listed twice')
+        except InvalidPosting as exc:
+            _record_error(run, run.received, item, exc)
+            continue
+        seen.add(external_id)
+        yield external_id, fields
+
+
+def _chunks(postings, size):
+    chunk = {}
+    for external_id, fields in postings:
+        chunk[external_id] = fields
+        if len(chunk) >= size:
+            yield chunk
+            chunk = {}
+    if chunk:
+        yield chunk
+
+
+# Writing
+
+def _locate(fields, geocoded):
+    """The job fields of a posting, geocoded unless it gave coordinates."""
+    point = (fields['latitude'], fields['longitude'])
+    if None in point:
+        location = fields['location']
+        if location not in geocoded:
+            geocoded[location] = geo.geocode(location) or (None, None)
+        point = geocoded[location]
+    return {
+        **fields, 'latitude': point[0], 'longitude': point[1],
+        'geohash': geo.encode(*point) if None not in point else None,
+    }
+
+
+def _update_jobs(jobs):
+    """Writes {job id: job fields} with one UPDATE."""
+    ids = list(jobs)
+    assignments = ', '.join(f'{column} = v.{column}' for column, _ in UPDATE_COLUMNS)
+    arrays = ', '.join(f'%s::{array_type}[]' for _, array_type in UPDATE_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE jobs_job j SET {assignments}, updated_at = %s "
+            f"FROM unnest(%s::bigint[], {arrays}) AS v(id, {', '.join(column for column, _ in UPDATE_COLUMNS)}) "
+            f"WHERE j.id = v.id",
+            [timezone.now(), ids, *([jobs[pk][column] for pk in ids] for column, _ in UPDATE_COLUMNS)],
+        )
+
+
+def _save_chunk(feed, postings, run):
+    """Inserts the new postings of a chunk and updates the changed ones."""
+    employer_id = feed.employer_id
+    hashes = {external_id: content_hash(fields) for external_id, fields in postings.items()}
+    # A source whose job is gone (e.g. its partition was archived) is not matched, so the posting is new again
+    known = {
+        external_id: (job_id, digest, tuple(previous))
+        for external_id, job_id, digest, *previous in JobSource.objects.filter(
+            employer_id=employer_id, external_id__in=list(postings),
+        ).values_list('external_id', 'job_id', 'content_hash', 'job__title', 'job__company_name', 'job__is_active')
+    }
+    new, changed, unchanged = [], [], []
+    for external_id, fields in postings.items():
+        if external_id not in known:
+            new.append(external_id)
+        elif known[external_id][1] != hashes[external_id] or known[external_id][2][2] != fields['is_active']:
+            # Also a posting closed as missing from an earlier run and listed again
+            changed.append(external_id)
+        else:
+            unchanged.append(external_id)
+
+    geocoded = {}
+    created = {}
+    if new:
+        JobSource.objects.filter(employer_id=employer_id, external_id__in=new).delete()
+        jobs = Job.objects.bulk_create([
+            Job(employer_id=employer_id, **_locate(postings[external_id], geocoded)) for external_id in new
+        ])
+        created = {external_id: job.pk for external_id, job in zip(new, jobs)}
+    updated = {known[external_id][0]: external_id for external_id in changed}
+    if updated:
+        _update_jobs({pk: _locate(postings[external_id], geocoded) for pk, external_id in updated.items()})
+    sources = [(external_id, pk) for external_id, pk in created.items()]
+    sources += [(external_id, pk) for pk, external_id in updated.items()]
+    if sources:
+        JobSource.objects.bulk_create(
+            [JobSource(job_id=pk, employer_id=employer_id, external_id=external_id, feed=feed,
+                       content_hash=hashes[external_id]) for external_id, pk in sources],
+            update_conflicts=True, unique_fields=['employer', 'external_id'],
+            update_fields=['feed', 'content_hash', 'updated_at'],
+        )
+    if unchanged:
+        # Postings moved from another feed of the employer now belong to this one
+        moved = JobSource.objects.filter(employer_id=employer_id, external_id__in=unchanged).exclude(feed=feed)
+        moved.update(feed=feed)
+
+    if sources:
+        previous = {pk: known[external_id][2] for pk, external_id in updated.items()}
+        closed = [
+            pk for pk, external_id in updated.items() if previous[pk][2] and not postings[external_id]['is_active']
+        ]
+        if closed:
+            dedup.release_duplicates(closed)
+        jobs_bulk_saved.send(sender=Job, created=list(created.values()), updated=list(updated), previous=previous)
+        dedup.fingerprint_jobs(Job.objects.filter(pk__in=[pk for _, pk in sources]))
+    run.created += len(new)
+    run.updated += len(changed)
+    run.unchanged += len(unchanged)
+
+
+def close_missing(feed, seen):
+    """Closes the feed's active postings whose external id is not in `seen`; returns how many."""
+    missing = [
+        job_id for external_id, job_id in
+        JobSource.objects.filter(feed=feed, job__is_active=True).values_list('external_id', 'job_id').iterator()
+        if external_id not in seen
+    ]
+    closed = 0
+    for start in range(0, len(missing), settings.FEED_CHUNK_SIZE):
+        with transaction.atomic():
+            previous = {
+                pk: (title, company_name, True) for pk, title, company_name in Job.objects.filter(
+                    pk__in=missing[start:start + settings.FEED_CHUNK_SIZE], is_active=True,
+                ).values_list('pk', 'title', 'company_name')
+            }
+            Job.objects.filter(pk__in=list(previous)).update(is_active=False, updated_at=timezone.now())
+            dedup.release_duplicates(list(previous))
+            jobs_bulk_saved.send(sender=Job, created=[], updated=list(previous), previous=previous)
+        closed += len(previous)
+    return closed
+
+
+@contextmanager
+def feed_lock(feed_id):
+    """Holds the feed's advisory lock for the session; raises FeedBusy if another run holds it."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [FEED_LOCK_NAMESPACE, feed_id])
+        if not cursor.fetchone()[0]:
+            raise FeedBusy(f'Feed {feed_id} is being ingested')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [FEED_LOCK_NAMESPACE, feed_id])
+
+
+def ingest(run, stream):
+    """
+    Ingests a feed file (a binary stream) into `run`, saving its counts
+    after each chunk; returns the run. Raises FeedBusy if another run of
+    the feed is in progress.
+    """
+    feed = run.feed
+    with feed_lock(feed.pk):
+        run.status, run.started_at = 'running', timezone.now()
+        run.save(update_fields=['status', 'started_at'])
+        seen = set()
+        try:
+            for chunk in _chunks(_postings(stream, feed.format, run, seen), settings.FEED_CHUNK_SIZE):
+                with transaction.atomic():
+                    _save_chunk(feed, chunk, run)
+                run.save(update_fields=COUNTS)
+            if run.is_full:
+                run.closed = close_missing(feed, seen)
+        except FeedError as exc:
+            run.status, run.message = 'failed', str(exc)
+        except Exception as exc:
+            run.status, run.message = 'failed', f'Ingestion failed: {exc.__class__.__name__}'
+            raise
+        else:
+            run.status = 'done'
+        finally:
+            run.finished_at = timezone.now()
+            run.save()
+    logger.info(
+        'Feed %s run %s %s: %s received, %s created, %s updated, %s unchanged, %s closed, %s errors in %.1fs',
+        feed.pk, run.pk, run.status, run.received, run.created, run.updated, run.unchanged, run.closed,
+        run.errors, run.seconds,
+    )
+    return run
+
+
+def start_run(feed, upload, is_full=None):
+    """Saves an uploaded feed file and queues its ingestion once the transaction commits; returns the run."""
+    from .tasks import ingest_job_feed
+
+    with transaction.atomic():
+        run = JobFeedRun.objects.create(feed=feed, is_full=feed.is_full if is_full is None else is_full)
+        extension = os.path.splitext(upload.name or '')[1][:10] or f'.{feed.format}'
+        run.file = default_storage.save(f'feeds/{feed.pk}/{run.pk}{extension}', upload)
+        run.save(update_fields=['file'])
+        transaction.on_commit(lambda: ingest_job_feed.delay(run.pk))
+    return run
+
+
+def ingest_upload(run_id):
+    """Ingests the file of a queued run, then deletes it; returns the run. Raises FeedBusy."""
+    run = JobFeedRun.objects.select_related('feed').get(pk=run_id)
+    if run.status != 'pending':
+        return run  # a task delivered twice
+    try:
+        with default_storage.open(run.file, 'rb') as stream:
+            ingest(run, stream)
+    except OSError:
+        logger.warning('File %s of feed run %s could not be read', run.file, run.pk)
+        run.status, run.message, run.finished_at = 'failed', 'The uploaded file is missing', timezone.now()
+        run.save(update_fields=['status', 'message', 'finished_at'])
+    if run.status in ('done', 'failed'):
+        default_storage.delete(run.file)
+    return run
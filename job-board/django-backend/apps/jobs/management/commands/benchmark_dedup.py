@@ -0,0 +1,173 @@
+import itertools
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import seeding
+from apps.core.benchmarking import summarize, write_results
+from apps.jobs import dedup
+from apps.jobs.models import JobFingerprint
+
+SYLLABLES = ['ka', 'ri', 'mo', 'zu', 'te', 'lan', 'bo', 'sha', 'ni', 'vor', 'el', 'da', 'qui', 'ston', 'ma']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure near-duplicate detection on a synthetic corpus: postings with Zipf-distributed "
+        "words, some reposted with random word edits. Reports signature throughput, LSH lookup "
+        "latency, precision and recall against exact Jaccard similarity, and the cost of exact "
+        "pairwise comparison. With --db-queries, also times the lookup run when a job is saved "
+        "against the fingerprints stored in the database (run dedupe_jobs first)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--postings', type=int, default=20000, help='Original postings')
+        parser.add_argument('--repost-rate', type=float, default=0.2, help='Share of postings reposted')
+        parser.add_argument('--max-edit-rate', type=float, default=0.15,
+                            help='Reposts change each word with a probability drawn up to this')
+        parser.add_argument('--pairwise-sample', type=int, default=1000,
+                            help='Postings compared exactly pairwise to estimate the quadratic cost')
+        parser.add_argument('--db-queries', type=int, default=0, help='Saved-job lookups to time on the database')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['postings'] < 10 or not 0 <= options['repost_rate'] <= 1:
+            raise CommandError('--postings must be at least 10 and --repost-rate between 0 and 1')
+        rng = random.Random(options['seed'])
+        postings, families = self._corpus(rng, options)
+        threshold = settings.JOBS_DEDUP_THRESHOLD
+        self.stdout.write(f"{len(postings)} postings ({len(postings) - options['postings']} reposts)")
+
+        started = time.perf_counter()
+        fingerprints = [dedup.fingerprint(employer, title, text) for employer, title, text in postings]
+        signature_s = time.perf_counter() - started
+
+        # Check each posting against the earlier ones, as saving it does
+        index, reported, latencies, candidates = defaultdict(list), set(), [], []
+        started = time.perf_counter()
+        for job_id, (values, keys) in enumerate(fingerprints):
+            t0 = time.perf_counter()
+            found = {other for key in keys for other in index[key]}
+            matches = {other for other in found if dedup.is_similar(values, fingerprints[other][0])}
+            latencies.append((time.perf_counter() - t0) * 1000)
+            candidates.append(len(found))
+            reported.update((other, job_id) for other in matches)
+            for key in keys:
+                index[key].append(job_id)
+        scenarios = {'lookup': summarize(latencies, time.perf_counter() - started)}
+        scenarios['lookup']['candidates'] = round(statistics.fmean(candidates), 2)
+
+        shingles = {}
+
+        def exact(first, second):
+            for job_id in (first, second):
+                if job_id not in shingles:
+                    shingles[job_id] = dedup.shingles(*postings[job_id][1:])
+            return len(shingles[first] & shingles[second]) / len(shingles[first] | shingles[second])
+
+        # Near-duplicates of other families are vanishingly unlikely with random texts
+        actual = {
+            pair for family in families for pair in itertools.combinations(sorted(family), 2)
+            if exact(*pair) >= threshold
+        }
+        true_positives = sum(1 for pair in reported if exact(*pair) >= threshold)
+        precision = true_positives / len(reported) if reported else 1.0
+        recall = len(reported & actual) / len(actual) if actual else 1.0
+
+        sample = list(range(min(options['pairwise_sample'], len(postings))))
+        sample_shingles = [dedup.shingles(*postings[job_id][1:]) for job_id in sample]
+        started = time.perf_counter()
+        comparisons = 0
+        for first, second in itertools.combinations(sample_shingles, 2):
+            len(first & second) / len(first | second)
+            comparisons += 1
+        per_comparison = (time.perf_counter() - started) / max(1, comparisons)
+        pairwise_s = per_comparison * len(postings) * (len(postings) - 1) / 2
+
+        if options['db_queries']:
+            scenarios['database_lookup'] = self._database(rng, options['db_queries'])
+
+        quality = {
+            'reported_pairs': len(reported), 'true_pairs': len(actual),
+            'precision': round(precision, 4), 'recall': round(recall, 4),
+        }
+        self.stdout.write(
+            f"signatures: {len(postings) / signature_s:,.0f}/s ({signature_s:.1f}s); "
+            f"all pairs compared exactly would take ~{pairwise_s:,.0f}s"
+        )
+        for label, summary in scenarios.items():
+            self.stdout.write(
+                f"{label:16} p50 {summary['latency_ms']['p50']:7.3f}ms  p95 {summary['latency_ms']['p95']:7.3f}ms  "
+                f"candidates {summary['candidates']:6.2f}"
+            )
+        self.stdout.write(
+            f"reported {len(reported)} pairs, {len(actual)} with similarity >= {threshold}: "
+            f"precision {precision:.3f}, recall {recall:.3f}"
+        )
+        if options['output']:
+            config = {key: options[key] for key in ('postings', 'repost_rate', 'max_edit_rate', 'seed')}
+            write_results(
+                options['output'], scenarios, threshold=threshold, bands=settings.JOBS_DEDUP_BANDS,
+                permutations=settings.JOBS_DEDUP_PERMUTATIONS, signatures_per_s=round(len(postings) / signature_s),
+                pairwise_estimated_s=round(pairwise_s), **quality, **config,
+            )
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _corpus(self, rng, options):
+        """[(employer, title, description)] and the families of ids of each reposted posting."""
+        words = sorted({''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(20000)})
+        weights = [1 / (rank + 1) for rank in range(len(words))]
+        employers = max(1, options['postings'] // 20)
+        postings, families = [], []
+        for _ in range(options['postings']):
+            text = rng.choices(words, weights=weights, k=rng.randint(40, 160))
+            postings.append((rng.randrange(employers), rng.choice(seeding.TITLES), text))
+        for original in rng.sample(range(len(postings)), round(options['repost_rate'] * len(postings))):
+            family = [original]
+            employer, title, text = postings[original]
+            for _ in range(rng.choice((1, 1, 2))):
+                rate = rng.uniform(0, options['max_edit_rate'])
+                edited = []
+                for word in text:
+                    roll = rng.random()
+                    if roll >= rate:
+                        edited.append(word)
+                    elif roll < rate / 3:
+                        edited.extend((word, rng.choices(words, weights=weights)[0]))  # insert
+                    elif roll < rate * 2 / 3:
+                        edited.append(rng.choices(words, weights=weights)[0])  # replace
+                family.append(len(postings))
+                postings.append((employer, title, edited))
+            families.append(family)
+        return [(employer, title, ' '.join(text)) for employer, title, text in postings], families
+
+    def _database(self, rng, queries):
+        """Times find_original() for stored fingerprints, as saving their job would run it."""
+        count = JobFingerprint.objects.count()
+        if not count:
+            raise CommandError('No stored fingerprints: run dedupe_jobs first')
+        ids = list(JobFingerprint.objects.order_by('?').values_list('job_id', flat=True)[:queries])
+        stored = {
+            job_id: (dedup.unpack(data), keys)
+            for job_id, data, keys in JobFingerprint.objects.filter(job_id__in=ids)
+            .values_list('job_id', 'signature', 'buckets')
+        }
+        dedup.find_original(stored[ids[0]], exclude=ids[0])  # warm up
+        latencies = []
+        started = time.perf_counter()
+        for job_id in ids:
+            t0 = time.perf_counter()
+            dedup.find_original(stored[job_id], exclude=job_id)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        summary = summarize(latencies, time.perf_counter() - started)
+        summary['candidates'] = round(statistics.fmean(
+            JobFingerprint.objects.filter(buckets__overlap=stored[job_id][1]).count() - 1 for job_id in ids[:100]
+        ), 2)
+        summary['fingerprints'] = count
+        self.stdout.write(f"{count} stored fingerprints")
+        return summary
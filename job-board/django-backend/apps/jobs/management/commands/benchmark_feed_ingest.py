@@ -0,0 +1,126 @@
+import json
+import os
+import random
+import resource
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.accounts.models import CustomUser
+from apps.core import seeding
+from apps.core.benchmarking import write_results
+from apps.jobs import feeds, partitions
+from apps.jobs.models import Job, JobFeed, JobFeedRun
+from apps.search.documents import get_document
+from apps.search.indexing import enqueue
+from apps.stats.rollups import record
+
+BENCHMARK_EMAIL = 'feed-benchmark@example.com'
+WORDS = ['build', 'scale', 'team', 'customers', 'platform', 'data', 'ship', 'review', 'design', 'mentor',
+         'reliable', 'services', 'product', 'growth', 'remote', 'support', 'cloud', 'api', 'mobile', 'quality']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure feed ingestion (apps/jobs/feeds.py) on a synthetic partner feed: a first load, the "
+        "same file again (every posting unchanged), and a file with --changed of the postings "
+        "edited and --removed left out (closed, as the feed is full), then an empty file closing "
+        "the rest. Reports postings/s per pass and peak memory. Works on a scratch employer, "
+        "deleted afterwards with its jobs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--postings', type=int, default=20000)
+        parser.add_argument('--format', dest='file_format', choices=sorted(feeds.PARSERS), default='json')
+        parser.add_argument('--changed', type=float, default=0.1, help='Share of postings edited in the third pass')
+        parser.add_argument('--removed', type=float, default=0.05, help='Share of postings left out of the third pass')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Leave the scratch employer and its jobs in place')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['postings'] < 1 or not 0 <= options['changed'] <= 1 or not 0 <= options['removed'] <= 1:
+            raise CommandError('--postings must be positive, --changed and --removed between 0 and 1')
+        rng = random.Random(options['seed'])
+        CustomUser.objects.filter(email=BENCHMARK_EMAIL).delete()
+        employer = CustomUser.objects.create_user(email=BENCHMARK_EMAIL, password=None)
+        feed = JobFeed.objects.create(employer=employer, name='Benchmark', format=options['file_format'])
+
+        postings = [self._posting(rng, index) for index in range(options['postings'])]
+        edited = [dict(posting) for posting in postings]
+        for posting in rng.sample(edited, round(options['changed'] * len(edited))):
+            posting['description'] += ' ' + ' '.join(rng.choices(WORDS, k=5))
+        removed = set(rng.sample(range(len(edited)), round(options['removed'] * len(edited))))
+        edited = [posting for index, posting in enumerate(edited) if index not in removed]
+
+        scenarios = {}
+        try:
+            passes = (('initial', postings), ('unchanged', postings), ('changed', edited), ('emptied', []))
+            for label, items in passes:
+                run = self._ingest(feed, items, options['file_format'])
+                scenarios[label] = {
+                    'postings': run.received, 'seconds': round(run.seconds, 3),
+                    'postings_per_s': run.postings_per_second or 0,
+                    **{key: getattr(run, key) for key in ('created', 'updated', 'unchanged', 'closed', 'errors')},
+                }
+                self.stdout.write(
+                    f"{label:10} {run.received:7} postings in {run.seconds:6.1f}s "
+                    f"({run.postings_per_second or 0:8,.0f}/s): "
+                    f"{run.created} created, {run.updated} updated, {run.unchanged} unchanged, {run.closed} closed"
+                )
+        finally:
+            if not options['keep']:
+                self._delete(employer)
+        # ru_maxrss is in KiB on Linux
+        peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(f"peak RSS {peak_mib:.0f} MiB")
+        if options['output']:
+            config = {key: options[key] for key in ('postings', 'file_format', 'changed', 'removed', 'seed')}
+            write_results(options['output'], scenarios, peak_rss_mib=round(peak_mib), **config)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _posting(self, rng, index):
+        return {
+            'external_id': f'REQ-{index:07d}',
+            'title': rng.choice(seeding.TITLES),
+            'company': rng.choice(seeding.COMPANIES),
+            'description': ' '.join(rng.choices(WORDS, k=rng.randint(40, 120))),
+            'category': rng.choice(seeding.CATEGORIES),
+            'location': rng.choice(seeding.LOCATIONS),
+            'job_type': rng.choice(seeding.JOB_TYPES),
+        }
+
+    def _ingest(self, feed, postings, file_format):
+        """Writes the postings to a feed file and ingests it; returns the run."""
+        with tempfile.NamedTemporaryFile('w', suffix=f'.{file_format}', delete=False) as output:
+            if file_format == 'json':
+                for posting in postings:
+                    output.write(json.dumps(posting) + '\n')
+            else:
+                output.write('<jobs>\n')
+                for posting in postings:
+                    fields = ''.join(f'<{key}>{escape(value)}</{key}>' for key, value in posting.items())
+                    output.write(f'  <job>{fields}</job>\n')
+                output.write('</jobs>\n')
+        try:
+            run = JobFeedRun.objects.create(feed=feed, is_full=True)
+            with open(output.name, 'rb') as stream:
+                feeds.ingest(run, stream)
+            if run.status != 'done':
+                raise CommandError(f'Run failed: {run.message}')
+            return run
+        finally:
+            os.unlink(output.name)
+
+    def _delete(self, employer):
+        """Deletes the scratch jobs in bulk: deleted one by one, each would signal stats and search."""
+        ids = list(Job.objects.filter(employer=employer).values_list('pk', flat=True))
+        with transaction.atomic(), connection.cursor() as cursor:
+            for table, column in partitions.job_side_tables():
+                cursor.execute(f"DELETE FROM {table} WHERE {column} = ANY(%s)", [ids])
+            cursor.execute("DELETE FROM jobs_job WHERE employer_id = %s", [employer.pk])
+            enqueue(get_document('jobs'), ids)  # jobs gone from the table are removed from the index
+            record('jobs_posted', delta=-len(ids))
+            employer.delete()
@@ -0,0 +1,133 @@
+import operator
+import random
+import statistics
+import time
+from functools import reduce
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from apps.core import geo, seeding
+from apps.core.benchmarking import summarize, write_results
+from apps.jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Time radius and bounding-box job searches on the seeded jobs (the reference run uses "
+        "`seed_data --users 0 --jobs 1000000`): geohash-pruned queries as the job API runs them, "
+        "with several cover sizes, against exact filters over every active job. Each search counts "
+        "its matches and fetches the first page, as a listing does. Centers are drawn around the "
+        "seeded cities, where the jobs are"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--radii', default='5,25,100', help='Comma-separated search radii (km)')
+        parser.add_argument('--cells', default='4,16,64', help='Comma-separated GEO_COVER_MAX_CELLS values to compare')
+        parser.add_argument('--queries', type=int, default=200, help='Searches to time per scenario')
+        parser.add_argument('--scan-queries', type=int, default=20,
+                            help='Searches to time without pruning (0: skip); also used to check the results')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        try:
+            radii = [float(radius) for radius in options['radii'].split(',')]
+            cells = [int(count) for count in options['cells'].split(',')]
+        except ValueError:
+            raise CommandError('--radii and --cells must be comma-separated numbers')
+        if min(radii) <= 0 or min(cells) < 1 or options['queries'] < 1 or options['scan_queries'] < 0:
+            raise CommandError('--radii, --cells and --queries must be positive')
+        located = Job.objects.filter(is_active=True, geohash__isnull=False).count()
+        if not located:
+            raise CommandError('No located jobs: run seed_data first')
+        self.stdout.write(f"{located} active located jobs")
+        self.page_size = options['page_size']
+
+        rng = random.Random(options['seed'])
+        cities = [geo.CITIES[name.lower()] for name in seeding.LOCATIONS if name.lower() in geo.CITIES]
+        centers = []
+        for _ in range(options['queries']):
+            latitude, longitude = rng.choice(cities)
+            centers.append((latitude + rng.gauss(0, seeding.JOB_SPREAD_DEGREES),
+                            longitude + rng.gauss(0, seeding.JOB_SPREAD_DEGREES)))
+        scan_centers = centers[:options['scan_queries']]
+
+        active = Job.objects.filter(is_active=True)
+        scenarios = {}
+        for radius in radii:
+            boxes = {center: geo.radius_box(*center, radius) for center in centers}
+            expected = {}
+            if scan_centers:
+                def scan(center, radius=radius):
+                    return (active.annotate(distance_km=geo.distance_km(*center))
+                            .filter(distance_km__lte=radius).order_by('distance_km', 'pk'))
+                scenarios[f'radius:scan@{radius:g}km'], expected = self._run(scan, scan_centers)
+            for count in cells:
+                def pruned(center, radius=radius, count=count):
+                    return geo.within_radius(active, *center, radius, max_cells=count).order_by('distance_km', 'pk')
+                scenarios[f'radius:geohash{count}@{radius:g}km'], _ = self._run(
+                    pruned, centers, expected, cover=lambda center, count=count: geo.cover(*boxes[center], count),
+                )
+
+            expected = {}
+            if scan_centers:
+                def box_scan(box):
+                    south, west, north, east = box
+                    return (active.filter(latitude__range=(south, north), longitude__range=(west, east))
+                            .order_by('-created_at', '-pk'))
+                scenarios[f'bbox:scan@{radius:g}km'], expected = self._run(
+                    box_scan, [boxes[center] for center in scan_centers],
+                )
+            for count in cells:
+                def box_pruned(box, count=count):
+                    return geo.within_box(active, *box, max_cells=count).order_by('-created_at', '-pk')
+                scenarios[f'bbox:geohash{count}@{radius:g}km'], _ = self._run(
+                    box_pruned, list(boxes.values()), expected, cover=lambda box, count=count: geo.cover(*box, count),
+                )
+
+        for label, summary in scenarios.items():
+            self.stdout.write(
+                f"{label:28} p50 {summary['latency_ms']['p50']:9.3f}ms  p95 {summary['latency_ms']['p95']:9.3f}ms  "
+                f"matches {summary['matches']:8.1f}  candidates {summary['candidates']:9.1f}"
+                + (f"  WRONG RESULTS {summary['errors']}" if summary['errors'] else '')
+            )
+
+        if options['output']:
+            config = {key: options[key] for key in ('queries', 'scan_queries', 'page_size', 'seed')}
+            write_results(options['output'], scenarios, radii=radii, cells=cells, jobs=located, **config)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _run(self, build, arguments, expected=None, cover=None):
+        """
+        Times count() plus the first page of build(argument) for each
+        argument. Returns the summary and {argument: (count, page ids)};
+        results differing from `expected` count as errors. `cover` gives
+        the geohash cells of an argument, to count the candidate rows the
+        index scan returns (every active job without one).
+        """
+        list(build(arguments[0])[:self.page_size])  # warm up
+        latencies, results = [], {}
+        started = time.perf_counter()
+        for argument in arguments:
+            t0 = time.perf_counter()
+            queryset = build(argument)
+            count = queryset.count()
+            page = [job.pk for job in queryset[:self.page_size]]
+            latencies.append((time.perf_counter() - t0) * 1000)
+            results[argument] = (count, page)
+        elapsed = time.perf_counter() - started
+
+        errors = sum(1 for argument, result in (expected or {}).items() if results[argument] != result)
+        summary = summarize(latencies, elapsed, errors=errors)
+        summary['matches'] = round(statistics.fmean(count for count, _ in results.values()), 1)
+        summary['candidates'] = round(statistics.fmean(self._candidates(cover, argument) for argument in arguments), 1)
+        return summary, results
+
+    def _candidates(self, cover, argument):
+        active = Job.objects.filter(is_active=True)
+        cells = cover(argument) if cover else []
+        if not cells:
+            return active.count()
+        return active.filter(reduce(operator.or_, (Q(geohash__startswith=cell) for cell in cells))).count()
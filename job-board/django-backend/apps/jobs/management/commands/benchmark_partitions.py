@@ -0,0 +1,183 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.benchmarking import summarize, write_results
+from apps.jobs.partitions import add_months, month_start
+
+PLAIN = 'bench_jobs_plain'
+PARTITIONED = 'bench_jobs_partitioned'
+COLUMNS = (
+    "id bigint NOT NULL, employer_id uuid NOT NULL, title varchar(255) NOT NULL, description text NOT NULL, "
+    "is_active boolean NOT NULL, created_at timestamptz NOT NULL"
+)
+CHURN = 0.02  # share of the current month's rows updated before each vacuum
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a plain and a monthly-partitioned copy of the job table as history grows: "
+        "recent listings, id lookups, a month count, and the vacuum after churn on recent rows. "
+        "Months past --retention are detached from the partitioned copy, as the maintenance task "
+        "does. Works on scratch tables (bench_jobs_*), which are dropped afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', default='3,12,36', help='Comma-separated months of history to measure at')
+        parser.add_argument('--rows-per-month', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=300, help='Queries to time per scenario')
+        parser.add_argument('--retention', type=int, default=12,
+                            help='Months kept attached to the partitioned copy (0: keep all)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Leave the scratch tables in place')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        try:
+            steps = sorted(int(months) for months in options['months'].split(','))
+        except ValueError:
+            raise CommandError('--months must be comma-separated integers')
+        if not steps or steps[0] < 1 or options['rows_per_month'] < 100 or options['queries'] < 1:
+            raise CommandError('--months, --rows-per-month (>= 100) and --queries must be positive')
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.current = month_start(timezone.now())
+        self.detached = []
+
+        self._drop()
+        self._create()
+        scenarios = {}
+        try:
+            loaded = 0
+            for months in steps:
+                started = time.perf_counter()
+                for age in range(loaded, months):
+                    self._load_month(age)
+                    if options['retention'] and age >= options['retention']:
+                        self._execute(f"ALTER TABLE {PARTITIONED} DETACH PARTITION {self._month_table(age)}")
+                        self.detached.append(self._month_table(age))
+                loaded = months
+                for table in (PLAIN, PARTITIONED):
+                    self._execute(f'VACUUM ANALYZE {table}')
+                self.stdout.write(f"{months} months loaded in {time.perf_counter() - started:.1f}s")
+                for table, layout in ((PLAIN, 'plain'), (PARTITIONED, 'partitioned')):
+                    for name, summary in self._measure(table).items():
+                        label = f'{name}:{layout}@{months}m'
+                        scenarios[label] = summary
+                        self.stdout.write(
+                            f"  {label:32} p50 {summary['latency_ms']['p50']:9.3f}ms  "
+                            f"p95 {summary['latency_ms']['p95']:9.3f}ms"
+                        )
+                    self.stdout.write(f"  {'indexes:' + layout:32} {self._index_sizes(table)}")
+        finally:
+            if not options['keep']:
+                self._drop()
+
+        if options['output']:
+            config = {key: options[key] for key in ('rows_per_month', 'queries', 'retention', 'seed')}
+            write_results(options['output'], scenarios, months=steps, **config)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _execute(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else None
+
+    def _create(self):
+        for table, partitioned in ((PLAIN, False), (PARTITIONED, True)):
+            key = 'id, created_at' if partitioned else 'id'
+            self._execute(f"CREATE TABLE {table} ({COLUMNS}, PRIMARY KEY ({key}))"
+                          + (' PARTITION BY RANGE (created_at)' if partitioned else ''))
+            self._execute(f"CREATE INDEX {table}_active_recent ON {table} (is_active, created_at DESC)")
+            self._execute(f"CREATE INDEX {table}_employer ON {table} (employer_id)")
+
+    def _drop(self):
+        for table in (PLAIN, PARTITIONED, *getattr(self, 'detached', [])):
+            self._execute(f"DROP TABLE IF EXISTS {table}")
+
+    def _month_table(self, age):
+        return f"{PARTITIONED}_p{add_months(self.current, -age):%Y_%m}"
+
+    def _load_month(self, age):
+        """Adds the month `age` months before the current one to both tables."""
+        start = add_months(self.current, -age)
+        end = timezone.now() if age == 0 else add_months(start, 1)
+        rows = self.options['rows_per_month']
+        self._execute(
+            f"CREATE TABLE {self._month_table(age)} PARTITION OF {PARTITIONED} FOR VALUES FROM (%s) TO (%s)",
+            [start, add_months(start, 1)],
+        )
+        # Older months get lower ids, as they would from a sequence; 5% of jobs are still open
+        self._execute(
+            f"INSERT INTO {PLAIN} SELECT (1000 - %s) * %s + n, md5((n %% 500)::text)::uuid, "
+            f"'Job ' || n, repeat('Responsibilities and requirements. ', 20), "
+            f"random() < CASE WHEN %s = 0 THEN 0.9 ELSE 0.05 END, %s + random() * (%s::timestamptz - %s) "
+            f"FROM generate_series(1, %s) AS n",
+            [age, rows, age, start, end, start, rows],
+        )
+        self._execute(
+            f"INSERT INTO {PARTITIONED} SELECT * FROM {PLAIN} WHERE created_at >= %s AND created_at < %s",
+            [start, add_months(start, 1)],
+        )
+
+    def _time(self, table, sql, params_list):
+        latencies = []
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            for params in params_list:
+                t0 = time.perf_counter()
+                cursor.execute(sql.format(table=table), params)
+                cursor.fetchall()
+                latencies.append((time.perf_counter() - t0) * 1000)
+        return summarize(latencies, time.perf_counter() - started)
+
+    def _measure(self, table):
+        queries = self.options['queries']
+        rows = self.options['rows_per_month']
+        recent_ids = [1000 * rows + self.rng.randrange(1, rows + 1) for _ in range(queries)]
+        results = {
+            'recent': self._time(
+                table,
+                "SELECT id, title FROM {table} WHERE is_active AND created_at >= now() - interval '7 days' "
+                "ORDER BY created_at DESC LIMIT 20 OFFSET %s",
+                [[self.rng.randrange(0, 200)] for _ in range(queries)],
+            ),
+            'lookup': self._time(table, "SELECT * FROM {table} WHERE id = %s", [[pk] for pk in recent_ids]),
+            'month_count': self._time(
+                table, "SELECT count(*) FROM {table} WHERE created_at >= %s",
+                [[self.current]] * max(1, queries // 10),
+            ),
+        }
+        results['vacuum'] = self._vacuum(table)
+        return results
+
+    def _vacuum(self, table, rounds=3):
+        """
+        Updates CHURN of the current month's rows, then vacuums what
+        autovacuum would: the whole plain table, or only the current
+        partition, the one with dead rows.
+        """
+        rows = self.options['rows_per_month']
+        target = table if table == PLAIN else self._month_table(0)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(rounds):
+            ids = self.rng.sample(range(1000 * rows + 1, 1001 * rows + 1), int(rows * CHURN))
+            self._execute(f"UPDATE {table} SET is_active = NOT is_active WHERE id = ANY(%s)", [ids])
+            t0 = time.perf_counter()
+            self._execute(f"VACUUM {target}")
+            latencies.append((time.perf_counter() - t0) * 1000)
+        return summarize(latencies, time.perf_counter() - started)
+
+    def _index_sizes(self, table):
+        current = table if table == PLAIN else self._month_table(0)
+        (total, hot), = self._execute(
+            "SELECT pg_size_pretty(sum(pg_indexes_size(c.oid))), pg_size_pretty(pg_indexes_size(%s::regclass)) "
+            "FROM pg_class c WHERE c.oid = %s::regclass OR c.oid IN "
+            "(SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+            [current, table, table],
+        )
+        return f"total {total}, vacuumed {hot}"
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs import dedup
+from apps.jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Group near-duplicate job postings (MinHash/LSH, apps/jobs/dedup.py) and update which "
+        "postings are duplicates of which. Postings without a fingerprint, such as bulk-loaded "
+        "ones, are fingerprinted first"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refingerprint', action='store_true',
+                            help='Recompute every fingerprint, e.g. after changing the JOBS_DEDUP_* settings')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['refingerprint']:
+            count = dedup.fingerprint_jobs(Job.objects.all())
+            self.stdout.write(f"Fingerprinted {count} jobs in {time.perf_counter() - started:.1f}s")
+        report = dedup.cluster(dry_run=options['dry_run'])
+        self.stdout.write(
+            f"Fingerprinted {report['fingerprinted']} new jobs, compared {report['compared']} pairs from "
+            f"{report['buckets']} shared buckets: {report['duplicates']} duplicates, {report['changed']} "
+            f"{'would change' if options['dry_run'] else 'changed'} ({time.perf_counter() - started:.1f}s)"
+        )
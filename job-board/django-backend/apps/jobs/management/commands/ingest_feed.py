@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs import feeds
+from apps.jobs.models import JobFeed, JobFeedRun
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest a job feed file for a feed (apps/jobs/feeds.py) in this process, e.g. to load a "
+        "partner's first export. Postings missing from the file are closed unless the feed is "
+        "partial or --partial is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('feed', type=int, help='JobFeed id')
+        parser.add_argument('path', help='XML or JSON file in the feed\'s format')
+        parser.add_argument('--partial', action='store_true', help='Close nothing, even if the feed is full')
+
+    def handle(self, *args, **options):
+        try:
+            feed = JobFeed.objects.get(pk=options['feed'])
+        except JobFeed.DoesNotExist:
+            raise CommandError(f"No feed {options['feed']}")
+        try:
+            stream = open(options['path'], 'rb')
+        except OSError as exc:
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+        with stream:
+            run = JobFeedRun.objects.create(feed=feed, is_full=feed.is_full and not options['partial'])
+            try:
+                feeds.ingest(run, stream)
+            except feeds.FeedBusy as exc:
+                run.delete()
+                raise CommandError(str(exc))
+        summary = (
+            f"{run.received} postings in {run.seconds:.1f}s ({run.postings_per_second or 0:,.0f}/s): "
+            f"{run.created} created, {run.updated} updated, {run.unchanged} unchanged, "
+            f"{run.closed} closed, {run.errors} invalid"
+        )
+        for sample in run.error_samples:
+            self.stderr.write(f"posting {sample['posting']}: {sample['error']}")
+        if run.status == 'failed':
+            raise CommandError(f"{run.message} after {summary}")
+        self.stdout.write(self.style.SUCCESS(summary))
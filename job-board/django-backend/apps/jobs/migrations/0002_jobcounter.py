@@ -0,0 +1,28 @@
+# Generated by Django 4.2.12 on 2026-10-19 11:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCounter',
+            fields=[
+                ('job', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='jobs.job')),
+                ('impressions', models.BigIntegerField(default=0, help_text='Times the posting was shown in a listing.')),
+                ('views', models.BigIntegerField(default=0, help_text="Times the posting's detail was viewed.")),
+                ('unique_viewers', models.BigIntegerField(default=0, help_text='Approximate distinct viewers (HyperLogLog).')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Job counter',
+                'verbose_name_plural': 'Job counters',
+            },
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 4.2.12 on 2026-10-19 12:03
+
+import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# table -> partition key, see apps/jobs/partitions.py
+PARTITIONED = (('jobs_job', 'created_at'), ('jobs_application', 'submitted_at'))
+PREMAKE_MONTHS = 3
+
+
+def _months(first, last):
+    month = datetime.datetime(first.year, first.month, 1, tzinfo=datetime.timezone.utc)
+    while month <= last:
+        following = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        yield month, following
+        month = following
+
+
+def _rebuild(cursor, table, column, partitioned):
+    """
+    Recreates `table` as a partitioned (or plain) table with the same
+    columns, rows, indexes, foreign keys and id sequence.
+    """
+    old = f'{table}_old'
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+        "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u'))",
+        [table, table],
+    )
+    indexes = [definition.replace(' ON ONLY ', ' ON ') for definition, in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    cursor.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    cursor.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY)'
+                   + (f' PARTITION BY RANGE ({column})' if partitioned else ''))
+    if partitioned:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})')
+        cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        cursor.execute(f'SELECT min({column}) FROM {old}')
+        now = datetime.datetime.now(datetime.timezone.utc)
+        first = min(cursor.fetchone()[0] or now, now).astimezone(datetime.timezone.utc)
+        last = now.replace(day=1)
+        for _ in range(PREMAKE_MONTHS):
+            last = last.replace(year=last.year + last.month // 12, month=last.month % 12 + 1)
+        for start, end in _months(first, last):
+            cursor.execute(
+                f"CREATE TABLE {table}_p{start:%Y_%m} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+    else:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence = cursor.fetchone()[0]
+    cursor.execute(f"SELECT setval(%s, coalesce(max(id), 0) + 1, false) FROM {table}", [sequence])
+    cursor.execute(f'DROP TABLE {old}')
+    cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {table}_id_seq')
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+
+def partition_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED:
+            _rebuild(cursor, table, column, partitioned=True)
+
+
+def unpartition_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in PARTITIONED:
+            _rebuild(cursor, table, column, partitioned=False)
+
+
+# Unique constraints on a partitioned table must include the partition key,
+# so (job, applicant) uniqueness is checked by a trigger. The advisory lock
+# serialises concurrent inserts of the same pair until commit.
+UNIQUE_APPLICANT_SQL = """
+CREATE FUNCTION jobs_application_unique_applicant() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('jobs_application'), hashtext(NEW.job_id::text || ':' || NEW.applicant_id::text));
+    IF EXISTS (SELECT 1 FROM jobs_application
+               WHERE job_id = NEW.job_id AND applicant_id = NEW.applicant_id AND id <> NEW.id) THEN
+        RAISE unique_violation
+            USING MESSAGE = 'duplicate key value violates unique constraint "jobs_application_unique_applicant"',
+                  DETAIL = format('Key (job_id, applicant_id)=(%s, %s) already exists.', NEW.job_id, NEW.applicant_id);
+    END IF;
+    RETURN NEW;
+END
+$$;
+CREATE TRIGGER jobs_application_unique_applicant
+    BEFORE INSERT OR UPDATE OF job_id, applicant_id ON jobs_application
+    FOR EACH ROW EXECUTE FUNCTION jobs_application_unique_applicant();
+"""
+DROP_UNIQUE_APPLICANT_SQL = """
+DROP TRIGGER jobs_application_unique_applicant ON jobs_application;
+DROP FUNCTION jobs_application_unique_applicant();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_jobcounter'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='application',
+            name='jobs_application_unique_applicant',
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='job',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='jobs.job'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'applicant'], name='jobs_app_job_applicant_idx'),
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+        migrations.RunSQL(UNIQUE_APPLICANT_SQL, DROP_UNIQUE_APPLICANT_SQL),
+    ]
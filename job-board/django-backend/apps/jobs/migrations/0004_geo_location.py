@@ -0,0 +1,47 @@
+# Generated by Django 4.2.12 on 2026-10-19 12:15
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def geocode_jobs(apps, schema_editor):
+    # One UPDATE per distinct location; the geocoder only knows city names anyway
+    from apps.core import geo
+
+    Job = apps.get_model('jobs', 'Job')
+    for location in Job.objects.exclude(location='').values_list('location', flat=True).distinct().order_by():
+        point = geo.geocode(location)
+        if point:
+            Job.objects.filter(location=location, latitude__isnull=True).update(
+                latitude=point[0], longitude=point[1], geohash=geo.encode(*point),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_partition_by_month'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['geohash'], name='jobs_job_active_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(geocode_jobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.12 on 2026-10-19 12:58
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_geo_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFingerprint',
+            fields=[
+                ('job', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='jobs.job')),
+                ('signature', models.BinaryField(help_text='JOBS_DEDUP_PERMUTATIONS 32-bit minimum hashes.')),
+                ('buckets', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), help_text='One hash per LSH band, scoped to the employer.', size=None)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Job fingerprint',
+                'verbose_name_plural': 'Job fingerprints',
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, help_text='Earlier active posting by the same employer this one nearly repeats.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='jobs.job'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('duplicate_of__isnull', False)), fields=['duplicate_of'], name='jobs_job_duplicate_of_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobfingerprint',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['buckets'], name='jobs_fingerprint_buckets_idx'),
+        ),
+    ]
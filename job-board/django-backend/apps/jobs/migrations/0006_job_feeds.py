@@ -0,0 +1,81 @@
+# Generated by Django 4.2.12 on 2026-10-19 14:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('jobs', '0005_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('format', models.CharField(choices=[('xml', 'XML'), ('json', 'JSON')], max_length=10)),
+                ('is_full', models.BooleanField(default=True, help_text='Each upload lists every open posting, so postings missing from one are closed.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_feeds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job feed',
+                'verbose_name_plural': 'Job feeds',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobSource',
+            fields=[
+                ('job', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='source', serialize=False, to='jobs.job')),
+                ('external_id', models.CharField(help_text="The posting's id in the partner's system.", max_length=255)),
+                ('content_hash', models.CharField(max_length=32)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('feed', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sources', to='jobs.jobfeed')),
+            ],
+            options={
+                'verbose_name': 'Job source',
+                'verbose_name_plural': 'Job sources',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobFeedRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(blank=True, help_text='Upload in default storage until ingested.', max_length=255)),
+                ('is_full', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('received', models.PositiveIntegerField(default=0, help_text='Postings read from the feed.')),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('unchanged', models.PositiveIntegerField(default=0, help_text='Postings skipped as their content hash matched.')),
+                ('closed', models.PositiveIntegerField(default=0, help_text='Postings closed as missing from a full feed.')),
+                ('errors', models.PositiveIntegerField(default=0, help_text='Postings rejected as invalid.')),
+                ('error_samples', models.JSONField(blank=True, default=list)),
+                ('message', models.TextField(blank=True, help_text='Why the run failed.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('feed', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='jobs.jobfeed')),
+            ],
+            options={
+                'verbose_name': 'Job feed run',
+                'verbose_name_plural': 'Job feed runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='jobsource',
+            constraint=models.UniqueConstraint(fields=('employer', 'external_id'), name='jobs_source_external_id_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='jobfeedrun',
+            index=models.Index(fields=['feed', '-created_at'], name='jobs_feedrun_feed_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Fingerprint buckets are now scoped to the employer, city and job type.
+    The old ones are dropped; the jobs-duplicate-clustering task fingerprints
+    the jobs again on its next run and regroups them.
+    """
+
+    dependencies = [
+        ('jobs', '0006_job_feeds'),
+    ]
+
+    operations = [
+        migrations.RunSQL('TRUNCATE jobs_jobfingerprint', migrations.RunSQL.noop),
+    ]
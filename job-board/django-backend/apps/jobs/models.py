@@ -1,3 +1,297 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class Job(models.Model):
+    """
+    A job posting published by a recruiter.
+
+    The table is partitioned by month of created_at (apps/jobs/partitions.py),
+    so its primary key in the database is (id, created_at); ids still come
+    from one sequence and are unique. Aggregates must not group by job rows
+    (e.g. annotate(Count(...)) on Job): Django groups those by id alone,
+    which PostgreSQL rejects now id is not the whole primary key.
+    """
+    JOB_TYPE_CHOICES = (
+        ('full_time', 'Full Time'),
+        ('part_time', 'Part Time'),
+        ('contract', 'Contract'),
+        ('internship', 'Internship'),
+    )
+
+    employer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='jobs',
+        help_text="Recruiter who posted the job."
+    )
+    title = models.CharField(max_length=255)
+    company_name = models.CharField(max_length=255, blank=True)
+    description = models.TextField()
+    category = models.CharField(max_length=100, blank=True, help_text="Industry or category, e.g. 'Engineering'")
+    location = models.CharField(max_length=255, blank=True)
+    # Geocoded from location unless set explicitly (apps/core/geo.py)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
+    job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES, default='full_time')
+    is_active = models.BooleanField(default=True, help_text="Inactive postings are hidden from search.")
+    # Set by near-duplicate detection (apps/jobs/dedup.py); duplicates are hidden from listings and search
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        db_constraint=False,
+        db_index=False,  # covered by jobs_job_duplicate_of_idx
+        help_text="Earlier active posting by the same employer this one nearly repeats.",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', '-created_at'], name='jobs_job_active_recent_idx'),
+            # Prefix scans for radius and bounding-box search (geohash__startswith)
+            models.Index(
+                fields=['geohash'], opclasses=['varchar_pattern_ops'], condition=models.Q(is_active=True),
+                name='jobs_job_active_geohash_idx',
+            ),
+            models.Index(
+                fields=['duplicate_of'], condition=models.Q(duplicate_of__isnull=False), name='jobs_job_duplicate_of_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+# Models keyed by job id whose rows are removed along with jobs deleted in
+# SQL, e.g. when partitions.detach_partition() archives a month of jobs. Add
+# new ones here.
+JOB_SIDE_MODELS = ('jobs.JobCounter', 'jobs.JobFingerprint', 'jobs.JobSource', 'search.SavedSearchMatch')
+
+
+class Application(models.Model):
+    """
+    A job seeker's application to a job posting.
+
+    Partitioned by month of submitted_at like Job. A partitioned table cannot
+    have unique constraints without the partition key, so one application
+    per job and applicant is enforced by a trigger (migration 0003), which
+    raises the same unique_violation the constraint did.
+    """
+    STATUS_CHOICES = (
+        ('submitted', 'Submitted'),
+        ('reviewing', 'Reviewing'),
+        ('interview', 'Interview'),
+        ('offered', 'Offered'),
+        ('rejected', 'Rejected'),
+    )
+
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='applications',
+        # Partitioned jobs have no unique index on id alone to reference;
+        # deletes still cascade through the ORM
+        db_constraint=False,
+        db_index=False,  # covered by jobs_app_job_applicant_idx
+    )
+    applicant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='applications'
+    )
+    cover_letter = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted')
+
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Application'
+        verbose_name_plural = 'Applications'
+        ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['job', 'applicant'], name='jobs_app_job_applicant_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.applicant} -> {self.job}"
+
+
+class JobCounter(models.Model):
+    """
+    Impression and view counts of a job posting, flushed in bulk from Redis
+    by apps/jobs/counters.py. Kept out of the job table so counting never
+    writes to, or locks, job rows.
+    """
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        # No FK constraint: inserts would take KEY SHARE locks on the job rows
+        db_constraint=False,
+    )
+    impressions = models.BigIntegerField(default=0, help_text="Times the posting was shown in a listing.")
+    views = models.BigIntegerField(default=0, help_text="Times the posting's detail was viewed.")
+    unique_viewers = models.BigIntegerField(default=0, help_text="Approximate distinct viewers (HyperLogLog).")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Job counter'
+        verbose_name_plural = 'Job counters'
+
+    def __str__(self):
+        return f"{self.job_id}: {self.views} views, {self.impressions} impressions"
+
+
+class JobFingerprint(models.Model):
+    """
+    MinHash signature of a posting's title and description, and its LSH band
+    buckets, maintained by apps/jobs/dedup.py. Postings sharing a bucket are
+    candidate near-duplicates; the GIN index finds them with one overlap query.
+    """
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='fingerprint',
+        db_constraint=False,
+    )
+    signature = models.BinaryField(help_text="JOBS_DEDUP_PERMUTATIONS 32-bit minimum hashes.")
+    buckets = ArrayField(models.BigIntegerField(), help_text="One hash per LSH band, scoped to the employer.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Job fingerprint'
+        verbose_name_plural = 'Job fingerprints'
+        indexes = [
+            GinIndex(fields=['buckets'], name='jobs_fingerprint_buckets_idx'),
+        ]
+
+    def __str__(self):
+        return f"Fingerprint of job {self.job_id}"
+
+
+class JobFeed(models.Model):
+    """
+    A partner ATS feed through which an employer pushes postings in bulk
+    (apps/jobs/feeds.py). Each upload is ingested as a JobFeedRun.
+    """
+    FORMAT_CHOICES = (
+        ('xml', 'XML'),
+        ('json', 'JSON'),
+    )
+
+    employer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='job_feeds')
+    name = models.CharField(max_length=100)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    is_full = models.BooleanField(
+        default=True,
+        help_text="Each upload lists every open posting, so postings missing from one are closed.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Job feed'
+        verbose_name_plural = 'Job feeds'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class JobFeedRun(models.Model):
+    """One ingestion of a feed upload, with what it did and how fast."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    feed = models.ForeignKey(JobFeed, on_delete=models.CASCADE, related_name='runs')
+    file = models.CharField(max_length=255, blank=True, help_text="Upload in default storage until ingested.")
+    is_full = models.BooleanField(default=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    received = models.PositiveIntegerField(default=0, help_text="Postings read from the feed.")
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0, help_text="Postings skipped as their content hash matched.")
+    closed = models.PositiveIntegerField(default=0, help_text="Postings closed as missing from a full feed.")
+    errors = models.PositiveIntegerField(default=0, help_text="Postings rejected as invalid.")
+    error_samples = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True, help_text="Why the run failed.")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Job feed run'
+        verbose_name_plural = 'Job feed runs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['feed', '-created_at'], name='jobs_feedrun_feed_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.feed} run {self.pk} ({self.status})"
+
+    @property
+    def seconds(self):
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+    @property
+    def postings_per_second(self):
+        return round(self.received / self.seconds, 1) if self.seconds else None
+
+
+class JobSource(models.Model):
+    """
+    The partner feed posting a job was imported from, matched on
+    (employer, external_id). jobs_job is partitioned and cannot carry that
+    unique constraint itself, so it lives here; content_hash lets unchanged
+    postings be skipped.
+    """
+    job = models.OneToOneField(
+        Job,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='source',
+        db_constraint=False,
+    )
+    employer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False,  # covered by jobs_source_external_id_uniq
+    )
+    external_id = models.CharField(max_length=255, help_text="The posting's id in the partner's system.")
+    feed = models.ForeignKey(JobFeed, on_delete=models.SET_NULL, null=True, blank=True, related_name='sources')
+    content_hash = models.CharField(max_length=32)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Job source'
+        verbose_name_plural = 'Job sources'
+        constraints = [
+            models.UniqueConstraint(fields=['employer', 'external_id'], name='jobs_source_external_id_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.external_id} -> job {self.job_id}"
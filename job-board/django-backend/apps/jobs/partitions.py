@@ -0,0 +1,216 @@
+"""
+Monthly range partitions of the job and application tables.
+
+jobs_job is partitioned by created_at and jobs_application by submitted_at
+(migration 0003), one partition per UTC month named <table>_pYYYY_MM, so
+recent rows and their indexes stay small however much history accumulates,
+and old months can be removed without a bulk DELETE. Each table also has a
+DEFAULT partition so an insert never fails for lack of a partition.
+
+maintain(), run daily by the jobs-partition-maintenance beat task:
+  * creates the partitions of the next JOBS_PARTITION_PREMAKE_MONTHS months,
+    and of any month whose rows ended up in the default partition (moving
+    them), so the default partition stays empty;
+  * detaches partitions older than JOBS_PARTITION_RETENTION_MONTHS into the
+    jobs_archive schema, where they can be dumped and dropped. A job
+    partition is kept while it has active jobs or jobs with applications
+    still in the live table.
+
+New partitions are built as plain tables and ATTACHed, which locks the
+parent less than CREATE TABLE ... PARTITION OF. Schema changes take a
+short lock_timeout so maintenance never queues behind long queries; a
+month skipped that way is retried on the next run.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# table -> partition key
+PARTITIONED = {
+    'jobs_job': 'created_at',
+    'jobs_application': 'submitted_at',
+}
+ARCHIVE_SCHEMA = 'jobs_archive'
+LOCK_TIMEOUT = '5s'
+
+
+def month_start(when):
+    when = when.astimezone(datetime.timezone.utc)
+    return datetime.datetime(when.year, when.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition(table):
+    return f'{table}_default'
+
+
+def partitions(table):
+    """{month: partition name} of the monthly partitions attached to `table`."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [table],
+        )
+        names = [name for name, in cursor.fetchall()]
+    prefix = f'{table}_p'
+    months = {}
+    for name in names:
+        if name.startswith(prefix):
+            year, month = name[len(prefix):].split('_')
+            months[datetime.datetime(int(year), int(month), 1, tzinfo=datetime.timezone.utc)] = name
+    return months
+
+
+def create_partition(table, month):
+    """
+    Creates and attaches the partition of `month`, moving any rows of that
+    month out of the default partition first (ATTACH refuses a range the
+    default partition has rows for).
+    """
+    column = PARTITIONED[table]
+    name = partition_name(table, month)
+    qn = connection.ops.quote_name
+    bounds = [month, add_months(month, 1)]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default_partition(table))} "
+            f"WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            bounds,
+        )
+        moved = cursor.rowcount
+        # The CHECK lets ATTACH skip scanning the new partition
+        cursor.execute(
+            f"ALTER TABLE {qn(name)} ADD CONSTRAINT {qn(name + '_bounds')} "
+            f"CHECK ({qn(column)} IS NOT NULL AND {qn(column)} >= %s AND {qn(column)} < %s)",
+            bounds,
+        )
+        cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)", bounds)
+        cursor.execute(f"ALTER TABLE {qn(name)} DROP CONSTRAINT {qn(name + '_bounds')}")
+    return moved
+
+
+def _default_months(table):
+    column = connection.ops.quote_name(PARTITIONED[table])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', {column} AT TIME ZONE 'UTC') "
+            f"FROM {connection.ops.quote_name(default_partition(table))}"
+        )
+        return [month.replace(tzinfo=datetime.timezone.utc) for month, in cursor.fetchall()]
+
+
+def ensure_partitions(table, now=None, since=None):
+    """
+    Creates missing partitions, also for every month from `since` if given;
+    returns {partition name: rows moved from the default partition}.
+    """
+    current = month_start(now or timezone.now())
+    back = 0
+    if since is not None:
+        since = month_start(since)
+        back = max(0, (current.year - since.year) * 12 + current.month - since.month)
+    wanted = {add_months(current, offset) for offset in range(-back, settings.JOBS_PARTITION_PREMAKE_MONTHS + 1)}
+    wanted.update(_default_months(table))
+    existing = partitions(table)
+    created = {}
+    for month in sorted(wanted - existing.keys()):
+        created[partition_name(table, month)] = create_partition(table, month)
+    return created
+
+
+def _job_partition_in_use(name):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {qn(name)} WHERE is_active) "
+            f"OR EXISTS (SELECT 1 FROM jobs_application a WHERE a.job_id IN (SELECT id FROM {qn(name)}))"
+        )
+        return cursor.fetchone()[0]
+
+
+def job_side_tables():
+    """(table, job id column) of each of JOB_SIDE_MODELS."""
+    from django.apps import apps
+
+    from .models import JOB_SIDE_MODELS
+
+    models = [apps.get_model(label) for label in JOB_SIDE_MODELS]
+    return [(model._meta.db_table, model._meta.get_field('job').column) for model in models]
+
+
+def detach_partition(table, name):
+    """
+    Detaches a partition and moves it to the archive schema. For job
+    partitions, the rows of JOB_SIDE_MODELS keyed by its jobs are deleted
+    in the same transaction.
+    """
+    from .counters import forget_jobs
+
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+        if table == 'jobs_job':
+            for side_table, column in job_side_tables():
+                cursor.execute(
+                    f"DELETE FROM {qn(side_table)} WHERE {qn(column)} IN (SELECT id FROM {qn(name)}) "
+                    f"RETURNING {qn(column)}"
+                )
+                if side_table == 'jobs_jobcounter':
+                    # Viewed jobs have a counter row once flushed; the flush drops the rest
+                    viewed = [job_id for job_id, in cursor.fetchall()]
+                    transaction.on_commit(lambda: forget_jobs(viewed))
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {qn(ARCHIVE_SCHEMA)}")
+        cursor.execute(f"ALTER TABLE {qn(name)} SET SCHEMA {qn(ARCHIVE_SCHEMA)}")
+
+
+def expire_partitions(table, now=None):
+    """Detaches the partitions past retention; returns their names."""
+    retention = settings.JOBS_PARTITION_RETENTION_MONTHS
+    if not retention:
+        return []
+    cutoff = add_months(month_start(now or timezone.now()), -retention)
+    detached = []
+    for month, name in sorted(partitions(table).items()):
+        if month >= cutoff:
+            break
+        if table == 'jobs_job' and _job_partition_in_use(name):
+            logger.info('Keeping %s past retention: it still has active jobs or live applications', name)
+            continue
+        detach_partition(table, name)
+        detached.append(name)
+    return detached
+
+
+def maintain(now=None):
+    """Creates upcoming partitions and archives expired ones for every partitioned table."""
+    report = {}
+    # Applications first, so the job partitions they referenced can go in the same run
+    for table in ('jobs_application', 'jobs_job'):
+        report[table] = {'created': {}, 'detached': [], 'failed': []}
+        for step, key in ((ensure_partitions, 'created'), (expire_partitions, 'detached')):
+            try:
+                result = step(table, now=now)
+            except Exception:
+                logger.exception('Partition maintenance step %s failed for %s', step.__name__, table)
+                report[table]['failed'].append(step.__name__)
+                continue
+            report[table][key] = result
+    return report
@@ -0,0 +1,49 @@
+from rest_framework import serializers
+from .models import Job, JobFeed, JobFeedRun
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for job postings as shown in listings and search results.
+    """
+    employer = serializers.PrimaryKeyRelatedField(read_only=True)
+    # Annotated from JobCounter by the view; eventually consistent
+    impressions = serializers.IntegerField(read_only=True, default=0)
+    views = serializers.IntegerField(read_only=True, default=0)
+    unique_viewers = serializers.IntegerField(read_only=True, default=0)
+    # Annotated by radius searches only
+    distance_km = serializers.FloatField(read_only=True, default=None)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'title', 'company_name', 'description', 'category',
+            'location', 'latitude', 'longitude', 'job_type', 'employer', 'created_at', 'updated_at',
+            'impressions', 'views', 'unique_viewers', 'distance_km',
+        ]
+        read_only_fields = fields
+
+
+class JobFeedSerializer(serializers.ModelSerializer):
+    """A recruiter's partner ATS feed."""
+    employer = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = JobFeed
+        fields = ['id', 'name', 'format', 'is_full', 'employer', 'created_at']
+        read_only_fields = ['employer', 'created_at']
+
+
+class JobFeedRunSerializer(serializers.ModelSerializer):
+    """One ingestion of a feed upload, with its counts and throughput."""
+    seconds = serializers.FloatField(read_only=True)
+    postings_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = JobFeedRun
+        fields = [
+            'id', 'feed', 'is_full', 'status', 'received', 'created', 'updated', 'unchanged', 'closed',
+            'errors', 'error_samples', 'message', 'created_at', 'started_at', 'finished_at',
+            'seconds', 'postings_per_second',
+        ]
+        read_only_fields = fields
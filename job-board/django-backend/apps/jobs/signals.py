@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from apps.core import geo
+
+from . import counters, dedup
+from .models import Job
+
+# Sent once per chunk by bulk job writes that bypass post_save, such as feed
+# ingestion (apps/jobs/feeds.py). Arguments: created and updated (job ids),
+# previous ({job id: (title, company_name, is_active)} of the updated jobs
+# before the chunk changed them).
+jobs_bulk_saved = Signal()
+
+
+@receiver(post_init, sender=Job, dispatch_uid='jobs.job_loaded')
+def remember_location(sender, instance, **kwargs):
+    geo.remember_location(instance)
+    dedup.remember_text(instance)
+
+
+@receiver(pre_save, sender=Job, dispatch_uid='jobs.job_located')
+def locate_job(sender, instance, **kwargs):
+    geo.locate(instance)
+
+
+@receiver(pre_save, sender=Job, dispatch_uid='jobs.job_deduplicated')
+def check_duplicate(sender, instance, **kwargs):
+    dedup.check(instance)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='jobs.job_fingerprinted')
+def store_fingerprint(sender, instance, created, **kwargs):
+    dedup.store(instance, created)
+
+
+@receiver(pre_delete, sender=Job, dispatch_uid='jobs.job_deleted')
+def release_deleted_duplicates(sender, instance, **kwargs):
+    # The delete clears duplicate_of with an UPDATE that sends no signal, so
+    # the duplicates would stay out of the search index
+    dedup.release_duplicates([instance.pk])
+
+
+@receiver(post_delete, sender=Job, dispatch_uid='jobs.job_counters_deleted')
+def forget_job_viewers(sender, instance, **kwargs):
+    job_id = instance.pk
+    transaction.on_commit(lambda: counters.forget_jobs([job_id]))
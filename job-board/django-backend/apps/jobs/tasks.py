@@ -0,0 +1,33 @@
+from apps.core.queues import BULK_QUEUE, queued_task
+
+from .counters import flush_counters
+from .dedup import cluster
+from .feeds import FeedBusy, ingest_upload
+from .partitions import maintain
+
+
+@queued_task(BULK_QUEUE)
+def flush_job_counters():
+    """Periodic: writes the buffered impression and view counts in bulk."""
+    return flush_counters()
+
+
+@queued_task(BULK_QUEUE)
+def maintain_job_partitions():
+    """Daily: creates the coming months' partitions and archives expired ones."""
+    return maintain()
+
+
+@queued_task(BULK_QUEUE, soft_time_limit=60 * 60)
+def cluster_duplicate_jobs():
+    """Daily: regroups near-duplicate postings, fingerprinting those written without signals."""
+    return cluster()
+
+
+@queued_task(BULK_QUEUE, bind=True, max_retries=30, default_retry_delay=60, soft_time_limit=2 * 60 * 60)
+def ingest_job_feed(self, run_id):
+    """Ingests an uploaded feed file, once any earlier run of the same feed has finished."""
+    try:
+        return ingest_upload(run_id).status
+    except FeedBusy as exc:
+        raise self.retry(exc=exc)
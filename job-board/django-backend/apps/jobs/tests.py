@@ -1,3 +1,386 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import datetime
+import io
+import json
+import tempfile
+
+from django.db import IntegrityError, connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import CustomUser
+from apps.core import warmup
+from apps.search import indexing
+from apps.search.backends import InMemoryBackend
+from apps.search.documents import get_document
+from apps.search.indexing import process_outbox
+from apps.search.models import SavedSearch, SavedSearchMatch
+
+from . import counters, dedup, feeds, partitions
+from .models import Application, Job, JobCounter, JobFeed, JobFeedRun, JobFingerprint, JobSource
+from .tasks import ingest_job_feed
+from .views import JobViewSet
+
+
+@override_settings(SEARCH_BACKEND='apps.search.backends.InMemoryBackend')
+class JobApiTests(APITestCase):
+    def setUp(self):
+        # Throttle counters live in the shared cache and would carry over between runs
+        patcher = mock.patch.object(JobViewSet, 'throttle_classes', [])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        InMemoryBackend.reset()
+        indexing._known_aliases.clear()
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.backend_job = Job.objects.create(
+            employer=self.recruiter, title='Backend Engineer', description='Django and Postgres APIs',
+            category='Engineering', location='Nairobi',
+        )
+        self.data_job = Job.objects.create(
+            employer=self.recruiter, title='Data Analyst', description='SQL dashboards',
+            category='Data', location='Remote', job_type='contract',
+        )
+        Job.objects.create(employer=self.recruiter, title='Django Intern', description='Closed', is_active=False)
+        process_outbox()
+        self.url = reverse('job-list')
+
+    def test_list_active_jobs(self):
+        """Test that anonymous users can list active jobs only."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_search_returns_matches_in_rank_order(self):
+        """Test that ?q= returns search hits, best match first."""
+        response = self.client.get(self.url, {'q': 'django postgres'})
+        self.assertEqual([job['id'] for job in response.data['results']], [self.backend_job.id])
+
+        response = self.client.get(self.url, {'q': 'nonexistent'})
+        self.assertEqual(response.data['count'], 0)
+
+    def test_exact_filters(self):
+        """Test filtering on category and job type."""
+        response = self.client.get(self.url, {'category': 'Data', 'job_type': 'contract'})
+        self.assertEqual([job['id'] for job in response.data['results']], [self.data_job.id])
+
+    def test_radius_and_bounding_box_search(self):
+        """Geo filters keep the jobs in range, nearest first; remote jobs have no coordinates."""
+        self.assertEqual((self.backend_job.latitude, self.backend_job.longitude), (-1.2921, 36.8219))
+        self.assertIsNone(self.data_job.geohash)
+        coast_job = Job.objects.create(employer=self.recruiter, title='Hotel Manager', description='Beach',
+                                       location='Mombasa')
+
+        response = self.client.get(self.url, {'near': '-1.30,36.80', 'radius': '10'})
+        self.assertEqual([job['id'] for job in response.data['results']], [self.backend_job.id])
+        self.assertLess(response.data['results'][0]['distance_km'], 3)
+
+        response = self.client.get(self.url, {'near': '-4.0,39.6', 'radius': '500'})
+        self.assertEqual([job['id'] for job in response.data['results']], [coast_job.id, self.backend_job.id])
+
+        response = self.client.get(self.url, {'bbox': '36,-2,37.5,0'})
+        self.assertEqual([job['id'] for job in response.data['results']], [self.backend_job.id])
+
+        for params in ({'near': 'nairobi'}, {'near': '0,0', 'radius': '5000'}, {'bbox': '37,-2,36'},
+                       {'near': 'me'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+        seeker = CustomUser.objects.create_user(email='seeker@example.com', password='pass12345')
+        seeker.profile.location = 'Mombasa, Kenya'
+        seeker.profile.save()
+        self.client.force_authenticate(seeker)
+        response = self.client.get(self.url, {'near': 'me', 'radius': '50'})
+        self.assertEqual([job['id'] for job in response.data['results']], [coast_job.id])
+
+    def test_impressions_and_views_are_counted(self):
+        """Listing and viewing jobs only touches Redis; a flush makes the counts visible."""
+        redis = counters._redis()
+        redis.delete(counters.IMPRESSIONS_KEY, counters.VIEWS_KEY, counters.DIRTY_KEY,
+                     counters.VIEWERS_PREFIX + str(self.backend_job.id))
+        detail = reverse('job-detail', args=[self.backend_job.id])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+            self.client.get(detail, HTTP_USER_AGENT='browser')
+            self.client.get(detail, HTTP_USER_AGENT='browser')
+            self.client.force_authenticate(self.recruiter)
+            self.client.get(detail)
+        self.assertFalse([query for query in queries if not query['sql'].lstrip().startswith('SELECT')
+                          or 'FOR UPDATE' in query['sql'] or 'FOR SHARE' in query['sql']])
+
+        self.assertEqual(counters.flush_counters(), 2)
+        counter = JobCounter.objects.get(job=self.backend_job)
+        self.assertEqual((counter.impressions, counter.views, counter.unique_viewers), (1, 3, 2))
+
+        self.client.get(self.url)
+        self.client.get(self.url, HTTP_X_WARMUP=warmup._SECRET)
+        self.client.get(detail, HTTP_X_WARMUP=warmup._SECRET)
+        # Anyone can send the header; only the process's own warm-up requests are skipped
+        self.client.get(detail, HTTP_X_WARMUP='1')
+        counters.flush_counters()
+        response = self.client.get(detail)
+        self.assertEqual((response.data['impressions'], response.data['views'], response.data['unique_viewers']),
+                         (2, 4, 2))
+
+    def test_jobs_are_served_while_redis_is_down(self):
+        """Counting fails quietly: listing and viewing jobs still succeed, and deleting a job still commits."""
+        with mock.patch.object(counters, '_redis', side_effect=ConnectionError), \
+                self.assertLogs(counters.logger, 'WARNING'):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+            detail = reverse('job-detail', args=[self.backend_job.id])
+            self.assertEqual(self.client.get(detail).status_code, status.HTTP_200_OK)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.backend_job.delete()
+        self.assertFalse(Job.objects.filter(pk=self.backend_job.pk).exists())
+
+    def test_counts_of_deleted_jobs_are_dropped(self):
+        """Counts and viewer HyperLogLogs of deleted jobs go, whether a view comes before or after the delete."""
+        redis = counters._redis()
+        redis.delete(counters.IMPRESSIONS_KEY, counters.VIEWS_KEY, counters.DIRTY_KEY)
+        counters.record_impressions([self.data_job.id])
+        counters.record_view(self.backend_job.id, 'someone')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.backend_job.delete()
+        self.assertFalse(redis.exists(counters.VIEWERS_PREFIX + str(self.backend_job.id)))
+        counters.record_view(self.data_job.id, 'someone')
+        self.data_job.delete()
+        self.assertEqual(counters.flush_counters(), 0)
+        self.assertFalse(JobCounter.objects.exists())
+        self.assertFalse(redis.exists(counters.VIEWERS_PREFIX + str(self.data_job.id)))
+
+
+class PartitionTests(TestCase):
+    def setUp(self):
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.job = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='Django')
+        self.old_month = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def _partition_of(self, job):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM jobs_job WHERE id = %s', [job.id])
+            row = cursor.fetchone()
+        return row and row[0]
+
+    def test_maintenance_creates_partitions_and_drains_the_default(self):
+        """Rows outside any monthly partition land in the default one until maintenance moves them."""
+        now = partitions.month_start(self.job.created_at)
+        self.assertEqual(self._partition_of(self.job), partitions.partition_name('jobs_job', now))
+        Job.objects.filter(pk=self.job.pk).update(created_at=self.old_month + datetime.timedelta(days=3))
+        self.assertEqual(self._partition_of(self.job), 'jobs_job_default')
+
+        created = partitions.ensure_partitions('jobs_job')
+        self.assertEqual(created, {'jobs_job_p2020_01': 1})
+        self.assertEqual(self._partition_of(self.job), 'jobs_job_p2020_01')
+        ahead = partitions.add_months(now, 3)
+        self.assertIn(ahead, partitions.partitions('jobs_job'))
+
+    @override_settings(JOBS_PARTITION_RETENTION_MONTHS=12)
+    def test_expired_partitions_are_archived_unless_in_use(self):
+        seeker = CustomUser.objects.create_user(email='seeker@example.com', password='pass12345')
+        Job.objects.filter(pk=self.job.pk).update(created_at=self.old_month, is_active=False)
+        partitions.ensure_partitions('jobs_job')
+        application = Application.objects.create(job=self.job, applicant=seeker)
+
+        # The live application still points into the old job partition
+        self.assertEqual(partitions.expire_partitions('jobs_job'), [])
+        application.delete()
+        JobSource.objects.create(job=self.job, employer=self.recruiter, external_id='REQ-1', content_hash='0' * 32)
+        search = SavedSearch.objects.create(user=seeker, query='django')
+        SavedSearchMatch.objects.create(search=search, user=seeker, job=self.job)
+        self.assertTrue(JobFingerprint.objects.filter(job_id=self.job.pk).exists())
+        counters.record_view(self.job.pk, 'someone')
+        counters.flush_counters()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(partitions.expire_partitions('jobs_job'), ['jobs_job_p2020_01'])
+        self.assertFalse(Job.objects.filter(pk=self.job.pk).exists())
+        for model in (JobCounter, JobFingerprint, JobSource, SavedSearchMatch):
+            self.assertFalse(model.objects.exists(), model.__name__)
+        self.assertFalse(counters._redis().exists(counters.VIEWERS_PREFIX + str(self.job.pk)))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {partitions.ARCHIVE_SCHEMA}.jobs_job_p2020_01')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_one_application_per_job_and_applicant(self):
+        """The uniqueness trigger replaces the unique constraint partitioning ruled out."""
+        seeker = CustomUser.objects.create_user(email='seeker@example.com', password='pass12345')
+        Application.objects.create(job=self.job, applicant=seeker)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Application.objects.create(job=self.job, applicant=seeker)
+        other = Job.objects.create(employer=self.recruiter, title='Data Engineer', description='SQL')
+        Application.objects.create(job=other, applicant=seeker)
+
+
+DESCRIPTION = (
+    "We are looking for a backend engineer to design, build and operate the APIs behind our job "
+    "marketplace. You will own services written in Python and Django on PostgreSQL, work with product "
+    "and design on new features, review code, mentor junior engineers and take part in the on-call "
+    "rotation. Experience with Celery, Redis and Elasticsearch is a plus. We offer a competitive salary, "
+    "remote work within Africa and a yearly learning budget."
+)
+
+
+@override_settings(SEARCH_BACKEND='apps.search.backends.InMemoryBackend')
+class DuplicateTests(TestCase):
+    def setUp(self):
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.original = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description=DESCRIPTION)
+
+    def test_signatures_estimate_jaccard_similarity(self):
+        edited = DESCRIPTION.replace('mentor junior engineers', 'coach new engineers')
+        first, second = dedup.shingles('', DESCRIPTION), dedup.shingles('', edited)
+        exact = len(first & second) / len(first | second)
+        estimate = dedup.similarity(dedup.signature('', DESCRIPTION), dedup.signature('', edited))
+        self.assertAlmostEqual(estimate, exact, delta=0.1)
+        self.assertEqual(dedup.similarity(dedup.signature('', DESCRIPTION), dedup.signature('', DESCRIPTION)), 1.0)
+        self.assertLess(dedup.similarity(dedup.signature('', DESCRIPTION), dedup.signature('', 'Data analyst')), 0.2)
+        self.assertIsNone(dedup.signature('', ' -- '))
+
+    @mock.patch.object(JobViewSet, 'throttle_classes', [])
+    def test_reposts_are_marked_when_saved(self):
+        """A lightly edited repost by the same employer is a duplicate; others are not."""
+        repost = Job.objects.create(
+            employer=self.recruiter, title='Backend Engineer', description=DESCRIPTION.replace('yearly', 'annual'),
+        )
+        self.assertEqual(repost.duplicate_of_id, self.original.pk)
+        other = CustomUser.objects.create_user(email='other@example.com', password='pass12345')
+        self.assertIsNone(Job.objects.create(employer=other, title='Backend Engineer', description=DESCRIPTION)
+                          .duplicate_of_id)
+        elsewhere = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description=DESCRIPTION,
+                                       location='Lagos, Nigeria')
+        self.assertIsNone(elsewhere.duplicate_of_id)
+        contract = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description=DESCRIPTION,
+                                      job_type='contract')
+        self.assertIsNone(contract.duplicate_of_id)
+        rewritten = Job.objects.create(employer=self.recruiter, title='Backend Engineer',
+                                       description=DESCRIPTION[:len(DESCRIPTION) // 3] + ' Apply now.')
+        self.assertIsNone(rewritten.duplicate_of_id)
+        self.assertEqual(JobFingerprint.objects.count(), 6)
+
+        response = self.client.get(reverse('job-list'))
+        self.assertNotIn(repost.pk, [job['id'] for job in response.data['results']])
+
+        # Closing the original releases its duplicates
+        self.original.is_active = False
+        self.original.save()
+        repost.refresh_from_db()
+        self.assertIsNone(repost.duplicate_of_id)
+
+    def test_deleting_the_original_releases_its_duplicates(self):
+        """Duplicates of a deleted posting are reindexed and show again."""
+        InMemoryBackend.reset()
+        indexing._known_aliases.clear()
+        repost = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description=DESCRIPTION)
+        self.assertEqual(repost.duplicate_of_id, self.original.pk)
+        process_outbox()
+        self.original.delete()
+        process_outbox()
+        repost.refresh_from_db()
+        self.assertIsNone(repost.duplicate_of_id)
+        alias = indexing.alias_name(get_document('jobs'))
+        self.assertIsNotNone(InMemoryBackend().get(alias, str(repost.pk)))
+
+    def test_cluster_groups_bulk_loaded_jobs(self):
+        """Jobs inserted without signals are fingerprinted and grouped in batch."""
+        jobs = Job.objects.bulk_create([
+            Job(employer=self.recruiter, title='Backend Engineer', description=DESCRIPTION + suffix)
+            for suffix in ('', ' Apply today.', ' Apply soon.')
+        ] + [Job(employer=self.recruiter, title='Data Analyst', description='SQL dashboards and reports')])
+        report = dedup.cluster()
+        self.assertEqual((report['fingerprinted'], report['duplicates'], report['changed']), (4, 3, 3))
+        self.assertEqual(
+            set(Job.objects.filter(duplicate_of=self.original).values_list('pk', flat=True)),
+            {job.pk for job in jobs[:3]},
+        )
+        self.assertEqual(dedup.cluster()['changed'], 0)
+
+
+class FeedTests(APITestCase):
+    def setUp(self):
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.recruiter.profile.user_type = 'recruiter'
+        self.recruiter.profile.save()
+        self.feed = JobFeed.objects.create(employer=self.recruiter, name='Partner ATS', format='json')
+
+    def _ingest(self, postings, is_full=True, file_format='json'):
+        if file_format == 'json':
+            data = json.dumps(postings).encode()
+        else:
+            data = ('<feed><jobs>' + ''.join(
+                '<job>' + ''.join(f'<{key}>{value}</{key}>' for key, value in posting.items()) + '</job>'
+                for posting in postings
+            ) + '</jobs></feed>').encode()
+        self.feed.format = file_format
+        run = JobFeedRun.objects.create(feed=self.feed, is_full=is_full)
+        return feeds.ingest(run, io.BytesIO(data))
+
+    def _posting(self, external_id, title='Backend Engineer', **fields):
+        return {'id': external_id, 'title': title, 'company': 'Acme', 'description': 'Django APIs',
+                'location': 'Nairobi', 'job_type': 'Full-time', **fields}
+
+    def test_postings_are_upserted_by_external_id(self):
+        """JSON and XML feeds create, then update, the jobs of their external ids; invalid postings are counted."""
+        run = self._ingest([self._posting('A1'), self._posting('B2', job_type='contract'), {'id': 'C3'}, 'junk'])
+        self.assertEqual((run.status, run.received, run.created, run.errors), ('done', 4, 2, 2))
+        self.assertEqual([sample['error'] for sample in run.error_samples], ['Missing title', 'Not an object'])
+        job = Job.objects.get(source__external_id='A1')
+        self.assertEqual((job.company_name, job.job_type, job.employer_id), ('Acme', 'full_time', self.recruiter.pk))
+        self.assertIsNotNone(job.geohash)
+        self.assertTrue(JobFingerprint.objects.filter(job=job).exists())
+
+        postings = [self._posting('A1', title='Senior Backend Engineer'), self._posting('B2', job_type='contract')]
+        run = self._ingest(postings, file_format='xml')
+        self.assertEqual((run.status, run.created, run.updated, run.unchanged), ('done', 0, 1, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.title, 'Senior Backend Engineer')
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_full_feeds_close_missing_postings(self):
+        """Unchanged postings are skipped; a full feed closes what it no longer lists, a broken one closes nothing."""
+        self._ingest([self._posting('A1'), self._posting('B2')])
+        run = self._ingest([self._posting('A1'), self._posting('B2')])
+        self.assertEqual((run.unchanged, run.updated), (2, 0))
+
+        with self.captureOnCommitCallbacks():
+            run = self._ingest([self._posting('A1')])
+        self.assertEqual(run.closed, 1)
+        self.assertFalse(Job.objects.get(source__external_id='B2').is_active)
+        self.assertEqual(self._ingest([], is_full=False).closed, 0)
+
+        run = JobFeedRun.objects.create(feed=self.feed)
+        feeds.ingest(run, io.BytesIO(b'[{"id": "A1", "title": "Backend'))
+        self.assertEqual((run.status, run.closed), ('failed', 0))
+        self.assertTrue(Job.objects.get(source__external_id='A1').is_active)
+
+        # Listed again, a closed posting reopens
+        run = self._ingest([self._posting('A1'), self._posting('B2')])
+        self.assertEqual(run.updated, 1)
+        self.assertTrue(Job.objects.get(source__external_id='B2').is_active)
+
+    def test_uploads_are_ingested_in_the_background(self):
+        """A recruiter uploads a feed file to their feed; other users cannot see the feed."""
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.client.force_authenticate(self.recruiter)
+        url = reverse('job-feed-runs', args=[self.feed.pk])
+        lines = [json.dumps(self._posting(str(number))) for number in range(3)]
+        upload = SimpleUploadedFile('feed.json', '\n'.join(lines).encode())
+        with self.settings(MEDIA_ROOT=media.name), \
+                mock.patch('apps.jobs.tasks.ingest_job_feed.delay', side_effect=ingest_job_feed), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'file': upload, 'full': 'false'}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        run = JobFeedRun.objects.get(pk=response.data['id'])
+        self.assertEqual((run.status, run.is_full, run.created), ('done', False, 3))
+        self.assertEqual(JobSource.objects.filter(feed=self.feed).count(), 3)
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['results'][0]['created'], 3)
+
+        other = CustomUser.objects.create_user(email='other@example.com', password='pass12345')
+        other.profile.user_type = 'recruiter'
+        other.profile.save()
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .views import JobFeedViewSet, JobViewSet
+
+router = SimpleRouter()
+# Before the job routes, whose detail pattern would take 'feeds' for an id
+router.register(r'feeds', JobFeedViewSet, basename='job-feed')
+router.register(r'', JobViewSet, basename='job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -1,3 +1,181 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.accounts.permissions import IsRecruiter
+from apps.core import geo, warmup
+from apps.core.exports import export_response
+from apps.core.pagination import CustomPageNumberPagination
+from apps.core.throttling import ExportThrottle, JobSearchThrottle
+from apps.search.queries import search_ids
+
+from . import counters, feeds
+from .exports import ApplicationExport
+from .models import Job, JobFeed
+from .serializers import JobFeedRunSerializer, JobFeedSerializer, JobSerializer
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Lists and searches active job postings; near-duplicates of another
+    posting (apps/jobs/dedup.py) are left out of lists but can be retrieved.
+
+    `?q=` runs a full-text search against the search index and returns the
+    matches in relevance order; `category`, `job_type` and `location`
+    filter on exact values.
+
+    `?near=lat,lng` (or `near=me`, the caller's profile location) keeps the
+    jobs within `radius` km and orders them by distance, returned as
+    `distance_km`; `?bbox=west,south,east,north` keeps the jobs inside the
+    box. Both prune by geohash prefix before any exact comparison
+    (apps/core/geo.py). Listed jobs count an impression and retrieved
+    ones a view (apps/jobs/counters.py), both written to Redis only.
+
+    `/<id>/applications/export/` streams the applications to a job to its
+    employer (apps/core/exports.py).
+    """
+    queryset = Job.objects.filter(is_active=True).annotate(
+        impressions=Coalesce('counters__impressions', 0),
+        views=Coalesce('counters__views', 0),
+        unique_viewers=Coalesce('counters__unique_viewers', 0),
+    )
+    serializer_class = JobSerializer
+    permission_classes = [AllowAny]
+    throttle_classes = [JobSearchThrottle]
+    pagination_class = CustomPageNumberPagination
+    exact_filter_fields = ('category', 'job_type', 'location')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        filters = {field: params[field] for field in self.exact_filter_fields if params.get(field)}
+        if self.action == 'list':
+            filters['duplicate_of__isnull'] = True
+        if filters:
+            queryset = queryset.filter(**filters)
+        if params.get('bbox'):
+            queryset = geo.within_box(queryset, *self._parse('bbox', geo.parse_bbox))
+        near = params.get('near', '').strip()
+        if near:
+            queryset = geo.within_radius(queryset, *self._point(near), self._radius())
+
+        query = params.get('q', '').strip()
+        if self.action == 'list' and query:
+            ids = search_ids(
+                'jobs', query, fields=['title', 'company_name', 'description', 'category', 'location'],
+                size=settings.JOB_SEARCH_MAX_RESULTS,
+            )
+            rank = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+            queryset = queryset.filter(pk__in=ids).order_by(rank) if ids else queryset.none()
+        elif near:
+            queryset = queryset.order_by('distance_km', 'pk')
+        return queryset
+
+    def _parse(self, param, parser):
+        try:
+            return parser(self.request.query_params[param])
+        except ValueError as exc:
+            raise ValidationError({param: str(exc)})
+
+    def _point(self, near):
+        if near != 'me':
+            return self._parse('near', geo.parse_point)
+        profile = getattr(self.request.user, 'profile', None)
+        if profile is None or profile.latitude is None:
+            raise ValidationError({'near': 'Your profile has no location.'})
+        return profile.latitude, profile.longitude
+
+    def _radius(self):
+        radius = self.request.query_params.get('radius', settings.GEO_DEFAULT_RADIUS_KM)
+        try:
+            radius = float(radius)
+        except ValueError:
+            raise ValidationError({'radius': 'Expected a number of kilometres.'})
+        if not 0 < radius <= settings.GEO_MAX_RADIUS_KM:
+            raise ValidationError({'radius': f'Must be between 0 and {settings.GEO_MAX_RADIUS_KM:g} km.'})
+        return radius
+
+    def _counted(self):
+        # Synthetic requests sent at worker boot are not visitors
+        return not warmup.is_warmup(self.request)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self._counted():
+            counters.record_impressions([job.pk for job in page])
+        return page
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if self._counted():
+            counters.record_view(kwargs['pk'], counters.viewer_id(request))
+        return response
+
+    @action(
+        detail=True, methods=['get'], url_path='applications/export',
+        permission_classes=[IsAuthenticated], throttle_classes=[ExportThrottle],
+    )
+    def export_applications(self, request, pk=None):
+        """Applications to one of the caller's jobs, active or not (any job, for staff)."""
+        job = get_object_or_404(Job.objects.only('pk', 'employer_id'), pk=pk)
+        if job.employer_id != request.user.pk and not request.user.is_staff:
+            raise PermissionDenied('Only the employer can export applications to this job.')
+        return export_response(request, ApplicationExport(job=job.pk))
+
+
+class JobFeedViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    A recruiter's partner ATS feeds (apps/jobs/feeds.py); staff see every
+    feed. POST a file to `/feeds/<id>/runs/` (multipart `file`, and `full`
+    to override the feed's is_full for this upload) to ingest it in the
+    background; GET there lists the runs with their counts and throughput.
+    Deleting a feed keeps the jobs it created.
+    """
+    serializer_class = JobFeedSerializer
+    permission_classes = [IsAuthenticated, IsRecruiter | IsAdminUser]
+    pagination_class = CustomPageNumberPagination
+
+    def get_queryset(self):
+        queryset = JobFeed.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(employer=self.request.user)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(employer=self.request.user)
+
+    @action(detail=True, methods=['get', 'post'], parser_classes=[MultiPartParser, FormParser, JSONParser])
+    def runs(self, request, pk=None):
+        feed = self.get_object()
+        if request.method == 'GET':
+            page = self.paginate_queryset(feed.runs.all())
+            return self.get_paginated_response(JobFeedRunSerializer(page, many=True).data)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Upload the feed file.'})
+        if upload.size > settings.FEED_MAX_UPLOAD_BYTES:
+            raise ValidationError({'file': f'Larger than {settings.FEED_MAX_UPLOAD_BYTES} bytes.'})
+        is_full = request.data.get('full')
+        if is_full in (None, ''):
+            is_full = None
+        else:
+            try:
+                is_full = serializers.BooleanField().to_internal_value(is_full)
+            except serializers.ValidationError as exc:
+                raise ValidationError({'full': exc.detail})
+        run = feeds.start_run(feed, upload, is_full)
+        return Response(JobFeedRunSerializer(run).data, status=status.HTTP_202_ACCEPTED)
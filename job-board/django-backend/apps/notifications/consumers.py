@@ -0,0 +1,46 @@
+import time
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .events import NEW_JOBS_GROUP, user_group
+
+# Close codes (4000-4999 are for applications)
+UNAUTHORIZED = 4401
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Notification stream for job seekers and recruiters at ws/notifications/.
+
+    Pushes the events sent with apps.notifications.events: application
+    updates to the user involved and, to job seekers, new postings.
+    Clients may send {"type": "ping"}. The connection is closed with 4401
+    once the access token it was opened with expires.
+    """
+    async def connect(self):
+        user = self.scope['user']
+        if not user.is_authenticated:
+            await self.close(code=UNAUTHORIZED)
+            return
+        self.groups = [user_group(user.pk)]
+        if self.scope['user_type'] == 'job_seeker':
+            self.groups.append(NEW_JOBS_GROUP)
+        for group in self.groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+
+    async def receive_json(self, content, **kwargs):
+        if await self._expired():
+            return
+        if isinstance(content, dict) and content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def notify(self, message):
+        if not await self._expired():
+            await self.send(text_data=message['text'])
+
+    async def _expired(self):
+        if time.time() < self.scope['token_exp']:
+            return False
+        await self.close(code=UNAUTHORIZED)
+        return True
@@ -0,0 +1,39 @@
+"""
+Pushing events to connected WebSocket clients through the channel layer.
+
+Every connection joins its user's group; job seekers also join
+NEW_JOBS_GROUP. Events are plain JSON-serializable dicts with a 'type'.
+"""
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+
+NEW_JOBS_GROUP = 'jobs.new'
+
+APPLICATION_SUBMITTED = 'application.submitted'
+APPLICATION_STATUS = 'application.status'
+JOB_POSTED = 'job.posted'
+
+
+def user_group(user_id):
+    return f'user.{user_id}'
+
+
+def message(event):
+    """
+    The channel layer message NotificationConsumer.notify delivers. The event
+    is encoded once here rather than once per socket it is fanned out to.
+    """
+    return {'type': 'notify', 'text': json.dumps(event, cls=DjangoJSONEncoder)}
+
+
+async def send_many(deliveries):
+    layer = get_channel_layer()
+    await asyncio.gather(*(layer.group_send(group, message(event)) for group, event in deliveries))
+
+
+def send(group, event):
+    async_to_sync(send_many)([(group, event)])
@@ -0,0 +1,208 @@
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import CustomUser
+from apps.core.benchmarking import summarize, write_results
+from apps.notifications.events import NEW_JOBS_GROUP, message, user_group
+
+
+class WebSocketClient:
+    """Just enough of RFC 6455 to open a socket, read text frames and send masked ones."""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, path):
+        reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        response = await reader.readuntil(b'\r\n\r\n')
+        if not response.startswith(b'HTTP/1.1 101'):
+            writer.close()
+            raise ConnectionError(response.split(b'\r\n', 1)[0].decode())
+        return cls(reader, writer)
+
+    async def receive(self):
+        """The next text message, or None once the server closes the socket."""
+        while True:
+            head = await self.reader.readexactly(2)
+            opcode, length = head[0] & 0x0F, head[1] & 0x7F
+            if length >= 126:
+                length = int.from_bytes(await self.reader.readexactly(2 if length == 126 else 8), 'big')
+            payload = await self.reader.readexactly(length)
+            if opcode == 0x1:
+                return payload.decode()
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self._send(0xA, payload)
+
+    def send_text(self, text):
+        self._send(0x1, text.encode())
+
+    def close(self):
+        try:
+            self._send(0x8, (1000).to_bytes(2, 'big'))
+        finally:
+            self.writer.close()
+
+    def _send(self, opcode, payload):
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = bytes([0x80 | opcode, 0x80 | length])
+        elif length < 2 ** 16:
+            header = bytes([0x80 | opcode, 0x80 | 126]) + length.to_bytes(2, 'big')
+        else:
+            header = bytes([0x80 | opcode, 0x80 | 127]) + length.to_bytes(8, 'big')
+        self.writer.write(header + mask + bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many notification WebSockets against a running daphne and measure connection setup, "
+        "then how many pushed events per second reach them and how late. Events are published "
+        "through the channel layer, as the Celery tasks do, so both must use the same Redis"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='ws://localhost:8001/ws/notifications/', help='WebSocket endpoint')
+        parser.add_argument('--connections', type=int, default=1000, help='Concurrent sockets to hold open')
+        parser.add_argument('--ramp', type=int, default=100, help='Handshakes in flight at once')
+        parser.add_argument('--messages', type=int, default=200, help='Events to publish per scenario')
+        parser.add_argument('--rate', type=float, default=0, help='Events published per second (0: no limit)')
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for deliveries')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'ws':
+            raise CommandError('Only ws:// URLs are supported')
+        if options['connections'] < 1 or options['messages'] < 1:
+            raise CommandError('--connections and --messages must be positive')
+        users = list(CustomUser.objects.filter(is_active=True, profile__user_type='job_seeker')
+                     .values_list('pk', flat=True)[:options['connections']])
+        if not users:
+            raise CommandError('No active job seekers to connect as; seed the data first with `seed_data`')
+        # Users are reused when there are fewer than connections
+        self.users = [users[i % len(users)] for i in range(options['connections'])]
+        self.options = options
+        self.host, self.port = url.hostname, url.port or 80
+        self.path = url.path or '/'
+
+        scenarios = asyncio.run(self._run())
+        for name, summary in scenarios.items():
+            latency = summary['latency_ms']
+            unit = 'conn/s' if name == 'connect' else 'msg/s'
+            self.stdout.write(
+                f"{name:<10} {summary['requests']:>8} ok  {summary['errors']:>6} err  "
+                f"{summary['throughput']:>10} {unit:6}  p50 {latency['p50']}ms  p95 {latency['p95']}ms  "
+                f"p99 {latency['p99']}ms"
+            )
+        if options['output']:
+            config = {key: options[key] for key in ('url', 'connections', 'ramp', 'messages', 'rate', 'seed')}
+            write_results(options['output'], scenarios, **config)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _token(self, user_id):
+        token = AccessToken()
+        token[api_settings.USER_ID_CLAIM] = str(user_id)
+        token.set_exp(lifetime=timedelta(hours=1))
+        return str(token)
+
+    async def _run(self):
+        clients, connect_ms, failures = await self._connect_all()
+        if not clients:
+            raise CommandError(f'No connection succeeded: {failures.most_common(1)[0][0]}')
+        self.stdout.write(f"{len(clients)} sockets open, {sum(failures.values())} failed {dict(failures)}")
+
+        self.deliveries = {}  # scenario -> list of latencies (ms)
+        self.last_delivery = {}
+        readers = [asyncio.create_task(self._read(client)) for client, _ in clients]
+        scenarios = {'connect': connect_ms}
+        try:
+            scenarios['broadcast'] = await self._publish('broadcast', clients, lambda rng: NEW_JOBS_GROUP)
+            scenarios['direct'] = await self._publish(
+                'direct', clients, lambda rng: user_group(rng.choice(clients)[1]),
+            )
+        finally:
+            for reader in readers:
+                reader.cancel()
+            for client, _ in clients:
+                client.close()
+        return scenarios
+
+    async def _connect_all(self):
+        semaphore = asyncio.Semaphore(self.options['ramp'])
+        latencies, failures = [], Counter()
+
+        async def connect(user_id):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    client = await WebSocketClient.connect(self.host, self.port,
+                                                           f'{self.path}?token={self._token(user_id)}')
+                except (OSError, ConnectionError, asyncio.IncompleteReadError) as exc:
+                    failures[type(exc).__name__ if not str(exc) else str(exc)[:60]] += 1
+                    return None
+                latencies.append((time.perf_counter() - started) * 1000)
+                return client, user_id
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(connect(user_id) for user_id in self.users))
+        summary = summarize(latencies, time.perf_counter() - started, errors=sum(failures.values()))
+        return [result for result in results if result], summary, failures
+
+    async def _read(self, client):
+        while True:
+            try:
+                text = await client.receive()
+            except (OSError, asyncio.IncompleteReadError):
+                return
+            if text is None:
+                return
+            event = json.loads(text)
+            if 'scenario' in event:
+                self.deliveries[event['scenario']].append((time.time() - event['sent']) * 1000)
+                self.last_delivery[event['scenario']] = time.perf_counter()
+
+    async def _publish(self, name, clients, pick_group):
+        """Publishes --messages events to the groups `pick_group` chooses and waits for their delivery."""
+        layer = get_channel_layer()
+        rng = random.Random(f"{self.options['seed']}:{name}")
+        sockets_per_user = Counter(str(user_id) for _, user_id in clients)
+        self.deliveries[name] = []
+        expected = 0
+        interval = 1 / self.options['rate'] if self.options['rate'] else 0
+        started = time.perf_counter()
+        for seq in range(self.options['messages']):
+            group = pick_group(rng)
+            expected += len(clients) if group == NEW_JOBS_GROUP else sockets_per_user[group.split('.', 1)[1]]
+            await layer.group_send(group, message({'type': 'loadtest', 'scenario': name, 'seq': seq,
+                                                   'sent': time.time()}))
+            if interval:
+                await asyncio.sleep(max(0.0, started + (seq + 1) * interval - time.perf_counter()))
+
+        deadline = time.perf_counter() + self.options['timeout']
+        while len(self.deliveries[name]) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        delivered = self.deliveries[name]
+        elapsed = self.last_delivery.get(name, started) - started
+        return summarize(delivered, elapsed, errors=expected - len(delivered))
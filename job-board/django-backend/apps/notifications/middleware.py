@@ -0,0 +1,46 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from apps.accounts.models import Profile
+
+
+def _raw_token(scope):
+    """An access token from an `Authorization: Bearer` header, or the `token` query parameter for browsers."""
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1]
+    return parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+
+
+@database_sync_to_async
+def _authenticate(raw_token):
+    """(user, token expiry, user type), looked up in one trip to the database thread."""
+    if not raw_token:
+        return AnonymousUser(), None, None
+    authentication = JWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token)
+        user = authentication.get_user(token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser(), None, None
+    user_type = Profile.objects.filter(user=user).values_list('user_type', flat=True).first()
+    return user, token['exp'], user_type
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticates WebSocket connections with the same access tokens as the
+    REST API, setting scope['user'], scope['token_exp'] and scope['user_type'].
+    """
+    async def __call__(self, scope, receive, send):
+        user, expires, user_type = await _authenticate(_raw_token(scope))
+        scope = dict(scope, user=user, token_exp=expires, user_type=user_type)
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from apps.jobs.models import Application, Job
+
+from .events import APPLICATION_STATUS, APPLICATION_SUBMITTED
+
+
+@receiver(post_init, sender=Application, dispatch_uid='notifications.application_loaded')
+def remember_status(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred field is not fetched
+    instance._notified_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Application, dispatch_uid='notifications.application_saved')
+def queue_application_event(sender, instance, created, **kwargs):
+    if created:
+        event_type = APPLICATION_SUBMITTED
+    elif instance._notified_status is not None and instance._notified_status != instance.status:
+        event_type = APPLICATION_STATUS
+    else:
+        return
+    instance._notified_status = instance.status
+    # Imported here so Celery only loads when there is something to send
+    from .tasks import notify_application
+    transaction.on_commit(lambda: notify_application.delay(instance.pk, event_type))
+
+
+@receiver(post_save, sender=Job, dispatch_uid='notifications.job_saved')
+def queue_job_event(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        from .tasks import notify_new_job
+        transaction.on_commit(lambda: notify_new_job.delay(instance.pk))
@@ -0,0 +1,41 @@
+from apps.core.queues import REALTIME_QUEUE, queued_task
+from apps.jobs.models import Application, Job
+
+from . import events
+from .events import APPLICATION_SUBMITTED, JOB_POSTED
+
+
+@queued_task(REALTIME_QUEUE)
+def notify_application(application_id, event_type):
+    """Tells the recruiter about a new application, or the applicant about a status change."""
+    application = Application.objects.select_related('job').filter(pk=application_id).first()
+    if application is None:
+        return
+    job = application.job
+    recipient = job.employer_id if event_type == APPLICATION_SUBMITTED else application.applicant_id
+    events.send(events.user_group(recipient), {
+        'type': event_type,
+        'application': application.pk,
+        'job': job.pk,
+        'job_title': job.title,
+        'status': application.status,
+        'at': application.updated_at.isoformat(),
+    })
+
+
+@queued_task(REALTIME_QUEUE)
+def notify_new_job(job_id):
+    """Broadcasts a new posting to every connected job seeker."""
+    job = Job.objects.filter(pk=job_id, is_active=True).first()
+    if job is None:
+        return
+    events.send(events.NEW_JOBS_GROUP, {
+        'type': JOB_POSTED,
+        'job': job.pk,
+        'title': job.title,
+        'company_name': job.company_name,
+        'category': job.category,
+        'location': job.location,
+        'job_type': job.job_type,
+        'at': job.created_at.isoformat(),
+    })
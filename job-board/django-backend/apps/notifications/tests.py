@@ -0,0 +1,75 @@
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import CustomUser
+from apps.jobs.models import Application, Job
+
+from .middleware import JWTAuthMiddleware
+from .routing import websocket_urlpatterns
+from .events import APPLICATION_STATUS, APPLICATION_SUBMITTED
+from .tasks import notify_application, notify_new_job
+
+application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+
+# TransactionTestCase: the consumer reads the database from another thread
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationTests(TransactionTestCase):
+    def setUp(self):
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.recruiter.profile.user_type = 'recruiter'
+        self.recruiter.profile.save()
+        self.seeker = CustomUser.objects.create_user(email='seeker@example.com', password='pass12345')
+
+    def _communicator(self, user=None, header=False):
+        token = str(AccessToken.for_user(user)) if user else 'invalid'
+        if header:
+            return WebsocketCommunicator(application, '/ws/notifications/',
+                                         headers=[(b'authorization', f'Bearer {token}'.encode())])
+        return WebsocketCommunicator(application, f'/ws/notifications/?token={token}')
+
+    async def test_rejects_invalid_tokens(self):
+        connected, code = await self._communicator().connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+    async def test_events_reach_the_users_involved(self):
+        """New postings go to job seekers; application events to the recruiter or the applicant."""
+        seeker, recruiter = self._communicator(self.seeker), self._communicator(self.recruiter, header=True)
+        self.assertTrue((await seeker.connect())[0])
+        self.assertTrue((await recruiter.connect())[0])
+
+        job, submitted = await database_sync_to_async(self._post_and_apply)()
+        seeker_events = [await seeker.receive_json_from(), await seeker.receive_json_from()]
+        recruiter_events = [await recruiter.receive_json_from()]
+        self.assertTrue(await recruiter.receive_nothing())
+        await seeker.send_json_to({'type': 'ping'})
+        seeker_events.append(await seeker.receive_json_from())
+        await seeker.disconnect()
+        await recruiter.disconnect()
+
+        self.assertEqual([event['type'] for event in seeker_events], ['job.posted', APPLICATION_STATUS, 'pong'])
+        self.assertEqual(seeker_events[1]['status'], 'interview')
+        self.assertEqual(recruiter_events[0]['type'], APPLICATION_SUBMITTED)
+        self.assertEqual(recruiter_events[0]['job'], job.pk)
+
+    def _post_and_apply(self):
+        """Posts a job and moves an application along, running the queued tasks inline."""
+        with mock.patch.object(notify_new_job, 'delay') as job_delay, \
+                mock.patch.object(notify_application, 'delay') as application_delay:
+            job = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='Django')
+            submitted = Application.objects.create(job=job, applicant=self.seeker)
+            submitted.status = 'interview'
+            submitted.save()
+        job_delay.assert_called_once_with(job.pk)
+        self.assertEqual(application_delay.call_args_list,
+                         [mock.call(submitted.pk, APPLICATION_SUBMITTED), mock.call(submitted.pk, APPLICATION_STATUS)])
+        notify_new_job(job.pk)
+        for args in application_delay.call_args_list:
+            notify_application(*args.args)
+        return job, submitted
@@ -0,0 +1,203 @@
+"""
+Saved-search alerts, matched percolator style.
+
+Rather than running every saved search against every new posting, each
+search is indexed under one of the keys it requires. Keys are its words,
+plus its filters as 'category:…', 'type:…' and 'location:…'. A posting
+can only match a search if it has every key of the search, so it is only
+checked against the searches indexed under keys it has.
+
+Searches are indexed under their rarest key, judged by the document
+frequencies in a sample of recent postings (term_frequencies()), so few
+come up as candidates for any one posting. A search without keys is
+indexed under MATCH_ALL.
+
+New postings are matched in batches (the search.alerts batch in
+apps/search/tasks.py). One query loads the searches indexed under any key
+of the batch's postings, then each posting is verified against the
+candidates of its own keys. Matches wait in SavedSearchMatch until the
+send_alert_digests task mails each user one digest of them.
+"""
+import logging
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.accounts.models import CustomUser
+from apps.core.mail import send_templated_mail
+from apps.jobs.models import Job
+
+from .models import SavedSearch, SavedSearchMatch
+
+logger = logging.getLogger(__name__)
+
+MATCH_ALL = '*'
+TERM_STATS_KEY = 'search:alerts:frequencies'
+JOB_FIELDS = ('title', 'company_name', 'description', 'category', 'job_type', 'location')
+# Words too common to narrow a search down
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from in is it of on or the to with we you our your will'.split()
+)
+_WORD = re.compile(r'\w+')
+
+
+def words(text):
+    """The distinct lower-cased words of a text, without stop words."""
+    return {word for word in _WORD.findall((text or '').lower()) if word not in STOP_WORDS}
+
+
+def _filter_keys(category, job_type, location):
+    keys = []
+    if category and category.strip():
+        keys.append(f'category:{category.strip().lower()}')
+    if job_type and job_type.strip():
+        keys.append(f'type:{job_type.strip().lower()}')
+    city = (location or '').split(',')[0].strip().lower()
+    if city:
+        keys.append(f'location:{city}')
+    return keys
+
+
+def search_keys(query, category='', job_type='', location=''):
+    """The keys a posting needs to match a search, sorted."""
+    return sorted(words(query)) + _filter_keys(category, job_type, location)
+
+
+def job_keys(title, company_name, description, category, job_type, location):
+    """The set of keys a posting has."""
+    return words(f'{title} {company_name} {description}').union(_filter_keys(category, job_type, location))
+
+
+def term_frequencies():
+    """
+    {key: postings having it} among the ALERT_TERM_SAMPLE latest active
+    postings, keys of a single posting left out; cached for a day.
+    """
+    frequencies = cache.get(TERM_STATS_KEY)
+    if frequencies is None:
+        counts = Counter()
+        latest = Job.objects.filter(is_active=True).order_by('-created_at').values_list(*JOB_FIELDS)
+        for fields in latest[:settings.ALERT_TERM_SAMPLE]:
+            counts.update(job_keys(*fields))
+        frequencies = {key: count for key, count in counts.items() if count > 1}
+        cache.set(TERM_STATS_KEY, frequencies, settings.ALERT_TERM_STATS_SECONDS)
+    return frequencies
+
+
+def choose_anchor(keys, frequencies):
+    """The key to index a search under: the one fewest postings have."""
+    if not keys:
+        return MATCH_ALL
+    # Unseen keys count as rare; among equals the longer word is likely rarer
+    return min(keys, key=lambda key: (frequencies.get(key, 0), -len(key), key))
+
+
+def prepare(instance):
+    """pre_save hook: derives a saved search's keys and anchor."""
+    instance.keys = search_keys(instance.query, instance.category, instance.job_type, instance.location)
+    instance.anchor = choose_anchor(instance.keys, term_frequencies())
+
+
+class Percolator:
+    """
+    Saved searches indexed by anchor, matched against the keys of
+    postings. `verified` counts the candidates checked so far.
+    """
+    def __init__(self, searches):
+        """`searches` yields (search id, user id, anchor, keys)."""
+        self.by_anchor = defaultdict(list)
+        for search_id, user_id, anchor, keys in searches:
+            self.by_anchor[anchor].append((search_id, user_id, frozenset(keys)))
+        self.verified = 0
+
+    def __len__(self):
+        return sum(len(searches) for searches in self.by_anchor.values())
+
+    def match(self, keys):
+        """[(search id, user id)] of the searches all of whose keys are in `keys`."""
+        matches = []
+        for anchor in (MATCH_ALL, *keys):
+            for search_id, user_id, required in self.by_anchor.get(anchor, ()):
+                self.verified += 1
+                if required <= keys:
+                    matches.append((search_id, user_id))
+        return matches
+
+
+def match_jobs(job_ids):
+    """Records the saved searches the postings match; returns how many matches were stored."""
+    jobs = {
+        pk: job_keys(*fields) for pk, *fields in Job.objects.filter(
+            pk__in=job_ids, is_active=True, duplicate_of__isnull=True,
+        ).values_list('pk', *JOB_FIELDS)
+    }
+    if not jobs:
+        return 0
+    anchors = set().union(*jobs.values())
+    anchors.add(MATCH_ALL)
+    searches = SavedSearch.objects.filter(is_active=True, anchor__in=list(anchors)).values_list(
+        'pk', 'user_id', 'anchor', 'keys',
+    )
+    percolator = Percolator(searches.iterator(settings.ALERT_MATCH_BATCH))
+    matches = [
+        SavedSearchMatch(search_id=search_id, user_id=user_id, job_id=pk)
+        for pk, keys in jobs.items()
+        for search_id, user_id in percolator.match(keys)
+    ]
+    SavedSearchMatch.objects.bulk_create(matches, batch_size=settings.ALERT_MATCH_BATCH, ignore_conflicts=True)
+    logger.info('Alerts: %d postings, %d candidate searches, %d verified, %d matches',
+                len(jobs), len(percolator), percolator.verified, len(matches))
+    return len(matches)
+
+
+def send_digests():
+    """
+    Mails each user with pending matches one digest of them and clears
+    the matches; returns the number of digests sent.
+    """
+    user_ids = list(SavedSearchMatch.objects.values_list('user_id', flat=True).distinct().order_by())
+    sent = 0
+    for start in range(0, len(user_ids), settings.ALERT_DIGEST_CHUNK):
+        chunk = user_ids[start:start + settings.ALERT_DIGEST_CHUNK]
+        with transaction.atomic():
+            rows = list(SavedSearchMatch.objects.filter(user_id__in=chunk).order_by('matched_at', 'pk').values_list(
+                'pk', 'user_id', 'search_id', 'search__name', 'search__query', 'job_id',
+            ))
+            # Postings closed, gone or found to repeat another since they matched are left out
+            jobs = {
+                pk: fields for pk, *fields in Job.objects.filter(
+                    pk__in={row[-1] for row in rows}, is_active=True, duplicate_of__isnull=True,
+                ).values_list('pk', 'title', 'company_name', 'location')
+            }
+            digests = defaultdict(dict)
+            for _, user_id, search_id, name, query, job_id in rows:
+                if job_id in jobs:
+                    title, company_name, location = jobs[job_id]
+                    search = digests[user_id].setdefault(search_id, {'name': name or query, 'jobs': []})
+                    search['jobs'].append({
+                        'title': title, 'company_name': company_name, 'location': location,
+                        'url': f'{settings.ALERT_JOB_URL}{job_id}',
+                    })
+            emails = dict(CustomUser.objects.filter(pk__in=list(digests), is_active=True).values_list('pk', 'email'))
+            recipients = [(emails[user_id], _digest_context(searches)) for user_id, searches in digests.items()
+                          if user_id in emails]
+            if recipients:
+                send_templated_mail(settings.ALERT_DIGEST_SUBJECT, settings.ALERT_DIGEST_TEMPLATE, recipients)
+            SavedSearchMatch.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        sent += len(recipients)
+    return sent
+
+
+def _digest_context(searches):
+    """Template context of {search id: {'name', 'jobs'}}, showing at most ALERT_DIGEST_MAX_JOBS postings."""
+    total = sum(len(search['jobs']) for search in searches.values())
+    shown, room = [], settings.ALERT_DIGEST_MAX_JOBS
+    for search in searches.values():
+        if room <= 0:
+            break
+        shown.append({'name': search['name'], 'jobs': search['jobs'][:room]})
+        room -= len(shown[-1]['jobs'])
+    return {'searches': shown, 'total': total, 'more': total - (settings.ALERT_DIGEST_MAX_JOBS - room)}
@@ -0,0 +1,326 @@
+"""
+Typeahead for job titles, company names and skills, served from memory.
+
+Term weights (how many active jobs carry a title, how many jobs and
+recruiter profiles a company name, how many profiles list a skill) live in
+one Redis hash per kind. Model signals adjust them by +1/-1 as jobs and
+profiles change; rebuild_weights() recounts them from the database, daily
+and after bulk loads that bypass signals.
+
+publish(), run by the search-autocomplete-publish task whenever weights
+changed, compiles them into a PrefixIndex per kind and stores the lot in
+Redis as one compressed snapshot under a new version. Every process keeps
+the current snapshot in memory and looks for a newer version at most every
+AUTOCOMPLETE_REFRESH_SECONDS (loading it in the background), so a lookup
+is a binary search over local arrays: no database, and usually no network.
+"""
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('title', 'company', 'skill')
+WEIGHTS_PREFIX = 'autocomplete:weights:'
+DIRTY_KEY = 'autocomplete:dirty'
+BUILD_KEY = 'autocomplete:build'
+VERSION_KEY = 'autocomplete:version'
+SNAPSHOT_PREFIX = 'autocomplete:snapshot:'
+SNAPSHOT_GRACE_SECONDS = 600  # A replaced snapshot stays readable this long
+MAX_CHAR = '\U0010ffff'
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def normalize(text):
+    """Lower case, accents stripped, whitespace collapsed."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def split_skills(text):
+    """Skills of a free-text list: comma, semicolon or line separated, else one per word."""
+    parts = re.split(r'[,;\n]+', text or '')
+    if len(parts) == 1:
+        parts = parts[0].split()
+    return [part.strip() for part in parts if part.strip()]
+
+
+class PrefixIndex:
+    """
+    The terms of one kind, best first, and a sorted array of search keys:
+    each term's normalized text from every word start, so "eng" finds
+    "Backend Engineer". The terms under a prefix are one contiguous run of
+    keys; as term ids are ranks, the best K of a run are its K smallest
+    ids. Runs longer than AUTOCOMPLETE_SCAN_LIMIT keys have their top K
+    precomputed, shorter ones are ranked on lookup.
+    """
+    def __init__(self, terms, weights, keys, ids, top):
+        self.terms = terms
+        self.weights = weights
+        self.keys = keys
+        self.ids = ids
+        self.top = top
+
+    @classmethod
+    def build(cls, weights, top_k=None, scan_limit=None):
+        """Builds the index of {term: weight}; spellings of one term are merged under the commonest."""
+        top_k = top_k or settings.AUTOCOMPLETE_TOP_K
+        scan_limit = scan_limit or settings.AUTOCOMPLETE_SCAN_LIMIT
+        merged = {}
+        for term, weight in weights.items():
+            key = normalize(term)
+            if not key or weight <= 0:
+                continue
+            total, best, best_weight = merged.get(key, (0, term, 0))
+            merged[key] = (total + weight, *((term, weight) if weight > best_weight else (best, best_weight)))
+        ranked = sorted(merged.items(), key=lambda item: (-item[1][0], item[1][1]))
+
+        entries = []
+        for term_id, (key, _) in enumerate(ranked):
+            words = key.split(' ')
+            entries.extend((' '.join(words[start:]), term_id) for start in range(len(words)))
+        entries.sort()
+        keys = [key for key, _ in entries]
+        ids = array('I', (term_id for _, term_id in entries))
+
+        top = {}
+        depth = 1
+        while True:
+            found, start = False, 0
+            while start < len(keys):
+                prefix = keys[start][:depth]
+                if len(prefix) < depth:
+                    start += 1
+                    continue
+                end = bisect_left(keys, prefix + MAX_CHAR, start)
+                if end - start > scan_limit:
+                    top[prefix] = heapq.nsmallest(top_k, set(ids[start:end]))
+                    found = True
+                start = end
+            if not found:
+                break
+            depth += 1
+        return cls([best for _, (_, best, _) in ranked], [total for _, (total, _, _) in ranked], keys, ids, top)
+
+    def lookup(self, prefix, limit):
+        key = normalize(prefix)
+        if not key:
+            return []
+        term_ids = self.top.get(key)
+        if term_ids is None:
+            start = bisect_left(self.keys, key)
+            end = bisect_left(self.keys, key + MAX_CHAR, start)
+            term_ids = heapq.nsmallest(limit, set(self.ids[start:end]))
+        return [self.terms[term_id] for term_id in term_ids[:limit]]
+
+    def to_dict(self):
+        return {'terms': self.terms, 'weights': self.weights, 'keys': self.keys,
+                'ids': self.ids.tolist(), 'top': self.top}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['terms'], data['weights'], data['keys'], array('I', data['ids']), data['top'])
+
+
+def dumps(indexes):
+    return zlib.compress(json.dumps({kind: index.to_dict() for kind, index in indexes.items()}).encode())
+
+
+def loads(blob):
+    return {kind: PrefixIndex.from_dict(data) for kind, data in json.loads(zlib.decompress(blob)).items()}
+
+
+# Weights
+
+def weights_key(kind):
+    return WEIGHTS_PREFIX + kind
+
+
+def job_terms(title, company_name, is_active):
+    """{(kind, term): count} a job contributes."""
+    if not is_active:
+        return Counter()
+    return Counter({('title', title.strip()): 1, ('company', company_name.strip()): 1})
+
+
+def profile_terms(company_name, skills):
+    """{(kind, term): count} a profile contributes."""
+    terms = Counter({('skill', skill): 1 for skill in set(split_skills(skills))})
+    terms[('company', company_name.strip())] += 1
+    return terms
+
+
+def record(before, after):
+    """Adds the difference of two term counters to the weights once the transaction commits."""
+    deltas = Counter(after)
+    deltas.subtract(before)
+    deltas = {(kind, term): delta for (kind, term), delta in deltas.items() if term and delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply(deltas))
+
+
+def _apply(deltas):
+    # Never fail the request that caused the change; the daily rebuild repairs lost deltas
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for (kind, term), delta in deltas.items():
+            pipe.hincrby(weights_key(kind), term, delta)
+        pipe.set(DIRTY_KEY, 1)
+        pipe.execute()
+    except Exception:
+        logger.exception('Could not record %d autocomplete deltas', len(deltas))
+
+
+def count_weights():
+    """{kind: {term: weight}} recounted from the database."""
+    from apps.accounts.models import Profile
+    from apps.jobs.models import Job
+
+    weights = {kind: Counter() for kind in KINDS}
+    jobs = Job.objects.filter(is_active=True).order_by()
+    for kind, field in (('title', 'title'), ('company', 'company_name')):
+        for row in jobs.values(field).annotate(count=Count('id')):
+            weights[kind][row[field].strip()] += row['count']
+    for row in Profile.objects.exclude(company_name='').order_by().values('company_name').annotate(count=Count('id')):
+        weights['company'][row['company_name'].strip()] += row['count']
+    skills = Profile.objects.exclude(skills='').values_list('skills', flat=True)
+    for text in skills.iterator(chunk_size=5000):
+        weights['skill'].update(set(split_skills(text)))
+    for counts in weights.values():
+        counts.pop('', None)
+    return weights
+
+
+def rebuild_weights():
+    """Replaces the weights with a recount; returns the number of terms per kind."""
+    redis = _redis()
+    weights = count_weights()
+    for kind, counts in weights.items():
+        staging = weights_key(kind) + ':rebuild'
+        redis.delete(staging)
+        items = list(counts.items())
+        for start in range(0, len(items), 10000):
+            redis.hset(staging, mapping=dict(items[start:start + 10000]))
+        if items:
+            redis.rename(staging, weights_key(kind))
+        else:
+            redis.delete(weights_key(kind))
+    redis.set(DIRTY_KEY, 1)
+    return {kind: len(counts) for kind, counts in weights.items()}
+
+
+# Snapshots
+
+def publish(force=False):
+    """
+    Compiles and stores a new snapshot if the weights changed since the
+    last one (or `force`); returns its version, or None if there was
+    nothing to do.
+    """
+    redis = _redis()
+    pipe = redis.pipeline(transaction=True)
+    pipe.get(DIRTY_KEY)
+    pipe.delete(DIRTY_KEY)
+    pipe.get(VERSION_KEY)
+    dirty, _, previous = pipe.execute()
+    if not (dirty or force or previous is None):
+        return None
+    try:
+        indexes = {}
+        for kind in KINDS:
+            weights = {term.decode(): int(weight) for term, weight in redis.hgetall(weights_key(kind)).items()}
+            indexes[kind] = PrefixIndex.build(weights)
+        version = str(redis.incr(BUILD_KEY))
+        pipe = redis.pipeline(transaction=True)
+        pipe.set(SNAPSHOT_PREFIX + version, dumps(indexes))
+        pipe.set(VERSION_KEY, version)
+        if previous is not None:
+            pipe.expire(SNAPSHOT_PREFIX + previous.decode(), SNAPSHOT_GRACE_SECONDS)
+        pipe.execute()
+    except Exception:
+        redis.set(DIRTY_KEY, 1)
+        raise
+    return version
+
+
+class _Snapshot:
+    """
+    The snapshot this process serves from. A newer published version is
+    loaded by a background thread while the current one keeps answering;
+    only the first load, with nothing to serve yet, happens in a request.
+    """
+    def __init__(self):
+        self.version = None
+        self.indexes = {}
+        self.checked = float('-inf')
+        self.lock = threading.Lock()
+        self.loader = None
+
+    def get(self):
+        if time.monotonic() - self.checked >= settings.AUTOCOMPLETE_REFRESH_SECONDS:
+            with self.lock:
+                if time.monotonic() - self.checked >= settings.AUTOCOMPLETE_REFRESH_SECONDS:
+                    self._refresh()
+        return self.indexes
+
+    def _refresh(self):
+        self.checked = time.monotonic()
+        if self.loader is not None and self.loader.is_alive():
+            return
+        try:
+            version = _redis().get(VERSION_KEY)
+        except Exception:
+            # Keep serving the snapshot we have
+            logger.warning('Could not check for a new autocomplete snapshot', exc_info=True)
+            return
+        if version is None or version == self.version:
+            return
+        if not self.indexes:
+            self._load(version)
+        else:
+            self.loader = threading.Thread(target=self._load, args=(version,), daemon=True)
+            self.loader.start()
+
+    def _load(self, version):
+        try:
+            blob = _redis().get(SNAPSHOT_PREFIX + version.decode())
+            if blob is not None:
+                self.indexes, self.version = loads(blob), version
+        except Exception:
+            logger.exception('Could not load autocomplete snapshot %s', version)
+
+    def wait(self):
+        """Waits for a background load to finish."""
+        if self.loader is not None:
+            self.loader.join()
+
+    def reset(self):
+        self.wait()
+        self.__init__()
+
+
+snapshot = _Snapshot()
+
+
+def suggest(prefix, kinds=KINDS, limit=None):
+    """{kind: [term, ...]}: the best terms of each kind with a word starting with `prefix`."""
+    limit = min(limit or settings.AUTOCOMPLETE_TOP_K, settings.AUTOCOMPLETE_TOP_K)
+    indexes = snapshot.get()
+    return {kind: indexes[kind].lookup(prefix, limit) if kind in indexes else [] for kind in kinds}
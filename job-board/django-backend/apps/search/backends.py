@@ -0,0 +1,167 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseSearchBackend:
+    """
+    The operations the indexing pipeline needs from a search engine.
+
+    Bulk actions use the Elasticsearch helper format:
+    {'_op_type': 'index' | 'delete', '_index': ..., '_id': ..., '_source': {...}}
+    """
+    def bulk(self, actions):
+        raise NotImplementedError
+
+    def create_index(self, name, mappings=None):
+        raise NotImplementedError
+
+    def delete_index(self, name):
+        raise NotImplementedError
+
+    def refresh(self, name):
+        pass
+
+    def get_alias(self, alias):
+        """Returns the names of the indexes the alias points to."""
+        raise NotImplementedError
+
+    def swap_alias(self, alias, new_index, old_indexes=()):
+        """Atomically points `alias` at `new_index` instead of `old_indexes`."""
+        raise NotImplementedError
+
+    def search(self, index, query, fields=None, size=10):
+        raise NotImplementedError
+
+
+class ElasticsearchBackend(BaseSearchBackend):
+    """
+    Elasticsearch 8 backend. The client is imported and created lazily so
+    processes that never touch search do not pay for it.
+    """
+    def __init__(self, url=None, **options):
+        self.url = url or settings.ELASTICSEARCH_URL
+        self.options = options
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from elasticsearch import Elasticsearch
+            self._client = Elasticsearch(self.url, **self.options)
+        return self._client
+
+    def bulk(self, actions):
+        from elasticsearch import helpers
+
+        _, errors = helpers.bulk(self.client, actions, raise_on_error=False, refresh=False)
+        # Deleting something that was never indexed is not an error for us
+        errors = [
+            error for error in errors
+            if not ('delete' in error and error['delete'].get('status') == 404)
+        ]
+        if errors:
+            raise RuntimeError(f'{len(errors)} bulk index errors, first: {errors[0]}')
+
+    def create_index(self, name, mappings=None):
+        self.client.indices.create(index=name, mappings=mappings or None)
+
+    def delete_index(self, name):
+        self.client.indices.delete(index=name, ignore_unavailable=True)
+
+    def refresh(self, name):
+        self.client.indices.refresh(index=name)
+
+    def get_alias(self, alias):
+        if not self.client.indices.exists_alias(name=alias):
+            return []
+        return list(self.client.indices.get_alias(name=alias).keys())
+
+    def swap_alias(self, alias, new_index, old_indexes=()):
+        actions = [{'remove': {'index': index, 'alias': alias}} for index in old_indexes]
+        actions.append({'add': {'index': new_index, 'alias': alias}})
+        self.client.indices.update_aliases(actions=actions)
+
+    def search(self, index, query, fields=None, size=10):
+        body = {'multi_match': {'query': query, 'fields': fields or ['*']}}
+        response = self.client.search(index=index, query=body, size=size)
+        return response['hits']['hits']
+
+
+class InMemoryBackend(BaseSearchBackend):
+    """
+    In-process stand-in for tests and local development. State is shared by
+    every instance in the process; call reset() between tests.
+    """
+    indexes = {}
+    aliases = {}
+
+    @classmethod
+    def reset(cls):
+        cls.indexes.clear()
+        cls.aliases.clear()
+
+    def _resolve(self, name):
+        if name in self.aliases:
+            return list(self.aliases[name])
+        return [name]
+
+    def bulk(self, actions):
+        for action in actions:
+            for index in self._resolve(action['_index']):
+                docs = self.indexes.setdefault(index, {})
+                if action.get('_op_type', 'index') == 'delete':
+                    docs.pop(action['_id'], None)
+                else:
+                    docs[action['_id']] = dict(action['_source'])
+
+    def create_index(self, name, mappings=None):
+        if name in self.indexes:
+            raise ValueError(f'Index {name} already exists')
+        self.indexes[name] = {}
+
+    def delete_index(self, name):
+        self.indexes.pop(name, None)
+        for targets in self.aliases.values():
+            targets.discard(name)
+
+    def get_alias(self, alias):
+        return sorted(self.aliases.get(alias, ()))
+
+    def swap_alias(self, alias, new_index, old_indexes=()):
+        targets = self.aliases.setdefault(alias, set())
+        targets.difference_update(old_indexes)
+        targets.add(new_index)
+
+    def get(self, index, doc_id):
+        for name in self._resolve(index):
+            if doc_id in self.indexes.get(name, {}):
+                return self.indexes[name][doc_id]
+        return None
+
+    def search(self, index, query, fields=None, size=10):
+        terms = [term for term in re.findall(r'\w+', query.lower())]
+        hits = []
+        for name in self._resolve(index):
+            for doc_id, source in self.indexes.get(name, {}).items():
+                values = [
+                    str(value).lower() for key, value in source.items()
+                    if value and (fields is None or key in fields)
+                ]
+                text = ' '.join(values)
+                score = sum(1 for term in terms if term in text)
+                if score:
+                    hits.append({'_index': name, '_id': doc_id, '_score': score, '_source': source})
+        hits.sort(key=lambda hit: -hit['_score'])
+        return hits[:size]
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    return _load_backend(settings.SEARCH_BACKEND)
@@ -0,0 +1,123 @@
+from apps.accounts.models import Profile
+from apps.jobs.models import Job
+
+# name -> Document instance
+_documents = {}
+
+
+class Document:
+    """
+    Describes how a model is turned into search documents.
+
+    `name` is the logical index; the physical index behind it is resolved
+    through an alias (see apps.search.indexing) so it can be rebuilt without
+    downtime. `id_field` is the model field used as the document id.
+    """
+    name = None
+    model = None
+    id_field = 'pk'
+    mappings = {}
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def get_id(self, obj):
+        return str(getattr(obj, self.id_field))
+
+    def should_index(self, obj):
+        """Objects for which this returns False are removed from the index."""
+        return True
+
+    def serialize(self, obj):
+        raise NotImplementedError
+
+
+def register(document_class):
+    document = document_class()
+    _documents[document.name] = document
+    return document_class
+
+
+def get_document(name):
+    try:
+        return _documents[name]
+    except KeyError:
+        raise LookupError(f'No search document registered under {name!r}') from None
+
+
+def get_documents():
+    return list(_documents.values())
+
+
+@register
+class ProfileDocument(Document):
+    name = 'profiles'
+    model = Profile
+    id_field = 'user_id'
+    mappings = {
+        'properties': {
+            'user_id': {'type': 'keyword'},
+            'full_name': {'type': 'text'},
+            'user_type': {'type': 'keyword'},
+            'bio': {'type': 'text'},
+            'skills': {'type': 'text'},
+            'experience': {'type': 'text'},
+            'education': {'type': 'text'},
+            'company_name': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}},
+            'position': {'type': 'text'},
+            'updated_at': {'type': 'date'},
+        }
+    }
+
+    def get_queryset(self):
+        return Profile.objects.select_related('user')
+
+    def should_index(self, obj):
+        return obj.user.is_active
+
+    def serialize(self, obj):
+        return {
+            'user_id': str(obj.user_id),
+            'full_name': obj.full_name,
+            'user_type': obj.user_type,
+            'bio': obj.bio,
+            'skills': obj.skills,
+            'experience': obj.experience,
+            'education': obj.education,
+            'company_name': obj.company_name,
+            'position': obj.position,
+            'updated_at': obj.updated_at.isoformat() if obj.updated_at else None,
+        }
+
+
+@register
+class JobDocument(Document):
+    name = 'jobs'
+    model = Job
+    mappings = {
+        'properties': {
+            'title': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}},
+            'company_name': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}},
+            'description': {'type': 'text'},
+            'category': {'type': 'keyword'},
+            'location': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}},
+            'job_type': {'type': 'keyword'},
+            'employer_id': {'type': 'keyword'},
+            'created_at': {'type': 'date'},
+        }
+    }
+
+    def should_index(self, obj):
+        return obj.is_active and obj.duplicate_of_id is None
+
+    def serialize(self, obj):
+        return {
+            'title': obj.title,
+            'company_name': obj.company_name,
+            'description': obj.description,
+            'category': obj.category,
+            'location': obj.location,
+            'job_type': obj.job_type,
+            'employer_id': str(obj.employer_id),
+            'created_at': obj.created_at.isoformat() if obj.created_at else None,
+        }
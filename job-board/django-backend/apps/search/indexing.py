@@ -0,0 +1,186 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .backends import get_backend
+from .documents import get_document
+from .models import IndexOutbox
+
+logger = logging.getLogger(__name__)
+
+# Aliases this process has already seen to exist
+_known_aliases = set()
+
+
+def alias_name(document):
+    return f"{settings.SEARCH_INDEX_PREFIX}-{document.name}"
+
+
+def _rebuild_key(document):
+    return f"search:rebuild:{document.name}"
+
+
+def enqueue(document, object_ids, action='index'):
+    """
+    Records index changes for `object_ids` in the outbox. Call it inside the
+    transaction that changes the rows (bulk updates bypass model signals).
+    """
+    rows = [IndexOutbox(index=document.name, object_id=str(object_id), action=action) for object_id in object_ids]
+    IndexOutbox.objects.bulk_create(rows)
+    transaction.on_commit(_trigger_processing)
+    return len(rows)
+
+
+def _trigger_processing():
+    from .tasks import outbox_trigger
+    try:
+        outbox_trigger.add('outbox')
+    except Exception:
+        # The periodic drain picks the rows up if Redis is unavailable
+        logger.warning('Could not schedule search outbox processing', exc_info=True)
+
+
+def ensure_alias(document, backend=None):
+    """
+    Creates an empty physical index behind the alias on first use, so that
+    writes never auto-create a concrete index under the alias name.
+    """
+    backend = backend or get_backend()
+    alias = alias_name(document)
+    if alias in _known_aliases:
+        return alias
+    if not backend.get_alias(alias):
+        index = f"{alias}-{timezone.now():%Y%m%d%H%M%S%f}"
+        backend.create_index(index, document.mappings)
+        backend.swap_alias(alias, index)
+    _known_aliases.add(alias)
+    return alias
+
+
+def write_targets(document, backend=None):
+    """
+    The live alias plus, while a rebuild is running, the index being built,
+    so changes made during a rebuild are not lost at the alias swap.
+    """
+    targets = [ensure_alias(document, backend)]
+    rebuilding = cache.get(_rebuild_key(document))
+    if rebuilding:
+        targets.append(rebuilding)
+    return targets
+
+
+def build_actions(document, object_ids, deleted_ids=(), targets=None):
+    """
+    Loads the objects for `object_ids` in one query and returns bulk actions.
+    Objects that no longer exist or should not be indexed become deletes.
+    """
+    targets = targets or write_targets(document)
+    objects = {
+        document.get_id(obj): obj
+        for obj in document.get_queryset().filter(**{f"{document.id_field}__in": list(object_ids)})
+    }
+    actions = []
+    for object_id in object_ids:
+        obj = objects.get(object_id)
+        for target in targets:
+            if obj is not None and document.should_index(obj):
+                actions.append({'_op_type': 'index', '_index': target, '_id': object_id, '_source': document.serialize(obj)})
+            else:
+                actions.append({'_op_type': 'delete', '_index': target, '_id': object_id})
+    for object_id in deleted_ids:
+        for target in targets:
+            actions.append({'_op_type': 'delete', '_index': target, '_id': object_id})
+    return actions
+
+
+def process_outbox(batch_size=None, max_batches=None):
+    """
+    Ships pending outbox rows to the search backend in bulk and deletes them.
+
+    Rows are claimed with SKIP LOCKED so several workers can drain in
+    parallel; if the backend fails the transaction rolls back and the rows
+    stay for the next run. Returns the number of rows processed.
+    """
+    batch_size = batch_size or settings.SEARCH_OUTBOX_BATCH_SIZE
+    backend = get_backend()
+    processed = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            rows = list(IndexOutbox.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+            if not rows:
+                break
+
+            # Only the latest action per object matters
+            latest = {}
+            for row in rows:
+                latest[(row.index, row.object_id)] = row.action
+
+            by_index = {}
+            for (index, object_id), action in latest.items():
+                by_index.setdefault(index, ([], []))[action == 'delete'].append(object_id)
+
+            actions = []
+            for index, (indexed, deleted) in by_index.items():
+                try:
+                    document = get_document(index)
+                except LookupError:
+                    logger.warning('Dropping outbox rows for unknown index %s', index)
+                    continue
+                actions.extend(build_actions(document, indexed, deleted, write_targets(document, backend)))
+
+            if actions:
+                backend.bulk(actions)
+            IndexOutbox.objects.filter(id__in=[row.id for row in rows]).delete()
+
+        processed += len(rows)
+        batches += 1
+    return processed
+
+
+def rebuild_index(document, chunk_size=1000):
+    """
+    Builds a fresh physical index from the database and swaps the alias to it
+    once it is complete. Searches keep hitting the old index until the swap.
+    Returns (new index name, documents indexed).
+    """
+    backend = get_backend()
+    alias = alias_name(document)
+    new_index = f"{alias}-{timezone.now():%Y%m%d%H%M%S%f}"
+    backend.create_index(new_index, document.mappings)
+    cache.set(_rebuild_key(document), new_index, timeout=None)
+
+    count = 0
+    try:
+        chunk = []
+        for obj in document.get_queryset().iterator(chunk_size=chunk_size):
+            if document.should_index(obj):
+                chunk.append({
+                    '_op_type': 'index', '_index': new_index,
+                    '_id': document.get_id(obj), '_source': document.serialize(obj),
+                })
+            if len(chunk) >= chunk_size:
+                backend.bulk(chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            backend.bulk(chunk)
+            count += len(chunk)
+        backend.refresh(new_index)
+
+        old_indexes = backend.get_alias(alias)
+        backend.swap_alias(alias, new_index, old_indexes)
+    except Exception:
+        backend.delete_index(new_index)
+        raise
+    finally:
+        cache.delete(_rebuild_key(document))
+
+    for index in old_indexes:
+        backend.delete_index(index)
+    _known_aliases.add(alias)
+    logger.info('Rebuilt %s into %s (%d documents)', alias, new_index, count)
+    return new_index, count
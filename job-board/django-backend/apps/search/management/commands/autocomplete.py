@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.search import autocomplete
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage the autocomplete index: recount the weights from the database and publish "
+        "(after seed_data or other bulk loads), publish pending changes, or show status"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'publish', 'status'])
+
+    def handle(self, *args, **options):
+        if options['action'] == 'rebuild':
+            counts = autocomplete.rebuild_weights()
+            self.stdout.write(', '.join(f"{count} {kind} terms" for kind, count in counts.items()))
+            options['action'] = 'publish'
+
+        redis = autocomplete._redis()
+        if options['action'] == 'publish':
+            version = autocomplete.publish(force=True)
+            self.stdout.write(self.style.SUCCESS(f"Published snapshot {version}"))
+
+        version = redis.get(autocomplete.VERSION_KEY)
+        if version is None:
+            self.stdout.write('No snapshot published')
+            return
+        blob = redis.get(autocomplete.SNAPSHOT_PREFIX + version.decode())
+        pending = 'pending changes' if redis.exists(autocomplete.DIRTY_KEY) else 'up to date'
+        self.stdout.write(f"Snapshot {version.decode()}: {len(blob) / 1024:.0f} KiB, {pending}")
+        for kind, index in autocomplete.loads(blob).items():
+            self.stdout.write(f"- {kind}: {len(index.terms)} terms, {len(index.keys)} keys, "
+                              f"{len(index.top)} precomputed prefixes")
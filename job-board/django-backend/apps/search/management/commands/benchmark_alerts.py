@@ -0,0 +1,182 @@
+import math
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.accounts.models import CustomUser
+from apps.core import seeding
+from apps.core.benchmarking import summarize, write_results
+from apps.jobs.models import Job
+from apps.search import alerts
+from apps.search.models import SavedSearch, SavedSearchMatch
+
+SYLLABLES = ['ka', 'ri', 'mo', 'zu', 'te', 'lan', 'bo', 'sha', 'ni', 'vor', 'el', 'da', 'qui', 'ston', 'ma']
+SCRATCH_DOMAIN = 'alerts-benchmark.test'
+USERS_PER_SEARCHES = 5  # one scratch user per this many searches with --db
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure saved-search alert matching (apps/search/alerts.py): a burst of synthetic "
+        "postings with Zipf-distributed words matched against saved searches of one or two rarer "
+        "words, now and then a skill or title, and optional filters. Compares the candidates "
+        "verified per posting when searches are indexed under their rarest key and under their "
+        "first one, and estimates the cost of "
+        "checking every search against every posting. With --db, also stores the searches and "
+        "postings for scratch users and times match_jobs() on them, removing them afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=100000)
+        parser.add_argument('--postings', type=int, default=10000)
+        parser.add_argument('--brute-force-sample', type=int, default=100,
+                            help='Postings checked against every search to estimate the naive cost')
+        parser.add_argument('--db', action='store_true', help='Also time matching through the database')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['searches'] < 1 or options['postings'] < 1:
+            raise CommandError('--searches and --postings must be positive')
+        rng = random.Random(options['seed'])
+        words = sorted({''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(20000)})
+        weights = [1 / (rank + 1) for rank in range(len(words))]
+        # Frequencies from earlier postings, as term_frequencies() samples them
+        history = [self._posting(rng, words, weights) for _ in range(settings.ALERT_TERM_SAMPLE)]
+        counts = {}
+        for posting in history:
+            for key in alerts.job_keys(*posting):
+                counts[key] = counts.get(key, 0) + 1
+        frequencies = {key: count for key, count in counts.items() if count > 1}
+
+        postings = [self._posting(rng, words, weights) for _ in range(options['postings'])]
+        searches = [self._search(rng, words) for _ in range(options['searches'])]
+        keyed = [alerts.search_keys(*search) for search in searches]
+        self.stdout.write(f"{len(searches)} searches, {len(postings)} postings")
+
+        scenarios, matched = {}, {}
+        for label, anchor in (('rarest_key', lambda keys: alerts.choose_anchor(keys, frequencies)),
+                              ('first_key', lambda keys: keys[0] if keys else alerts.MATCH_ALL)):
+            started = time.perf_counter()
+            percolator = alerts.Percolator(
+                (search_id, None, anchor(keys), keys) for search_id, keys in enumerate(keyed)
+            )
+            build_s = time.perf_counter() - started
+            latencies, matches = [], 0
+            started = time.perf_counter()
+            for posting in postings:
+                t0 = time.perf_counter()
+                matches += len(percolator.match(alerts.job_keys(*posting)))
+                latencies.append((time.perf_counter() - t0) * 1000)
+            scenarios[label] = summarize(latencies, time.perf_counter() - started)
+            scenarios[label].update(
+                build_s=round(build_s, 3), matches=matches,
+                verified_per_posting=round(percolator.verified / len(postings), 1),
+            )
+            matched[label] = matches
+
+        sample = postings[:options['brute_force_sample']]
+        required = [frozenset(keys) for keys in keyed]
+        started = time.perf_counter()
+        for posting in sample:
+            keys = alerts.job_keys(*posting)
+            sum(1 for search in required if search <= keys)
+        per_posting = (time.perf_counter() - started) / max(1, len(sample))
+        brute_force_s = per_posting * len(postings)
+
+        if options['db']:
+            scenarios['database'] = self._database(searches, keyed, frequencies, postings)
+
+        for label, summary in scenarios.items():
+            verified = summary.get('verified_per_posting')
+            self.stdout.write(
+                f"{label:11} {summary['throughput']:9,.0f} postings/s  p50 {summary['latency_ms']['p50']:8.3f}ms  "
+                f"p99 {summary['latency_ms']['p99']:8.3f}ms  "
+                f"{f'verified/posting {verified:9,.1f}  ' if verified is not None else ''}matches {summary['matches']}"
+            )
+        self.stdout.write(
+            f"checking every search against every posting would take ~{brute_force_s:,.0f}s "
+            f"({per_posting * 1000:,.1f}ms per posting)"
+        )
+        if matched['rarest_key'] != matched['first_key']:
+            raise CommandError('The two indexes found different matches')
+        if options['output']:
+            config = {key: options[key] for key in ('searches', 'postings', 'seed')}
+            write_results(options['output'], scenarios, brute_force_estimated_s=round(brute_force_s, 1), **config)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _posting(self, rng, words, weights):
+        """(title, company_name, description, category, job_type, location) of a synthetic posting."""
+        description = rng.choices(words, weights=weights, k=rng.randint(40, 160))
+        description += rng.sample(seeding.SKILLS, 3)
+        return (
+            rng.choice(seeding.TITLES), rng.choice(seeding.COMPANIES), ' '.join(description),
+            rng.choice(seeding.CATEGORIES), rng.choice(seeding.JOB_TYPES), rng.choice(seeding.LOCATIONS),
+        )
+
+    def _search(self, rng, words):
+        """(query, category, job_type, location) of a synthetic saved search."""
+        # One or two words spread log-uniformly over the ranks past the 200 commonest,
+        # narrowed by a skill or a title now and then
+        terms = [words[int(math.exp(rng.uniform(math.log(200), math.log(len(words)))))]
+                 for _ in range(rng.choice((1, 1, 2)))]
+        if rng.random() < 0.4:
+            terms.append(rng.choice(seeding.SKILLS))
+        if rng.random() < 0.2:
+            terms.append(rng.choice(seeding.TITLES))
+        return (
+            ' '.join(terms),
+            rng.choice(seeding.CATEGORIES) if rng.random() < 0.3 else '',
+            rng.choice(seeding.JOB_TYPES) if rng.random() < 0.3 else '',
+            rng.choice(seeding.LOCATIONS) if rng.random() < 0.6 else '',
+        )
+
+    def _database(self, searches, keyed, frequencies, postings):
+        """Stores the searches and postings for scratch users and times match_jobs() on the postings."""
+        self._delete()
+        users = CustomUser.objects.bulk_create([
+            CustomUser(email=f'user{index}@{SCRATCH_DOMAIN}', password='!')
+            for index in range(len(searches) // USERS_PER_SEARCHES + 1)
+        ])
+        SavedSearch.objects.bulk_create([
+            SavedSearch(user=users[index // USERS_PER_SEARCHES], query=query, category=category, job_type=job_type,
+                        location=location, keys=keys, anchor=alerts.choose_anchor(keys, frequencies))
+            for index, ((query, category, job_type, location), keys) in enumerate(zip(searches, keyed))
+        ], batch_size=5000)
+        fields = ('title', 'company_name', 'description', 'category', 'job_type', 'location')
+        job_ids = [job.pk for job in Job.objects.bulk_create(
+            [Job(employer=users[0], **dict(zip(fields, posting))) for posting in postings], batch_size=2000,
+        )]
+        try:
+            latencies, matches = [], 0
+            started = time.perf_counter()
+            for start in range(0, len(job_ids), settings.ALERT_MATCH_BATCH):
+                t0 = time.perf_counter()
+                matches += alerts.match_jobs(job_ids[start:start + settings.ALERT_MATCH_BATCH])
+                latencies.append((time.perf_counter() - t0) * 1000)
+            elapsed = time.perf_counter() - started
+        finally:
+            self._delete()
+        summary = summarize(latencies, elapsed)
+        # Per posting, to compare with the in-memory runs
+        summary['throughput'] = round(len(job_ids) / elapsed, 2)
+        summary['matches'] = matches
+        summary['batches'] = len(latencies)
+        self.stdout.write(f"database: {len(job_ids)} postings in {len(latencies)} batches, "
+                          f"{statistics.fmean(latencies):,.0f}ms per batch")
+        return summary
+
+    def _delete(self):
+        """Removes the scratch rows in bulk, without per-row signals."""
+        user_ids = list(CustomUser.objects.filter(email__endswith=f'@{SCRATCH_DOMAIN}').values_list('pk', flat=True))
+        if not user_ids:
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            SavedSearchMatch.objects.filter(user_id__in=user_ids).delete()
+            SavedSearch.objects.filter(user_id__in=user_ids).delete()
+            cursor.execute("DELETE FROM jobs_job WHERE employer_id = ANY(%s::uuid[])", [user_ids])
+            CustomUser.objects.filter(pk__in=user_ids).delete()
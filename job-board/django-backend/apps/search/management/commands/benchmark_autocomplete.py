@@ -0,0 +1,106 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from apps.core import seeding
+from apps.core.benchmarking import summarize, write_results
+from apps.search import autocomplete
+
+LEVELS = ['Junior', 'Senior', 'Lead', 'Principal', 'Staff', 'Head of', 'Associate', 'Chief']
+SYLLABLES = ['ka', 'ri', 'mo', 'zu', 'te', 'lan', 'bo', 'sha', 'ni', 'vor', 'el', 'da', 'qui', 'ston', 'ma']
+
+
+class Command(BaseCommand):
+    help = (
+        "Build autocomplete indexes over a synthetic vocabulary (Zipf-distributed weights) and time "
+        "lookups in process and through the endpoint, served from this process only: the published "
+        "snapshot is left alone. Run with --settings=config.settings.benchmark so the endpoint is not throttled"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--terms', type=int, default=100000, help='Distinct terms per kind')
+        parser.add_argument('--queries', type=int, default=5000, help='Lookups to time per scenario')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['terms'] < 100 or options['queries'] < 1:
+            raise CommandError('--terms must be at least 100 and --queries positive')
+        rng = random.Random(options['seed'])
+        vocabulary = {kind: self._vocabulary(rng, kind, options['terms']) for kind in autocomplete.KINDS}
+
+        started = time.perf_counter()
+        indexes = {kind: autocomplete.PrefixIndex.build(weights) for kind, weights in vocabulary.items()}
+        build_s = time.perf_counter() - started
+        blob = autocomplete.dumps(indexes)
+        tracemalloc.start()
+        started = time.perf_counter()
+        indexes = autocomplete.loads(blob)
+        load_s = time.perf_counter() - started
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f"{options['terms']} terms per kind: built in {build_s:.2f}s, snapshot {len(blob) / 2 ** 20:.1f} MiB, "
+            f"loaded in {load_s:.2f}s using {memory / 2 ** 20:.0f} MiB"
+        )
+
+        # Prefixes of 1-6 characters of terms drawn by weight, as users type what is common
+        terms = [term for weights in vocabulary.values() for term in weights]
+        prefixes = []
+        for term in rng.choices(terms, weights=[1 / (rank % options['terms'] + 1) for rank in range(len(terms))],
+                                k=options['queries']):
+            prefixes.append(term[:rng.randint(1, min(6, len(term)))])
+
+        scenarios = {}
+        latencies = []
+        started = time.perf_counter()
+        for prefix in prefixes:
+            t0 = time.perf_counter()
+            for index in indexes.values():
+                index.lookup(prefix, 10)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        scenarios['lookup'] = summarize(latencies, time.perf_counter() - started)
+
+        # Serve the synthetic indexes from this process without a refresh during the run
+        autocomplete.snapshot.indexes = indexes
+        autocomplete.snapshot.checked = float('inf')
+        client, url = Client(), reverse('search-autocomplete')
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for prefix in prefixes:
+            t0 = time.perf_counter()
+            response = client.get(url, {'q': prefix})
+            latencies.append((time.perf_counter() - t0) * 1000)
+            errors += response.status_code != 200
+        scenarios['endpoint'] = summarize(latencies, time.perf_counter() - started, errors=errors)
+        autocomplete.snapshot.reset()
+
+        for label, summary in scenarios.items():
+            self.stdout.write(
+                f"{label:10} p50 {summary['latency_ms']['p50']:7.3f}ms  p95 {summary['latency_ms']['p95']:7.3f}ms  "
+                f"p99 {summary['latency_ms']['p99']:7.3f}ms  errors {summary['errors']}"
+            )
+        if options['output']:
+            write_results(options['output'], scenarios, terms=options['terms'], queries=options['queries'],
+                          seed=options['seed'], build_s=round(build_s, 3), load_s=round(load_s, 3),
+                          snapshot_bytes=len(blob), memory_bytes=memory)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _vocabulary(self, rng, kind, count):
+        """{term: weight} of `count` distinct terms with Zipf weights."""
+        terms = set()
+        while len(terms) < count:
+            word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+            if kind == 'title':
+                terms.add(f"{rng.choice(LEVELS)} {word} {rng.choice(seeding.TITLES)}")
+            elif kind == 'company':
+                terms.add(f"{word} {rng.choice(['Labs', 'Systems', 'Digital', 'Group', 'Tech', ''])}".strip())
+            else:
+                terms.add(f"{rng.choice(seeding.SKILLS)} {word.lower()}" if rng.random() < 0.5 else word.lower())
+        ordered = sorted(terms)
+        rng.shuffle(ordered)
+        return {term: max(1, int(100000 / (rank + 1))) for rank, term in enumerate(ordered)}
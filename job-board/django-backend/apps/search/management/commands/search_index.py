@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.backends import get_backend
+from apps.search.documents import get_document, get_documents
+from apps.search.indexing import alias_name, process_outbox, rebuild_index
+from apps.search.models import IndexOutbox
+
+
+class Command(BaseCommand):
+    help = "Manage the search indexes: rebuild with an alias swap, drain the outbox, or show status"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'process', 'status'])
+        parser.add_argument('indexes', nargs='*', help='Logical index names (default: all)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            documents = [get_document(name) for name in options['indexes']] or get_documents()
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        if options['action'] == 'rebuild':
+            for document in documents:
+                index, count = rebuild_index(document, chunk_size=options['chunk_size'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{alias_name(document)} -> {index} ({count} documents)"
+                ))
+
+        elif options['action'] == 'process':
+            processed = process_outbox()
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} outbox entries"))
+
+        else:
+            backend = get_backend()
+            for document in documents:
+                alias = alias_name(document)
+                pending = IndexOutbox.objects.filter(index=document.name).count()
+                targets = ', '.join(backend.get_alias(alias)) or 'not built'
+                self.stdout.write(f"- {alias}: {targets}; {pending} pending changes")
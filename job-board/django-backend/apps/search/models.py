@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+
+class IndexOutbox(models.Model):
+    """
+    Pending search index changes (transactional outbox).
+
+    Rows are written by signal handlers in the same transaction as the change
+    they describe and removed once a worker has shipped them to the index.
+    """
+    ACTION_CHOICES = (
+        ('index', 'Index'),
+        ('delete', 'Delete'),
+    )
+
+    index = models.CharField(max_length=50, help_text="Logical index name, e.g. 'profiles'.")
+    object_id = models.CharField(max_length=64)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='index')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Index outbox entry'
+        verbose_name_plural = 'Index outbox'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.action} {self.index}/{self.object_id}"
+
+
+class SavedSearch(models.Model):
+    """
+    A job seeker's saved job search, matched against new postings and
+    mailed as a digest (apps/search/alerts.py). All of its words and
+    filters must match.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=100, blank=True)
+    query = models.CharField(max_length=255, blank=True, help_text="Words every matching posting contains.")
+    category = models.CharField(max_length=100, blank=True)
+    job_type = models.CharField(max_length=20, blank=True)
+    location = models.CharField(max_length=255, blank=True, help_text="City, compared up to the first comma.")
+    is_active = models.BooleanField(default=True, help_text="Inactive searches send no alerts.")
+    # Derived on save (alerts.prepare): the search's required keys, and the one it is indexed under
+    keys = ArrayField(models.CharField(max_length=255), default=list, editable=False)
+    anchor = models.CharField(max_length=255, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Saved search'
+        verbose_name_plural = 'Saved searches'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['anchor'], condition=models.Q(is_active=True), name='search_saved_active_anchor_idx'),
+        ]
+
+    def __str__(self):
+        return self.name or self.query or f"Saved search {self.pk}"
+
+
+class SavedSearchMatch(models.Model):
+    """A new posting that matched a saved search, waiting for the user's next digest."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    search = models.ForeignKey(
+        SavedSearch,
+        on_delete=models.CASCADE,
+        related_name='matches',
+        db_index=False,  # covered by search_match_search_job_uniq
+    )
+    # jobs_job is partitioned, so the database cannot enforce this key
+    job = models.ForeignKey('jobs.Job', on_delete=models.CASCADE, related_name='+', db_constraint=False)
+    matched_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Saved search match'
+        verbose_name_plural = 'Saved search matches'
+        constraints = [
+            models.UniqueConstraint(fields=['search', 'job'], name='search_match_search_job_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.search_id} -> job {self.job_id}"
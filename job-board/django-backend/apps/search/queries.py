@@ -0,0 +1,13 @@
+from .backends import get_backend
+from .documents import get_document
+from .indexing import alias_name
+
+
+def search_ids(name, query, fields=None, size=10):
+    """
+    Ids of the best matches for `query` in the `name` index, best first.
+    Callers load the rows themselves so responses always reflect the database.
+    """
+    document = get_document(name)
+    hits = get_backend().search(alias_name(document), query, fields=fields, size=size)
+    return [hit['_id'] for hit in hits]
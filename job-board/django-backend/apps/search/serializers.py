@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from apps.jobs.models import Job
+
+from .models import SavedSearch
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    """A saved search; `keys` are what a new posting must have to be sent in the next digest."""
+    job_type = serializers.ChoiceField(choices=Job.JOB_TYPE_CHOICES, required=False, allow_blank=True)
+
+    class Meta:
+        model = SavedSearch
+        fields = ['id', 'name', 'query', 'category', 'job_type', 'location', 'is_active', 'keys', 'created_at']
+        read_only_fields = ['keys', 'created_at']
+
+    def validate(self, attrs):
+        values = {field: attrs.get(field, getattr(self.instance, field, '')) for field in
+                  ('query', 'category', 'job_type', 'location')}
+        if not any(value.strip() for value in values.values()):
+            raise serializers.ValidationError('Give words to search for or at least one filter.')
+        user = self.context['request'].user
+        if self.instance is None and user.saved_searches.count() >= settings.ALERT_MAX_SEARCHES_PER_USER:
+            raise serializers.ValidationError(
+                f'You can keep at most {settings.ALERT_MAX_SEARCHES_PER_USER} saved searches.'
+            )
+        return attrs
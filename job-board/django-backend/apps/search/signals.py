@@ -0,0 +1,118 @@
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.accounts.models import Profile
+from apps.accounts.signals import users_bulk_updated
+from apps.jobs.models import Job
+from apps.jobs.signals import jobs_bulk_saved
+
+from . import alerts, autocomplete
+from .documents import get_document, get_documents
+from .indexing import enqueue
+from .models import SavedSearch
+
+logger = logging.getLogger(__name__)
+
+
+def _connect(document):
+    def record_save(sender, instance, **kwargs):
+        enqueue(document, [document.get_id(instance)])
+
+    def record_delete(sender, instance, **kwargs):
+        enqueue(document, [document.get_id(instance)], action='delete')
+
+    post_save.connect(record_save, sender=document.model, weak=False,
+                      dispatch_uid=f'search.{document.name}.save')
+    post_delete.connect(record_delete, sender=document.model, weak=False,
+                        dispatch_uid=f'search.{document.name}.delete')
+
+
+for _document in get_documents():
+    _connect(_document)
+
+
+@receiver(users_bulk_updated)
+def reindex_bulk_updated_profiles(sender, user_ids, **kwargs):
+    enqueue(get_document('profiles'), user_ids)
+
+
+@receiver(jobs_bulk_saved, dispatch_uid='search.jobs_bulk_saved')
+def reindex_bulk_saved_jobs(sender, created, updated, previous, **kwargs):
+    ids = [*created, *updated]
+    enqueue(get_document('jobs'), ids)
+    before, after = Counter(), Counter()
+    for values in previous.values():
+        before.update(autocomplete.job_terms(*values))
+    for values in Job.objects.filter(pk__in=ids).values_list('title', 'company_name', 'is_active'):
+        after.update(autocomplete.job_terms(*values))
+    autocomplete.record(before, after)
+
+
+# Autocomplete weights: each model remembers the terms it contributed when
+# loaded, so a save records only the difference.
+AUTOCOMPLETE_FIELDS = {
+    Job: (('title', 'company_name', 'is_active'), autocomplete.job_terms),
+    Profile: (('company_name', 'skills'), autocomplete.profile_terms),
+}
+
+
+def _autocomplete_terms(instance):
+    fields, terms = AUTOCOMPLETE_FIELDS[type(instance)]
+    # Read from __dict__ so a deferred field is not fetched; None if one is missing
+    values = [instance.__dict__.get(field) for field in fields]
+    return None if None in values else terms(*values)
+
+
+@receiver(post_init, sender=Job, dispatch_uid='search.autocomplete.job_loaded')
+@receiver(post_init, sender=Profile, dispatch_uid='search.autocomplete.profile_loaded')
+def remember_autocomplete_terms(sender, instance, **kwargs):
+    instance._autocomplete_terms = _autocomplete_terms(instance) if instance.pk else Counter()
+
+
+@receiver(post_save, sender=Job, dispatch_uid='search.autocomplete.job_saved')
+@receiver(post_save, sender=Profile, dispatch_uid='search.autocomplete.profile_saved')
+def record_autocomplete_terms(sender, instance, created, **kwargs):
+    before = Counter() if created else instance._autocomplete_terms
+    after = _autocomplete_terms(instance)
+    if before is not None and after is not None:
+        autocomplete.record(before, after)
+    instance._autocomplete_terms = after
+
+
+@receiver(post_delete, sender=Job, dispatch_uid='search.autocomplete.job_deleted')
+@receiver(post_delete, sender=Profile, dispatch_uid='search.autocomplete.profile_deleted')
+def forget_autocomplete_terms(sender, instance, **kwargs):
+    if instance._autocomplete_terms:
+        autocomplete.record(instance._autocomplete_terms, Counter())
+
+
+# Saved-search alerts (apps/search/alerts.py)
+
+@receiver(pre_save, sender=SavedSearch, dispatch_uid='search.saved_search_prepared')
+def prepare_saved_search(sender, instance, **kwargs):
+    alerts.prepare(instance)
+
+
+def _queue_alerts(job_ids):
+    from .tasks import match_saved_searches
+    try:
+        match_saved_searches.add(*job_ids)
+    except Exception:
+        # Alerts are a convenience: never fail the commit that published the jobs
+        logger.warning('Could not queue %d jobs for saved-search alerts', len(job_ids), exc_info=True)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='search.alerts.job_saved')
+def queue_job_alerts(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        transaction.on_commit(lambda: _queue_alerts([instance.pk]))
+
+
+@receiver(jobs_bulk_saved, dispatch_uid='search.alerts.jobs_bulk_saved')
+def queue_bulk_job_alerts(sender, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: _queue_alerts(list(created)))
@@ -0,0 +1,53 @@
+from django.conf import settings
+
+from apps.core.batching import batched
+from apps.core.queues import BULK_QUEUE, DEFAULT_QUEUE, queued_task
+
+from . import alerts, autocomplete
+from .documents import get_document
+from .indexing import process_outbox, rebuild_index
+
+
+@batched('search.outbox', delay=1, unique=True)
+def outbox_trigger(items):
+    """
+    Coalesces "outbox has rows" notifications from many commits into one drain.
+    """
+    process_outbox()
+
+
+@queued_task(BULK_QUEUE)
+def process_search_outbox():
+    """Periodic safety net in case a trigger was lost."""
+    return process_outbox()
+
+
+@queued_task(BULK_QUEUE, soft_time_limit=3600, time_limit=3700)
+def rebuild_search_index(name):
+    index, count = rebuild_index(get_document(name))
+    return count
+
+
+@queued_task(DEFAULT_QUEUE)
+def publish_autocomplete():
+    """Publishes a new autocomplete snapshot if any weight changed."""
+    return autocomplete.publish()
+
+
+@queued_task(BULK_QUEUE, soft_time_limit=1800, time_limit=1900)
+def rebuild_autocomplete():
+    """Recounts the autocomplete weights from the database, repairing drift and bulk loads."""
+    autocomplete.rebuild_weights()
+    return autocomplete.publish(force=True)
+
+
+@batched('search.alerts', max_size=settings.ALERT_MATCH_BATCH, delay=10, unique=True)
+def match_saved_searches(job_ids):
+    """Matches new postings against the saved searches, a batch of postings at a time."""
+    alerts.match_jobs(job_ids)
+
+
+@queued_task(BULK_QUEUE, soft_time_limit=60 * 60)
+def send_alert_digests():
+    """Daily: mails each user the new postings matching their saved searches."""
+    return alerts.send_digests()
@@ -0,0 +1,231 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import CustomUser
+from apps.jobs.models import Job
+
+from . import alerts, autocomplete, indexing
+from .backends import InMemoryBackend
+from .documents import get_document
+from .indexing import alias_name, process_outbox, rebuild_index
+from .models import IndexOutbox, SavedSearch, SavedSearchMatch
+
+
+@override_settings(SEARCH_BACKEND='apps.search.backends.InMemoryBackend')
+class SearchIndexingTests(TestCase):
+    def setUp(self):
+        InMemoryBackend.reset()
+        indexing._known_aliases.clear()
+        self.backend = InMemoryBackend()
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.profile = self.recruiter.profile
+        self.profile.first_name = 'Ada'
+        self.profile.skills = 'python django postgres'
+        self.profile.save()
+
+    def test_changes_are_written_to_outbox(self):
+        """Saving a profile or a job records outbox rows in the same transaction."""
+        job = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='Django APIs')
+        self.assertTrue(IndexOutbox.objects.filter(index='profiles', object_id=str(self.recruiter.id)).exists())
+        self.assertTrue(IndexOutbox.objects.filter(index='jobs', object_id=str(job.id)).exists())
+
+    def test_process_outbox_ships_latest_state_in_bulk(self):
+        """The outbox drains into the index and repeated changes collapse."""
+        Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='Django APIs')
+        processed = process_outbox()
+        self.assertGreater(processed, 0)
+        self.assertFalse(IndexOutbox.objects.exists())
+
+        hits = self.backend.search(alias_name(get_document('jobs')), 'django')
+        self.assertEqual([hit['_source']['title'] for hit in hits], ['Backend Engineer'])
+        profile = self.backend.get(alias_name(get_document('profiles')), str(self.recruiter.id))
+        self.assertEqual(profile['skills'], 'python django postgres')
+
+    def test_inactive_and_deleted_jobs_leave_the_index(self):
+        job = Job.objects.create(employer=self.recruiter, title='Data Engineer', description='ETL')
+        other = Job.objects.create(employer=self.recruiter, title='Data Analyst', description='SQL')
+        process_outbox()
+        job.is_active = False
+        job.save()
+        other.delete()
+        process_outbox()
+        alias = alias_name(get_document('jobs'))
+        self.assertIsNone(self.backend.get(alias, str(job.id)))
+        self.assertIsNone(self.backend.get(alias, str(other.id)))
+
+    def test_backend_failure_keeps_rows(self):
+        """A failed bulk request leaves the outbox untouched for the next run."""
+        with mock.patch.object(InMemoryBackend, 'bulk', side_effect=RuntimeError('cluster down')):
+            with self.assertRaises(RuntimeError):
+                process_outbox()
+        self.assertTrue(IndexOutbox.objects.exists())
+
+    def test_rebuild_swaps_alias(self):
+        """A rebuild fills a new index, moves the alias and drops the old index."""
+        document = get_document('jobs')
+        Job.objects.create(employer=self.recruiter, title='Frontend Engineer', description='React')
+        process_outbox()
+        alias = alias_name(document)
+        [old_index] = self.backend.get_alias(alias)
+
+        new_index, count = rebuild_index(document)
+        self.assertEqual(count, 1)
+        self.assertEqual(self.backend.get_alias(alias), [new_index])
+        self.assertNotIn(old_index, InMemoryBackend.indexes)
+        self.assertEqual(len(self.backend.search(alias, 'react')), 1)
+
+    def test_changes_during_rebuild_reach_both_indexes(self):
+        document = get_document('jobs')
+        process_outbox()
+        cache.set('search:rebuild:jobs', 'jobboard-jobs-building', timeout=None)
+        self.addCleanup(cache.delete, 'search:rebuild:jobs')
+        self.backend.create_index('jobboard-jobs-building')
+
+        job = Job.objects.create(employer=self.recruiter, title='SRE', description='Kubernetes')
+        process_outbox()
+        self.assertIsNotNone(self.backend.get(alias_name(document), str(job.id)))
+        self.assertIsNotNone(self.backend.get('jobboard-jobs-building', str(job.id)))
+
+
+class AutocompleteTests(APITestCase):
+    def setUp(self):
+        redis = autocomplete._redis()
+        redis.delete(autocomplete.DIRTY_KEY, autocomplete.VERSION_KEY,
+                     *(autocomplete.weights_key(kind) for kind in autocomplete.KINDS))
+        autocomplete.snapshot.reset()
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+
+    def _weights(self, kind):
+        weights = autocomplete._redis().hgetall(autocomplete.weights_key(kind))
+        return {term.decode(): int(weight) for term, weight in weights.items() if int(weight)}
+
+    def test_weights_follow_changes(self):
+        """Saves and deletes adjust the weights by the terms they added or removed."""
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = self.recruiter.profile
+            profile.company_name, profile.skills = 'Savanna Labs', 'Python, Django'
+            profile.save()
+            job = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='APIs',
+                                     company_name='Savanna Labs')
+            other = Job.objects.create(employer=self.recruiter, title='Data Analyst', description='SQL')
+        self.assertEqual(self._weights('company'), {'Savanna Labs': 2})
+        self.assertEqual(self._weights('skill'), {'Python': 1, 'Django': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.get(pk=job.pk)
+            job.title = 'Platform Engineer'
+            job.save()
+            other.is_active = False
+            other.save()
+        self.assertEqual(self._weights('title'), {'Platform Engineer': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.delete()
+        self.assertEqual(self._weights('title'), {})
+        self.assertEqual(self._weights('company'), {'Savanna Labs': 1})
+
+    def test_prefix_index(self):
+        """Every word start matches, best first, whether the top terms are precomputed or ranked per lookup."""
+        weights = {'Backend Engineer': 5, 'backend engineer': 2, 'Engineering Manager': 6, 'Data Engineer': 3,
+                   'Ingénieur Logiciel': 1, 'Designer': 9}
+        for scan_limit in (1, 100):
+            index = autocomplete.PrefixIndex.build(weights, top_k=10, scan_limit=scan_limit)
+            self.assertEqual(index.lookup('eng', 10), ['Backend Engineer', 'Engineering Manager', 'Data Engineer'])
+            self.assertEqual(index.lookup('  ENGINEER  ', 2), ['Backend Engineer', 'Engineering Manager'])
+            self.assertEqual(index.lookup('data e', 10), ['Data Engineer'])
+            self.assertEqual(index.lookup('inge', 10), ['Ingénieur Logiciel'])
+            self.assertEqual(index.lookup('x', 10), [])
+        self.assertIn('e', autocomplete.PrefixIndex.build(weights, scan_limit=1).top)
+        restored = autocomplete.loads(autocomplete.dumps({'title': index}))['title']
+        self.assertEqual(restored.lookup('d', 10), ['Designer', 'Data Engineer'])
+
+    @override_settings(AUTOCOMPLETE_REFRESH_SECONDS=0)
+    def test_endpoint_answers_from_memory(self):
+        """Published snapshots are picked up by the endpoint, which never queries the database."""
+        url = reverse('search-autocomplete')
+        Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='APIs',
+                           company_name='Baobab Digital')
+        autocomplete.rebuild_weights()
+        self.assertIsNotNone(autocomplete.publish())
+        self.assertIsNone(autocomplete.publish())
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'ba'})
+        self.assertEqual(response.json(), {'title': ['Backend Engineer'], 'company': ['Baobab Digital'], 'skill': []})
+        self.assertIn('max-age', response['Cache-Control'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.create(employer=self.recruiter, title='Bar Manager', description='Drinks')
+        autocomplete.publish()
+        self.client.get(url, {'q': 'ba'})  # starts loading the new version
+        autocomplete.snapshot.wait()
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'ba', 'kind': 'title', 'limit': 1})
+        self.assertEqual(response.json(), {'title': ['Backend Engineer']})
+        self.assertEqual(self.client.get(url, {'q': 'bar', 'kind': 'title'}).json(), {'title': ['Bar Manager']})
+        self.assertEqual(self.client.get(url, {'q': 'ba', 'kind': 'salary'}).status_code, 400)
+
+
+class SavedSearchTests(APITestCase):
+    def setUp(self):
+        cache.delete(alerts.TERM_STATS_KEY)
+        self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+        self.seeker = CustomUser.objects.create_user(email='seeker@example.com', password='pass12345')
+
+    def _job(self, title, description, **fields):
+        return Job.objects.create(employer=self.recruiter, title=title, description=description,
+                                  location='Nairobi, Kenya', **fields)
+
+    def test_search_is_indexed_under_its_rarest_key(self):
+        self._job('Backend Engineer', 'Python and Django')
+        self._job('Data Engineer', 'Python and SQL')
+        cache.delete(alerts.TERM_STATS_KEY)
+        search = SavedSearch.objects.create(user=self.seeker, query='Python Django', location='Nairobi')
+        self.assertEqual(search.keys, ['django', 'python', 'location:nairobi'])
+        self.assertEqual(search.anchor, 'django')
+        self.assertEqual(SavedSearch.objects.create(user=self.seeker, query='the').anchor, alerts.MATCH_ALL)
+
+    def test_postings_match_searches_having_all_their_keys(self):
+        """Each match is stored once; closed and duplicate postings match nothing."""
+        django = SavedSearch.objects.create(user=self.seeker, query='django', location='Nairobi')
+        SavedSearch.objects.create(user=self.seeker, query='django', location='Mombasa')
+        SavedSearch.objects.create(user=self.seeker, query='django rust')
+        SavedSearch.objects.create(user=self.seeker, query='django', is_active=False)
+        job = self._job('Backend Engineer', 'Django APIs')
+        closed = self._job('Backend Engineer', 'Django APIs', is_active=False)
+        copy = self._job('Backend Engineer', 'Django APIs', duplicate_of=job)
+
+        self.assertEqual(alerts.match_jobs([job.pk, closed.pk, copy.pk]), 1)
+        alerts.match_jobs([job.pk])
+        self.assertEqual(list(SavedSearchMatch.objects.values_list('search', 'job')), [(django.pk, job.pk)])
+
+    def test_digest_is_mailed_once(self):
+        search = SavedSearch.objects.create(user=self.seeker, name='Django jobs', query='django')
+        job = self._job('Backend Engineer', 'Django APIs')
+        closed = self._job('Django Developer', 'Django admin')
+        alerts.match_jobs([job.pk, closed.pk])
+        closed.is_active = False
+        closed.save()
+
+        self.assertEqual(alerts.send_digests(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['seeker@example.com'])
+        self.assertIn('Backend Engineer', mail.outbox[0].body)
+        self.assertNotIn('Django Developer', mail.outbox[0].body)
+        self.assertFalse(SavedSearchMatch.objects.filter(search=search).exists())
+        self.assertEqual(alerts.send_digests(), 0)
+
+    def test_api_manages_own_searches(self):
+        url = reverse('saved-search-list')
+        SavedSearch.objects.create(user=self.recruiter, query='python')
+        self.client.force_authenticate(self.seeker)
+        response = self.client.post(url, {'name': 'Remote Django', 'query': 'Django', 'job_type': 'contract'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['keys'], ['django', 'type:contract'])
+        self.assertEqual(self.client.post(url, {'name': 'Anything'}).status_code, 400)
+        self.assertEqual([search['name'] for search in self.client.get(url).json()['results']], ['Remote Django'])
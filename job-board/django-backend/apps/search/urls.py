@@ -0,0 +1,12 @@
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from .views import AutocompleteView, SavedSearchViewSet
+
+router = SimpleRouter()
+router.register(r'saved', SavedSearchViewSet, basename='saved-search')
+
+urlpatterns = [
+    path('autocomplete/', AutocompleteView.as_view(), name='search-autocomplete'),
+    path('', include(router.urls)),
+]
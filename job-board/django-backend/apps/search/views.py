@@ -0,0 +1,64 @@
+from django.conf import settings
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core.pagination import CustomPageNumberPagination
+from apps.core.throttling import AutocompleteThrottle
+
+from . import autocomplete
+from .models import SavedSearch
+from .serializers import SavedSearchSerializer
+
+MAX_PREFIX_LENGTH = 100
+
+
+class AutocompleteView(APIView):
+    """
+    Search-as-you-type: `?q=` returns the commonest job titles, company
+    names and skills with a word starting with it, as {kind: [term, ...]}.
+    `kind` restricts the answer to one kind, `limit` shortens the lists.
+
+    Answered from the in-process prefix index (apps/search/autocomplete.py).
+    Nothing here authenticates, so nothing queries the database.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [AutocompleteThrottle]
+
+    def get(self, request):
+        params = request.query_params
+        kinds = autocomplete.KINDS
+        if params.get('kind'):
+            if params['kind'] not in autocomplete.KINDS:
+                raise ValidationError({'kind': f"Must be one of {', '.join(autocomplete.KINDS)}."})
+            kinds = (params['kind'],)
+        try:
+            limit = int(params.get('limit', settings.AUTOCOMPLETE_TOP_K))
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be positive.'})
+        response = Response(autocomplete.suggest(params.get('q', '')[:MAX_PREFIX_LENGTH], kinds, limit))
+        # The same for everyone, so shared caches may keep it too
+        response['Cache-Control'] = f'public, max-age={settings.AUTOCOMPLETE_CACHE_SECONDS}'
+        return response
+
+
+class SavedSearchViewSet(viewsets.ModelViewSet):
+    """
+    The caller's saved job searches. New postings having all of a search's
+    words and filters are mailed in a daily digest (apps/search/alerts.py);
+    `is_active=false` pauses a search.
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPageNumberPagination
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.stats import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the dashboard rollups from the source tables and report where they "
+        "differ from the stored ones; --fix overwrites them (also a backfill for new metrics). "
+        "Events committed while it runs can show up as small differences in the latest buckets"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('metrics', nargs='*', help='Metrics to check (default: all with a source)')
+        parser.add_argument('--fix', action='store_true', help='Replace differing metrics with the recomputed values')
+        parser.add_argument('--show', type=int, default=10, help='Differences to print per metric')
+
+    def handle(self, *args, **options):
+        metrics = options['metrics'] or list(rollups.SOURCES)
+        unknown = [metric for metric in metrics if metric not in rollups.METRICS]
+        if unknown:
+            raise CommandError(f"Unknown metrics: {', '.join(unknown)}")
+
+        # Stored rollups must include every event the source tables already do
+        rollups.flush_rollups()
+        drifted = []
+        for metric in metrics:
+            expected = rollups.compute(metric)
+            if expected is None:
+                self.stdout.write(f"{metric}: no source to recompute from, skipped")
+                continue
+            differences = rollups.differences(expected, rollups.stored(metric))
+            if not differences:
+                self.stdout.write(self.style.SUCCESS(f"{metric}: {len(expected)} rollups consistent"))
+                continue
+            drifted.append(metric)
+            self.stdout.write(self.style.WARNING(f"{metric}: {len(differences)} of {len(expected)} rollups differ"))
+            for (dimension, granularity, bucket), (want, have) in sorted(differences.items())[:options['show']]:
+                self.stdout.write(f"  {granularity:5} {bucket:%Y-%m-%d %H:%M} {dimension or '-':20} "
+                                  f"source {want}, rollup {have}")
+            if options['fix']:
+                rollups.replace(metric, expected)
+                self.stdout.write(self.style.SUCCESS(f"  replaced {metric}"))
+
+        if drifted and not options['fix']:
+            raise CommandError(f"Rollups differ from the source for: {', '.join(drifted)}")
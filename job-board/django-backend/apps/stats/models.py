@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class Rollup(models.Model):
+    """
+    One pre-aggregated counter: the value of `metric` for `dimension` (e.g. a
+    job id or a user type, '' for none) in the time bucket starting at
+    `bucket`. Totals use the 'total' granularity with a fixed bucket.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    WEEK = 'week'
+    TOTAL = 'total'
+    GRANULARITY_CHOICES = (
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),
+        (WEEK, 'Week'),
+        (TOTAL, 'Total'),
+    )
+
+    metric = models.CharField(max_length=50)
+    dimension = models.CharField(max_length=64, blank=True, default='')
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index every dashboard read goes through
+            models.UniqueConstraint(fields=['metric', 'granularity', 'dimension', 'bucket'],
+                                    name='stats_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.dimension}] {self.granularity} {self.bucket:%Y-%m-%d %H:%M} = {self.value}"
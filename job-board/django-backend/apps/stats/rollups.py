@@ -0,0 +1,223 @@
+"""
+Dashboard statistics kept as pre-aggregated rollups.
+
+Signals call record() with +1/-1 deltas. Once the transaction commits the
+deltas are added to a Redis hash, and flush_rollups, run periodically by
+apps.stats.tasks.flush_stats_rollups, adds them to stats_rollup with one
+INSERT ... ON CONFLICT DO UPDATE per chunk: a busy counter costs one row
+write per flush instead of one per event, and the API only reads
+stats_rollup. compute() recomputes a metric from its source table, which
+the check_stats command uses to find and repair drift.
+"""
+import datetime
+import logging
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .models import Rollup
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'stats:pending'
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+SERIES = (Rollup.HOUR, Rollup.DAY, Rollup.WEEK, Rollup.TOTAL)
+
+# metric -> granularities kept for it
+METRICS = {
+    'signups': SERIES,
+    'users_by_type': (Rollup.TOTAL,),
+    'jobs_posted': SERIES,
+    'applications': SERIES,
+    # Per job posting, the job id as dimension
+    'job_applications': (Rollup.DAY, Rollup.TOTAL),
+    'job_views': (Rollup.DAY, Rollup.TOTAL),
+}
+JOB_METRICS = ('job_applications', 'job_views')
+
+# metric -> (model, time field, dimension field) it can be recomputed from.
+# Views are only counted (apps/jobs/counters.py), so job_views has no source.
+SOURCES = {
+    'signups': ('accounts.CustomUser', 'date_joined', None),
+    'users_by_type': ('accounts.Profile', None, 'user_type'),
+    'jobs_posted': ('jobs.Job', 'created_at', None),
+    'applications': ('jobs.Application', 'submitted_at', None),
+    'job_applications': ('jobs.Application', 'submitted_at', 'job_id'),
+}
+
+
+def _redis():
+    return get_redis_connection('default')
+
+
+def bucket_start(when, granularity):
+    """Start of the UTC hour, day or week (from Monday) `when` falls in; EPOCH for totals."""
+    if granularity == Rollup.TOTAL:
+        return EPOCH
+    when = when.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == Rollup.HOUR:
+        return when
+    day = when.replace(hour=0)
+    if granularity == Rollup.DAY:
+        return day
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def _field(metric, dimension, granularity, bucket):
+    return f'{metric}|{dimension}|{granularity}|{int(bucket.timestamp())}'
+
+
+def _parse_field(field):
+    metric, rest = field.split('|', 1)
+    dimension, granularity, bucket = rest.rsplit('|', 2)
+    return metric, dimension, granularity, int(bucket)
+
+
+def record(metric, dimension='', when=None, delta=1):
+    """
+    Counts `delta` events of `metric` at `when` (default now) into every
+    granularity kept for it, once the current transaction commits.
+    """
+    record_many(metric, {dimension: delta}, when=when)
+
+
+def record_many(metric, deltas, when=None):
+    """Like record() for {dimension: delta}, in one Redis round trip."""
+    when = when or timezone.now()
+    buckets = [(granularity, bucket_start(when, granularity)) for granularity in METRICS[metric]]
+    fields = [
+        (_field(metric, str(dimension), granularity, bucket), delta)
+        for dimension, delta in deltas.items()
+        for granularity, bucket in buckets
+    ]
+    if fields:
+        transaction.on_commit(lambda: _buffer(metric, fields))
+
+
+def _buffer(metric, fields):
+    # Never fail the request that caused the event; check_stats repairs lost deltas
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        for field, delta in fields:
+            pipe.hincrby(PENDING_KEY, field, delta)
+        pipe.execute()
+    except Exception:
+        logger.exception('Could not buffer %d %s deltas', len(fields), metric)
+
+
+def _take_buffer():
+    pipe = _redis().pipeline(transaction=True)
+    pipe.hgetall(PENDING_KEY)
+    pipe.delete(PENDING_KEY)
+    pending, _ = pipe.execute()
+    return {field.decode(): int(delta) for field, delta in pending.items() if int(delta)}
+
+
+def _restore_buffer(pending):
+    # Deltas are additive, so putting them back is exact
+    pipe = _redis().pipeline(transaction=False)
+    for field, delta in pending.items():
+        pipe.hincrby(PENDING_KEY, field, delta)
+    pipe.execute()
+
+
+def _upsert_chunk(rows):
+    table = connection.ops.quote_name(Rollup._meta.db_table)
+    values = ', '.join(['(%s, %s, %s, to_timestamp(%s), %s)'] * len(rows))
+    params = [value for row in rows for value in row]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} AS r (metric, dimension, granularity, bucket, value) "
+            f"VALUES {values} "
+            f"ON CONFLICT (metric, granularity, dimension, bucket) "
+            f"DO UPDATE SET value = r.value + EXCLUDED.value",
+            params,
+        )
+
+
+def flush_rollups():
+    """
+    Adds the buffered deltas to the rollup table and returns the number of
+    rows touched. If the write fails the deltas are put back.
+    """
+    pending = _take_buffer()
+    if not pending:
+        return 0
+    # Sorted so concurrent flushes lock rows in the same order
+    rows = sorted((*_parse_field(field), delta) for field, delta in pending.items())
+    chunk_size = settings.STATS_FLUSH_CHUNK_SIZE
+    try:
+        with transaction.atomic():
+            for start in range(0, len(rows), chunk_size):
+                _upsert_chunk(rows[start:start + chunk_size])
+    except Exception:
+        _restore_buffer(pending)
+        logger.exception('Stats flush failed, %d deltas requeued', len(pending))
+        raise
+    return len(rows)
+
+
+def compute(metric):
+    """
+    Recomputes a metric from its source table as {(dimension, granularity,
+    bucket): value}, or returns None if it has no source.
+    """
+    if metric not in SOURCES:
+        return None
+    model_label, time_field, dimension_field = SOURCES[metric]
+    queryset = apps.get_model(model_label)._default_manager.order_by()
+    dimension = [dimension_field] if dimension_field else []
+    counts = Counter()
+    for granularity in METRICS[metric]:
+        if granularity == Rollup.TOTAL and not dimension:
+            # values() without fields would group by every column, i.e. one group per row
+            counts[('', granularity, EPOCH)] += queryset.count()
+            continue
+        if granularity == Rollup.TOTAL:
+            groups = queryset.values(*dimension)
+        else:
+            groups = queryset.annotate(
+                bucket=Trunc(time_field, granularity, tzinfo=datetime.timezone.utc),
+            ).values('bucket', *dimension)
+        for group in groups.annotate(value=Count('pk')):
+            key_dimension = str(group[dimension_field]) if dimension_field else ''
+            counts[(key_dimension, granularity, group.get('bucket', EPOCH))] += group['value']
+    return dict(counts)
+
+
+def stored(metric):
+    """The rollup rows of a metric in the shape compute() returns, without zeros."""
+    rows = Rollup.objects.filter(metric=metric).exclude(value=0)
+    return {
+        (dimension, granularity, bucket): value
+        for dimension, granularity, bucket, value
+        in rows.values_list('dimension', 'granularity', 'bucket', 'value')
+    }
+
+
+def differences(expected, actual):
+    """{key: (expected, actual)} for every rollup the two disagree on."""
+    return {
+        key: (expected.get(key, 0), actual.get(key, 0))
+        for key in expected.keys() | actual.keys()
+        if expected.get(key, 0) != actual.get(key, 0)
+    }
+
+
+def replace(metric, values):
+    """Overwrites the stored rollups of a metric with `values`."""
+    with transaction.atomic():
+        Rollup.objects.filter(metric=metric).delete()
+        Rollup.objects.bulk_create(
+            [
+                Rollup(metric=metric, dimension=dimension, granularity=granularity, bucket=bucket, value=value)
+                for (dimension, granularity, bucket), value in values.items()
+            ],
+            batch_size=settings.STATS_FLUSH_CHUNK_SIZE,
+        )
@@ -0,0 +1,81 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import CustomUser, Profile
+from apps.accounts.signals import users_bulk_updated
+from apps.jobs.models import Application, Job
+from apps.jobs.signals import jobs_bulk_saved
+
+from .rollups import record
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid='stats.user_saved')
+def count_signup(sender, instance, created, **kwargs):
+    if created:
+        record('signups', when=instance.date_joined)
+
+
+@receiver(post_delete, sender=CustomUser, dispatch_uid='stats.user_deleted')
+def uncount_signup(sender, instance, **kwargs):
+    record('signups', when=instance.date_joined, delta=-1)
+
+
+@receiver(post_init, sender=Profile, dispatch_uid='stats.profile_loaded')
+def remember_user_type(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred field is not fetched
+    instance._stats_user_type = instance.__dict__.get('user_type')
+
+
+@receiver(post_save, sender=Profile, dispatch_uid='stats.profile_saved')
+def count_user_type(sender, instance, created, **kwargs):
+    previous, current = instance._stats_user_type, instance.user_type
+    if created:
+        record('users_by_type', current)
+    elif previous is not None and previous != current:
+        record('users_by_type', previous, delta=-1)
+        record('users_by_type', current)
+    instance._stats_user_type = current
+
+
+@receiver(post_delete, sender=Profile, dispatch_uid='stats.profile_deleted')
+def uncount_user_type(sender, instance, **kwargs):
+    record('users_by_type', instance._stats_user_type or instance.user_type, delta=-1)
+
+
+@receiver(users_bulk_updated, dispatch_uid='stats.users_bulk_updated')
+def count_bulk_user_types(sender, changes, previous_user_types=None, **kwargs):
+    if 'user_type' not in changes:
+        return
+    for user_type, count in (previous_user_types or {}).items():
+        record('users_by_type', user_type, delta=-count)
+        record('users_by_type', changes['user_type'], delta=count)
+
+
+@receiver(post_save, sender=Job, dispatch_uid='stats.job_saved')
+def count_job(sender, instance, created, **kwargs):
+    if created:
+        record('jobs_posted', when=instance.created_at)
+
+
+@receiver(post_delete, sender=Job, dispatch_uid='stats.job_deleted')
+def uncount_job(sender, instance, **kwargs):
+    record('jobs_posted', when=instance.created_at, delta=-1)
+
+
+@receiver(jobs_bulk_saved, dispatch_uid='stats.jobs_bulk_saved')
+def count_bulk_jobs(sender, created, **kwargs):
+    if created:
+        record('jobs_posted', delta=len(created))
+
+
+@receiver(post_save, sender=Application, dispatch_uid='stats.application_saved')
+def count_application(sender, instance, created, **kwargs):
+    if created:
+        record('applications', when=instance.submitted_at)
+        record('job_applications', instance.job_id, when=instance.submitted_at)
+
+
+@receiver(post_delete, sender=Application, dispatch_uid='stats.application_deleted')
+def uncount_application(sender, instance, **kwargs):
+    record('applications', when=instance.submitted_at, delta=-1)
+    record('job_applications', instance.job_id, when=instance.submitted_at, delta=-1)
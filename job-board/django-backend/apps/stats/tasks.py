@@ -0,0 +1,9 @@
+from apps.core.queues import BULK_QUEUE, queued_task
+
+from .rollups import flush_rollups
+
+
+@queued_task(BULK_QUEUE)
+def flush_stats_rollups():
+    """Adds the buffered statistics deltas to the rollup table."""
+    return flush_rollups()
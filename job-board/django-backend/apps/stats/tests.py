@@ -0,0 +1,93 @@
+import datetime
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.accounts.bulk import apply_user_changes
+from apps.accounts.models import CustomUser
+from apps.jobs.models import Application, Job
+
+from . import rollups
+from .models import Rollup
+
+
+def _value(metric, dimension='', granularity=Rollup.TOTAL, bucket=rollups.EPOCH):
+    row = Rollup.objects.filter(metric=metric, dimension=dimension, granularity=granularity, bucket=bucket).first()
+    return row.value if row else 0
+
+
+class StatsTests(APITestCase):
+    def setUp(self):
+        rollups._redis().delete(rollups.PENDING_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recruiter = CustomUser.objects.create_user(email='recruiter@example.com', password='pass12345')
+            self.recruiter.profile.user_type = 'recruiter'
+            self.recruiter.profile.save()
+            self.seeker = CustomUser.objects.create_user(email='seeker@example.com', password='pass12345')
+            self.job = Job.objects.create(employer=self.recruiter, title='Backend Engineer', description='Django')
+            self.application = Application.objects.create(job=self.job, applicant=self.seeker)
+        rollups.flush_rollups()
+
+    def test_events_are_rolled_up(self):
+        """Signups, user types, postings and applications land in every granularity after a flush."""
+        joined = self.seeker.date_joined
+        self.assertEqual(_value('signups'), 2)
+        self.assertEqual(_value('signups', granularity=Rollup.DAY, bucket=rollups.bucket_start(joined, Rollup.DAY)), 2)
+        self.assertEqual(_value('signups', granularity=Rollup.WEEK, bucket=rollups.bucket_start(joined, Rollup.WEEK)), 2)
+        self.assertEqual(_value('users_by_type', 'recruiter'), 1)
+        self.assertEqual(_value('users_by_type', 'job_seeker'), 1)
+        self.assertEqual(_value('jobs_posted'), 1)
+        self.assertEqual(_value('job_applications', str(self.job.id)), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.application.delete()
+            apply_user_changes([self.seeker.id], user_type='recruiter')
+        rollups.flush_rollups()
+        self.assertEqual(_value('applications'), 0)
+        self.assertEqual(_value('users_by_type', 'recruiter'), 2)
+        self.assertEqual(_value('users_by_type', 'job_seeker'), 0)
+
+    def test_bucket_start(self):
+        when = datetime.datetime(2026, 10, 22, 15, 42, tzinfo=datetime.timezone.utc)  # a Thursday
+        self.assertEqual(rollups.bucket_start(when, Rollup.HOUR), when.replace(minute=0))
+        self.assertEqual(rollups.bucket_start(when, Rollup.DAY), when.replace(hour=0, minute=0))
+        self.assertEqual(rollups.bucket_start(when, Rollup.WEEK), datetime.datetime(2026, 10, 19, tzinfo=datetime.timezone.utc))
+
+    def test_check_stats_repairs_drift(self):
+        """The consistency check fails on drifted rollups and --fix rewrites them from the source."""
+        call_command('check_stats', stdout=StringIO())
+        Rollup.objects.filter(metric='signups', granularity=Rollup.TOTAL).update(value=7)
+        with self.assertRaises(CommandError):
+            call_command('check_stats', stdout=StringIO())
+        call_command('check_stats', '--fix', stdout=StringIO())
+        self.assertEqual(_value('signups'), 2)
+        call_command('check_stats', stdout=StringIO())
+
+    def test_series_reads_contiguous_buckets(self):
+        admin = CustomUser.objects.create_user(email='admin@example.com', password='pass12345', is_staff=True)
+        self.client.force_authenticate(admin)
+        today = rollups.bucket_start(self.seeker.date_joined, Rollup.DAY)
+        response = self.client.get(reverse('stats-series'), {
+            'metric': 'signups', 'granularity': 'day',
+            'since': (today - datetime.timedelta(days=2)).isoformat(), 'until': today.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([point['value'] for point in response.data['points']], [0, 0, 2])
+
+        response = self.client.get(reverse('stats-summary'))
+        self.assertEqual(response.data['signups'], 2)
+        self.assertEqual(response.data['users_by_type'], {'recruiter': 1, 'job_seeker': 1})
+
+    def test_recruiters_only_see_their_own_postings(self):
+        other = Job.objects.create(employer=self.seeker, title='Other', description='Other')
+        self.client.force_authenticate(self.recruiter)
+        url = reverse('stats-series')
+        self.assertEqual(self.client.get(url, {'metric': 'signups'}).status_code, 403)
+        self.assertEqual(self.client.get(url, {'metric': 'job_applications', 'dimension': other.id}).status_code, 403)
+        response = self.client.get(url, {'metric': 'job_applications', 'dimension': self.job.id})
+        self.assertEqual(response.data['points'][-1]['value'], 1)
+
+        response = self.client.get(reverse('stats-jobs'))
+        self.assertEqual(response.data, [{'job': self.job.id, 'applications': 1, 'views': 0}])
@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .views import StatsViewSet
+
+router = SimpleRouter()
+router.register(r'', StatsViewSet, basename='stats')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
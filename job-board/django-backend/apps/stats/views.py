@@ -0,0 +1,129 @@
+import datetime
+
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.throttling import UserRateThrottle
+
+from apps.accounts.permissions import IsRecruiter
+from apps.jobs.models import Job
+
+from .models import Rollup
+from .rollups import EPOCH, JOB_METRICS, METRICS, bucket_start
+
+STEPS = {
+    Rollup.HOUR: datetime.timedelta(hours=1),
+    Rollup.DAY: datetime.timedelta(days=1),
+    Rollup.WEEK: datetime.timedelta(weeks=1),
+}
+# Points returned when `since` is not given, and the most a series may span
+DEFAULT_POINTS = {Rollup.HOUR: 48, Rollup.DAY: 30, Rollup.WEEK: 26}
+MAX_POINTS = 1000
+
+
+def _parse_time(value, name):
+    parsed = parse_datetime(value)
+    if parsed is None and parse_date(value) is not None:
+        parsed = datetime.datetime.combine(parse_date(value), datetime.time())
+    if parsed is None:
+        raise ValidationError({name: 'Expected an ISO 8601 date or datetime.'})
+    return parsed if timezone.is_aware(parsed) else parsed.replace(tzinfo=datetime.timezone.utc)
+
+
+class StatsViewSet(viewsets.ViewSet):
+    """
+    Dashboard statistics, read only from the rollup table (apps/stats/rollups.py),
+    so figures lag the source tables by up to one flush interval.
+
+    `summary` and most series are staff-only; recruiters may read the per-job
+    series and totals of their own postings.
+    """
+    throttle_classes = [UserRateThrottle]
+
+    def get_permissions(self):
+        if self.action == 'summary':
+            return [IsAdminUser()]
+        if self.action == 'jobs':
+            return [IsRecruiter()]
+        return [IsAuthenticated()]
+
+    @action(detail=False)
+    def summary(self, request):
+        """Totals of every metric, with users broken down by type."""
+        rows = Rollup.objects.filter(granularity=Rollup.TOTAL, bucket=EPOCH).exclude(metric__in=JOB_METRICS)
+        data = {'users_by_type': {}}
+        for metric, dimension, value in rows.values_list('metric', 'dimension', 'value'):
+            if metric == 'users_by_type':
+                data['users_by_type'][dimension] = value
+            else:
+                data[metric] = value
+        return Response(data)
+
+    @action(detail=False)
+    def series(self, request):
+        """
+        `?metric=signups&granularity=day&since=&until=` as contiguous buckets,
+        zeros included. Per-job metrics take the job id as `dimension`.
+        """
+        params = request.query_params
+        metric = params.get('metric', '')
+        granularity = params.get('granularity', Rollup.DAY)
+        dimension = params.get('dimension', '')
+        if granularity not in STEPS or granularity not in METRICS.get(metric, ()):
+            raise ValidationError({'granularity': f'No {granularity} series for metric {metric!r}.'})
+        if metric in JOB_METRICS:
+            self._check_job_access(request, dimension)
+        elif not request.user.is_staff:
+            raise PermissionDenied()
+
+        step = STEPS[granularity]
+        until = bucket_start(_parse_time(params['until'], 'until') if 'until' in params else timezone.now(), granularity)
+        if 'since' in params:
+            since = bucket_start(_parse_time(params['since'], 'since'), granularity)
+        else:
+            since = until - step * (DEFAULT_POINTS[granularity] - 1)
+        if since > until or (until - since) / step >= MAX_POINTS:
+            raise ValidationError({'since': f'A series spans 1 to {MAX_POINTS} buckets.'})
+
+        values = dict(Rollup.objects.filter(
+            metric=metric, granularity=granularity, dimension=dimension, bucket__range=(since, until),
+        ).values_list('bucket', 'value'))
+        points = []
+        bucket = since
+        while bucket <= until:
+            points.append({'bucket': bucket, 'value': values.get(bucket, 0)})
+            bucket += step
+        return Response({'metric': metric, 'dimension': dimension, 'granularity': granularity, 'points': points})
+
+    @action(detail=False)
+    def jobs(self, request):
+        """Applications and views so far of the recruiter's postings that have any."""
+        job_ids = Job.objects.filter(employer=request.user).annotate(
+            key=Cast('pk', CharField()),
+        ).values('key')
+        totals = {}
+        rows = Rollup.objects.filter(
+            metric__in=JOB_METRICS, granularity=Rollup.TOTAL, bucket=EPOCH, dimension__in=job_ids,
+        )
+        for metric, dimension, value in rows.values_list('metric', 'dimension', 'value'):
+            totals.setdefault(dimension, {})[metric] = value
+        return Response([
+            {
+                'job': int(dimension),
+                'applications': values.get('job_applications', 0),
+                'views': values.get('job_views', 0),
+            }
+            for dimension, values in sorted(totals.items(), key=lambda item: int(item[0]))
+        ])
+
+    def _check_job_access(self, request, job_id):
+        if not job_id.isdigit():
+            raise ValidationError({'dimension': 'Per-job metrics need a job id.'})
+        if not request.user.is_staff and not Job.objects.filter(pk=job_id, employer=request.user).exists():
+            raise PermissionDenied()
@@ -0,0 +1,48 @@
+"""
+Micro-benchmarks of the main API endpoints, run in-process against the
+seeded test database:
+
+    cd benchmarks && pytest --benchmark-json=results.json
+"""
+import pytest
+
+from apps.core import seeding
+
+pytestmark = pytest.mark.django_db
+
+
+def test_register(client, measure, unique_emails):
+    def register():
+        password = seeding.SEED_PASSWORD
+        return client.post('/api/accounts/users/register/', {
+            'email': unique_emails(), 'password': password, 'password_confirm': password,
+        }, format='json')
+    measure(register, expected_status=201)
+
+
+def test_login(client, measure):
+    measure(lambda: client.post('/api/accounts/auth/login/', {
+        'email': seeding.seed_email(1), 'password': seeding.SEED_PASSWORD,
+    }, format='json'))
+
+
+def test_users_me(user_client, measure):
+    measure(lambda: user_client.get('/api/accounts/users/me/'))
+
+
+def test_profile_patch(user_client, measure):
+    measure(lambda: user_client.patch('/api/accounts/profiles/me/', {'bio': 'Benchmark bio'}, format='json'))
+
+
+@pytest.mark.parametrize('page', [1, 50])
+def test_user_list(admin_client, measure, page):
+    measure(lambda: admin_client.get('/api/accounts/users/', {'page': page}))
+
+
+@pytest.mark.parametrize('query', ['django', 'remote engineer'])
+def test_job_search(client, measure, query):
+    measure(lambda: client.get('/api/jobs/', {'q': query}))
+
+
+def test_job_list(client, measure):
+    measure(lambda: client.get('/api/jobs/', {'category': 'Engineering'}))
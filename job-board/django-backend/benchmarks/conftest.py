@@ -0,0 +1,86 @@
+"""
+Fixtures for the pytest-benchmark suite. Data is seeded once per session
+with the deterministic seeder, so runs on different commits are comparable.
+
+Sizes can be raised with BENCH_USERS / BENCH_JOBS; BENCH_SEARCH_BACKEND
+selects the search backend (in-memory by default, no Elasticsearch needed).
+"""
+import itertools
+import os
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.core import seeding
+
+BENCH_USERS = int(os.getenv('BENCH_USERS', 2000))
+BENCH_JOBS = int(os.getenv('BENCH_JOBS', 5000))
+BENCH_SEARCH_BACKEND = os.getenv('BENCH_SEARCH_BACKEND', 'apps.search.backends.InMemoryBackend')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def search_backend():
+    with override_settings(SEARCH_BACKEND=BENCH_SEARCH_BACKEND):
+        yield
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker, search_backend):
+    from apps.search.documents import get_document
+    from apps.search.indexing import rebuild_index
+
+    with django_db_blocker.unblock():
+        seeding.ensure_seed_admin()
+        seeding.seed_users(BENCH_USERS)
+        seeding.seed_jobs(BENCH_JOBS, users=BENCH_USERS)
+        rebuild_index(get_document('jobs'))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+
+@pytest.fixture
+def client(db):
+    return APIClient()
+
+
+def _authenticated(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+@pytest.fixture
+def user_client(db):
+    from apps.accounts.models import CustomUser
+    return _authenticated(CustomUser.objects.get(email=seeding.seed_email(1)))
+
+
+@pytest.fixture
+def admin_client(db):
+    from apps.accounts.models import CustomUser
+    return _authenticated(CustomUser.objects.get(email=seeding.SEED_ADMIN_EMAIL))
+
+
+@pytest.fixture
+def unique_emails():
+    counter = itertools.count()
+    return lambda: f'bench-{next(counter)}@{seeding.SEED_EMAIL_DOMAIN}'
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmarks `request()` and records its SQL query count in extra_info,
+    where `benchmark_compare` picks it up. Asserts the response succeeded.
+    """
+    def run(request, expected_status=200):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        assert response.status_code == expected_status, response.content
+        benchmark.extra_info['queries'] = len(queries.captured_queries)
+        return benchmark(request)
+    return run
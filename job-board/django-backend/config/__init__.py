@@ -1,5 +1,12 @@
-# This will make sure the app is always imported when
-# Django starts so that shared_task will use this app.
-from .celery import app as celery_app
+# The Celery app is loaded on first use rather than with Django: web workers
+# that never enqueue a task skip importing Celery altogether. Task modules
+# load it through apps.core.queues.queued_task, and `celery -A config` finds
+# it as config.celery.
+def __getattr__(name):
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ('celery_app',)
\ No newline at end of file
+
+__all__ = ('celery_app',)
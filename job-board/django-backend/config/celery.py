@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_init
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
@@ -13,6 +14,15 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
 
+@celeryd_init.connect
+def configure_worker_queues(sender=None, conf=None, options=None, **kwargs):
+    """
+    Applies the per-queue tuning from TASK_QUEUE_PROFILES to a worker
+    started with -Q, e.g. `celery -A config worker -Q bulk`.
+    """
+    from apps.core.queues import worker_overrides
+    conf.update(worker_overrides((options or {}).get('queues')))
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -0,0 +1,17 @@
+# Gunicorn server hooks; the other options are passed on the command line
+# (see docker/supervisor/supervisord.conf).
+
+
+def when_ready(server):
+    """With --preload, warms up the master once; forked workers inherit the result."""
+    if server.cfg.preload_app:
+        from apps.core.warmup import PRE_FORK, run_warmup
+        run_warmup(PRE_FORK)
+
+
+def post_worker_init(worker):
+    """Opens connections and sends the synthetic requests before the worker accepts traffic."""
+    from apps.core.warmup import POST_FORK, PRE_FORK, run_warmup
+    if not worker.cfg.preload_app:
+        run_warmup(PRE_FORK)
+    run_warmup(POST_FORK)
@@ -22,6 +22,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -30,23 +31,31 @@ THIRD_PARTY_APPS = [
     "corsheaders",
     "django_ratelimit",
     "django_rest_passwordreset",
+    "channels",
+    "graphene_django",
 ]
 
 LOCAL_APPS = [
     "apps.accounts",
     "apps.jobs",
     "apps.core",
+    "apps.search",
+    "apps.stats",
+    "apps.notifications",
+    "apps.graphql_api",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "apps.core.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.accounts.middleware.ActivityMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -71,6 +80,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+AUTH_USER_MODEL = "accounts.CustomUser"
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -121,13 +132,18 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "job_search": "100/hour",
         "applications": "10/day",
+        "autocomplete": "600/minute",
+        "exports": "30/hour",
+        "login": "5/minute",
+        "user": "1000/hour",
     }
 }
 
 # Cache Configuration
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        # django_redis RedisCache that also reports to the request profiler
+        'BACKEND': 'apps.core.profiling.TimedRedisCache',
         'LOCATION': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
@@ -139,6 +155,8 @@ CACHES = {
 
 # Rate Limiting Configuration
 RATELIMIT_CACHE_BACKEND = 'default'
+# TimedRedisCache is django_redis' RedisCache with timing, which django_ratelimit supports
+SILENCED_SYSTEM_CHECKS = ['django_ratelimit.W001']
 RATELIMIT_RATE = '5/m'  # Default rate limit for all views
 
 # Celery Configuration
@@ -148,6 +166,145 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+# Results are only kept for tasks declared with ignore_result=False
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_RESULT_EXPIRES = timedelta(hours=1)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'config.celery.debug_task': {'queue': 'default'},
+    'apps.core.tasks.flush_batch': {'queue': 'bulk'},
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 4
+
+CELERY_BEAT_SCHEDULE = {
+    'search-outbox-drain': {
+        'task': 'apps.search.tasks.process_search_outbox',
+        'schedule': 60.0,
+    },
+    'accounts-activity-flush': {
+        'task': 'apps.accounts.tasks.flush_user_activity',
+        'schedule': 60.0,
+    },
+    'accounts-token-blacklist-purge': {
+        'task': 'apps.accounts.tasks.purge_token_blacklist',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'accounts-resume-extraction': {
+        'task': 'apps.accounts.tasks.extract_pending_resumes',
+        'schedule': 60.0 * 10,
+    },
+    'jobs-counters-flush': {
+        'task': 'apps.jobs.tasks.flush_job_counters',
+        'schedule': 30.0,
+    },
+    'jobs-partition-maintenance': {
+        'task': 'apps.jobs.tasks.maintain_job_partitions',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'stats-rollup-flush': {
+        'task': 'apps.stats.tasks.flush_stats_rollups',
+        'schedule': 30.0,
+    },
+    'search-autocomplete-publish': {
+        'task': 'apps.search.tasks.publish_autocomplete',
+        'schedule': 60.0,
+    },
+    'search-autocomplete-rebuild': {
+        'task': 'apps.search.tasks.rebuild_autocomplete',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'jobs-duplicate-clustering': {
+        'task': 'apps.jobs.tasks.cluster_duplicate_jobs',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'search-alert-digests': {
+        'task': 'apps.search.tasks.send_alert_digests',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'core-exports-purge': {
+        'task': 'apps.core.tasks.purge_export_files',
+        'schedule': 60.0 * 60,
+    },
+}
+
+# Per-queue tuning (see apps/core/queues.py). Prefetch is applied to workers
+# started with -Q, ack-late to tasks declared with apps.core.queues.queued_task.
+TASK_QUEUE_PROFILES = {
+    'realtime': {'prefetch_multiplier': 1, 'acks_late': True},
+    'default': {'prefetch_multiplier': 4, 'acks_late': True},
+    'bulk': {'prefetch_multiplier': 16, 'acks_late': False},
+}
+
+# Search (apps/search). Writes go through the outbox table; the live index
+# is an alias so rebuilds can swap to a new index without downtime.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'apps.search.backends.ElasticsearchBackend')
+ELASTICSEARCH_URL = os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')
+SEARCH_INDEX_PREFIX = os.getenv('ELASTICSEARCH_INDEX_PREFIX', 'jobboard')
+SEARCH_OUTBOX_BATCH_SIZE = int(os.getenv('SEARCH_OUTBOX_BATCH_SIZE', 500))
+# Upper bound on the matches a job search request pages through
+JOB_SEARCH_MAX_RESULTS = int(os.getenv('JOB_SEARCH_MAX_RESULTS', 200))
+
+# Saved-search alerts (apps/search/alerts.py). New jobs are matched
+# ALERT_MATCH_BATCH at a time; searches are indexed under their rarest key by
+# the frequencies in the ALERT_TERM_SAMPLE latest jobs, recounted every
+# ALERT_TERM_STATS_SECONDS. The daily digest lists at most
+# ALERT_DIGEST_MAX_JOBS jobs and is built for ALERT_DIGEST_CHUNK users at a time.
+ALERT_MATCH_BATCH = 500
+ALERT_TERM_SAMPLE = 2000
+ALERT_TERM_STATS_SECONDS = 60 * 60 * 24
+ALERT_MAX_SEARCHES_PER_USER = 20
+ALERT_DIGEST_MAX_JOBS = 20
+ALERT_DIGEST_CHUNK = 500
+ALERT_DIGEST_SUBJECT = 'New jobs for your saved searches'
+ALERT_DIGEST_TEMPLATE = 'saved_search_digest.html'
+ALERT_JOB_URL = os.getenv('ALERT_JOB_URL', 'http://localhost:3000/jobs/')
+
+# Autocomplete (apps/search/autocomplete.py). Processes look for a newly
+# published snapshot at most every AUTOCOMPLETE_REFRESH_SECONDS; prefixes
+# matching more than AUTOCOMPLETE_SCAN_LIMIT keys have their top terms
+# precomputed, shorter runs are ranked per lookup.
+AUTOCOMPLETE_TOP_K = int(os.getenv('AUTOCOMPLETE_TOP_K', 10))
+AUTOCOMPLETE_SCAN_LIMIT = int(os.getenv('AUTOCOMPLETE_SCAN_LIMIT', 64))
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', 10))
+AUTOCOMPLETE_CACHE_SECONDS = int(os.getenv('AUTOCOMPLETE_CACHE_SECONDS', 60))
+
+# Geo search (apps/core/geo.py). Radius and bounding-box filters first select
+# rows by at most GEO_COVER_MAX_CELLS geohash prefixes, then by exact distance.
+GEOCODER = os.getenv('GEOCODER', 'apps.core.geo.GazetteerGeocoder')
+GEO_COVER_MAX_CELLS = int(os.getenv('GEO_COVER_MAX_CELLS', 16))
+GEO_DEFAULT_RADIUS_KM = float(os.getenv('GEO_DEFAULT_RADIUS_KM', 25))
+GEO_MAX_RADIUS_KM = float(os.getenv('GEO_MAX_RADIUS_KM', 500))
+
+# Worker boot budget enforced by the startup regression test (apps/core/tests.py)
+STARTUP_TIME_BUDGET_MS = int(os.getenv('STARTUP_TIME_BUDGET_MS', 2000))
+
+# Worker warm-up (apps/core/warmup.py), run from the gunicorn hooks in
+# config/gunicorn.conf.py. Endpoints flagged `authenticated` are sent with a
+# token for a non-existent user, so they answer 401 after authenticating.
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+WARMUP_HOST = os.getenv('WARMUP_HOST', '')
+WARMUP_ENDPOINTS = [
+    {'path': '/health/'},
+    {'path': '/api/jobs/'},
+    {'path': '/api/accounts/users/me/', 'authenticated': True},
+    {'path': '/api/accounts/profiles/me/', 'authenticated': True},
+]
+WARMUP_SERIALIZERS = [
+    'apps.accounts.serializers.CustomUserSerializer',
+    'apps.accounts.serializers.ProfileSerializer',
+    'apps.accounts.serializers.UserRegistrationSerializer',
+    'apps.jobs.serializers.JobSerializer',
+]
+
+# Request profiling (apps/core/profiling.py), off unless PROFILING_ENABLED.
+# Profiles a random fraction of requests plus every request slower than
+# PROFILING_SLOW_MS (0 disables), sampling stacks every PROFILING_INTERVAL_MS.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.01))
+PROFILING_SLOW_MS = float(os.getenv('PROFILING_SLOW_MS', 1000))
+PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', 5))
+PROFILING_MAX_STORED = int(os.getenv('PROFILING_MAX_STORED', 500))
+PROFILING_TTL = 60 * 60 * 24 * 7
 
 # JWT Configuration
 SIMPLE_JWT = {
@@ -157,8 +314,126 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.tokens.RevocationAwareTokenRefreshSerializer',
+    # Logins are buffered by this serializer instead (apps/accounts/activity.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.accounts.tokens.ActivityTrackingTokenObtainPairSerializer',
+    'UPDATE_LAST_LOGIN': False,
+}
+
+# Refresh token blacklist (apps/accounts/blacklist.py). Entries expire with
+# their token. The optional Bloom filter answers most "not blacklisted"
+# lookups from a compact bitmap per refresh lifetime; it is consulted for
+# tokens issued after it was switched on.
+TOKEN_BLACKLIST_BLOOM = os.getenv('TOKEN_BLACKLIST_BLOOM', 'False').lower() == 'true'
+TOKEN_BLACKLIST_BLOOM_CAPACITY = int(os.getenv('TOKEN_BLACKLIST_BLOOM_CAPACITY', 10_000_000))  # per lifetime
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = float(os.getenv('TOKEN_BLACKLIST_BLOOM_ERROR_RATE', 0.001))
+
+# Permission checks (apps/accounts/backends.py): each user's effective
+# permissions are cached for PERMISSION_CACHE_SECONDS and read with the version
+# tokens that invalidate them in one round trip.
+AUTHENTICATION_BACKENDS = ['apps.accounts.backends.CachedPermissionBackend']
+PERMISSION_CACHE_SECONDS = int(os.getenv('PERMISSION_CACHE_SECONDS', 60 * 60))
+
+# Activity tracking (apps/accounts/activity.py): last_login / last_seen are
+# buffered in Redis and flushed in bulk by the accounts-activity-flush task.
+ACTIVITY_SEEN_RESOLUTION = int(os.getenv('ACTIVITY_SEEN_RESOLUTION', 60))  # seconds
+ACTIVITY_SEEN_MEMORY = 50000  # users remembered per process for the above
+ACTIVITY_FLUSH_CHUNK_SIZE = 1000
+
+# Bulk account operations (apps/accounts/bulk.py): selections above the sync
+# limit run as a background job with pollable progress.
+BULK_USER_CHUNK_SIZE = 5000
+BULK_USER_SYNC_LIMIT = 5000
+
+# Resume text extraction and candidate search (apps/accounts/resumes.py). New
+# files are parsed by up to RESUME_EXTRACTION_WORKERS subprocesses at a time,
+# each file given RESUME_EXTRACTION_TIMEOUT seconds; text beyond RESUME_MAX_CHARS is
+# dropped (a tsvector holds at most 1 MiB).
+RESUME_EXTRACTION_WORKERS = int(os.getenv('RESUME_EXTRACTION_WORKERS', 4))
+RESUME_EXTRACTION_TIMEOUT = int(os.getenv('RESUME_EXTRACTION_TIMEOUT', 30))  # seconds
+RESUME_EXTRACTION_BATCH = 50  # profiles per run of the extract_pending_resumes task
+RESUME_MAX_BYTES = 10 * 1024 * 1024
+RESUME_MAX_PAGES = 30
+RESUME_MAX_CHARS = 200_000
+RESUME_SEARCH_CONFIG = 'english'
+RESUME_SNIPPET_WORDS = 30
+
+# WebSocket notifications (apps/notifications), served by daphne from
+# config/asgi.py. The pub/sub layer sends a group message with one PUBLISH
+# however many sockets are in the group.
+ASGI_APPLICATION = 'config.asgi.application'
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {'hosts': [os.getenv('REDIS_URL', 'redis://localhost:6379/0')]},
+    },
 }
 
+# GraphQL (apps/graphql_api), served at GRAPHQL_PATH when GRAPHQL_ENABLED (off
+# by default, on in development settings). Documents deeper or
+# costlier than the limits below are rejected before execution
+# (apps/graphql_api/complexity.py); lists without a `limit` argument are
+# costed at GRAPHQL_DEFAULT_LIST_SIZE items. With
+# GRAPHQL_PERSISTED_QUERIES_ONLY only documents registered with the
+# graphql_persist command run; otherwise documents clients send with their
+# hash are kept for GRAPHQL_PERSISTED_QUERY_TTL once they validate.
+GRAPHQL_ENABLED = os.getenv('GRAPHQL_ENABLED', 'False').lower() == 'true'
+GRAPHQL_PATH = os.getenv('GRAPHQL_PATH', '/graphql/')
+GRAPHENE = {'SCHEMA': 'apps.graphql_api.schema.schema'}
+GRAPHQL_MAX_DEPTH = int(os.getenv('GRAPHQL_MAX_DEPTH', 7))
+GRAPHQL_MAX_COST = int(os.getenv('GRAPHQL_MAX_COST', 5000))
+GRAPHQL_MAX_PAGE_SIZE = 100
+GRAPHQL_DEFAULT_LIST_SIZE = 20
+GRAPHQL_PERSISTED_QUERIES_ONLY = os.getenv('GRAPHQL_PERSISTED_QUERIES_ONLY', 'False').lower() == 'true'
+GRAPHQL_PERSISTED_QUERY_TTL = int(os.getenv('GRAPHQL_PERSISTED_QUERY_TTL', 60 * 60 * 24 * 7))
+GRAPHQL_DOCUMENT_CACHE_SIZE = 500  # parsed documents kept per process
+
+# Job impression/view counters (apps/jobs/counters.py): buffered in Redis and
+# flushed to jobs_jobcounter by the jobs-counters-flush task.
+JOB_COUNTERS_FLUSH_CHUNK_SIZE = 1000
+
+# Monthly partitions of jobs_job and jobs_application (apps/jobs/partitions.py).
+# The jobs-partition-maintenance task keeps this many months created ahead and
+# archives partitions older than the retention period (0 keeps everything).
+JOBS_PARTITION_PREMAKE_MONTHS = 3
+JOBS_PARTITION_RETENTION_MONTHS = int(os.getenv('JOBS_PARTITION_RETENTION_MONTHS', 24))
+
+# Near-duplicate job postings (apps/jobs/dedup.py): MinHash signatures of
+# JOBS_DEDUP_PERMUTATIONS values over word JOBS_DEDUP_SHINGLE_SIZE-grams, cut
+# into JOBS_DEDUP_BANDS LSH bands. Changing these three needs
+# `dedupe_jobs --refingerprint`. Postings whose estimated similarity reaches
+# JOBS_DEDUP_THRESHOLD are duplicates.
+JOBS_DEDUP_PERMUTATIONS = 128
+JOBS_DEDUP_BANDS = 16
+JOBS_DEDUP_SHINGLE_SIZE = 3
+JOBS_DEDUP_THRESHOLD = float(os.getenv('JOBS_DEDUP_THRESHOLD', 0.8))
+JOBS_DEDUP_MAX_CANDIDATES = 50  # bucket matches verified per posting saved
+JOBS_DEDUP_MAX_BUCKET_SIZE = 100  # larger buckets (boilerplate) are skipped by dedupe_jobs
+JOBS_DEDUP_CHUNK_SIZE = 2000
+
+# Job feeds from partner ATSs (apps/jobs/feeds.py): uploads are parsed as a
+# stream FEED_READ_SIZE bytes at a time and written FEED_CHUNK_SIZE postings
+# per transaction. A JSON posting longer than FEED_MAX_POSTING_CHARS fails the
+# run; a run keeps the first FEED_ERROR_SAMPLES invalid postings.
+FEED_CHUNK_SIZE = 1000
+FEED_READ_SIZE = 64 * 1024
+FEED_MAX_POSTING_CHARS = 2 ** 20
+FEED_MAX_UPLOAD_BYTES = int(os.getenv('FEED_MAX_UPLOAD_BYTES', 500 * 2 ** 20))
+FEED_ERROR_SAMPLES = 20
+
+# Exports (apps/core/exports.py): rows are read from a server-side cursor
+# EXPORT_CHUNK_SIZE at a time and written out in pieces of EXPORT_BUFFER_SIZE
+# bytes. Exports of more than EXPORT_SYNC_LIMIT rows run in the background and
+# their files are kept in default storage for EXPORT_RETENTION_HOURS.
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+EXPORT_SYNC_LIMIT = int(os.getenv('EXPORT_SYNC_LIMIT', 100000))
+EXPORT_RETENTION_HOURS = int(os.getenv('EXPORT_RETENTION_HOURS', 24))
+
+# Dashboard statistics (apps/stats): signals buffer deltas in Redis, the
+# stats-rollup-flush task adds them to the rollup table in chunks of this size.
+STATS_FLUSH_CHUNK_SIZE = 1000
+
 # CORS Configuration
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = list(default_headers) + [
@@ -175,6 +450,13 @@ RATELIMIT_RATE = '5/m'
 PASSWORD_RESET_TOKEN_EXPIRY = 1  # 1 day
 PASSWORD_RESET_EMAIL_SUBJECT = 'Password Reset Request'
 PASSWORD_RESET_EMAIL_TEMPLATE = 'password_reset_email.html'
+PASSWORD_RESET_URL = os.getenv('PASSWORD_RESET_URL', 'http://localhost:3000/reset-password?token=')
+
+# Email delivery. With EMAIL_BACKEND = 'apps.core.mail.CeleryEmailBackend' requests
+# only enqueue mail; workers send it in batches through EMAIL_DELIVERY_BACKEND.
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'no-reply@jobboard.local')
+EMAIL_DELIVERY_BACKEND = os.getenv('EMAIL_DELIVERY_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 100))
 
 # File Upload Settings
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB max file size
@@ -0,0 +1,23 @@
+from .development import *
+import os
+
+# Settings for load tests and the pytest-benchmark suite (benchmarks/).
+# Close to production behaviour, but without throttling so the load
+# generator measures the endpoints rather than the rate limits.
+DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1,testserver").split(",")
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_THROTTLE_CLASSES": [],
+    "DEFAULT_THROTTLE_RATES": {
+        **REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+        "autocomplete": "1000000/second",
+        "exports": "1000000/second",
+        "login": "1000000/second",
+        "user": "1000000/second",
+    },
+}
+
+# Reports X-Query-Count / X-Query-Time-Ms on every response
+MIDDLEWARE = ["apps.core.middleware.QueryCountMiddleware"] + MIDDLEWARE
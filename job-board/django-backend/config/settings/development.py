@@ -14,14 +14,24 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD", "dev_password"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Persistent connections for daphne, whose database calls all run on one thread
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
+# MailHog SMTP sink from docker-compose; set EMAIL_BACKEND=apps.core.mail.CeleryEmailBackend to use it
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 1025))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False").lower() == "true"
 
 # Redis / Celery
 CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 
+# GraphQL endpoint, off by default in base.py
+GRAPHQL_ENABLED = os.getenv("GRAPHQL_ENABLED", "True").lower() == "true"
+
 # Optional dev CORS/security
 CORS_ALLOW_ALL_ORIGINS = True
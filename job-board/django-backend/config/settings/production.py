@@ -13,10 +13,15 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Persistent connections for daphne, whose database calls all run on one thread
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
-EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "apps.core.mail.CeleryEmailBackend")
+EMAIL_DELIVERY_BACKEND = os.getenv("EMAIL_DELIVERY_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", 10))
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.example.com")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() == "true"
@@ -27,6 +32,23 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 
+# Media on S3 / MinIO. The backend is referenced by dotted path, so boto3 is
+# only imported when a file is first stored or read, not at worker boot.
+if os.getenv("USE_S3", "False").lower() == "true":
+    _s3_scheme = "https" if os.getenv("MINIO_USE_SSL", "True").lower() == "true" else "http"
+    STORAGES = {
+        "default": {
+            "BACKEND": "storages.backends.s3.S3Storage",
+            "OPTIONS": {
+                "bucket_name": os.getenv("MINIO_BUCKET_NAME"),
+                "access_key": os.getenv("MINIO_ROOT_USER"),
+                "secret_key": os.getenv("MINIO_ROOT_PASSWORD"),
+                "endpoint_url": f"{_s3_scheme}://{os.getenv('MINIO_HOST', 's3.amazonaws.com')}:{os.getenv('MINIO_PORT', '443')}",
+            },
+        },
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+
 # CORS
 CORS_ALLOW_ALL_ORIGINS = os.getenv("CORS_ALLOW_ALL_ORIGINS", "False").lower() == "true"
 if not CORS_ALLOW_ALL_ORIGINS:
@@ -1,9 +1,20 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from apps.core.views.exports import ExportDownloadView, ExportStatusView
 from apps.core.views.health import HealthCheckView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('health/', HealthCheckView.as_view(), name='health-check'),
     path('api/accounts/', include('apps.accounts.urls')),
+    path('api/jobs/', include('apps.jobs.urls')),
+    path('api/profiling/', include('apps.core.urls')),
+    path('api/stats/', include('apps.stats.urls')),
+    path('api/search/', include('apps.search.urls')),
+    path('api/exports/<uuid:job_id>/', ExportStatusView.as_view(), name='export-status'),
+    path('api/exports/<uuid:job_id>/download/', ExportDownloadView.as_view(), name='export-download'),
 ]
+
+if settings.GRAPHQL_ENABLED:
+    urlpatterns.append(path(settings.GRAPHQL_PATH.lstrip('/'), include('apps.graphql_api.urls')))